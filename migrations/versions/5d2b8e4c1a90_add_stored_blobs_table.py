@@ -0,0 +1,54 @@
+"""Add stored_blobs table for content-addressed attachments
+
+Revision ID: 5d2b8e4c1a90
+Revises: 9c3e5a1f7b24
+Create Date: 2025-11-10 09:41:17.204518
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5d2b8e4c1a90"
+down_revision: Union[str, None] = "9c3e5a1f7b24"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "stored_blobs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column("delete_at", sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.Column(
+            "sha256", sqlmodel.sql.sqltypes.AutoString(length=64), nullable=False
+        ),
+        sa.Column(
+            "file_path", sqlmodel.sql.sqltypes.AutoString(length=500), nullable=False
+        ),
+        sa.Column("size", sa.BigInteger(), nullable=False),
+        sa.Column(
+            "content_type", sqlmodel.sql.sqltypes.AutoString(length=255), nullable=True
+        ),
+        sa.Column("ref_count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_stored_blobs_sha256"), "stored_blobs", ["sha256"], unique=True
+    )
+    op.create_index(
+        op.f("ix_stored_blobs_file_path"), "stored_blobs", ["file_path"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_stored_blobs_file_path"), table_name="stored_blobs")
+    op.drop_index(op.f("ix_stored_blobs_sha256"), table_name="stored_blobs")
+    op.drop_table("stored_blobs")
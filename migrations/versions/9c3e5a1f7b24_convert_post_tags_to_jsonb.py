@@ -0,0 +1,53 @@
+"""Convert posts.tags to JSONB with a GIN index
+
+Revision ID: 9c3e5a1f7b24
+Revises: 41eb1b4fe5b7
+Create Date: 2025-11-03 10:12:41.512093
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9c3e5a1f7b24"
+down_revision: Union[str, None] = "41eb1b4fe5b7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Posts created without tags stored JSON null: the tag facets need arrays
+    op.execute("UPDATE posts SET tags = '[]' WHERE tags IS NULL OR tags::text = 'null'")
+    op.alter_column(
+        "posts",
+        "tags",
+        existing_type=sa.JSON(),
+        type_=postgresql.JSONB(astext_type=sa.Text()),
+        existing_nullable=False,
+        postgresql_using="tags::jsonb",
+    )
+    op.create_index(
+        "ix_posts_tags_gin",
+        "posts",
+        ["tags"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"tags": "jsonb_path_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_posts_tags_gin", table_name="posts", postgresql_using="gin")
+    op.alter_column(
+        "posts",
+        "tags",
+        existing_type=postgresql.JSONB(astext_type=sa.Text()),
+        type_=sa.JSON(),
+        existing_nullable=False,
+        postgresql_using="tags::json",
+    )
@@ -0,0 +1,56 @@
+"""Add notifications table
+
+Revision ID: a3c8e1f5b742
+Revises: e4a9c2f6d813
+Create Date: 2025-11-24 10:41:12.305117
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a3c8e1f5b742"
+down_revision: Union[str, None] = "e4a9c2f6d813"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "notifications",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column("delete_at", sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.Column("user_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column(
+            "notification_type",
+            sqlmodel.sql.sqltypes.AutoString(length=50),
+            nullable=False,
+        ),
+        sa.Column(
+            "title", sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False
+        ),
+        sa.Column("message", sa.Text(), nullable=False),
+        sa.Column("action", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column("read_at", sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_notifications_user_id_created_at",
+        "notifications",
+        ["user_id", "created_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_notifications_user_id_created_at", table_name="notifications")
+    op.drop_table("notifications")
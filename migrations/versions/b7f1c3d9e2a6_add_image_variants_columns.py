@@ -0,0 +1,51 @@
+"""Add image variants columns to posts, post_sections and users
+
+Revision ID: b7f1c3d9e2a6
+Revises: 5d2b8e4c1a90
+Create Date: 2025-11-12 15:08:33.917420
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b7f1c3d9e2a6"
+down_revision: Union[str, None] = "5d2b8e4c1a90"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "posts",
+        sa.Column(
+            "cover_image_variants",
+            postgresql.JSONB(astext_type=sa.Text()),
+            nullable=True,
+        ),
+    )
+    op.add_column(
+        "post_sections",
+        sa.Column(
+            "cover_image_variants",
+            postgresql.JSONB(astext_type=sa.Text()),
+            nullable=True,
+        ),
+    )
+    op.add_column(
+        "users",
+        sa.Column(
+            "picture_variants", postgresql.JSONB(astext_type=sa.Text()), nullable=True
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("users", "picture_variants")
+    op.drop_column("post_sections", "cover_image_variants")
+    op.drop_column("posts", "cover_image_variants")
@@ -0,0 +1,63 @@
+"""Add document processing columns and text search index to attachments
+
+Revision ID: e4a9c2f6d813
+Revises: b7f1c3d9e2a6
+Create Date: 2025-11-17 15:02:44.918362
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e4a9c2f6d813"
+down_revision: Union[str, None] = "b7f1c3d9e2a6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("student_attachments", "job_attachments")
+SEARCH_INDEX = "to_tsvector('simple'::regconfig, coalesce(text_content, ''::text))"
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.add_column(
+            table,
+            sa.Column(
+                "processing_status",
+                sqlmodel.sql.sqltypes.AutoString(length=20),
+                nullable=True,
+            ),
+        )
+        op.add_column(
+            table,
+            sa.Column(
+                "processing_error",
+                sqlmodel.sql.sqltypes.AutoString(length=255),
+                nullable=True,
+            ),
+        )
+        op.add_column(table, sa.Column("page_count", sa.Integer(), nullable=True))
+        op.add_column(table, sa.Column("text_content", sa.Text(), nullable=True))
+        op.create_index(
+            f"ix_{table}_text_search",
+            table,
+            [sa.text(SEARCH_INDEX)],
+            unique=False,
+            postgresql_using="gin",
+        )
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.drop_index(
+            f"ix_{table}_text_search", table_name=table, postgresql_using="gin"
+        )
+        op.drop_column(table, "text_content")
+        op.drop_column(table, "page_count")
+        op.drop_column(table, "processing_error")
+        op.drop_column(table, "processing_status")
@@ -1,3 +1,4 @@
+import logging
 from typing import Annotated
 from fastapi import Depends , HTTPException, status, APIRouter,UploadFile,File,Request,Response
 from src.api.user.models import  User
@@ -6,7 +7,7 @@ from src.api.auth.schemas import ( ChangeEmailInput, ClientACcessTokenInput, For
 
 from src.api.auth.utils import (get_all_keys, get_current_active_user, make_access_token,verify_password,
                                 generate_random_code,create_access_token)
-from src.helper.file_helper import FileHelper
+from src.helper.storage import get_storage
 from src.helper.notifications import (ChangeAccountNotification,ForgottenPasswordNotification, LoginAlertNotification, TwoFactorAuthNotification)
 from src.config import settings
 from src.api.user.service import UserService
@@ -16,6 +17,8 @@ from src.helper.schemas import ErrorMessage,BaseOutFail,BaseOutSuccess
 from datetime import datetime, timezone
 import re
 
+logger = logging.getLogger(__name__)
+
 
 
 router = APIRouter()
@@ -455,11 +458,11 @@ async def update_profile_image(
 ):
     name = f"{current_user.first_name}_{current_user.last_name}_profile"
     try :
-        document , _ , _ = await FileHelper.upload_file(file=image,location="/profile", name = name)
-        FileHelper.delete_file(current_user.picture)
+        document = (await get_storage().save(image, "/profile", name)).file_path
+        await get_storage().remove(current_user.picture)
     
     except Exception as e :
-        print("Error when uploading profile image :" ,e)
+        logger.error("Error when uploading profile image: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=BaseOutFail(
@@ -481,13 +484,13 @@ async def update_profile_image(
 @router.post("/oauth/token")
 async def get_client_access_token(input : ClientACcessTokenInput):
     # TODO: authenticate client_id/client_secret and check allowed scopes/audience
-    access_token = make_access_token(sub=f"svc:{input.client_id}", aud=input.audience, scope=input.scope)
+    access_token = await make_access_token(sub=f"svc:{input.client_id}", aud=input.audience, scope=input.scope)
     return {"access_token": access_token, "token_type": "Bearer", "expires_in": 600}
 
 
 @router.get("/jwks.json")
 async def jwks():
-    all_keys = get_all_keys()
+    all_keys = await get_all_keys()
     jwks = []
     for kid, key in all_keys.items():
         jwks.append({
@@ -1,9 +1,12 @@
+import logging
 from typing import  Literal, Optional
 from pydantic import BaseModel,EmailStr
 import phonenumbers
 from  datetime import date, datetime
 from src.api.user.schemas import UserFullOut, UserOut
 
+logger = logging.getLogger(__name__)
+
 
 
 class Token(BaseModel):
@@ -43,7 +46,7 @@ class PhoneUtil():
     def __init__(self,number:str,country:str = None) -> None:
         try :
             self._value = phonenumbers.parse(number,country)
-            print(self._value)
+            logger.debug("Parsed phone number: %s", self._value)
         except :   
             self._value = None 
             
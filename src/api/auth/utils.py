@@ -1,13 +1,14 @@
+import logging
 import os
-import sys
 from typing import Annotated, List, Optional, Set
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials,HTTPBearer
 from jwt.exceptions import InvalidTokenError
 from passlib.context import CryptContext
 from src.api.user.service import UserService
-from src.helper.file_helper import FileHelper
+from src.helper.storage import get_storage
 from src.helper.schemas import BaseOutFail,ErrorMessage
+from src.helper.tracing import span
 from src.api.user.models import  User
 import random
 import string
@@ -20,6 +21,8 @@ from cryptography.hazmat.primitives import serialization
 from src.config import settings
 from jwcrypto import jwk
 
+logger = logging.getLogger(__name__)
+
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -105,7 +108,8 @@ async def get_current_active_user(
 def check_permissions(required_permissions: List[str]):
     """ Dependency to check if the user has required permissions. """
     async def permission_checker(current: Annotated[User, Depends(get_current_user)]  , user_service:Annotated[UserService, Depends()]):
-        val = await user_service.has_all_permissions(user_id=current.id, permissions=required_permissions)
+        with span("auth", "check_permissions"):
+            val = await user_service.has_all_permissions(user_id=current.id, permissions=required_permissions)
         if not val :
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=BaseOutFail(
                 message=ErrorMessage.ACCESS_DENIED.description,
@@ -134,41 +138,40 @@ def generate_random_code(length=5):
     return ''.join(random.choice(characters) for _ in range(length)).upper()
 
 
-def list_keys_in_s3():
-    """List all keys in S3 for this environment."""
-    prefix = f"private/{settings.ENV}/rsa/"
-    
-    resp = FileHelper.get_aws_list_objects_v2(prefix=prefix)
-    if "Contents" not in resp:
-        return []
-    return [obj["Key"] for obj in resp["Contents"]]
+def signing_keys_prefix() -> str:
+    """Storage prefix of the RSA signing keys of this environment."""
+    return f"{get_storage().root(public=False)}/{settings.ENV}/rsa/"
+
+async def list_signing_keys():
+    """List all signing key files stored for this environment."""
+    return [obj.key for obj in await get_storage().list(signing_keys_prefix())]
 
-def load_key_from_s3(key_name: str):
-    """Load a key JSON from S3 and return JWK object."""
-    obj = FileHelper.get_aws_object(key=key_name)
-    return jwk.JWK.from_json(obj["Body"].read().decode("utf-8"))
+async def load_signing_key(key_name: str):
+    """Load a key JSON from the storage and return JWK object."""
+    data = await get_storage().read(key_name)
+    return jwk.JWK.from_json(data.decode("utf-8"))
 
-def get_all_keys():
+async def get_all_keys():
     """Return a dict of {kid: JWK} for this environment."""
     keys = {}
-    for key_name in list_keys_in_s3():
+    for key_name in await list_signing_keys():
         kid = os.path.splitext(os.path.basename(key_name))[0]
-        keys[kid] = load_key_from_s3(key_name)
+        keys[kid] = await load_signing_key(key_name)
     return keys
 
-def get_active_key():
+async def get_active_key():
     """Load the newest key as active key (last by timestamp)."""
-    keys = list_keys_in_s3()
+    keys = await list_signing_keys()
     if not keys:
-        raise Exception("No keys found in S3!")
+        raise Exception("No signing keys found in the storage!")
     keys.sort(reverse=True)  # newest last
     active_key_name = keys[0]
     kid = os.path.splitext(os.path.basename(active_key_name))[0]
-    return kid, load_key_from_s3(active_key_name)
+    return kid, await load_signing_key(active_key_name)
 
 
-def make_access_token(sub: str, aud: str, scope: str, ttl=600):
-    kid, active_key = get_active_key()
+async def make_access_token(sub: str, aud: str, scope: str, ttl=600):
+    kid, active_key = await get_active_key()
     now = datetime.now(timezone.utc)
     payload = {
         "iss": settings.JWK_ISS, "sub": sub, "aud": aud, "scope": scope,
@@ -194,11 +197,11 @@ async def rotate_key():
     key = jwk.JWK.generate(kty="RSA", size=2048)
 
     key_json = key.export(private_key=True)
-    s3_key = f"{settings.ENV}/rsa/{kid}.json"
-    
-    await FileHelper.upload_private_byte(key_json, location=f"{settings.ENV}/rsa/", name=kid, content_type="json")
+    stored = await get_storage().save_bytes(
+        key_json.encode("utf-8"), location=f"{settings.ENV}/rsa/", name=kid, content_type="application/json", public=False
+    )
 
-    print(f"✅ New key created: {s3_key} with kid={kid}")
+    logger.info("New key created: %s with kid=%s", stored.key, kid)
     
 
 
@@ -228,7 +231,7 @@ def require_oauth_client(required_scopes: Optional[Set[str]] = None, accepted_au
                 raise HTTPException(status_code=401, detail="missing_kid")
             
             
-            key_obj = get_all_keys()[kid]
+            key_obj = (await get_all_keys())[kid]
 
             pub_pem = key_obj.export_to_pem(private_key=False, password=None) 
 
@@ -257,10 +260,10 @@ def require_oauth_client(required_scopes: Optional[Set[str]] = None, accepted_au
 
             return payload  # pass claims to the route
         except HTTPException as e:
-            print(e.with_traceback(sys.exc_info()[2]))
+            logger.info("Client token rejected: %s", e.detail)
             raise
         except Exception as e:
-            print(e.with_traceback(sys.exc_info()[2]))
+            logger.info("Invalid client token: %s", e)
             raise HTTPException(status_code=401, detail="invalid_or_expired_token")
 
     return _dep
\ No newline at end of file
@@ -3,7 +3,8 @@ from sqlmodel import  TIMESTAMP, Field, Relationship
 from src.helper.model import CustomBaseModel
 from typing import List, Optional
 from  datetime import datetime
-from sqlalchemy import  JSON, Column, Text
+from sqlalchemy import  Column, Index, Text
+from sqlalchemy.dialects.postgresql import JSONB
 
 
 class PostCategory(CustomBaseModel,table=True):
@@ -14,16 +15,20 @@ class PostCategory(CustomBaseModel,table=True):
 
 class Post(CustomBaseModel, table=True):
     __tablename__ = "posts"
+    __table_args__ = (
+        Index("ix_posts_tags_gin", "tags", postgresql_using="gin", postgresql_ops={"tags": "jsonb_path_ops"}),
+    )
     
     user_id: str = Field(foreign_key="users.id", nullable=False)
     author_name: str = Field( max_length=255)
     title: str = Field( max_length=255, index=True)
     slug : str = Field( max_length=255, index=True)
     cover_image: str = Field(default="", max_length=255)
+    cover_image_variants: Optional[dict] = Field(default=None, sa_column=Column(JSONB, nullable=True))
     summary: str = Field(default=None, sa_column=Column(Text, nullable=True))
     published_at: Optional[datetime] = Field(default=None, nullable=True, sa_type=TIMESTAMP(timezone=True))
     tags: Optional[List[str]] = Field(
-        sa_column=Column(JSON, nullable=False, default=[])
+        sa_column=Column(JSONB, nullable=False, default=[])
     )
     category_id : int = Field(foreign_key="post_categories.id", nullable=False)
     
@@ -36,6 +41,7 @@ class PostSection(CustomBaseModel,table=True):
     
     title: str = Field( max_length=255)
     cover_image: Optional[str] = Field(default="", max_length=255)
+    cover_image_variants: Optional[dict] = Field(default=None, sa_column=Column(JSONB, nullable=True))
     content : str =  Field(sa_column=Column(Text, nullable=False))
     section_style : str = Field(default = "")
     position : int = Field(default=1)
@@ -1,9 +1,10 @@
 from typing import Annotated
-from fastapi import APIRouter, Depends, Form, HTTPException, Query, status
+from fastapi import APIRouter, Depends, Form, HTTPException, Query, Request, status
 from slugify import slugify
 
 from src.api.auth.utils import check_permissions
 from src.api.user.models import PermissionEnum, User
+from src.helper.cache import CacheTag, cache_response, etag_response
 from src.helper.schemas import BaseOutFail, ErrorMessage
 
 from src.api.blog.service import BlogService
@@ -15,14 +16,17 @@ from src.api.blog.schemas import (
     PostCreateInput,
     PostUpdateInput,
     PostOutSuccess,
+    PostFullOutSuccess,
+    PostRenderCacheStatsOutSuccess,
     PostsPageOutSuccess,
     PostFilter,
     PostSectionCreateInput,
     PostSectionUpdateInput,
     PostSectionOutSuccess,
     PostSectionListOutSuccess,
+    PostTagCountListOutSuccess,
 )
-from src.api.blog.dependencies import get_category, get_post, get_post_by_slug, get_section
+from src.api.blog.dependencies import get_category, get_post, get_section
 
 
 router = APIRouter(tags=["Blog"])
@@ -30,6 +34,7 @@ router = APIRouter(tags=["Blog"])
 
 # Categories
 @router.get("/blog/categories", response_model=PostCategoryListOutSuccess,tags=["Post Category"])
+@cache_response(CacheTag.BLOG_CATEGORIES)
 async def list_categories(
     blog_service: BlogService = Depends(),
 ):
@@ -117,6 +122,7 @@ async def list_posts(
     return {"data": posts, "page": filters.page, "number": len(posts), "total_number": total}
 
 @router.get("/blog/get-published-posts", response_model=PostsPageOutSuccess,tags=["Post"])
+@cache_response(CacheTag.BLOG_POSTS)
 async def list_posts(
     filters: Annotated[PostFilter, Query(...)],
     blog_service: BlogService = Depends(),
@@ -124,6 +130,14 @@ async def list_posts(
     posts, total = await blog_service.list_posts(filters,True)
     return {"data": posts, "page": filters.page, "number": len(posts), "total_number": total}
 
+@router.get("/blog/tags", response_model=PostTagCountListOutSuccess,tags=["Post"])
+@cache_response(CacheTag.BLOG_TAGS)
+async def list_tags(
+    blog_service: BlogService = Depends(),
+):
+    tags = await blog_service.list_tag_counts()
+    return {"message": "Tags fetched successfully", "data": tags}
+
 @router.post("/blog/posts", response_model=PostOutSuccess,tags=["Post"])
 async def create_post(
     input: Annotated[PostCreateInput, Form(...)],
@@ -160,13 +174,14 @@ async def get_post_route(
         )
     return {"message": "Post fetched successfully", "data": post}
 
-@router.get("/blog/posts-by-slug/{post_slug}", response_model=PostOutSuccess,tags=["Post"])
+@router.get("/blog/posts-by-slug/{post_slug}", response_model=PostFullOutSuccess,tags=["Post"])
 async def get_post_route(
     post_slug: str,
+    request: Request,
     blog_service: BlogService = Depends(),
 ):
-    post = await blog_service.get_full_post_by_slug(post_slug)
-    if post is None:
+    rendered = await blog_service.get_rendered_post(post_slug)
+    if rendered is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=BaseOutFail(
@@ -174,7 +189,7 @@ async def get_post_route(
                 error_code=ErrorMessage.POST_NOT_FOUND.value,
             ).model_dump(),
         )
-    return {"message": "Post fetched successfully", "data": post}
+    return etag_response(request, rendered["body"], rendered["etag"])
 
 @router.put("/blog/posts/{post_id}", response_model=PostOutSuccess,tags=["Post"])
 async def update_post_route(
@@ -225,11 +240,28 @@ async def list_sections(
 @router.get("/blog/posts-by-slug/{post_slug}/sections", response_model=PostSectionListOutSuccess,tags=["Post Section"])
 async def list_sections(
     post_slug: str,
-    post=Depends(get_post_by_slug),
+    request: Request,
     blog_service: BlogService = Depends(),
 ):
-    sections = await blog_service.get_section_by_post_slug(post_slug)
-    return {"message": "Sections fetched successfully", "data": sections}
+    rendered = await blog_service.get_rendered_sections(post_slug)
+    if rendered is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=BaseOutFail(
+                message=ErrorMessage.POST_NOT_FOUND.description,
+                error_code=ErrorMessage.POST_NOT_FOUND.value,
+            ).model_dump(),
+        )
+    return etag_response(request, rendered["body"], rendered["etag"])
+
+
+@router.get("/blog/render-cache/stats", response_model=PostRenderCacheStatsOutSuccess,tags=["Post"])
+async def get_render_cache_stats(
+    current_user: Annotated[User, Depends(check_permissions([PermissionEnum.CAN_VIEW_BLOG]))],
+    blog_service: BlogService = Depends(),
+):
+    stats = await blog_service.get_render_cache_stats()
+    return {"message": "Render cache stats fetched successfully", "data": stats}
 
 @router.post("/blog/sections", response_model=PostSectionOutSuccess,tags=["Post Section"])
 async def create_section(
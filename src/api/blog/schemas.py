@@ -1,8 +1,8 @@
 from datetime import datetime
 from typing import List, Optional, Literal
 from fastapi import UploadFile
-from pydantic import BaseModel, Field
-from src.helper.schemas import BaseOutPage, BaseOutSuccess
+from pydantic import AliasChoices, BaseModel, Field
+from src.helper.schemas import BaseOutPage, BaseOutSuccess, ImageSources
 
 
 class PostCategoryCreateInput(BaseModel):
@@ -31,7 +31,7 @@ class PostCreateInput(BaseModel):
     cover_image: UploadFile
     section_style : Optional[str] = ""
     summary: Optional[str] = None
-    tags: Optional[List[str]] = None
+    tags: List[str] = []
     category_id: int
 
 
@@ -51,6 +51,7 @@ class PostOut(BaseModel):
     title: str
     slug: str
     cover_image: str
+    cover_image_sources: ImageSources = Field(default=None, validation_alias=AliasChoices("cover_image_variants", "cover_image_sources"))
     summary: Optional[str]
     published_at: Optional[datetime]
     tags: Optional[List[str]]
@@ -66,6 +67,8 @@ class PostFilter(BaseModel):
     category_id: Optional[int] = None
     is_published: Optional[bool] = None
     tag: Optional[str] = None
+    tags: Optional[List[str]] = None
+    tags_match: Literal["all", "any"] = "all"
     order_by: Literal["created_at", "published_at", "title"] = "created_at"
     asc: Literal["asc", "desc"] = "asc"
 
@@ -90,6 +93,7 @@ class PostSectionOut(BaseModel):
     id: int
     title: str
     cover_image: Optional[str]
+    cover_image_sources: ImageSources = Field(default=None, validation_alias=AliasChoices("cover_image_variants", "cover_image_sources"))
     content: str
     position: int
     post_id: int
@@ -97,10 +101,33 @@ class PostSectionOut(BaseModel):
     updated_at: datetime
 
 
+class PostFullOut(PostOut):
+    sections: List[PostSectionOut] = []
+
+
+class PostTagCountOut(BaseModel):
+    tag: str
+    count: int
+
+
+class PostRenderCacheStatsOut(BaseModel):
+    hits: int
+    misses: int
+    hit_rate: float
+
+
 class PostOutSuccess(BaseOutSuccess):
     data: PostOut
 
 
+class PostFullOutSuccess(BaseOutSuccess):
+    data: PostFullOut
+
+
+class PostRenderCacheStatsOutSuccess(BaseOutSuccess):
+    data: PostRenderCacheStatsOut
+
+
 class PostsPageOutSuccess(BaseOutPage):
     data: List[PostOut]
 
@@ -121,3 +148,7 @@ class PostSectionListOutSuccess(BaseOutSuccess):
     data: List[PostSectionOut]
 
 
+class PostTagCountListOutSuccess(BaseOutSuccess):
+    data: List[PostTagCountOut]
+
+
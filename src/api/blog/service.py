@@ -1,3 +1,5 @@
+import json
+import logging
 from typing import List, Optional, Tuple
 from datetime import datetime, timezone
 from fastapi import Depends
@@ -9,8 +11,27 @@ from sqlmodel import select, or_, update
 from slugify import slugify
 from src.database import get_session_async
 from src.api.blog.models import Post, PostCategory, PostSection
-from src.api.blog.schemas import PostCategoryCreateInput, PostCategoryUpdateInput, PostCreateInput, PostFilter, PostSectionCreateInput, PostSectionUpdateInput, PostUpdateInput
-from src.helper.file_helper import FileHelper
+from src.api.blog.schemas import PostCategoryCreateInput, PostCategoryUpdateInput, PostCreateInput, PostFilter, PostFullOutSuccess, PostSectionCreateInput, PostSectionListOutSuccess, PostSectionUpdateInput, PostUpdateInput
+from src.config import settings
+from src.helper.cache import CacheTag, compute_etag, invalidate_cache_tags
+from src.helper.images import delete_image_variants, process_image_variants
+from src.helper.query import FilteredQuery
+from src.helper.storage import get_storage
+from src.redis_client import delete_from_redis, get_from_redis, get_redis, set_to_redis
+
+logger = logging.getLogger(__name__)
+
+
+RENDER_CACHE_HITS_KEY = "blog:render_cache:hits"
+RENDER_CACHE_MISSES_KEY = "blog:render_cache:misses"
+
+
+def _render_key(slug: str) -> str:
+    return f"blog:render:{slug}"
+
+
+def _render_sections_key(slug: str) -> str:
+    return f"blog:render:{slug}:sections"
 
 
 class BlogService:
@@ -25,6 +46,7 @@ class BlogService:
         self.session.add(category)
         await self.session.commit()
         await self.session.refresh(category)
+        await invalidate_cache_tags(CacheTag.BLOG_CATEGORIES)
         return category
 
     async def update_category(self, category: PostCategory, data : PostCategoryUpdateInput) -> PostCategory:
@@ -38,6 +60,7 @@ class BlogService:
         self.session.add(category)
         await self.session.commit()
         await self.session.refresh(category)
+        await invalidate_cache_tags(CacheTag.BLOG_CATEGORIES)
         return category
 
     async def get_category_by_id(self, category_id: int) -> Optional[PostCategory]:
@@ -65,22 +88,25 @@ class BlogService:
         category.delete_at = datetime.now(timezone.utc)
         self.session.add(category)
         await self.session.commit()
+        await invalidate_cache_tags(CacheTag.BLOG_CATEGORIES)
         return category
 
     # Posts
     async def create_post(self, data : PostCreateInput, user_id: str) -> Post:
         slug = slugify(data.title)
         
-        cover_url, _, _ = await FileHelper.upload_file(
-                data.cover_image, "/posts", slug
-            )
+        cover_url = (await get_storage().save(data.cover_image, "/posts", slug)).file_path
         data = data.model_dump()
         data["cover_image"] = cover_url
+        data["tags"] = data["tags"] or []
         
         post = Post(**data ,user_id=user_id, slug=slug)
         self.session.add(post)
         await self.session.commit()
         await self.session.refresh(post)
+        process_image_variants.delay("post", post.id, post.cover_image)
+        await self.refresh_post_render_cache(post.id)
+        await invalidate_cache_tags(CacheTag.BLOG_POSTS)
         return post
 
     async def update_post(self, post: Post, data :PostUpdateInput) -> Post:
@@ -89,17 +115,20 @@ class BlogService:
         else :
             slug = None
         
-        if data.cover_image is not None:
+        new_cover = data.cover_image is not None
+        if new_cover:
             
-            FileHelper.delete_file(post.cover_image)
-            cover_url, _, _ = await FileHelper.upload_file(
-                data.cover_image, "/posts", slug
-            )
+            await get_storage().remove(post.cover_image)
+            await delete_image_variants(post.cover_image_variants)
+            post.cover_image_variants = None
+            cover_url = (await get_storage().save(data.cover_image, "/posts", slug)).file_path
         else:
             cover_url = post.cover_image
         
+        previous_slug = post.slug
         data = data.model_dump(exclude_none=True)
         data["cover_image"] = cover_url
+        data.setdefault("tags", post.tags or [])
         if slug :
             post.slug = slug
         for key, value in data.items():
@@ -107,6 +136,12 @@ class BlogService:
         self.session.add(post)
         await self.session.commit()
         await self.session.refresh(post)
+        if new_cover:
+            process_image_variants.delay("post", post.id, post.cover_image)
+        if previous_slug != post.slug:
+            await self.drop_post_render_cache(previous_slug)
+        await self.refresh_post_render_cache(post.id)
+        await invalidate_cache_tags(CacheTag.BLOG_POSTS, CacheTag.BLOG_TAGS)
         return post
     
     async def get_post_by_id(self, post_id: int) -> Optional[Post]:
@@ -140,53 +175,71 @@ class BlogService:
         return result.scalars().first()
 
     async def list_posts(self, filters: PostFilter,published:bool=False) -> Tuple[List[Post], int]:
-        statement = select(Post).where(Post.delete_at.is_(None))
-        count_query = select(func.count(Post.id)).where(Post.delete_at.is_(None))
+        query = FilteredQuery(select(Post).where(Post.delete_at.is_(None)))
         
         if published :
-            statement = statement.where(Post.published_at != None)
+            query.where(Post.published_at != None)
 
         if filters.search is not None:
-            like_clause = or_(
+            query.where(or_(
                 Post.title.contains(filters.search),
                 Post.summary.contains(filters.search),
                 Post.author_name.contains(filters.search),
-            )
-            statement = statement.where(like_clause)
-            count_query = count_query.where(like_clause)
+            ))
 
         if filters.category_id is not None:
-            statement = statement.where(Post.category_id == filters.category_id)
-            count_query = count_query.where(Post.category_id == filters.category_id)
+            query.where(Post.category_id == filters.category_id)
             
         if filters.is_published != None and filters.is_published :
             
-            statement = statement.where(Post.published_at != None)
-            count_query = count_query.where(Post.published_at != None)
+            query.where(Post.published_at != None)
 
 
+        # JSONB containment (@>) is served by the GIN index on posts.tags
         if filters.tag is not None:
-            # JSON contains check can vary by DB; for portability, do a simple text contains on tags json string cast
-            statement = statement.where(func.cast(Post.tags, func.TEXT).contains(filters.tag))
-            count_query = count_query.where(func.cast(Post.tags, func.TEXT).contains(filters.tag))
+            query.where(Post.tags.contains([filters.tag]))
+
+        if filters.tags:
+            if filters.tags_match == "any":
+                query.where(or_(*[Post.tags.contains([tag]) for tag in filters.tags]))
+            else:
+                query.where(Post.tags.contains(filters.tags))
 
         if filters.order_by == "created_at":
-            statement = statement.order_by(Post.created_at if filters.asc == "asc" else Post.created_at.desc())
+            query.order_by(Post.created_at if filters.asc == "asc" else Post.created_at.desc())
         elif filters.order_by == "published_at":
-            statement = statement.order_by(Post.published_at if filters.asc == "asc" else Post.published_at.desc())
+            query.order_by(Post.published_at if filters.asc == "asc" else Post.published_at.desc())
         elif filters.order_by == "title":
-            statement = statement.order_by(Post.title if filters.asc == "asc" else Post.title.desc())
-
-        total_count = (await self.session.execute(count_query)).scalar_one()
-
-        statement = statement.offset((filters.page - 1) * filters.page_size).limit(filters.page_size)
+            query.order_by(Post.title if filters.asc == "asc" else Post.title.desc())
+
+        return await query.paginate(self.session, filters.page, filters.page_size)
+
+    async def list_tag_counts(self) -> List[dict]:
+        """Count the published posts of every tag, most used first."""
+        tags = (
+            select(func.jsonb_array_elements_text(Post.tags).label("tag"))
+            .where(
+                Post.delete_at.is_(None),
+                Post.published_at != None,
+                # a scalar (JSON null) makes jsonb_array_elements_text raise
+                func.jsonb_typeof(Post.tags) == "array",
+            )
+            .subquery()
+        )
+        statement = (
+            select(tags.c.tag, func.count().label("count"))
+            .group_by(tags.c.tag)
+            .order_by(func.count().desc(), tags.c.tag)
+        )
         result = await self.session.execute(statement)
-        return result.scalars().all(), total_count
+        return [{"tag": tag, "count": count} for tag, count in result.all()]
 
     async def delete_post(self, post: Post) -> Post:
         post.delete_at = datetime.now(timezone.utc)
         self.session.add(post)
         await self.session.commit()
+        await self.drop_post_render_cache(post.slug)
+        await invalidate_cache_tags(CacheTag.BLOG_POSTS, CacheTag.BLOG_TAGS)
         return post
 
     async def publish_post(self, post: Post) -> Post:
@@ -194,15 +247,111 @@ class BlogService:
         self.session.add(post)
         await self.session.commit()
         await self.session.refresh(post)
+        await self.refresh_post_render_cache(post.id)
+        await invalidate_cache_tags(CacheTag.BLOG_POSTS, CacheTag.BLOG_TAGS)
         return post
 
+    # Render cache
+    def _build_post_render(self, post: Post) -> Tuple[str, str]:
+        sections = sorted(
+            (section for section in post.sections if section.delete_at is None),
+            key=lambda section: section.position,
+        )
+        post_body = PostFullOutSuccess(
+            message="Post fetched successfully",
+            data={**post.model_dump(), "sections": [section.model_dump() for section in sections]},
+        ).model_dump_json()
+        sections_body = PostSectionListOutSuccess(
+            message="Sections fetched successfully",
+            data=[section.model_dump() for section in sections],
+        ).model_dump_json()
+        return post_body, sections_body
+
+    async def _store_post_render(self, slug: str, post_body: str, sections_body: str) -> None:
+        ttl = settings.BLOG_RENDER_CACHE_TTL
+        try:
+            await set_to_redis(_render_key(slug), json.dumps({"etag": compute_etag(post_body), "body": post_body}), ex=ttl)
+            await set_to_redis(
+                _render_sections_key(slug),
+                json.dumps({"etag": compute_etag(sections_body), "body": sections_body}),
+                ex=ttl,
+            )
+        except Exception as e:
+            logger.warning("Redis cache set error: %s", e)
+
+    async def refresh_post_render_cache(self, post_id: int) -> None:
+        """
+        Rebuild the pre-rendered JSON of a post and of its sections.
+
+        Called after every write touching the post so the read endpoints
+        can serve the stored body without any ORM work.
+        """
+        statement = (
+            select(Post)
+            .options(selectinload(Post.sections))
+            .where(Post.id == post_id, Post.delete_at.is_(None))
+            .execution_options(populate_existing=True)
+        )
+        post = (await self.session.execute(statement)).scalars().first()
+        if post is None:
+            return
+        post_body, sections_body = self._build_post_render(post)
+        await self._store_post_render(post.slug, post_body, sections_body)
+
+    async def drop_post_render_cache(self, slug: str) -> None:
+        try:
+            await delete_from_redis(_render_key(slug), _render_sections_key(slug))
+        except Exception as e:
+            logger.warning("Redis cache invalidation error: %s", e)
+
+    async def _get_post_render(self, slug: str, sections: bool) -> Optional[dict]:
+        key = _render_sections_key(slug) if sections else _render_key(slug)
+        try:
+            cached = await get_from_redis(key)
+            await get_redis().incr(
+                f"{settings.REDIS_NAMESPACE}:{RENDER_CACHE_HITS_KEY if cached else RENDER_CACHE_MISSES_KEY}"
+            )
+        except Exception as e:
+            logger.warning("Redis cache error: %s", e)
+            cached = None
+        if cached:
+            return json.loads(cached)
+
+        post = await self.get_full_post_by_slug(slug)
+        if post is None:
+            return None
+        post_body, sections_body = self._build_post_render(post)
+        await self._store_post_render(slug, post_body, sections_body)
+        body = sections_body if sections else post_body
+        return {"etag": compute_etag(body), "body": body}
+
+    async def get_rendered_post(self, slug: str) -> Optional[dict]:
+        """
+        Return the pre-rendered `{"etag", "body"}` of a post with its sections,
+        building and storing it on a miss. None when the post does not exist.
+        """
+        return await self._get_post_render(slug, sections=False)
+
+    async def get_rendered_sections(self, slug: str) -> Optional[dict]:
+        """Same as `get_rendered_post` for the section list of a post."""
+        return await self._get_post_render(slug, sections=True)
+
+    async def get_render_cache_stats(self) -> dict:
+        try:
+            redis_client = get_redis()
+            hits = int(await redis_client.get(f"{settings.REDIS_NAMESPACE}:{RENDER_CACHE_HITS_KEY}") or 0)
+            misses = int(await redis_client.get(f"{settings.REDIS_NAMESPACE}:{RENDER_CACHE_MISSES_KEY}") or 0)
+        except Exception as e:
+            logger.warning("Redis cache error: %s", e)
+            hits, misses = 0, 0
+        total = hits + misses
+        return {"hits": hits, "misses": misses, "hit_rate": round(hits / total, 4) if total else 0.0}
+
     # Sections
     async def create_section(self, data : PostSectionCreateInput) -> PostSection:
         
         if data.cover_image is not None:
-            cover_url, _, _ = await FileHelper.upload_file(
-                data.cover_image, "/posts/sections", slugify(data.title)
-            )
+            cover_url = (await get_storage().save(data.cover_image, "/posts/sections", slugify(data.title))).file_path
         else:
             cover_url = None
 
@@ -213,18 +362,24 @@ class BlogService:
         self.session.add(section)
         await self.session.commit()
         await self.session.refresh(section)
+        if section.cover_image:
+            process_image_variants.delay("post_section", section.id, section.cover_image)
+        await self.refresh_post_render_cache(section.post_id)
+        await invalidate_cache_tags(CacheTag.BLOG_POSTS)
         return section
 
     async def update_section(self, section: PostSection, data : PostSectionUpdateInput) -> PostSection:
-        if data.cover_image is not None:
+        new_cover = data.cover_image is not None
+        if new_cover:
             if section.cover_image != None:
-                FileHelper.delete_file(section.cover_image)
-            cover_url, _, _ = await FileHelper.upload_file(
-                data.cover_image, "/posts/sections", slugify(data.title)
-            )
+                await get_storage().remove(section.cover_image)
+            await delete_image_variants(section.cover_image_variants)
+            section.cover_image_variants = None
+            cover_url = (await get_storage().save(data.cover_image, "/posts/sections", slugify(data.title))).file_path
         else:
             cover_url = section.cover_image
             
+        previous_post_id = section.post_id
         data = data.model_dump(exclude_none=True)
         data["cover_image"] = cover_url
         
@@ -233,6 +388,12 @@ class BlogService:
         self.session.add(section)
         await self.session.commit()
         await self.session.refresh(section)
+        if new_cover:
+            process_image_variants.delay("post_section", section.id, section.cover_image)
+        if previous_post_id != section.post_id:
+            await self.refresh_post_render_cache(previous_post_id)
+        await self.refresh_post_render_cache(section.post_id)
+        await invalidate_cache_tags(CacheTag.BLOG_POSTS)
         return section
 
     async def get_section_by_id(self, section_id: int) -> Optional[PostSection]:
@@ -272,6 +433,8 @@ class BlogService:
         
         self.session.delete(section)
         await self.session.commit()
+        await self.refresh_post_render_cache(post_id)
+        await invalidate_cache_tags(CacheTag.BLOG_POSTS)
         return section
 
 
@@ -1,3 +1,4 @@
+import logging
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
@@ -8,12 +9,17 @@ from src.api.auth.utils import get_current_active_user
 from src.api.user.models import User
 from src.api.user.service import UserService
 from src.api.cabinet.service import CabinetApplicationService, ApplicationFeeService
+from src.api.storage.dependencies import get_confirmed_upload
+from src.helper.file_helper import FileHelper
+from src.helper.schemas import DirectUploadConfirmInput, DirectUploadInput, DirectUploadOutSuccess
 from src.api.cabinet.schemas import (
     CabinetApplicationCreate, CabinetApplicationUpdate, CabinetApplicationOut,
     ApplicationFeeCreate, ApplicationFeeUpdate, ApplicationFeeOut,
     CabinetApplicationPaymentResponse, PaymentWebhookData, CabinetApplicationStats
 )
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(tags=["Cabinet Application"])
 
 # Endpoints pour les candidatures de cabinet
@@ -31,7 +37,7 @@ async def create_cabinet_application(
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
-        print(f"Server error: {str(e)}")
+        logger.exception("Server error: %s", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Erreur interne: {str(e)}")
 
 @router.get("/{application_id}", response_model=CabinetApplicationOut)
@@ -299,3 +305,43 @@ async def upload_application_document(
         
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+@router.post("/{application_id}/upload-document/presign", response_model=DirectUploadOutSuccess)
+async def presign_application_document(
+    application_id: str,
+    input: DirectUploadInput,
+    session: AsyncSession = Depends(get_session_async)
+):
+    """Préparer l'envoi d'un document directement vers le stockage, puis appeler /confirm"""
+    service = CabinetApplicationService(session)
+    application = await service.get_application_by_id(application_id)
+    
+    if not application:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Candidature non trouvée")
+    
+    upload = await FileHelper.create_direct_upload(
+        f"/cabinet-applications/{application_id}",
+        input.file_name,
+        input.content_type,
+        input.size,
+        name=input.name,
+        context={"resource": "cabinet_document", "id": application_id, "name": input.name},
+    )
+    return {"message": "Upload préparé avec succès", "data": upload}
+
+@router.post("/{application_id}/upload-document/confirm", response_model=CabinetApplicationOut)
+async def confirm_application_document(
+    application_id: str,
+    input: DirectUploadConfirmInput,
+    session: AsyncSession = Depends(get_session_async)
+):
+    """Vérifier le document envoyé directement vers le stockage et l'enregistrer sur la candidature"""
+    upload = await get_confirmed_upload(input.upload_token, "cabinet_document", application_id)
+    
+    service = CabinetApplicationService(session)
+    application = await service.record_document(application_id, upload["file_path"])
+    
+    if not application:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Candidature non trouvée")
+    
+    return application
@@ -1,3 +1,4 @@
+import logging
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_, or_
 from sqlalchemy.orm import selectinload
@@ -12,6 +13,7 @@ from src.api.user.models import User, UserStatusEnum, UserTypeEnum
 from src.api.user.schemas import CreateUserInput
 from src.api.user.service import UserService
 from src.api.payments.service import PaymentService
+from src.api.storage.service import BlobStoreService
 from src.helper.notifications import NotificationService
 from src.helper.utils import clean_payment_description
 from fastapi import Request
@@ -24,6 +26,8 @@ from .schemas import (
 )
 from src.api.auth.service import AuthService
 
+logger = logging.getLogger(__name__)
+
 class CabinetApplicationService:
     def __init__(self, session: AsyncSession = Depends(get_session_async)):
         self.session = session
@@ -33,7 +37,6 @@ class CabinetApplicationService:
 
     async def create_application(self, application_data: CabinetApplicationCreate, request: Request = None) -> CabinetApplicationOut:
         try:
-            print("Checking for existing application...")
             existing_application = await self.session.execute(
                 select(CabinetApplication).where(
                     CabinetApplication.contact_email == application_data.contact_email
@@ -42,7 +45,6 @@ class CabinetApplicationService:
             if existing_application.scalar_one_or_none():
                 raise ValueError("Une candidature existe déjà pour cet email")
 
-            print("Creating new application...")
             application = CabinetApplication(
                 **application_data.dict(),
                 status=CabinetApplicationStatus.PENDING,
@@ -52,21 +54,16 @@ class CabinetApplicationService:
                 campaign_id=None  # Set to a specific campaign_id if required
             )
             
-            print("Adding application to session...")
             self.session.add(application)
-            print("Committing session...")
             await self.session.commit()
-            print("Refreshing application...")
             await self.session.refresh(application)
             
-            print("Initiating payment...")
             payment_result = await self._submit_cabinet_application(application)
             
-            print("Creating response...")
-            # Debug: log payment result
-            print(f"Payment result: {payment_result}")
-            print(f"Payment link: {payment_result.get('payment_link')}")
-            print(f"Transaction ID: {payment_result.get('transaction_id')}")
+            logger.debug(
+                "Cabinet application %s created, payment %s: %s",
+                application.id, payment_result.get("transaction_id"), payment_result.get("payment_link"),
+            )
             
             # Créer manuellement l'objet de réponse avec payment_url
             application_out = CabinetApplicationOut(
@@ -98,7 +95,7 @@ class CabinetApplicationService:
             
         except Exception as e:
             await self.session.rollback()
-            print(f"Error in create_application: {str(e)}")
+            logger.exception("Error in create_application: %s", e)
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Erreur interne: {str(e)}")
                 
 
@@ -159,7 +156,7 @@ class CabinetApplicationService:
         for field in forbidden_fields:
             if field in update_dict:
                 del update_dict[field]
-                print(f"Champ '{field}' ignoré - seul le paiement peut le modifier")
+                logger.info("Champ '%s' ignoré - seul le paiement peut le modifier", field)
         
         # Mettre à jour uniquement les champs autorisés
         for field, value in update_dict.items():
@@ -172,9 +169,26 @@ class CabinetApplicationService:
         
         return CabinetApplicationOut.model_validate(application.model_dump())
 
+    async def record_document(self, application_id: str, file_path: str) -> Optional[CabinetApplicationOut]:
+        """Enregistrer le document (proposition) uploadé d'une candidature"""
+        application = await self.session.get(CabinetApplication, application_id)
+        if not application:
+            return None
+        
+        # Libérer l'ancien document (supprimé s'il n'est plus référencé)
+        if application.proposal_document_path and application.proposal_document_path != file_path:
+            await BlobStoreService(self.session).release(application.proposal_document_path)
+        
+        application.proposal_document_path = file_path
+        application.updated_at = datetime.utcnow()
+        
+        await self.session.commit()
+        await self.session.refresh(application)
+        
+        return CabinetApplicationOut.model_validate(application.model_dump())
+
     async def _submit_cabinet_application(self, application: CabinetApplication) -> dict:
         try:
-            print("Preparing payment input...")
             from src.api.payments.schemas import PaymentInitInput
             description = clean_payment_description(f"Frais de candidature cabinet LAFAOM - {application.company_name}")
             payment_input = PaymentInitInput(
@@ -193,14 +207,13 @@ class CabinetApplicationService:
                 customer_state="SN",
                 customer_zip_code="00000"
             )
-            print("Initiating payment with PaymentService...")
             payment_result = await self.payment_service.initiate_payment(payment_input)
             if not payment_result.get("success"):
                 raise ValueError(f"Payment initiation failed: {payment_result.get('message')}")
-            print("Payment initiated successfully:", payment_result)
+            logger.debug("Payment initiated: %s", payment_result.get("transaction_id"))
             return payment_result
         except Exception as e:
-            print(f"Payment error: {str(e)}")
+            logger.error("Payment error: %s", e)
             raise ValueError(f"Erreur lors de l'initiation du paiement: {str(e)}")
                 
     async def initiate_payment(self, application_id: str) -> CabinetApplicationPaymentResponse:
@@ -258,12 +271,12 @@ class CabinetApplicationService:
             application = application.scalar_one_or_none()
             
             if not application:
-                print(f"Candidature non trouvée pour la référence: {webhook_data.payment_reference}")
+                logger.warning("Candidature non trouvée pour la référence: %s", webhook_data.payment_reference)
                 return False
             
             # Vérifier que la candidature est en attente de paiement
             if application.payment_status != PaymentStatus.PENDING:
-                print(f"Candidature {application.id} n'est pas en attente de paiement (statut: {application.payment_status})")
+                logger.info("Candidature %s n'est pas en attente de paiement (statut: %s)", application.id, application.payment_status)
                 return False
             
             if webhook_data.status == "success":
@@ -276,18 +289,18 @@ class CabinetApplicationService:
                 await self._create_cabinet_user(application, request)
                 
                 await self.session.commit()
-                print(f"Paiement confirmé pour la candidature {application.id}")
+                logger.info("Paiement confirmé pour la candidature %s", application.id)
                 return True
                 
             elif webhook_data.status == "failed":
                 application.payment_status = PaymentStatus.FAILED
                 # Le statut reste PENDING en cas d'échec
                 await self.session.commit()
-                print(f"Paiement échoué pour la candidature {application.id}")
+                logger.info("Paiement échoué pour la candidature %s", application.id)
                 return True
                 
         except Exception as e:
-            print(f"Erreur lors du traitement du webhook: {e}")
+            logger.exception("Erreur lors du traitement du webhook: %s", e)
             return False
         
         return False
@@ -324,7 +337,7 @@ class CabinetApplicationService:
             await self._send_credentials_email(application, username, temp_password, request)
             
         except Exception as e:
-            print(f"Erreur lors de la création du compte utilisateur: {e}")
+            logger.error("Erreur lors de la création du compte utilisateur: %s", e)
             raise e
 
     def _generate_temp_password(self, length: int = 12) -> str:
@@ -355,7 +368,7 @@ class CabinetApplicationService:
             application.credentials_sent = True
             
         except Exception as e:
-            print(f"Erreur lors de l'envoi de l'email: {e}")
+            logger.error("Erreur lors de l'envoi de l'email: %s", e)
             raise e
 
     async def get_applications_stats(self) -> CabinetApplicationStats:
@@ -495,7 +508,7 @@ class CabinetApplicationService:
             application.credentials_sent = True
             
         except Exception as e:
-            print(f"Erreur lors de la création du compte utilisateur: {e}")
+            logger.error("Erreur lors de la création du compte utilisateur: %s", e)
             # Continuer même si la création du compte échoue
         
         await self.session.commit()
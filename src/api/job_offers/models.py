@@ -5,7 +5,8 @@ from src.helper.model import CustomBaseUUIDModel,CustomBaseModel
 from typing import List, Optional
 from enum import Enum
 from  datetime import datetime
-from sqlalchemy import Column, Numeric, JSON, TIMESTAMP
+from sqlalchemy import Column, Numeric, JSON, TIMESTAMP, Index, Text, text
+from src.api.storage.models import DOCUMENT_SEARCH_INDEX
 
 
 
@@ -87,11 +88,19 @@ class JobApplication(CustomBaseModel, table=True):
 
 class JobAttachment(CustomBaseModel, table=True):
     __tablename__ = "job_attachments"
+    __table_args__ = (
+        Index("ix_job_attachments_text_search", text(DOCUMENT_SEARCH_INDEX), postgresql_using="gin"),
+    )
 
     application_id: Optional[int] = Field(foreign_key="job_applications.id", nullable=True)
     document_type: str = Field( max_length=100)
     file_path: str = Field(max_length=255)
     name: str = Field(max_length=255, description="Nom du fichier")
+    # Renseignés par la tâche process_attachment_document
+    processing_status: Optional[str] = Field(default=None, max_length=20)
+    processing_error: Optional[str] = Field(default=None, max_length=255)
+    page_count: Optional[int] = Field(default=None)
+    text_content: Optional[str] = Field(default=None, sa_column=Column(Text, nullable=True))
 
 
 class JobApplicationCode(CustomBaseModel, table=True):
@@ -1,14 +1,21 @@
 from datetime import date, datetime, timezone
-import sys
+import logging
+import os
 from typing import Annotated
-from fastapi import APIRouter, Depends, Form, File, HTTPException, Query, status
+from fastapi import APIRouter, Depends, Form, File, HTTPException, Query, Request, status
 from fastapi import UploadFile
+from slugify import slugify
 
 from src.api.auth.utils import check_permissions, get_current_active_user
 from src.api.payments.schemas import PaymentInitInput
 from src.api.payments.service import PaymentService
 from src.api.user.models import PermissionEnum, User
-from src.helper.schemas import BaseOutFail, ErrorMessage
+from src.helper.cache import CacheTag, cache_response
+from src.helper.download import file_response, zip_response
+from src.api.storage.dependencies import get_confirmed_upload
+from src.helper.export import export_response
+from src.helper.file_helper import FileHelper
+from src.helper.schemas import BaseOutFail, DirectUploadConfirmInput, DirectUploadInput, DirectUploadOutSuccess, ErrorMessage
 from src.helper.utils import clean_payment_description
 
 from src.api.job_offers.service import JobOfferService
@@ -25,6 +32,7 @@ from src.api.job_offers.schemas import (
     JobApplicationOTPRequestInput,
     JobApplicationOutSuccess,
     JobApplicationsPageOutSuccess,
+    JobApplicationExportFilter,
     JobApplicationFilter,
     JobAttachmentOutSuccess,
     JobAttachmentListOutSuccess,
@@ -34,12 +42,15 @@ from src.api.job_offers.schemas import (
 from src.api.job_offers.dependencies import get_job_offer, get_job_application, get_job_attachment
 from src.api.job_offers.models import ApplicationStatusEnum
 
+logger = logging.getLogger(__name__)
+
 
 router = APIRouter(tags=["Job Offers"])
 
 
 # Job Offers
 @router.get("/job-offers", response_model=JobOffersPageOutSuccess, tags=["Job Offer"])
+@cache_response(CacheTag.JOB_OFFERS)
 async def list_job_offers(
     filters: Annotated[JobOfferFilter, Query(...)],
     job_offer_service: JobOfferService = Depends(),
@@ -158,6 +169,16 @@ async def list_all_job_applications(
     applications, total = await job_offer_service.list_job_applications(filters)
     return {"data": applications, "page": filters.page, "number": len(applications), "total_number": total}
 
+@router.get("/job-applications/export", tags=["Job Application"])
+async def export_job_applications(
+    current_user: Annotated[User, Depends(check_permissions([PermissionEnum.CAN_VIEW_JOB_APPLICATION]))],
+    filters: Annotated[JobApplicationExportFilter, Query(...)],
+    job_offer_service: JobOfferService = Depends(),
+):
+    """Stream every job application matching the list filters as a CSV or XLSX file"""
+    statement = job_offer_service.export_job_applications_statement(filters)
+    return export_response(statement, "job-applications", filters.format)
+
 @router.get("/job-applications/payment-stats", tags=["Job Application"])
 async def get_job_applications_payment_stats(
     current_user: Annotated[User, Depends(check_permissions([PermissionEnum.CAN_VIEW_JOB_APPLICATION]))],
@@ -177,9 +198,62 @@ async def list_job_attachments(
     attachments = await job_offer_service.list_attachments_by_application(application_id)
     return {"message": "Attachments fetched successfully", "data": attachments}
 
+@router.get("/job-applications/{application_id}/attachments/zip", tags=["Job Application"])
+async def download_job_application_attachments(
+    application_id: int,
+    current_user: Annotated[User, Depends(check_permissions([PermissionEnum.CAN_VIEW_JOB_APPLICATION]))],
+    job_offer_service: JobOfferService = Depends(),
+):
+    """Download every attachment of a job application as a ZIP archive"""
+    application = await job_offer_service.get_job_application_by_id(application_id)
+    if application is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=BaseOutFail(
+                message=ErrorMessage.JOB_APPLICATION_NOT_FOUND.description,
+                error_code=ErrorMessage.JOB_APPLICATION_NOT_FOUND.value,
+            ).model_dump(),
+        )
+    
+    attachments = await job_offer_service.list_attachments_by_application(application_id)
+    entries = [
+        (f"{attachment.document_type}{os.path.splitext(attachment.file_path)[1]}", attachment.file_path)
+        for attachment in attachments
+    ]
+    return zip_response(entries, f"job-application-{application.application_number or application.id}")
+
+@router.get("/job-offers/{job_offer_id}/attachments/zip", tags=["Job Application"])
+async def download_job_offer_attachments(
+    job_offer_id: str,
+    current_user: Annotated[User, Depends(check_permissions([PermissionEnum.CAN_VIEW_JOB_APPLICATION]))],
+    job_offer_service: JobOfferService = Depends(),
+):
+    """Download the attachments of every application to a job offer, one folder per application"""
+    job_offer = await job_offer_service.get_job_offer_by_id(job_offer_id)
+    if job_offer is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=BaseOutFail(
+                message=ErrorMessage.JOB_OFFER_NOT_FOUND.description,
+                error_code=ErrorMessage.JOB_OFFER_NOT_FOUND.value,
+            ).model_dump(),
+        )
+    
+    rows = await job_offer_service.list_attachments_by_job_offer(job_offer_id)
+    entries = [
+        (
+            f"{application.application_number or application.id}_{application.last_name}_{application.first_name}/"
+            f"{attachment.document_type}{os.path.splitext(attachment.file_path)[1]}",
+            attachment.file_path,
+        )
+        for application, attachment in rows
+    ]
+    return zip_response(entries, f"job-offer-{job_offer.reference or job_offer.id}")
+
 @router.get("/job-attachments/{attachment_id}/download", tags=["Job Application"])
 async def download_job_attachment(
     attachment_id: int,
+    request: Request,
     current_user: Annotated[User, Depends(check_permissions([PermissionEnum.CAN_VIEW_JOB_APPLICATION]))],
     job_offer_service: JobOfferService = Depends(),
 ):
@@ -194,8 +268,17 @@ async def download_job_attachment(
             ).model_dump(),
         )
     
-    # Return the file path for download
-    return {"download_url": attachment.file_path}
+    extension = os.path.splitext(attachment.file_path)[1]
+    response = await file_response(request, attachment.file_path, filename=f"{attachment.name}{extension}")
+    if response is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=BaseOutFail(
+                message=ErrorMessage.FILE_NOT_FOUND.description,
+                error_code=ErrorMessage.FILE_NOT_FOUND.value,
+            ).model_dump(),
+        )
+    return response
 
 @router.post("/job-applications/change-status", response_model=JobApplicationOutSuccess, tags=["Job Application"])
 async def change_job_application_status(
@@ -259,12 +342,11 @@ async def create_job_application(
             submitted_attachment_types = [val.type for val in input.attachments]
         
         required_attachments = job_offer.attachment
-        print(f"DEBUG: Required attachments: {required_attachments}")
-        print(f"DEBUG: Submitted attachments: {submitted_attachment_types}")
+        logger.debug("Required attachments: %s, submitted: %s", required_attachments, submitted_attachment_types)
         
         for required_attachment in required_attachments:
             if required_attachment not in submitted_attachment_types:
-                print(f"DEBUG: Missing required attachment: {required_attachment}")
+                logger.debug("Missing required attachment: %s", required_attachment)
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail=BaseOutFail(
@@ -315,7 +397,7 @@ async def create_job_application(
     try:
         payment = await payment_service.initiate_payment(payment_input)
     except Exception as e:
-        print(e.with_traceback(sys.exc_info()[2]))
+        logger.exception("Payment initiation error: %s", e)
         await job_offer_service.delete_job_application(application)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -369,6 +451,30 @@ async def create_attachment(
     attachment = await job_offer_service.create_job_attachment(input_data)
     return {"message": "Attachment created successfully", "data": [attachment]}
 
+@router.post("/job-attachments/presign", response_model=DirectUploadOutSuccess, tags=["Job Attachment"])
+async def presign_attachment(
+    input: DirectUploadInput,
+):
+    """Prepare an upload sent straight to the storage, then call /job-attachments/confirm"""
+    upload = await FileHelper.create_direct_upload(
+        "/job-applications",
+        input.file_name,
+        input.content_type,
+        input.size,
+        name=slugify(input.name),
+        context={"resource": "job_attachment", "id": None, "name": input.name},
+    )
+    return {"message": "Upload prepared successfully", "data": upload}
+
+@router.post("/job-attachments/confirm", response_model=JobAttachmentListOutSuccess, tags=["Job Attachment"])
+async def confirm_attachment(
+    input: DirectUploadConfirmInput,
+    job_offer_service: JobOfferService = Depends(),
+):
+    upload = await get_confirmed_upload(input.upload_token, "job_attachment")
+    attachment = await job_offer_service.record_job_attachment(upload["context"]["name"], upload["file_path"])
+    return {"message": "Attachment created successfully", "data": [attachment]}
+
 # Job Attachments
 @router.get("/job-applications/{application_id}/attachments", response_model=JobAttachmentListOutSuccess, tags=["Job Attachment"])
 async def list_attachments(
@@ -3,7 +3,7 @@ from typing import List, Optional, Literal
 from fastapi import UploadFile
 from pydantic import BaseModel, EmailStr, Field
 from src.api.payments.schemas import InitPaymentOut
-from src.helper.schemas import BaseOutPage, BaseOutSuccess
+from src.helper.schemas import BaseOutPage, BaseOutSuccess, ExportFormat
 from src.api.job_offers.models import ApplicationStatusEnum
 
 
@@ -152,6 +152,8 @@ class JobAttachmentOut(BaseModel):
     document_type: str
     file_path: str
     name: str  # Nom du fichier
+    processing_status: Optional[str] = None
+    page_count: Optional[int] = None
     created_at: datetime
     updated_at: datetime
     
@@ -199,10 +201,15 @@ class JobApplicationFilter(BaseModel):
     payment_id: Optional[bool] = None  # Alias for is_paid for frontend compatibility
     job_offer_id: Optional[str] = None
     payment_method: Optional[str] = None
+    attachment_text: Optional[str] = None  # Recherche dans le texte des pièces jointes PDF
     order_by: Literal["created_at", "application_number", "status"] = "created_at"
     asc: Literal["asc", "desc"] = "asc"
 
 
+class JobApplicationExportFilter(JobApplicationFilter):
+    format: ExportFormat = "csv"
+
+
 class JobOfferOutSuccess(BaseOutSuccess):
     data: JobOfferOut
 
@@ -5,15 +5,18 @@ from sqlalchemy import func, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from sqlmodel import select, or_
-from slugify import slugify
 from src.api.payments.models import Payment, PaymentStatusEnum
+from src.api.storage.models import DocumentStatusEnum, document_search_query, document_search_vector
+from src.api.storage.service import BlobStoreService
 from src.database import get_session_async
 from src.api.job_offers.models import JobOffer, JobApplication, JobAttachment, JobApplicationCode, ApplicationStatusEnum
 from src.api.job_offers.schemas import JobApplicationCreateInput, JobApplicationUpdateByCandidateInput, JobAttachmentInput, JobOfferFilter, JobApplicationFilter, UpdateJobOfferStatusInput
 from src.api.auth.utils import generate_random_code
 from src.config import settings
-from src.helper.file_helper import FileHelper
+from src.helper.cache import CacheTag, invalidate_cache_tags
+from src.helper.documents import process_attachment_document
 from src.helper.notifications import JobApplicationConfirmationNotification, JobApplicationOTPNotification
+from src.helper.query import FilteredQuery
 from src.helper.schemas import BaseOutFail, ErrorMessage
 
 
@@ -27,6 +30,7 @@ class JobOfferService:
         self.session.add(job_offer)
         await self.session.commit()
         await self.session.refresh(job_offer)
+        await invalidate_cache_tags(CacheTag.JOB_OFFERS)
         return job_offer
 
     async def update_job_offer(self, job_offer: JobOffer, data) -> JobOffer:
@@ -35,6 +39,7 @@ class JobOfferService:
         self.session.add(job_offer)
         await self.session.commit()
         await self.session.refresh(job_offer)
+        await invalidate_cache_tags(CacheTag.JOB_OFFERS)
         return job_offer
 
     async def get_job_offer_by_id(self, job_offer_id: str) -> Optional[JobOffer]:
@@ -48,54 +53,44 @@ class JobOfferService:
         return result.scalars().first()
 
     async def list_job_offers(self, filters: JobOfferFilter) -> Tuple[List[JobOffer], int]:
-        statement = select(JobOffer).where(JobOffer.delete_at.is_(None))
-        count_query = select(func.count(JobOffer.id)).where(JobOffer.delete_at.is_(None))
+        query = FilteredQuery(select(JobOffer).where(JobOffer.delete_at.is_(None)))
 
         if filters.search is not None:
-            like_clause = or_(
+            query.where(or_(
                 JobOffer.title.contains(filters.search),
                 JobOffer.main_mission.contains(filters.search),
                 JobOffer.responsibilities.contains(filters.search),
                 JobOffer.competencies.contains(filters.search),
-            )
-            statement = statement.where(like_clause)
-            count_query = count_query.where(like_clause)
+            ))
 
         if filters.location is not None:
-            statement = statement.where(JobOffer.location.contains(filters.location))
-            count_query = count_query.where(JobOffer.location.contains(filters.location))
+            query.where(JobOffer.location.contains(filters.location))
 
         if filters.contract_type is not None:
-            statement = statement.where(JobOffer.contract_type == filters.contract_type)
-            count_query = count_query.where(JobOffer.contract_type == filters.contract_type)
+            query.where(JobOffer.contract_type == filters.contract_type)
 
         if filters.salary_min is not None:
-            statement = statement.where(JobOffer.salary >= filters.salary_min)
-            count_query = count_query.where(JobOffer.salary >= filters.salary_min)
+            query.where(JobOffer.salary >= filters.salary_min)
 
         if filters.salary_max is not None:
-            statement = statement.where(JobOffer.salary <= filters.salary_max)
-            count_query = count_query.where(JobOffer.salary <= filters.salary_max)
+            query.where(JobOffer.salary <= filters.salary_max)
 
         if filters.order_by == "created_at":
-            statement = statement.order_by(JobOffer.created_at if filters.asc == "asc" else JobOffer.created_at.desc())
+            query.order_by(JobOffer.created_at if filters.asc == "asc" else JobOffer.created_at.desc())
         elif filters.order_by == "submission_deadline":
-            statement = statement.order_by(JobOffer.submission_deadline if filters.asc == "asc" else JobOffer.submission_deadline.desc())
+            query.order_by(JobOffer.submission_deadline if filters.asc == "asc" else JobOffer.submission_deadline.desc())
         elif filters.order_by == "title":
-            statement = statement.order_by(JobOffer.title if filters.asc == "asc" else JobOffer.title.desc())
+            query.order_by(JobOffer.title if filters.asc == "asc" else JobOffer.title.desc())
         elif filters.order_by == "salary":
-            statement = statement.order_by(JobOffer.salary if filters.asc == "asc" else JobOffer.salary.desc())
-
-        total_count = (await self.session.execute(count_query)).scalar_one()
+            query.order_by(JobOffer.salary if filters.asc == "asc" else JobOffer.salary.desc())
 
-        statement = statement.offset((filters.page - 1) * filters.page_size).limit(filters.page_size)
-        result = await self.session.execute(statement)
-        return result.scalars().all(), total_count
+        return await query.paginate(self.session, filters.page, filters.page_size)
 
     async def delete_job_offer(self, job_offer: JobOffer) -> JobOffer:
         job_offer.delete_at = datetime.now(timezone.utc)
         self.session.add(job_offer)
         await self.session.commit()
+        await invalidate_cache_tags(CacheTag.JOB_OFFERS)
         return job_offer
 
     # Job Applications
@@ -181,19 +176,19 @@ class JobOfferService:
         result = await self.session.execute(statement)
         return result.scalars().first()
 
-    async def list_job_applications(self, filters: JobApplicationFilter) -> Tuple[List[JobApplication], int]:
-        from sqlalchemy import case, exists, or_, and_
-        statement = (
-            select(JobApplication)
+    @staticmethod
+    def _filter_job_applications(statement, filters: JobApplicationFilter) -> FilteredQuery:
+        """Join, filter and order `statement` the way the application lists do."""
+        from sqlalchemy import case, or_, and_
+        query = FilteredQuery(
+            statement
             .join(JobOffer, JobOffer.id == JobApplication.job_offer_id)
             .where(JobApplication.delete_at.is_(None))
         )
-        count_query = select(func.count(JobApplication.id)).where(JobApplication.delete_at.is_(None))
         
         # Apply payment_method filter if provided
         if filters.payment_method:
-            statement = statement.where(JobApplication.payment_method == filters.payment_method)
-            count_query = count_query.where(JobApplication.payment_method == filters.payment_method)
+            query.where(JobApplication.payment_method == filters.payment_method)
         
         payment_filter = filters.is_paid if filters.is_paid is not None else None
         
@@ -213,8 +208,7 @@ class JobOfferService:
                         JobApplication.status == ApplicationStatusEnum.APPROVED.value
                     )
                 )
-                statement = statement.where(paid_condition)
-                count_query = count_query.where(paid_condition)
+                query.where(paid_condition)
             else:
                 # "Non-payées": Candidatures ONLINE (ou NULL) en attente de confirmation
                 unpaid_condition = and_(
@@ -224,8 +218,7 @@ class JobOfferService:
                     ),
                     JobApplication.status != ApplicationStatusEnum.APPROVED.value
                 )
-                statement = statement.where(unpaid_condition)
-                count_query = count_query.where(unpaid_condition)
+                query.where(unpaid_condition)
 
         if filters.search is not None:
             like_clause = or_(
@@ -236,18 +229,25 @@ class JobOfferService:
                 JobOffer.reference.contains(filters.search),
                 JobApplication.application_number.contains(filters.search),
             )
-            statement = statement.where(like_clause)
-            count_query = count_query.where(like_clause)
+            query.where(like_clause)
 
         if filters.status is not None:
-            statement = statement.where(JobApplication.status == filters.status)
-            count_query = count_query.where(JobApplication.status == filters.status)
+            query.where(JobApplication.status == filters.status)
 
         if filters.job_offer_id is not None:
-            statement = statement.where(JobApplication.job_offer_id == filters.job_offer_id)
-            count_query = count_query.where(JobApplication.job_offer_id == filters.job_offer_id)
-
-        total_count = (await self.session.execute(count_query)).scalar_one()
+            query.where(JobApplication.job_offer_id == filters.job_offer_id)
+
+        # Full-text search in the text extracted from the attachments
+        if filters.attachment_text:
+            query.where(
+                select(JobAttachment.id)
+                .where(
+                    JobAttachment.application_id == JobApplication.id,
+                    JobAttachment.delete_at.is_(None),
+                    document_search_vector(JobAttachment.text_content).op("@@")(document_search_query(filters.attachment_text)),
+                )
+                .exists()
+            )
 
         # Prioritize TRANSFER (payment_method == "TRANSFER" first)
         priority = case(
@@ -256,29 +256,58 @@ class JobOfferService:
         )
 
         if filters.order_by == "created_at":
-            statement = statement.order_by(priority, JobApplication.created_at if filters.asc == "asc" else JobApplication.created_at.desc())
+            query.order_by(priority, JobApplication.created_at if filters.asc == "asc" else JobApplication.created_at.desc())
         elif filters.order_by == "application_number":
-            statement = statement.order_by(priority, JobApplication.application_number if filters.asc == "asc" else JobApplication.application_number.desc())
+            query.order_by(priority, JobApplication.application_number if filters.asc == "asc" else JobApplication.application_number.desc())
         elif filters.order_by == "status":
-            statement = statement.order_by(priority, JobApplication.status if filters.asc == "asc" else JobApplication.status.desc())
+            query.order_by(priority, JobApplication.status if filters.asc == "asc" else JobApplication.status.desc())
 
-        statement = statement.offset((filters.page - 1) * filters.page_size).limit(filters.page_size)
-        result = await self.session.execute(statement)
-        return result.scalars().all(), total_count
+        return query
+
+    async def list_job_applications(self, filters: JobApplicationFilter) -> Tuple[List[JobApplication], int]:
+        query = self._filter_job_applications(select(JobApplication), filters)
+        return await query.paginate(self.session, filters.page, filters.page_size)
+
+    def export_job_applications_statement(self, filters: JobApplicationFilter):
+        """Select the exported columns of the applications matching the list filters."""
+        query = self._filter_job_applications(
+            select(
+                JobApplication.application_number.label("application_number"),
+                JobApplication.created_at.label("created_at"),
+                JobApplication.status.label("status"),
+                JobApplication.payment_method.label("payment_method"),
+                JobApplication.civility.label("civility"),
+                JobApplication.first_name.label("first_name"),
+                JobApplication.last_name.label("last_name"),
+                JobApplication.email.label("email"),
+                JobApplication.phone_number.label("phone_number"),
+                JobApplication.city.label("city"),
+                JobApplication.country_code.label("country_code"),
+                JobOffer.reference.label("job_offer_reference"),
+                JobOffer.title.label("job_offer"),
+                JobApplication.submission_fee.label("submission_fee"),
+                JobApplication.currency.label("currency"),
+            ).select_from(JobApplication),
+            filters,
+        )
+        return query.order_by(JobApplication.id).statement
 
     # Job Attachments
     async def create_job_attachment(self, data: JobAttachmentInput) -> JobAttachment:
-        cover_url, _, _ = await FileHelper.upload_file(
-                data.file, f"/job-applications", slugify(data.name)
-            )
+        file_path = await BlobStoreService(self.session).store_upload(data.file)
+        return await self.record_job_attachment(data.name, file_path)
+
+    async def record_job_attachment(self, name: str, file_path: str) -> JobAttachment:
         attachment = JobAttachment(
-            file_path=cover_url,
-            document_type=data.name,
-            name=data.name
+            file_path=file_path,
+            document_type=name,
+            name=name,
+            processing_status=DocumentStatusEnum.PENDING,
         )
         self.session.add(attachment)
         await self.session.commit()
         await self.session.refresh(attachment)
+        process_attachment_document.delay("job", attachment.id)
         return attachment
 
 
@@ -318,19 +347,33 @@ class JobOfferService:
         result = await self.session.execute(statement)
         return result.scalars().all()
 
+    async def list_attachments_by_job_offer(self, job_offer_id: str) -> List[Tuple[JobApplication, JobAttachment]]:
+        statement = (
+            select(JobApplication, JobAttachment)
+            .join(JobAttachment, JobAttachment.application_id == JobApplication.id)
+            .where(
+                JobApplication.job_offer_id == job_offer_id,
+                JobApplication.delete_at.is_(None),
+                JobAttachment.delete_at.is_(None),
+            )
+            .order_by(JobApplication.id, JobAttachment.created_at)
+        )
+        result = await self.session.execute(statement)
+        return result.all()
+
     async def delete_job_attachment_by_application_and_type(self, application_id: int, document_type: str) -> JobAttachment:
         attachment = await self.get_job_attachment_by_type_and_application_id(document_type, application_id)
         if attachment is None:
             return None
-        FileHelper.delete_file(attachment.file_path)
-        self.session.delete(attachment)
+        await BlobStoreService(self.session).release(attachment.file_path)
+        await self.session.delete(attachment)
         await self.session.commit()
         return attachment
     
     async def delete_job_attachment(self, attachment: JobAttachment) -> JobAttachment:
     
-        FileHelper.delete_file(attachment.file_path)
-        self.session.delete(attachment)
+        await BlobStoreService(self.session).release(attachment.file_path)
+        await self.session.delete(attachment)
         await self.session.commit()
         return attachment
 
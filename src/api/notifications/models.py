@@ -0,0 +1,30 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Column, Index, Text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlmodel import TIMESTAMP, Field
+
+from src.helper.model import CustomBaseModel
+
+
+class Notification(CustomBaseModel, table=True):
+    """
+    An in-app notification of a user, rendered in the user's language when it
+    is created (see `NotificationType` in src/helper/in_app_notif.py).
+    """
+
+    __tablename__ = "notifications"
+    __table_args__ = (
+        # Inbox of a user, newest first
+        Index("ix_notifications_user_id_created_at", "user_id", "created_at"),
+    )
+
+    user_id: str = Field(foreign_key="users.id", nullable=False)
+    notification_type: str = Field(max_length=50, nullable=False)
+    title: str = Field(max_length=255, nullable=False)
+    message: str = Field(sa_column=Column(Text, nullable=False))
+    action: Optional[list] = Field(default=None, sa_column=Column(JSONB, nullable=True))
+    read_at: Optional[datetime] = Field(
+        default=None, nullable=True, sa_type=TIMESTAMP(timezone=True)
+    )
@@ -0,0 +1,105 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from src.api.auth.utils import get_current_active_user
+from src.api.notifications.schemas import (
+    NotificationFilter,
+    NotificationOutSuccess,
+    NotificationsPageOutSuccess,
+    UnreadCountOutSuccess,
+)
+from src.api.notifications.service import NotificationService
+from src.api.user.models import User
+from src.helper.schemas import BaseOutFail, ErrorMessage
+
+router = APIRouter()
+
+
+@router.get(
+    "/my-notifications",
+    response_model=NotificationsPageOutSuccess,
+    tags=["My Notifications"],
+)
+async def list_my_notifications(
+    filters: Annotated[NotificationFilter, Query(...)],
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    notification_service: NotificationService = Depends(),
+):
+    """Notifications of the current user, newest first (cursor pagination)"""
+    try:
+        notifications, next_cursor = await notification_service.list_notifications(
+            current_user.id, filters
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=BaseOutFail(
+                message=ErrorMessage.INVALID_CURSOR.description,
+                error_code=ErrorMessage.INVALID_CURSOR.value,
+            ).model_dump(),
+        )
+    return {
+        "message": "Notifications fetched successfully",
+        "data": notifications,
+        "number": len(notifications),
+        "unread_count": await notification_service.unread_count(current_user.id),
+        "next_cursor": next_cursor,
+    }
+
+
+@router.get(
+    "/my-notifications/unread-count",
+    response_model=UnreadCountOutSuccess,
+    tags=["My Notifications"],
+)
+async def count_my_unread_notifications(
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    notification_service: NotificationService = Depends(),
+):
+    count = await notification_service.unread_count(current_user.id)
+    return {
+        "message": "Unread notifications counted successfully",
+        "data": {"unread_count": count},
+    }
+
+
+@router.post(
+    "/my-notifications/read-all",
+    response_model=UnreadCountOutSuccess,
+    tags=["My Notifications"],
+)
+async def read_all_my_notifications(
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    notification_service: NotificationService = Depends(),
+):
+    await notification_service.mark_all_read(current_user.id)
+    return {
+        "message": "Notifications marked as read successfully",
+        "data": {"unread_count": 0},
+    }
+
+
+@router.post(
+    "/my-notifications/{notification_id}/read",
+    response_model=NotificationOutSuccess,
+    tags=["My Notifications"],
+)
+async def read_my_notification(
+    notification_id: int,
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    notification_service: NotificationService = Depends(),
+):
+    notification = await notification_service.get_notification(
+        current_user.id, notification_id
+    )
+    if notification is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=BaseOutFail(
+                message=ErrorMessage.NOTIFICATION_NOT_FOUND.description,
+                error_code=ErrorMessage.NOTIFICATION_NOT_FOUND.value,
+            ).model_dump(),
+        )
+    notification = await notification_service.mark_read(notification)
+    return {"message": "Notification marked as read successfully", "data": notification}
@@ -0,0 +1,41 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+from src.helper.schemas import BaseOutSuccess
+
+
+class NotificationOut(BaseModel):
+    id: int
+    notification_type: str
+    title: str
+    message: str
+    action: Optional[list] = None
+    read_at: Optional[datetime] = None
+    created_at: datetime
+
+
+class NotificationFilter(BaseModel):
+    page_size: int = Field(20, ge=1, le=100)
+    cursor: Optional[str] = None
+    unread: bool = False
+
+
+class NotificationOutSuccess(BaseOutSuccess):
+    data: NotificationOut
+
+
+class NotificationsPageOutSuccess(BaseOutSuccess):
+    data: List[NotificationOut]
+    number: int
+    unread_count: int
+    next_cursor: Optional[str] = None
+
+
+class UnreadCountOut(BaseModel):
+    unread_count: int
+
+
+class UnreadCountOutSuccess(BaseOutSuccess):
+    data: UnreadCountOut
@@ -0,0 +1,203 @@
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional, Tuple
+
+from fastapi import Depends
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import func, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from src.api.notifications.models import Notification
+from src.api.notifications.schemas import NotificationFilter, NotificationOut
+from src.config import settings
+from src.database import get_session_async
+from src.helper.query import FilteredQuery, encode_cursor
+from src.redis_client import delete_from_redis, get_from_redis, set_to_redis
+
+logger = logging.getLogger(__name__)
+
+# Keys dropped per DEL command when a fan-out invalidates many inboxes
+_INVALIDATE_CHUNK = 1000
+
+
+def unread_count_key(user_id: str) -> str:
+    return f"notifications:unread:{user_id}"
+
+
+def inbox_key(user_id: str) -> str:
+    return f"notifications:inbox:{user_id}"
+
+
+async def invalidate_inboxes(user_ids: Iterable[str]) -> None:
+    """Drop the cached unread counters and first pages of `user_ids`"""
+    keys = [
+        key
+        for user_id in user_ids
+        for key in (unread_count_key(user_id), inbox_key(user_id))
+    ]
+    try:
+        for start in range(0, len(keys), _INVALIDATE_CHUNK):
+            await delete_from_redis(*keys[start : start + _INVALIDATE_CHUNK])
+    except Exception as e:
+        logger.warning("Redis cache delete error: %s", e)
+
+
+class NotificationService:
+    """
+    Inbox of the in-app notifications of a user.
+
+    The unread counter and the newest `NOTIFICATION_INBOX_CACHE_SIZE`
+    notifications are kept in Redis, so opening the inbox does not hit the
+    database. Both are dropped whenever the inbox changes (new notifications,
+    notifications read) and rebuilt on the next read.
+    """
+
+    def __init__(self, session: AsyncSession = Depends(get_session_async)) -> None:
+        self.session = session
+
+    def _query(self, user_id: str, unread: bool = False) -> FilteredQuery:
+        query = FilteredQuery(
+            select(Notification).where(
+                Notification.user_id == user_id, Notification.delete_at.is_(None)
+            )
+        )
+        if unread:
+            query.where(Notification.read_at.is_(None))
+        return query
+
+    async def _page(
+        self, user_id: str, cursor: Optional[str], page_size: int, unread: bool = False
+    ):
+        notifications, _, next_cursor = await self._query(
+            user_id, unread
+        ).paginate_cursor(
+            self.session,
+            cursor,
+            page_size,
+            key_column=Notification.created_at,
+            id_column=Notification.id,
+            descending=True,
+        )
+        return notifications, next_cursor
+
+    async def _cached_inbox(self, user_id: str) -> dict:
+        """Newest notifications of the user, from Redis or rebuilt from the database"""
+        try:
+            cached = await get_from_redis(inbox_key(user_id))
+        except Exception as e:
+            logger.warning("Redis cache error: %s", e)
+            cached = None
+        if cached:
+            return json.loads(cached)
+
+        notifications, next_cursor = await self._page(
+            user_id, None, settings.NOTIFICATION_INBOX_CACHE_SIZE
+        )
+        inbox = {
+            "data": jsonable_encoder(
+                [
+                    NotificationOut.model_validate(n, from_attributes=True)
+                    for n in notifications
+                ]
+            ),
+            "next_cursor": next_cursor,
+        }
+        try:
+            await set_to_redis(
+                inbox_key(user_id),
+                json.dumps(inbox),
+                ex=settings.NOTIFICATION_CACHE_TTL,
+            )
+        except Exception as e:
+            logger.warning("Redis cache set error: %s", e)
+        return inbox
+
+    async def list_notifications(
+        self, user_id: str, filters: NotificationFilter
+    ) -> Tuple[List, Optional[str]]:
+        """
+        One page of the inbox, newest first. First pages of the whole inbox
+        are served from the cached newest notifications.
+
+        Raises:
+            ValueError: If the cursor cannot be decoded.
+        """
+        if (
+            filters.cursor
+            or filters.unread
+            or filters.page_size > settings.NOTIFICATION_INBOX_CACHE_SIZE
+        ):
+            return await self._page(
+                user_id, filters.cursor, filters.page_size, filters.unread
+            )
+
+        inbox = await self._cached_inbox(user_id)
+        items = inbox["data"][: filters.page_size]
+        if len(inbox["data"]) > filters.page_size:
+            last = items[-1]
+            return items, encode_cursor(last["created_at"], last["id"])
+        return items, inbox["next_cursor"]
+
+    async def unread_count(self, user_id: str) -> int:
+        try:
+            cached = await get_from_redis(unread_count_key(user_id))
+        except Exception as e:
+            logger.warning("Redis cache error: %s", e)
+            cached = None
+        if cached is not None:
+            return int(cached)
+
+        statement = (
+            select(func.count())
+            .select_from(Notification)
+            .where(
+                Notification.user_id == user_id,
+                Notification.read_at.is_(None),
+                Notification.delete_at.is_(None),
+            )
+        )
+        count = (await self.session.execute(statement)).scalar_one()
+        try:
+            await set_to_redis(
+                unread_count_key(user_id), count, ex=settings.NOTIFICATION_CACHE_TTL
+            )
+        except Exception as e:
+            logger.warning("Redis cache set error: %s", e)
+        return count
+
+    async def get_notification(
+        self, user_id: str, notification_id: int
+    ) -> Optional[Notification]:
+        statement = select(Notification).where(
+            Notification.id == notification_id,
+            Notification.user_id == user_id,
+            Notification.delete_at.is_(None),
+        )
+        return (await self.session.execute(statement)).scalars().first()
+
+    async def mark_read(self, notification: Notification) -> Notification:
+        if notification.read_at is None:
+            notification.read_at = datetime.now(timezone.utc)
+            notification.updated_at = notification.read_at
+            self.session.add(notification)
+            await self.session.commit()
+            await self.session.refresh(notification)
+            await invalidate_inboxes([notification.user_id])
+        return notification
+
+    async def mark_all_read(self, user_id: str) -> int:
+        now = datetime.now(timezone.utc)
+        result = await self.session.execute(
+            update(Notification)
+            .where(
+                Notification.user_id == user_id,
+                Notification.read_at.is_(None),
+                Notification.delete_at.is_(None),
+            )
+            .values(read_at=now, updated_at=now)
+        )
+        await self.session.commit()
+        await invalidate_inboxes([user_id])
+        return result.rowcount
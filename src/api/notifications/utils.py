@@ -0,0 +1,159 @@
+import asyncio
+from typing import List, Optional
+
+from celery import shared_task
+from sqlalchemy import case, func, insert, literal
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlmodel import Session, select
+
+from src.api.notifications.models import Notification
+from src.api.user.models import User
+from src.config import settings
+from src.helper.in_app_notif import NotificationType
+
+
+def localized(values: dict, type_=None, default_lang: str = "en"):
+    """SQL expression picking the value of the user's language in `values`"""
+    return case(
+        {
+            lang: literal(value, type_)
+            for lang, value in values.items()
+            if lang != default_lang
+        },
+        value=User.lang,
+        else_=literal(values[default_lang], type_),
+    )
+
+
+def _recipients(
+    statement,
+    user_ids: Optional[List[str]],
+    after: Optional[str],
+    until: Optional[str] = None,
+):
+    statement = statement.where(User.delete_at.is_(None))
+    if user_ids is not None:
+        statement = statement.where(User.id.in_(user_ids))
+    if after is not None:
+        statement = statement.where(User.id > after)
+    if until is not None:
+        statement = statement.where(User.id <= until)
+    return statement
+
+
+def batch_end_statement(user_ids: Optional[List[str]], after: Optional[str], size: int):
+    """Id of the last user of the next batch in database order (none for the last)"""
+    return (
+        _recipients(select(User.id), user_ids, after)
+        .order_by(User.id)
+        .offset(size - 1)
+        .limit(1)
+    )
+
+
+def fan_out_statement(
+    kind: NotificationType,
+    data: dict,
+    user_ids: Optional[List[str]],
+    after: Optional[str],
+    until: Optional[str],
+):
+    """
+    INSERT ... SELECT of the notifications of the users with an id in
+    (`after`, `until`], rendered in each user's language by the database.
+    Returns the ids of the users notified.
+    """
+    langs = kind.title.keys()
+    recipients = _recipients(
+        select(
+            User.id,
+            literal(kind.value),
+            localized(kind.title),
+            localized({lang: kind.template[lang].format(**data) for lang in langs}),
+            # The parameters are sent untyped: the CASE would be text otherwise
+            localized({lang: kind.action(lang, data) for lang in langs}, JSONB).cast(
+                JSONB
+            ),
+            func.now(),
+            func.now(),
+        ),
+        user_ids,
+        after,
+        until,
+    )
+
+    columns = [
+        "user_id",
+        "notification_type",
+        "title",
+        "message",
+        "action",
+        "created_at",
+        "updated_at",
+    ]
+    return (
+        insert(Notification)
+        .from_select(columns, recipients)
+        .returning(Notification.user_id)
+    )
+
+
+def _invalidate(user_ids: List[str]) -> None:
+    from src.api.notifications.service import invalidate_inboxes
+    from src.redis_client import close_redis
+
+    async def run():
+        try:
+            await invalidate_inboxes(user_ids)
+        finally:
+            await close_redis()
+
+    asyncio.run(run())
+
+
+@shared_task(ignore_result=True)
+def fan_out_notification(
+    notification_type: str,
+    data: dict,
+    user_ids: Optional[List[str]] = None,
+    push: bool = False,
+) -> int:
+    """
+    Store a `NotificationType` notification in the inbox of `user_ids` (every
+    user when None), and send it as a push notification when `push`.
+
+    Rows are written by the database itself, one INSERT ... SELECT per
+    `NOTIFICATION_FANOUT_BATCH_SIZE` users, so an audience-wide event does
+    not send a row per user over the wire.
+    """
+    from src.database import engine
+    from src.helper.push import fan_out_push
+
+    kind = NotificationType.from_value(notification_type)
+    if kind is None:
+        raise ValueError(f"Unknown notification type: {notification_type}")
+
+    notified, after = 0, None
+    with Session(engine) as session:
+        while True:
+            until = session.execute(
+                batch_end_statement(
+                    user_ids, after, settings.NOTIFICATION_FANOUT_BATCH_SIZE
+                )
+            ).scalar()
+            batch = (
+                session.execute(fan_out_statement(kind, data, user_ids, after, until))
+                .scalars()
+                .all()
+            )
+            session.commit()
+            if batch:
+                _invalidate(batch)
+                notified += len(batch)
+            if until is None:
+                break
+            after = until
+
+    if push:
+        fan_out_push.delay(notification_type, data, user_ids)
+    return notified
@@ -1,3 +1,4 @@
+import logging
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_, or_
 from sqlalchemy.orm import selectinload
@@ -17,6 +18,8 @@ from ..payment.schemas import (
 from ..payment.models import Payment
 from ..user.models import User
 
+logger = logging.getLogger(__name__)
+
 class PaymentService:
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -210,7 +213,7 @@ class PaymentService:
 
         except Exception as e:
             # Log error and return failure
-            print(f"Error processing CinetPay webhook: {str(e)}")
+            logger.exception("Error processing CinetPay webhook: %s", e)
             return {
                 "transaction_id": webhook_data.cpm_trans_id,
                 "status": PaymentStatusEnum.FAILED,
@@ -0,0 +1,179 @@
+import asyncio
+import json
+import logging
+from typing import AsyncIterator, Dict, Optional, Set
+
+from src.api.payments.models import Payment, PaymentStatusEnum
+from src.config import settings
+from src.redis_client import get_redis, publish_to_redis
+
+logger = logging.getLogger(__name__)
+
+# Redis channel of each payment (in REDIS_NAMESPACE):
+# "payments:events:<transaction_id>"
+PAYMENT_EVENTS_CHANNEL = "payments:events"
+
+# Statuses after which a payment no longer changes: the stream ends on them
+FINAL_STATUSES = {
+    PaymentStatusEnum.ACCEPTED.value,
+    PaymentStatusEnum.REFUSED.value,
+    PaymentStatusEnum.CANCELLED.value,
+}
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    # Proxies must not buffer the stream
+    "X-Accel-Buffering": "no",
+}
+
+
+def payment_channel(transaction_id: str) -> str:
+    return f"{PAYMENT_EVENTS_CHANNEL}:{transaction_id}"
+
+
+def status_value(status) -> Optional[str]:
+    """Statuses are stored as the enum value, but are the enum before a commit"""
+    return status.value if isinstance(status, PaymentStatusEnum) else status
+
+
+def payment_event(payment: Payment) -> Dict:
+    return {
+        "transaction_id": payment.transaction_id,
+        "status": status_value(payment.status),
+    }
+
+
+async def publish_payment_status(payment: Payment) -> None:
+    """Notify the open streams of the payment of its new status"""
+    try:
+        await publish_to_redis(
+            payment_channel(payment.transaction_id), json.dumps(payment_event(payment))
+        )
+    except Exception as e:
+        logger.warning("Redis publish error: %s", e)
+
+
+def publish_payment_status_sync(payment: Payment) -> None:
+    """`publish_payment_status` from a Celery task"""
+    from src.redis_client import close_redis
+
+    async def publish():
+        try:
+            await publish_payment_status(payment)
+        finally:
+            await close_redis()
+
+    asyncio.run(publish())
+
+
+class PaymentEventBroker:
+    """
+    Status changes of the payments followed by the open streams of the process.
+
+    A single pattern subscription (one Redis connection) is shared by every
+    stream: its messages are dispatched to the queue of each listener of the
+    payment, so thousands of open streams cost no more Redis connections than one.
+    """
+
+    def __init__(self):
+        self.listeners: Dict[str, Set[asyncio.Queue]] = {}
+        self._reader: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    async def subscribe(self, transaction_id: str) -> asyncio.Queue:
+        """
+        Queue receiving the events published for the payment from now on.
+        None is put in it if the subscription is lost.
+        """
+        queue = asyncio.Queue()
+        self.listeners.setdefault(transaction_id, set()).add(queue)
+        try:
+            await self._start()
+        except Exception:
+            self.unsubscribe(transaction_id, queue)
+            raise
+        return queue
+
+    def unsubscribe(self, transaction_id: str, queue: asyncio.Queue) -> None:
+        queues = self.listeners.get(transaction_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self.listeners[transaction_id]
+
+    async def _start(self) -> None:
+        async with self._lock:
+            if self._reader is not None and not self._reader.done():
+                return
+            pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+            await pubsub.psubscribe(
+                f"{settings.REDIS_NAMESPACE}:{payment_channel('*')}"
+            )
+            self._reader = asyncio.create_task(self._read(pubsub))
+
+    async def _read(self, pubsub) -> None:
+        prefix = len(f"{settings.REDIS_NAMESPACE}:{payment_channel('')}")
+        try:
+            async for message in pubsub.listen():
+                if message["type"] != "pmessage":
+                    continue
+                for queue in self.listeners.get(message["channel"][prefix:], ()):
+                    queue.put_nowait(message["data"])
+        except Exception as e:
+            logger.warning("Payment events subscription lost: %s", e)
+            # End the open streams, browsers reconnect and subscribe again
+            for queues in self.listeners.values():
+                for queue in queues:
+                    queue.put_nowait(None)
+        finally:
+            await pubsub.aclose()
+
+
+_broker: Optional[PaymentEventBroker] = None
+
+
+def get_payment_event_broker() -> PaymentEventBroker:
+    global _broker
+    if _broker is None:
+        _broker = PaymentEventBroker()
+    return _broker
+
+
+def sse_event(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def stream_payment_status(
+    current: Dict,
+    queue: asyncio.Queue,
+    broker: PaymentEventBroker,
+    keepalive: Optional[float] = None,
+    timeout: Optional[float] = None,
+) -> AsyncIterator[str]:
+    """
+    Server-sent events of a payment: its `current` status, then each new status
+    until a final one. A comment is sent every `keepalive` seconds without
+    event, and the stream is closed after `timeout` seconds (the browser reconnects).
+    """
+    keepalive = keepalive or settings.PAYMENT_EVENTS_KEEPALIVE
+    timeout = timeout or settings.PAYMENT_EVENTS_TIMEOUT
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    try:
+        yield sse_event("status", current)
+        if current["status"] in FINAL_STATUSES:
+            return
+        while (remaining := deadline - loop.time()) > 0:
+            try:
+                data = await asyncio.wait_for(queue.get(), min(keepalive, remaining))
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if data is None:
+                return
+            event = json.loads(data)
+            yield sse_event("status", event)
+            if event["status"] in FINAL_STATUSES:
+                return
+    finally:
+        broker.unsubscribe(current["transaction_id"], queue)
@@ -1,17 +1,24 @@
 import hashlib
 import hmac
+import logging
 from typing import Annotated, Optional
 from fastapi import APIRouter, Depends, Form, HTTPException, Header, Query, status
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, StreamingResponse
 from src.api.auth.utils import check_permissions
 from src.api.payments.dependencies import get_payment_by_transaction
+from src.api.payments.events import SSE_HEADERS, get_payment_event_broker, payment_event, stream_payment_status
 from src.api.payments.models import PaymentStatusEnum
 from src.api.payments.service import PaymentService 
-from src.api.payments.schemas import  PaymentFilter, PaymentOutSuccess, PaymentPageOutSuccess, WebhookPayload
+from src.api.payments.schemas import  PaymentExportFilter, PaymentFilter, PaymentOutSuccess, PaymentPageOutSuccess, WebhookPayload
 from src.api.auth.models import User
 from src.api.payments.utils import check_cash_in_status
 from src.api.user.models import PermissionEnum
 from src.config import settings
+from src.helper.export import export_response
+from src.helper.schemas import BaseOutFail, ErrorMessage
+
+logger = logging.getLogger(__name__)
+
 # This is a placeholder for your actual dependency to get the current user
 # You should replace it with your actual implementation.
 async def get_current_active_user() -> User:
@@ -31,8 +38,26 @@ async def get_payment_status(
     payment_service: PaymentService = Depends()
 ):
  
-    payments, total =await payment_service.list_payments(filters)
-    return {"data": payments, "page": filters.page, "number": len(payments), "total_number": total}
+    try:
+        payments, total, next_cursor = await payment_service.list_payments(filters)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=BaseOutFail(
+                message=ErrorMessage.INVALID_CURSOR.description,
+                error_code=ErrorMessage.INVALID_CURSOR.value,
+            ).model_dump(),
+        )
+    return {"data": payments, "page": filters.page, "number": len(payments), "total_number": total, "next_cursor": next_cursor}
+
+@router.get("/payments/export")
+async def export_payments(
+    filters: Annotated[PaymentExportFilter, Query(...)],
+    current_user: Annotated[User, Depends(check_permissions([PermissionEnum.CAN_VIEW_PAYMENT]))],
+    payment_service: PaymentService = Depends()
+):
+    """Stream every payment matching the list filters as a CSV or XLSX file"""
+    return export_response(payment_service.export_payments_statement(filters), "payments", filters.format)
 
 @router.get("/payments/{payment_id}",response_model=PaymentOutSuccess)
 async def get_payment_status(
@@ -47,6 +72,42 @@ async def get_payment_status(
         "data": payment
     }
 
+@router.get("/payments/{transaction_id}/events")
+async def payment_status_events(
+    transaction_id: str,
+    payment_service: PaymentService = Depends()
+):
+    """
+    Server-sent events of the payment status, to follow a checkout without polling.
+
+    The current status is sent first, then every change published by the
+    webhook, the provider callback or a status check, without calling the
+    provider. The stream ends on a final status (accepted, refused, cancelled):
+    the client should then close its EventSource.
+    """
+    broker = get_payment_event_broker()
+    # Subscribed before reading the status, so that no change is missed in between
+    queue = await broker.subscribe(transaction_id)
+    try:
+        payment = await payment_service.get_payment_by_transaction_id(transaction_id)
+    except Exception:
+        broker.unsubscribe(transaction_id, queue)
+        raise
+    if payment is None:
+        broker.unsubscribe(transaction_id, queue)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=BaseOutFail(
+                message=ErrorMessage.PAYMENT_NOT_FOUND.description,
+                error_code=ErrorMessage.PAYMENT_NOT_FOUND.value,
+            ).model_dump(),
+        )
+    return StreamingResponse(
+        stream_payment_status(payment_event(payment), queue, broker),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
 @router.get("/payments-by-transaction/{transaction_id}",response_model=PaymentOutSuccess)
 async def get_payment_status(
     transaction_id : str,
@@ -109,8 +170,7 @@ async def cinetpay_webhook_handler(
     # 2️⃣ Générer le token HMAC selon la documentation CinetPay
     # La clé secrète doit être fournie (chargée depuis .env)
     if not settings.CINETPAY_SECRET_KEY or settings.CINETPAY_SECRET_KEY.strip() == "":
-        print("WARNING: CINETPAY_SECRET_KEY is not configured in .env file. Skipping HMAC verification.")
-        print("WARNING: This is a security risk in production. Please set CINETPAY_SECRET_KEY in your .env file.")
+        logger.warning("CINETPAY_SECRET_KEY is not configured: skipping the HMAC verification of the CinetPay notification")
         # En développement, on peut accepter sans vérification, mais en production c'est risqué
     else:
         generated_token = hmac.new(
@@ -121,21 +181,15 @@ async def cinetpay_webhook_handler(
 
         # 3️⃣ Vérification de l'intégrité
         if not hmac.compare_digest(x_token, generated_token):
-            print(f"HMAC verification failed. Expected: {generated_token}, Received: {x_token}")
+            logger.warning("HMAC verification failed for transaction %s", cpm_trans_id)
             raise HTTPException(status_code=403, detail="Invalid token")
 
     # 4️⃣ Logs détaillés pour diagnostic
-    print(f"=== CINETPAY WEBHOOK NOTIFICATION ===")
-    print(f"Transaction ID: {cpm_trans_id}")
-    print(f"Site ID: {cpm_site_id}")
-    print(f"Amount: {cpm_amount} {cpm_currency}")
-    print(f"Payment Method: {payment_method}")
-    print(f"Phone Number: {cel_phone_num}")
-    print(f"Phone Prefix: {cpm_phone_prefixe}")
-    print(f"Error Message: {cpm_error_message}")
-    print(f"Page Action: {cpm_page_action}")
-    print(f"Payment Config: {cpm_payment_config}")
-    print(f"Signature: {signature}")
+    logger.info(
+        "CinetPay notification for transaction %s: %s %s by %s (%s)",
+        cpm_trans_id, cpm_amount, cpm_currency, payment_method, cpm_error_message,
+        extra={"page_action": cpm_page_action, "payment_config": cpm_payment_config},
+    )
     
     # 5️⃣ Déclencher la vérification transactionnelle
     check_cash_in_status.apply_async(
@@ -203,19 +257,17 @@ async def elyon_callback(
         PaymentStatusEnum.CANCELLED.value,
     ]
     if payment.status not in definitive_statuses:
-        print(f"🔍 [ELYON CALLBACK] Vérification API pour transaction {transaction_id} (URL status={status})")
         payment = await payment_service.check_payment_status(payment)
-        print(f"✅ [ELYON CALLBACK] Statut après vérification API: {payment.status}")
+        logger.info("ElyonPay callback for transaction %s (URL status=%s): %s after the API check", transaction_id, status, payment.status)
 
     # Décision basée UNIQUEMENT sur le statut DB (mis à jour depuis l'API ElyonPay)
     if payment.status == PaymentStatusEnum.ACCEPTED.value:
-        print(f"✅ [ELYON CALLBACK] Redirection SUCCÈS pour {transaction_id}")
         return RedirectResponse(
             url=f"{settings.ELYONPAY_SUCCESS_URL}?transaction_id={transaction_id}",
             status_code=302
         )
     else:
-        print(f"❌ [ELYON CALLBACK] Redirection ERREUR pour {transaction_id} (statut={payment.status})")
+        logger.info("ElyonPay callback for transaction %s: redirected to the error page (status=%s)", transaction_id, payment.status)
         return RedirectResponse(
             url=f"{settings.ELYONPAY_ERROR_URL}?transaction_id={transaction_id}",
             status_code=302
@@ -5,7 +5,7 @@ from typing import Any, Literal, Optional
 from typing import Union, TYPE_CHECKING
 from src.config import settings
 from src.api.job_offers.models import JobApplication
-from src.helper.schemas import BaseOutSuccess,BaseOutPage
+from src.helper.schemas import BaseOutSuccess,BaseOutPage, ExportFormat
 
 # Éviter la dépendance circulaire avec TYPE_CHECKING
 if TYPE_CHECKING:
@@ -109,6 +109,12 @@ class PaymentFilter(BaseModel):
     date_to : Optional[date] = None
     order_by: Literal["created_at", "amount"] = "created_at"
     asc: Literal["asc", "desc"] = "asc"
+    cursor: Optional[str] = None  # keyset pagination, takes precedence over page
+
+
+class PaymentExportFilter(PaymentFilter):
+    format: ExportFormat = "csv"
+
 
 class PaymentOut(BaseModel):
     transaction_id : str 
@@ -1,18 +1,20 @@
 
 import asyncio
 import json
+import logging
 import math
 import re
 from celery import shared_task
 from fastapi import Depends
 import httpx
-from sqlalchemy import func, or_
+from sqlalchemy import or_
 from sqlmodel import select ,Session
 from src.api.job_offers.models import JobApplication
 from src.api.job_offers.service import JobOfferService
 from src.api.training.models import StudentApplication, TrainingFeeInstallmentPayment
 from src.config import settings
 from src.api.payments.models import CinetPayPayment, ElyonPayPayment, Payment, PaymentStatusEnum
+from src.api.payments.events import publish_payment_status, status_value
 from src.api.payments.schemas import CinetPayInit, ElyonPayInit, PaymentFilter, PaymentInitInput
 import uuid
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -21,11 +23,16 @@ from src.api.user.models import User, UserStatusEnum, UserTypeEnum
 from src.api.user.schemas import CreateUserInput
 from src.api.user.service import UserService
 from src.helper.notifications import NotificationService
+from src.helper.query import FilteredQuery
+from src.helper.clients import async_http_client, get_http_client
+from src.helper.tracing import traced
 from src.helper.utils import clean_payment_description, clean_cinetpay_string
 import secrets
 import string
 from src.redis_client import get_from_redis, set_to_redis
 
+logger = logging.getLogger(__name__)
+
 
 class PaymentService:
     
@@ -36,62 +43,81 @@ class PaymentService:
     def round_up_to_nearest_5(x: float) -> int:
         return int(math.ceil(x / 5.0)) * 5
     
-    async def list_payments(self, filters: PaymentFilter):
-        
-        statement = (
-            select(Payment)
+    @staticmethod
+    def _filter_payments(filters: PaymentFilter, statement=None) -> FilteredQuery:
+        """Apply the list filters on `statement` (defaults to `select(Payment)`)."""
+        query = FilteredQuery(
+            (statement if statement is not None else select(Payment))
             .where(Payment.delete_at.is_(None))
         )
-        count_query = select(func.count(Payment.id)).where(Payment.delete_at.is_(None))
-        
-        print(filters)
 
         if filters.search is not None:
-            like_clause = or_(
+            query.where(or_(
                 Payment.transaction_id.contains(filters.search),
                 Payment.payable_type.contains(filters.search),
                 Payment.payment_type.contains(filters.search),
                 Payment.product_currency.contains(filters.search),
-            )
-            statement = statement.where(like_clause)
-            count_query = count_query.where(like_clause)
+            ))
             
         if filters.currency is not None:
-            statement = statement.where(Payment.product_currency == filters.currency)
-            count_query = count_query.where(Payment.product_currency == filters.currency)
+            query.where(Payment.product_currency == filters.currency)
 
         if filters.status is not None:
-            statement = statement.where(Payment.status == filters.status)
-            count_query = count_query.where(Payment.status == filters.status)
+            query.where(Payment.status == filters.status)
 
         if filters.min_amount is not None:
-            statement = statement.where(Payment.product_amount >= filters.min_amount)
-            count_query = count_query.where(Payment.product_amount >= filters.min_amount)
+            query.where(Payment.product_amount >= filters.min_amount)
             
         if filters.max_amount is not None:
-            statement = statement.where(Payment.product_amount <= filters.max_amount)
-            count_query = count_query.where(Payment.product_amount <= filters.max_amount)
+            query.where(Payment.product_amount <= filters.max_amount)
             
         if filters.date_from is not None:
-            statement = statement.where(Payment.created_at >= filters.date_from)
-            count_query = count_query.where(Payment.created_at >= filters.date_from)
+            query.where(Payment.created_at >= filters.date_from)
             
         if filters.date_to is not None:
-            statement = statement.where(Payment.created_at <= filters.date_to)
-            count_query = count_query.where(Payment.created_at <= filters.date_to)
+            query.where(Payment.created_at <= filters.date_to)
 
-        if filters.order_by == "created_at":
-            statement = statement.order_by(Payment.created_at if filters.asc == "asc" else Payment.created_at.desc())
-        elif filters.order_by == "amount":
-            statement = statement.order_by(Payment.product_amount if filters.asc == "asc" else Payment.product_amount.desc())
-        elif filters.order_by == "status":
-            statement = statement.order_by(Payment.status if filters.asc == "asc" else Payment.status.desc())
+        return query
 
-        total_count = (await self.session.execute(count_query)).scalar_one()
+    @staticmethod
+    def _payment_order_column(filters: PaymentFilter):
+        if filters.order_by == "amount":
+            return Payment.product_amount
+        if filters.order_by == "status":
+            return Payment.status
+        return Payment.created_at
 
-        statement = statement.offset((filters.page - 1) * filters.page_size).limit(filters.page_size)
-        result = await self.session.execute(statement)
-        return result.scalars().all(), total_count
+    async def list_payments(self, filters: PaymentFilter):
+        query = self._filter_payments(filters)
+        order_column = self._payment_order_column(filters)
+
+        if filters.cursor is not None:
+            payments, total_count, next_cursor = await query.paginate_cursor(
+                self.session, filters.cursor, filters.page_size,
+                key_column=order_column, id_column=Payment.id, descending=filters.asc == "desc"
+            )
+            return payments, total_count, next_cursor
+
+        query.order_by(order_column if filters.asc == "asc" else order_column.desc())
+        payments, total_count = await query.paginate(self.session, filters.page, filters.page_size)
+        return payments, total_count, None
+
+    def export_payments_statement(self, filters: PaymentFilter):
+        """Select the exported columns of the payments matching the list filters."""
+        query = self._filter_payments(filters, select(
+            Payment.transaction_id.label("transaction_id"),
+            Payment.created_at.label("created_at"),
+            Payment.status.label("status"),
+            Payment.product_amount.label("product_amount"),
+            Payment.product_currency.label("product_currency"),
+            Payment.payment_currency.label("payment_currency"),
+            Payment.payment_type.label("payment_type"),
+            Payment.payable_type.label("payable_type"),
+            Payment.payable_id.label("payable_id"),
+        ))
+        order_column = self._payment_order_column(filters)
+        query.order_by(order_column if filters.asc == "asc" else order_column.desc(), Payment.id)
+        return query.statement
     
     async def get_payment_by_payable(self, payable_id: str, payable_type: str):
         statement = select(Payment).where(Payment.payable_id == payable_id).where(Payment.payable_type == payable_type)
@@ -111,6 +137,7 @@ class PaymentService:
         payment = result.scalars().first()
         return payment
     
+    @traced("provider", "currency_api.rates")
     async def get_currency_rates(self, from_currency: str, to_currencies: list[str] = None):
         
         # Determine unique currencies to request, excluding the source currency
@@ -132,11 +159,11 @@ class PaymentService:
             if cached:
                 return json.loads(cached)
         except Exception as e:
-            print(f"Redis cache error: {e}")
+            logger.warning("Redis cache error: %s", e)
 
         # Si pas d'API key configurée, utiliser des taux par défaut
         if not settings.CURRENCY_API_KEY or settings.CURRENCY_API_KEY == "your_currency_api_key_here":
-            print("No currency API key configured, using default rates")
+            logger.debug("No currency API key configured, using default rates")
             default_rates = {
                 "USDXAF": 600.0,
                 "EURXAF": 675.0,
@@ -150,7 +177,7 @@ class PaymentService:
             return final_rates
         
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
+            async with async_http_client(timeout=10.0) as client:
                 headers = {
                     "apikey": settings.CURRENCY_API_KEY
                 }
@@ -159,26 +186,25 @@ class PaymentService:
                 if symbols_str:
                     params["currencies"] = symbols_str
                 
-                print(f"Currency API Request - URL: {settings.CURRENCY_API_URL}")
-                print(f"Currency API Request - Params: {params}")
+                logger.debug("Currency API request: %s %s", settings.CURRENCY_API_URL, params)
                 
                 response = await client.get(f"{settings.CURRENCY_API_URL}", headers=headers, params=params)
                 
                 if response.status_code != 200:
-                    print(f"Currency API Error: {response.status_code} - {response.text}")
+                    logger.error("Currency API Error: %s - %s", response.status_code, response.text)
                     raise Exception(f"Currency API returned {response.status_code}")
                 
                 data = response.json()
-                print(f"Currency API Response: {data}")
+                logger.debug("Currency API Response: %s", data)
                 
                 if 'quotes' not in data:
-                    print(f"Currency API Error: No 'quotes' in response: {data}")
+                    logger.error("Currency API Error: No 'quotes' in response: %s", data)
                     raise Exception("Invalid currency API response format")
                 
                 rates = data['quotes']
                 # Ensure rates is a dictionary
                 if not isinstance(rates, dict):
-                    print(f"Currency API Error: 'quotes' is not a dictionary: {rates}")
+                    logger.error("Currency API Error: 'quotes' is not a dictionary: %s", rates)
                     rates = {}
                 
                 # Merge with our base rates
@@ -188,12 +214,12 @@ class PaymentService:
                 try:
                     await set_to_redis(cache_key, json.dumps(final_rates), ex=14400)
                 except Exception as e:
-                    print(f"Redis cache set error: {e}")
+                    logger.warning("Redis cache set error: %s", e)
                 
                 return final_rates
                 
         except Exception as e:
-            print(f"Currency API Error: {e}")
+            logger.error("Currency API Error: %s", e)
             # Fallback to default rates for all requested symbols
             default_rates = {
                 "USDXAF": 600.0,
@@ -207,6 +233,7 @@ class PaymentService:
                     final_rates[key] = default_rates.get(key, 1.0)
             return final_rates
 
+    @traced("payment", "initiate_payment")
     async def initiate_payment(self, payment_data: PaymentInitInput,is_swallow: bool = False):
         
         # Forcer la devise de paiement à XAF pour assurer la conversion depuis l'EUR/USD
@@ -223,11 +250,13 @@ class PaymentService:
             # Exemple: Si 1 USD = 655 XAF et 1 USD = 0.9 EUR, alors 1 EUR = 655 / 0.9 = 727 XAF
             product_currency_to_payment_currency_rate = usd_to_payment_currency_rate / usd_to_product_currency_rate
             
-            print(f"Currency Pivot - 1 USD = {usd_to_payment_currency_rate} {payment_currency}")
-            print(f"Currency Pivot - 1 USD = {usd_to_product_currency_rate} {payment_data.product_currency}")
+            logger.debug(
+                "Currency pivot: 1 USD = %s %s = %s %s",
+                usd_to_payment_currency_rate, payment_currency, usd_to_product_currency_rate, payment_data.product_currency,
+            )
             
         except Exception as e:
-            print(f"Currency conversion error (USD pivot): {e}")
+            logger.error("Currency conversion error (USD pivot): %s", e)
             # Utiliser des taux par défaut si la conversion échoué
             if payment_data.product_currency == "EUR":
                 product_currency_to_payment_currency_rate = 655.957
@@ -239,9 +268,11 @@ class PaymentService:
             usd_to_payment_currency_rate = 655.957
             usd_to_product_currency_rate = 1.0
         
-        print(f"Currency Conversion - Original Amount: {payment_data.amount} {payment_data.product_currency}")
-        print(f"Currency Conversion - Rate: {product_currency_to_payment_currency_rate}")
-        print(f"Currency Conversion - Converted Amount: {payment_data.amount * product_currency_to_payment_currency_rate} {payment_currency}")
+        logger.debug(
+            "Currency conversion: %s %s at %s = %s %s",
+            payment_data.amount, payment_data.product_currency, product_currency_to_payment_currency_rate,
+            payment_data.amount * product_currency_to_payment_currency_rate, payment_currency,
+        )
         
 
         # Générer un transaction_id sans caractères spéciaux pour CinetPay
@@ -263,7 +294,7 @@ class PaymentService:
         )
         
         final_amount = PaymentService.round_up_to_nearest_5(payment_data.amount * product_currency_to_payment_currency_rate)
-        print(f"CinetPay Amount - Final Amount: {final_amount} {payment_currency}")
+        logger.debug("CinetPay final amount: %s %s", final_amount, payment_currency)
         
 
         # Générer la description selon le type de payable
@@ -291,7 +322,7 @@ class PaymentService:
         
         # Nettoyer la description pour retirer les caractères spéciaux non autorisés par CinetPay
         cleaned_description = clean_payment_description(base_description)
-        print(f"Description générée: {cleaned_description} (type: {payable_type})")
+        logger.debug("Description générée: %s (type: %s)", cleaned_description, payable_type)
         
         # Forcer le canal CARTE BANCAIRE (CREDIT_CARD) pour CinetPay
         channels = payment_data.channels
@@ -350,7 +381,7 @@ class PaymentService:
             else :
                 result = await cinetpay_client.initiate_cinetpay_payment( cinetpay_data)
         except Exception as e:
-            print(f"Payment initiation error: {e}")
+            logger.error("Payment initiation error: %s", e)
             return {
                 "success": False,
                 "message":f"unable to initiate payment: {str(e)}",
@@ -401,7 +432,9 @@ class PaymentService:
     
 
 
+    @traced("payment", "check_payment_status")
     async def check_payment_status(self, payment : Payment):
+        previous_status = status_value(payment.status)
         if payment.payment_type == "CinetPayPayment":
         
             
@@ -437,12 +470,12 @@ class PaymentService:
                             job_app.payment_id = str(payment.id)
                             job_app.status = JobStatus.APPROVED.value
                             self.session.add(job_app)
-                            print(f"✅ [CinetPay] JobApplication {payment.payable_id} → payment_id={payment.id}, status=APPROVED")
+                            logger.info("[CinetPay] JobApplication %s → payment_id=%s, status=APPROVED", payment.payable_id, payment.id)
                             await self.session.commit()
                             await self.session.refresh(job_app)
                             await self._create_job_application_user_async(job_app)
                         else:
-                            print(f"⚠️ [CinetPay] JobApplication {payment.payable_id} introuvable")
+                            logger.warning("[CinetPay] JobApplication %s introuvable", payment.payable_id)
                             await self.session.commit()
                     
                     elif payment.payable_type == "StudentApplication":
@@ -455,7 +488,7 @@ class PaymentService:
                             from src.api.training.models import ApplicationStatusEnum as StudentStatus
                             student_application.status = StudentStatus.APPROVED.value
                             self.session.add(student_application)
-                            print(f"✅ [CinetPay] StudentApplication {payment.payable_id} → payment_id={payment.id}, status=APPROVED")
+                            logger.info("[CinetPay] StudentApplication %s → payment_id=%s, status=APPROVED", payment.payable_id, payment.id)
                             await self.session.commit()
                             await self.session.refresh(student_application)
                             # Inscrire l'étudiant (Moodle, etc.)
@@ -463,7 +496,7 @@ class PaymentService:
                             training_service = StudentApplicationService(self.session)
                             await training_service.enroll_student_to_session(student_application)
                         else:
-                            print(f"⚠️ [CinetPay] StudentApplication {payment.payable_id} introuvable")
+                            logger.warning("[CinetPay] StudentApplication %s introuvable", payment.payable_id)
                             await self.session.commit()
                     
                     elif payment.payable_type == "CabinetApplication":
@@ -477,7 +510,7 @@ class PaymentService:
                         cabinet_application.payment_date = datetime.utcnow()
                         await self.session.commit()
                         await self.session.refresh(cabinet_application)
-                        print(f"✅ CabinetApplication {payment.payable_id} mis à jour avec payment_id: {payment.id}")
+                        logger.info("CabinetApplication %s mis à jour avec payment_id: %s", payment.payable_id, payment.id)
                     
                 elif transaction_status in ["REFUSED", "CANCELLED"]:
                     payment.status = PaymentStatusEnum.REFUSED.value
@@ -496,7 +529,7 @@ class PaymentService:
                     fee_payment.payment_id = str(payment.id)
                     await self.session.commit()
                     await self.session.refresh(fee_payment)
-                    print(f"✅ TrainingFeeInstallmentPayment {payment.payable_id} mis à jour avec payment_id: {payment.id}")
+                    logger.info("TrainingFeeInstallmentPayment %s mis à jour avec payment_id: %s", payment.payable_id, payment.id)
 
                 await self.session.commit()
                 await self.session.refresh(payment)
@@ -513,7 +546,7 @@ class PaymentService:
                 status_check_id = elyon_payment.provider_transaction_id or payment.transaction_id
                 result = await elyon_service.check_elyonpay_payment_status(status_check_id, elyon_payment.token)
                 
-                print(f"DEBUG: ElyonPay status check result: {result}")
+                logger.debug("ElyonPay status check result: %s", result)
                 if result:
                     # Map ElyonPay status to our PaymentStatusEnum
                     # States: CREATED, PENDING, ACCEPTED, REJECTED, DELIVERED, CANCELLED, DECLINED, WAITING_FOR_PAYMENT
@@ -525,12 +558,12 @@ class PaymentService:
                         raw_state = result.get("transactionStates")[-1].get("state")
                     
                     elyon_status = str(raw_state or result.get("status") or "").upper()
-                    print(f"DEBUG: ElyonPay API returned status: '{elyon_status}' (from state/states/status) for transaction {payment.transaction_id}")
+                    logger.debug("ElyonPay API returned status: '%s' (from state/states/status) for transaction %s", elyon_status, payment.transaction_id)
                     
                     if elyon_status in ["ACCEPTED", "DELIVERED", "SUCCESS", "SUCCESSFUL", "PAID", "COMPLETED"]:
                         payment.status = PaymentStatusEnum.ACCEPTED.value
                         elyon_payment.status = PaymentStatusEnum.ACCEPTED.value
-                        print(f"✅ SUCCESS: Transaction confirmed as {elyon_status}")
+                        logger.info("ElyonPay transaction %s confirmed as %s", payment.transaction_id, elyon_status)
                         
                         # Apply payment effects
                         if payment.payable_type == "JobApplication":
@@ -545,13 +578,13 @@ class PaymentService:
                                 job_app.payment_id = str(payment.id)
                                 job_app.status = JobStatus.APPROVED.value
                                 self.session.add(job_app)
-                                print(f"✅ JobApplication {payment.payable_id} → payment_id={payment.id}, status=APPROVED")
+                                logger.info("JobApplication %s → payment_id=%s, status=APPROVED", payment.payable_id, payment.id)
                                 await self.session.commit()
                                 await self.session.refresh(job_app)
                                 # Créer le compte candidat en arrière-plan
                                 await self._create_job_application_user_async(job_app)
                             else:
-                                print(f"⚠️ JobApplication {payment.payable_id} introuvable")
+                                logger.warning("JobApplication %s introuvable", payment.payable_id)
                                 await self.session.commit()
                         
                         elif payment.payable_type == "StudentApplication":
@@ -564,7 +597,7 @@ class PaymentService:
                                 from src.api.training.models import ApplicationStatusEnum as StudentStatus
                                 student_app.status = StudentStatus.APPROVED.value
                                 self.session.add(student_app)
-                                print(f"✅ [ElyonPay] StudentApplication {payment.payable_id} → payment_id={payment.id}, status=APPROVED")
+                                logger.info("[ElyonPay] StudentApplication %s → payment_id=%s, status=APPROVED", payment.payable_id, payment.id)
                                 await self.session.commit()
                                 await self.session.refresh(student_app)
                                 
@@ -573,7 +606,7 @@ class PaymentService:
                                 training_service = StudentApplicationService(self.session)
                                 await training_service.enroll_student_to_session(student_app)
                             else:
-                                print(f"⚠️ [ElyonPay] StudentApplication {payment.payable_id} introuvable")
+                                logger.warning("[ElyonPay] StudentApplication %s introuvable", payment.payable_id)
                                 await self.session.commit()
                         elif payment.payable_type == "CabinetApplication":
                             from src.api.cabinet.models import CabinetApplication, PaymentStatus
@@ -593,9 +626,9 @@ class PaymentService:
                                 fee_payment.payment_id = str(payment.id)
                                 self.session.add(fee_payment)
                                 await self.session.commit()
-                                print(f"✅ [ElyonPay] TrainingFeeInstallmentPayment {payment.payable_id} mis à jour avec payment_id: {payment.id}")
+                                logger.info("[ElyonPay] TrainingFeeInstallmentPayment %s mis à jour avec payment_id: %s", payment.payable_id, payment.id)
                             else:
-                                print(f"⚠️ [ElyonPay] TrainingFeeInstallmentPayment {payment.payable_id} introuvable")
+                                logger.warning("[ElyonPay] TrainingFeeInstallmentPayment %s introuvable", payment.payable_id)
                                 await self.session.commit()
                     
                     elif elyon_status in ["REJECTED", "DECLINED", "FAILED", "ERROR"]:
@@ -610,12 +643,15 @@ class PaymentService:
                     await self.session.refresh(payment)
                     await self.session.refresh(elyon_payment)
 
+        if status_value(payment.status) != previous_status:
+            await publish_payment_status(payment)
         return payment
     
     @staticmethod
+    @traced("payment", "check_payment_status")
     def check_payment_status_sync(session : Session, payment : Payment):
         if payment.payment_type == "CinetPayPayment":
-            print("CinetPayPayment",payment.transaction_id)
+            logger.debug("Checking CinetPay payment %s", payment.transaction_id)
         
             cinetpay_statement = (
                 select(CinetPayPayment).where(CinetPayPayment.transaction_id == payment.transaction_id)
@@ -623,19 +659,18 @@ class PaymentService:
             cinetpay_payment = session.exec(cinetpay_statement).first()
             
             if cinetpay_payment is None:
-                print("CinetPayPayment not found")
+                logger.warning("CinetPayPayment %s not found", payment.transaction_id)
                 
                 payment.status = PaymentStatusEnum.ERROR
                 session.commit()
             else :
                 result =   CinetPayService.check_cinetpay_payment_status_sync(payment.transaction_id)
-                print("result",result)
+                logger.debug("CinetPay status of %s: %s", payment.transaction_id, result)
                 
                 # Gérer les différents statuts selon la documentation CinetPay
                 transaction_status = result["data"].get("status", "")
                 
                 if transaction_status == "ACCEPTED":
-                    print("ACCEPTED")
                     payment.status = PaymentStatusEnum.ACCEPTED.value
                     cinetpay_payment.status = PaymentStatusEnum.ACCEPTED.value
                     cinetpay_payment.amount_received = float(result["data"].get("amount", 0))
@@ -691,7 +726,7 @@ class PaymentService:
                             cabinet_application.payment_date = datetime.utcnow()
                             session.commit()
                             session.refresh(cabinet_application)
-                            print(f"✅ CabinetApplication {payment.payable_id} mis à jour avec payment_id: {payment.id}")
+                            logger.info("CabinetApplication %s mis à jour avec payment_id: %s", payment.payable_id, payment.id)
                     
                 elif transaction_status in ["REFUSED", "CANCELLED"]:
                     payment.status = PaymentStatusEnum.REFUSED.value
@@ -725,12 +760,12 @@ class PaymentService:
                             raw_state = result.get("transactionStates")[-1].get("state")
                         
                         elyon_status = str(raw_state or result.get("status") or "").upper()
-                        print(f"DEBUG SYNC: ElyonPay API returned status: '{elyon_status}' for {payment.transaction_id}")
+                        logger.debug("ElyonPay API returned status: '%s' for %s", elyon_status, payment.transaction_id)
 
                         if elyon_status in ["ACCEPTED", "DELIVERED", "SUCCESS", "SUCCESSFUL", "PAID", "COMPLETED"]:
                             payment.status = PaymentStatusEnum.ACCEPTED.value
                             elyon_payment.status = PaymentStatusEnum.ACCEPTED.value
-                            print(f"✅ SUCCESS SYNC: confirmed as {elyon_status}")
+                            logger.info("ElyonPay transaction %s confirmed as %s", payment.transaction_id, elyon_status)
                             
                             # Apply payment effects sync
                             if payment.payable_type == "JobApplication":
@@ -807,22 +842,20 @@ class CinetPayService:
         return CinetPayService.ERROR_CODES.get(error_code, "UNKNOWN_ERROR")
 
 
+    @traced("provider", "cinetpay.initiate")
     async def initiate_cinetpay_payment(self, payment_data: CinetPayInit):
         
         # Validation des paramètres CinetPay
-        print(f"=== CINETPAY CONFIGURATION CHECK ===")
-        print(f"API Key: {settings.CINETPAY_API_KEY}")
-        print(f"Site ID: {settings.CINETPAY_SITE_ID}")
-        print(f"Notify URL: {settings.CINETPAY_NOTIFY_URL}")
-        print(f"Return URL: {settings.CINETPAY_RETURN_URL}")
-        print(f"Payment Amount: {payment_data.amount}")
-        print(f"Payment Currency: {payment_data.currency}")
-        print(f"Transaction ID: {payment_data.transaction_id}")
+        logger.debug(
+            "CinetPay payment %s: %s %s (notify URL %s, return URL %s)",
+            payment_data.transaction_id, payment_data.amount, payment_data.currency,
+            settings.CINETPAY_NOTIFY_URL, settings.CINETPAY_RETURN_URL,
+        )
         
         # Vérification des paramètres requis (chargés depuis .env)
         if not settings.CINETPAY_API_KEY or settings.CINETPAY_API_KEY.strip() == "":
             error_msg = "CinetPay API Key is not configured. Please set CINETPAY_API_KEY in your .env file"
-            print(f"ERROR: {error_msg}")
+            logger.error("Invalid CinetPay payment %s: %s", payment_data.transaction_id, error_msg)
             return {
                 "status": "error",
                 "code": "INVALID_API_KEY",
@@ -831,7 +864,7 @@ class CinetPayService:
         
         if not settings.CINETPAY_SITE_ID or settings.CINETPAY_SITE_ID.strip() == "":
             error_msg = "CinetPay Site ID is not configured. Please set CINETPAY_SITE_ID in your .env file"
-            print(f"ERROR: {error_msg}")
+            logger.error("Invalid CinetPay payment %s: %s", payment_data.transaction_id, error_msg)
             return {
                 "status": "error",
                 "code": "INVALID_SITE_ID",
@@ -840,7 +873,7 @@ class CinetPayService:
         
         if payment_data.amount <= 0:
             error_msg = "Payment amount must be greater than 0"
-            print(f"ERROR: {error_msg}")
+            logger.error("Invalid CinetPay payment %s: %s", payment_data.transaction_id, error_msg)
             return {
                 "status": "error",
                 "code": "INVALID_AMOUNT",
@@ -854,7 +887,7 @@ class CinetPayService:
             if payment_data.amount % 5 != 0:
                 # Arrondir au multiple de 5 supérieur
                 payment_data.amount = PaymentService.round_up_to_nearest_5(payment_data.amount)
-                print(f"Amount rounded from {original_amount} to nearest multiple of 5: {payment_data.amount}")
+                logger.debug("Amount rounded from %s to nearest multiple of 5: %s", original_amount, payment_data.amount)
         
         # S'assurer que le montant est un entier (comme dans les tests qui fonctionnent)
         payment_data.amount = int(payment_data.amount)
@@ -881,7 +914,7 @@ class CinetPayService:
         
         if payment_data.amount < min_amount:
             error_msg = f"Montant minimum requis: {min_amount} {payment_data.currency}"
-            print(f"ERROR: {error_msg}")
+            logger.error("Invalid CinetPay payment %s: %s", payment_data.transaction_id, error_msg)
             return {
                 "status": "error",
                 "code": "AMOUNT_TOO_LOW",
@@ -890,7 +923,7 @@ class CinetPayService:
         
         if payment_data.amount > max_amount:
             error_msg = f"Montant maximum autorisé: {max_amount} {payment_data.currency}"
-            print(f"ERROR: {error_msg}")
+            logger.error("Invalid CinetPay payment %s: %s", payment_data.transaction_id, error_msg)
             return {
                 "status": "error",
                 "code": "AMOUNT_TOO_HIGH",
@@ -908,21 +941,19 @@ class CinetPayService:
         else:
             channels_param = settings.CINETPAY_CHANNELS if settings.CINETPAY_CHANNELS else "ALL"
         
-        print(f"CinetPay Channels: {channels_param}")
-        print(f"CinetPay Card Payments Enabled: {settings.CINETPAY_ENABLE_CARD_PAYMENTS}")
+        logger.debug("CinetPay channels: %s (card payments enabled: %s)", channels_param, settings.CINETPAY_ENABLE_CARD_PAYMENTS)
         
         # Nettoyer la description pour retirer les caractères spéciaux non autorisés par CinetPay
         # La description a déjà été nettoyée dans initiate_payment, mais on la nettoie à nouveau ici
         # pour être sûr qu'elle ne contient aucun caractère spécial qui pourrait bloquer la validation
         original_description = payment_data.description or ""
         cleaned_description = clean_payment_description(original_description)
-        print(f"=== DESCRIPTION CLEANING (FINAL CHECK) ===")
-        print(f"Original: {original_description}")
-        print(f"Cleaned: {cleaned_description}")
-        print(f"Length: {len(cleaned_description)} characters")
         pattern = r'[^a-zA-Z0-9\s\-.]'
         has_special_chars = bool(re.search(pattern, cleaned_description))
-        print(f"Contains special chars: {has_special_chars}")
+        logger.debug(
+            "CinetPay description %r cleaned to %r (%s characters, special characters: %s)",
+            original_description, cleaned_description, len(cleaned_description), has_special_chars,
+        )
         
         # Construire le payload selon la documentation CinetPay (identique aux tests qui fonctionnent)
         payload = {
@@ -983,7 +1014,7 @@ class CinetPayService:
             default_phone = "657807309"  # Format valide pour le Cameroun
             
             payload["customer_phone_number"] = f"+{default_prefix}{default_phone}"
-            print(f"⚠️  Aucun numéro de téléphone fourni, utilisation du numéro par défaut: {payload['customer_phone_number']}")
+            logger.warning("Aucun numéro de téléphone fourni, utilisation du numéro par défaut pour %s", payment_data.transaction_id)
         
         # S'assurer que tous les champs obligatoires sont remplis
         # Adapter les valeurs par défaut selon la devise/pays
@@ -1017,7 +1048,7 @@ class CinetPayService:
                           "customer_address", "customer_city", "customer_country", "customer_state", "customer_zip_code"]
         for field in required_fields:
             if not payload.get(field) or (isinstance(payload[field], str) and payload[field].strip() == ""):
-                print(f"⚠️  WARNING: Field {field} is empty, using default value")
+                logger.warning("Field %s is empty, using default value", field)
                 if field == "customer_name":
                     payload[field] = "Client"
                 elif field == "customer_surname":
@@ -1043,25 +1074,14 @@ class CinetPayService:
         
         # Logs détaillés pour le diagnostic (surtout pour le paiement par carte bancaire)
         if channels_param == "CREDIT_CARD":
-            print(f"\n{'='*80}")
-            print(f"📋 PAYLOAD CINETPAY - PAIEMENT CARTE BANCAIRE")
-            print(f"{'='*80}")
-            print(f"Transaction ID: {payment_data.transaction_id}")
-            print(f"Amount: {payload['amount']} {payload['currency']}")
-            print(f"Channels: {channels_param}")
-            print(f"\n👤 INFORMATIONS CLIENT:")
-            print(f"  - Name: {payload['customer_name']}")
-            print(f"  - Surname: {payload['customer_surname']}")
-            print(f"  - Email: {payload['customer_email']}")
-            print(f"  - Phone: {payload['customer_phone_number']}")
-            print(f"  - Address: {payload['customer_address']}")
-            print(f"  - City: {payload['customer_city']}")
-            print(f"  - Country: {payload['customer_country']}")
-            print(f"  - State: {payload['customer_state']}")
-            print(f"  - Zip Code: {payload['customer_zip_code']}")
-            print(f"{'='*80}\n")
+            logger.debug(
+                "CinetPay card payment %s: %s %s for %s %s, %s, %s, %s %s %s",
+                payment_data.transaction_id, payload["amount"], payload["currency"],
+                payload["customer_name"], payload["customer_surname"], payload["customer_email"],
+                payload["customer_phone_number"], payload["customer_city"], payload["customer_country"], payload["customer_zip_code"],
+            )
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with async_http_client(timeout=30.0) as client:
             # Headers selon les tests qui fonctionnent
             headers = {
                 "Content-Type": "application/json",
@@ -1069,15 +1089,11 @@ class CinetPayService:
                 "User-Agent": "LAFAOM-Backend/1.0"
             }
             
-            # Logs détaillés pour debug (identique aux tests)
-            print(f"=== CINETPAY API REQUEST ===")
-            print(f"URL: https://api-checkout.cinetpay.com/v2/payment")
-            print(f"Transaction ID: {payment_data.transaction_id}")
-            print(f"Transaction ID length: {len(payment_data.transaction_id)}")
-            print(f"Amount: {payload['amount']} {payload['currency']}")
-            print(f"Channels: {payload['channels']}")
-            print(f"Description: {payload['description'][:50]}...")
-            
+            logger.debug(
+                "CinetPay request for %s: %s %s on %s, %r",
+                payment_data.transaction_id, payload["amount"], payload["currency"], payload["channels"], payload["description"][:50],
+            )
+
             try:
                 response = await client.post(
                     "https://api-checkout.cinetpay.com/v2/payment", 
@@ -1085,39 +1101,34 @@ class CinetPayService:
                     headers=headers
                 )
             except httpx.TimeoutException as timeout_error:
-                print(f"CinetPay API Timeout: {timeout_error}")
+                logger.error("CinetPay API Timeout: %s", timeout_error)
                 return {
                     "status": "error",
                     "code": "TIMEOUT",
                     "message": f"CinetPay API timeout: {str(timeout_error)}"
                 }
             except httpx.ConnectError as connect_error:
-                print(f"CinetPay API Connection Error: {connect_error}")
+                logger.error("CinetPay API Connection Error: %s", connect_error)
                 return {
                     "status": "error",
                     "code": "CONNECTION_ERROR",
                     "message": f"CinetPay API connection failed: {str(connect_error)}"
                 }
             except Exception as http_error:
-                print(f"CinetPay API HTTP Error: {http_error}")
+                logger.error("CinetPay API HTTP Error: %s", http_error)
                 return {
                     "status": "error",
                     "code": "HTTP_ERROR",
                     "message": f"CinetPay API error: {str(http_error)}"
                 }
             
-            print(f"=== CINETPAY API RESPONSE ===")
-            print(f"Status Code: {response.status_code}")
-            
             try:
                 response_data = response.json()
                 response_code = response_data.get("code", "")
                 response_message = response_data.get("message", "")
-                print(f"Code CinetPay: {response_code}")
-                print(f"Message: {response_message}")
+                logger.debug("CinetPay response %s: %s %s", response.status_code, response_code, response_message)
             except json.JSONDecodeError as json_error:
-                print(f"❌ Failed to parse JSON response: {json_error}")
-                print(f"Raw response text: {response.text[:500]}")
+                logger.error("Failed to parse the CinetPay response (%s): %s", json_error, response.text[:500])
                 return {
                     "status": "error",
                     "code": "INVALID_JSON_RESPONSE",
@@ -1129,7 +1140,7 @@ class CinetPayService:
                 error_description = response_data.get('description', '')
                 if error_description:
                     error_message += f" - {error_description}"
-                print(f"❌ HTTP Error: {error_message}")
+                logger.error("HTTP Error: %s", error_message)
                 return {
                     "status": "error",
                     "code": response_data.get("code", f"HTTP_{response.status_code}"),
@@ -1171,8 +1182,7 @@ class CinetPayService:
                 # Obtenir le message d'erreur standardisé
                 standard_message = CinetPayService.get_error_message(error_code)
                 
-                print(f"CinetPay Error - Code: {error_code}, Message: {error_message}, Description: {error_description}")
-                print(f"Standard Error Message: {standard_message}")
+                logger.error("CinetPay error %s: %s - %s (%s)", error_code, error_message, error_description, standard_message)
                 
                 # Construire le message d'erreur détaillé
                 detailed_message = error_message
@@ -1203,6 +1213,7 @@ class CinetPayService:
         return db_payment
 
     @staticmethod
+    @traced("provider", "cinetpay.check_status")
     async def check_cinetpay_payment_status(transaction_id: str):
         """
         Vérifie le statut d'une transaction CinetPay
@@ -1217,7 +1228,7 @@ class CinetPayService:
             "site_id": settings.CINETPAY_SITE_ID,
             "transaction_id": transaction_id
         }
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with async_http_client(timeout=30.0) as client:
             try:
                 response = await client.post(
                     "https://api-checkout.cinetpay.com/v2/payment/check", 
@@ -1227,11 +1238,12 @@ class CinetPayService:
                 response.raise_for_status()
                 return response.json()
             except httpx.HTTPError as e:
-                print(f"Error checking CinetPay payment status: {e}")
+                logger.error("Error checking CinetPay payment status: %s", e)
                 raise
         
     
     @staticmethod
+    @traced("provider", "cinetpay.check_status")
     def check_cinetpay_payment_status_sync(transaction_id: str):
         """
         Vérifie le statut d'une transaction CinetPay (version synchrone)
@@ -1247,18 +1259,18 @@ class CinetPayService:
             "transaction_id": transaction_id
         }
         # Using synchronous HTTP client
-        with httpx.Client(timeout=30.0) as client:
-            try:
-                response = client.post(
-                    "https://api-checkout.cinetpay.com/v2/payment/check",
-                    json=payload,
-                    headers={"Content-Type": "application/json", "User-Agent": "LAFAOM-Backend/1.0"}
-                )
-                response.raise_for_status()
-                return response.json()
-            except httpx.HTTPError as e:
-                print(f"Error checking CinetPay payment status (sync): {e}")
-                raise
+        client = get_http_client()
+        try:
+            response = client.post(
+                "https://api-checkout.cinetpay.com/v2/payment/check",
+                json=payload,
+                headers={"Content-Type": "application/json", "User-Agent": "LAFAOM-Backend/1.0"}
+            )
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPError as e:
+            logger.error("Error checking CinetPay payment status (sync): %s", e)
+            raise
 
     async def get_cinetpay_payment(self, transaction_id: str):
         statement = select(CinetPayPayment).where(CinetPayPayment.transaction_id == transaction_id)
@@ -1309,10 +1321,10 @@ class CinetPayService:
             # Envoyer les identifiants par email (version synchrone)
             PaymentService._send_job_application_credentials_email_sync_static(job_application, username, temp_password)
             
-            print(f"Compte utilisateur créé pour le candidat {job_application.first_name} {job_application.last_name}")
+            logger.info("Compte utilisateur créé pour la candidature d'emploi %s", job_application.id)
             
         except Exception as e:
-            print(f"Erreur lors de la création du compte utilisateur pour la candidature d'emploi: {e}")
+            logger.error("Erreur lors de la création du compte utilisateur pour la candidature d'emploi: %s", e)
             raise e
 
     @staticmethod
@@ -1339,10 +1351,10 @@ class CinetPayService:
             # Envoyer l'email avec les identifiants
             notification.send_notification()
             
-            print(f"Identifiants envoyés par email à {job_application.email}")
+            logger.info("Identifiants envoyés par email à %s", job_application.email)
             
         except Exception as e:
-            print(f"Erreur lors de l'envoi de l'email: {e}")
+            logger.error("Erreur lors de l'envoi de l'email: %s", e)
             raise e
 
 
@@ -1350,6 +1362,7 @@ class ElyonPayService:
     def __init__(self, session: AsyncSession = Depends(get_session_async)) -> None:
         self.session = session
 
+    @traced("provider", "elyonpay.auth")
     async def _get_auth_token(self):
         """Authentifiez-vous et recevez un JWT pour accéder aux points de terminaison protégés."""
         cache_key = "elyonpay_auth_token"
@@ -1358,27 +1371,24 @@ class ElyonPayService:
             if cached:
                 return cached
         except Exception as e:
-            print(f"Redis cache error: {e}")
+            logger.warning("Redis cache error: %s", e)
 
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with async_http_client(timeout=10.0) as client:
             payload = {
                 "username": settings.ELYONPAY_USERNAME,
                 "password": settings.ELYONPAY_PASSWORD,
                 "role": settings.ELYONPAY_ROLE
             }
             try:
-                print(f"ElyonPay auth request to: {settings.ELYONPAY_API_URL}/login")
-                # Do not print password in logs, but print username and role
-                print(f"ElyonPay auth payload: {{'username': '{settings.ELYONPAY_USERNAME}', 'role': '{settings.ELYONPAY_ROLE}'}}")
-                
+                logger.debug("ElyonPay auth request to %s/login as %s (%s)", settings.ELYONPAY_API_URL, settings.ELYONPAY_USERNAME, settings.ELYONPAY_ROLE)
+
                 response = await client.post(
                     f"{settings.ELYONPAY_API_URL}/login",
                     json=payload,
                     headers={"Content-Type": "application/json"}
                 )
-                print(f"ElyonPay auth response status: {response.status_code}")
                 if response.status_code != 200:
-                    print(f"ElyonPay auth response body: {response.text}")
+                    logger.warning("ElyonPay auth response %s: %s", response.status_code, response.text)
                 
                 response.raise_for_status()
                 data = response.json()
@@ -1388,37 +1398,40 @@ class ElyonPayService:
                 try:
                     await set_to_redis(cache_key, token, ex=3600)
                 except Exception as e:
-                    print(f"Redis cache set error: {e}")
+                    logger.warning("Redis cache set error: %s", e)
 
                 return token
             except Exception as e:
-                print(f"ElyonPay auth error: {e}")
+                logger.error("ElyonPay auth error: %s", e)
                 return None
 
+    @traced("provider", "elyonpay.auth")
     def _get_auth_token_sync(self):
         """Authentifiez-vous et recevez un JWT (version synchrone)."""
         # We could use Redis cache even in sync
         import redis
         # Simplistic approach for sync auth
-        with httpx.Client(timeout=10.0) as client:
-            payload = {
-                "username": settings.ELYONPAY_USERNAME,
-                "password": settings.ELYONPAY_PASSWORD,
-                "role": settings.ELYONPAY_ROLE
-            }
-            try:
-                response = client.post(
-                   f"{settings.ELYONPAY_API_URL}/login",
-                   json=payload,
-                   headers={"Content-Type": "application/json"}
-                )
-                response.raise_for_status()
-                data = response.json()
-                return data["token"]
-            except Exception as e:
-                print(f"ElyonPay sync auth error: {e}")
-                return None
+        client = get_http_client()
+        payload = {
+            "username": settings.ELYONPAY_USERNAME,
+            "password": settings.ELYONPAY_PASSWORD,
+            "role": settings.ELYONPAY_ROLE
+        }
+        try:
+            response = client.post(
+               f"{settings.ELYONPAY_API_URL}/login",
+               json=payload,
+               headers={"Content-Type": "application/json"},
+               timeout=10.0
+            )
+            response.raise_for_status()
+            data = response.json()
+            return data["token"]
+        except Exception as e:
+            logger.error("ElyonPay sync auth error: %s", e)
+            return None
 
+    @traced("provider", "elyonpay.initiate")
     async def initiate_elyonpay_payment(self, payment_data: ElyonPayInit):
         """Génère un lien de transaction de paiement ElyonPay."""
         token = await self._get_auth_token()
@@ -1469,7 +1482,7 @@ class ElyonPayService:
                 phone = "+237657807309" # Cameroon default
             else:
                 phone = "+221771234567" # Senegal default
-            print(f"⚠️ Warning: Missing phone number for ElyonPay, using default: {phone}")
+            logger.warning("Missing phone number for ElyonPay, using the default one of %s", payment_data.currency)
 
         payload = {
             "amount": float(payment_data.amount),
@@ -1479,9 +1492,9 @@ class ElyonPayService:
             "error": error_url
         }
 
-        print(f"ElyonPay Initiation Request Payload: {payload}")
+        logger.debug("ElyonPay initiation request payload: %s", payload)
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with async_http_client(timeout=30.0) as client:
             try:
                 response = await client.post(
                     f"{settings.ELYONPAY_API_URL}/request-to-pay/payment/link",
@@ -1524,7 +1537,7 @@ class ElyonPayService:
                     "data": db_payment
                 }
             except Exception as e:
-                print(f"ElyonPay initiate error: {e}")
+                logger.error("ElyonPay initiate error: %s", e)
                 error_msg = str(e)
                 try:
                     if hasattr(e, 'response') and e.response:
@@ -1536,6 +1549,7 @@ class ElyonPayService:
                     "message": f"ElyonPay initiate failure: {error_msg}"
                 }
 
+    @traced("provider", "elyonpay.check_status")
     async def check_elyonpay_payment_status(self, provider_transaction_id: str, token: str):
         """Vérifie le statut d'une transaction ElyonPay."""
         if not provider_transaction_id:
@@ -1545,7 +1559,7 @@ class ElyonPayService:
             "Authorization": f"Bearer {token}",
             "Accept": "application/json"
         }
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with async_http_client(timeout=30.0) as client:
             try:
                 response = await client.get(
                     f"{settings.ELYONPAY_API_URL}/transactions/{provider_transaction_id}",
@@ -1555,10 +1569,11 @@ class ElyonPayService:
                     return response.json()
                 return None
             except Exception as e:
-                print(f"Error checking ElyonPay payment status: {e}")
+                logger.error("Error checking ElyonPay payment status: %s", e)
                 return None
 
     @staticmethod
+    @traced("provider", "elyonpay.check_status")
     def check_elyonpay_payment_status_sync(provider_transaction_id: str, token: str):
         """Vérifie le statut d'une transaction ElyonPay (version synchrone)."""
         if not provider_transaction_id:
@@ -1568,18 +1583,18 @@ class ElyonPayService:
             "Authorization": f"Bearer {token}",
             "Accept": "application/json"
         }
-        with httpx.Client(timeout=30.0) as client:
-            try:
-                response = client.get(
-                    f"{settings.ELYONPAY_API_URL}/transactions/{provider_transaction_id}",
-                    headers=headers
-                )
-                if response.status_code == 200:
-                    return response.json()
-                return None
-            except Exception as e:
-                print(f"Error checking ElyonPay payment status (sync): {e}")
-                return None
+        client = get_http_client()
+        try:
+            response = client.get(
+                f"{settings.ELYONPAY_API_URL}/transactions/{provider_transaction_id}",
+                headers=headers
+            )
+            if response.status_code == 200:
+                return response.json()
+            return None
+        except Exception as e:
+            logger.error("Error checking ElyonPay payment status (sync): %s", e)
+            return None
 
     async def _create_job_application_user_async(self, job_app: JobApplication) -> None:
         """Créer un compte utilisateur pour le candidat d'emploi (async)"""
@@ -1610,5 +1625,5 @@ class ElyonPayService:
             self.session.add(job_app)
             await self.session.commit()
         except Exception as e:
-            print(f"Erreur création compte candidat (async): {e}")
+            logger.error("Erreur création compte candidat (async): %s", e)
 
@@ -1,6 +1,7 @@
 from celery import shared_task
 from sqlalchemy import select
 
+from src.api.payments.events import publish_payment_status_sync, status_value
 from src.api.payments.models import Payment, PaymentStatusEnum
 from src.api.payments.service import PaymentService
 from src.database import get_session
@@ -10,6 +11,9 @@ from src.database import get_session
 def check_cash_in_status(transaction_id: str) -> dict:
     """
     Celery task to check cash-in status for a payment.
+
+    The result only carries the status: the payment itself is in the database.
+    A status change is published to the open status streams of the payment.
     """
 
     with get_session() as session:
@@ -20,10 +24,12 @@ def check_cash_in_status(transaction_id: str) -> dict:
 
             if payment.status == PaymentStatusEnum.PENDING.value:
                 payment = PaymentService.check_payment_status_sync(session, payment)
+                if status_value(payment.status) != PaymentStatusEnum.PENDING.value:
+                    publish_payment_status_sync(payment)
 
-            return {"message": "success", "data": payment.model_dump()}
+            return {"message": "success", "data": {"transaction_id": payment.transaction_id, "status": payment.status}}
 
-@shared_task
+@shared_task(ignore_result=True)
 def handle_payment_effects(payment_id: str):
     """
     Background task to handle slow operations after a payment is confirmed.
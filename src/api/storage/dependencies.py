@@ -0,0 +1,41 @@
+from fastapi import HTTPException, status
+
+from src.helper.file_helper import FileHelper
+from src.helper.schemas import BaseOutFail, ErrorMessage
+
+
+async def get_confirmed_upload(
+    upload_token: str, resource: str, resource_id=None
+) -> dict:
+    """
+    Check a direct upload announced for `resource` (and `resource_id`) and
+    return its confirmed payload, see `FileHelper.confirm_direct_upload`.
+    """
+    try:
+        payload = FileHelper.read_token(upload_token)
+    except ValueError:
+        payload = None
+    context = payload["context"] if payload else {}
+    if (
+        payload is None
+        or context.get("resource") != resource
+        or context.get("id") != resource_id
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=BaseOutFail(
+                message=ErrorMessage.INVALID_UPLOAD_TOKEN.description,
+                error_code=ErrorMessage.INVALID_UPLOAD_TOKEN.value,
+            ).model_dump(),
+        )
+
+    try:
+        return await FileHelper.confirm_direct_upload(upload_token)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=BaseOutFail(
+                message=ErrorMessage.UPLOADED_FILE_NOT_VALID.description,
+                error_code=ErrorMessage.UPLOADED_FILE_NOT_VALID.value,
+            ).model_dump(),
+        )
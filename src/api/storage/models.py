@@ -0,0 +1,54 @@
+from enum import Enum
+from typing import Optional
+
+from sqlalchemy import BigInteger, Column, func, literal_column
+from sqlmodel import Field
+
+from src.helper.model import CustomBaseModel
+
+
+class DocumentStatusEnum(str, Enum):
+    """Result of the document processing of an attachment (`processing_status`)"""
+
+    PENDING = "PENDING"
+    VALID = "VALID"
+    INVALID = "INVALID"
+    ENCRYPTED = "ENCRYPTED"
+    TOO_MANY_PAGES = "TOO_MANY_PAGES"
+    SKIPPED = "SKIPPED"
+
+
+# Text search configuration of the attachments, written as a literal so that
+# queries match the expression of the GIN indexes
+DOCUMENT_SEARCH_CONFIG = "'simple'::regconfig"
+DOCUMENT_SEARCH_INDEX = (
+    "to_tsvector('simple'::regconfig, coalesce(text_content, ''::text))"
+)
+
+
+def document_search_vector(text_column):
+    return func.to_tsvector(
+        literal_column(DOCUMENT_SEARCH_CONFIG),
+        func.coalesce(text_column, literal_column("''::text")),
+    )
+
+
+def document_search_query(text: str):
+    return func.plainto_tsquery(literal_column(DOCUMENT_SEARCH_CONFIG), text)
+
+
+class StoredBlob(CustomBaseModel, table=True):
+    """
+    A stored file shared by every attachment with the same content.
+
+    `ref_count` is the number of rows (student attachments, job attachments,
+    cabinet documents) whose `file_path` points at the blob.
+    """
+
+    __tablename__ = "stored_blobs"
+
+    sha256: str = Field(max_length=64, unique=True, index=True)
+    file_path: str = Field(max_length=500, index=True)
+    size: int = Field(sa_column=Column(BigInteger, nullable=False))
+    content_type: Optional[str] = Field(default=None, max_length=255)
+    ref_count: int = Field(default=1)
@@ -0,0 +1,60 @@
+from fastapi import APIRouter, HTTPException, Request, status
+
+from src.helper.download import file_response
+from src.helper.file_helper import FileHelper, FileTooLargeError
+from src.helper.schemas import BaseOutFail, BaseOutSuccess, ErrorMessage
+
+
+router = APIRouter(tags=["Storage"])
+
+
+@router.put("/local-upload", response_model=BaseOutSuccess)
+async def local_upload(
+    token: str,
+    request: Request,
+):
+    """Receive the body of a direct upload when the files are stored locally"""
+    try:
+        upload = await FileHelper.receive_local_upload(
+            token, request.headers.get("content-type"), request.stream()
+        )
+    except FileTooLargeError:
+        raise
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=BaseOutFail(
+                message=ErrorMessage.INVALID_UPLOAD_TOKEN.description,
+                error_code=ErrorMessage.INVALID_UPLOAD_TOKEN.value,
+            ).model_dump(),
+        )
+    return {"message": "File uploaded successfully", "data": {"size": upload["size"]}}
+
+
+@router.get("/private-file")
+async def private_file(
+    file: str,
+    expire: int,
+    signature: str,
+    request: Request,
+):
+    """Serve a private file from a `FileHelper.generate_local_signed_url` link"""
+    if not FileHelper.verify_local_signed_url(file, expire, signature):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=BaseOutFail(
+                message=ErrorMessage.INVALID_FILE_SIGNATURE.description,
+                error_code=ErrorMessage.INVALID_FILE_SIGNATURE.value,
+            ).model_dump(),
+        )
+
+    response = await file_response(request, file)
+    if response is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=BaseOutFail(
+                message=ErrorMessage.FILE_NOT_FOUND.description,
+                error_code=ErrorMessage.FILE_NOT_FOUND.value,
+            ).model_dump(),
+        )
+    return response
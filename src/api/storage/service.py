@@ -0,0 +1,125 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import Depends, UploadFile
+from sqlalchemy import delete, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.api.storage.models import StoredBlob
+from src.database import get_session_async
+from src.helper.storage import get_storage, hash_upload
+
+
+class BlobStoreService:
+    """
+    Content-addressed store for attachments.
+
+    Files are keyed by the SHA-256 of their content: uploading a file that is
+    already stored only increments its `ref_count` and returns the existing
+    path. `release` is the counterpart of `StorageBackend.remove` for those
+    paths, the file is only removed with its last reference.
+    """
+
+    def __init__(self, session: AsyncSession = Depends(get_session_async)) -> None:
+        self.session = session
+
+    async def store_upload(self, file: UploadFile) -> str:
+        """
+        Store an uploaded file (or reference the identical stored one).
+
+        Returns:
+            str: The path to record on the row, as `StorageBackend.save` returns it.
+
+        Raises:
+            FileTooLargeError: If the file goes over `MAX_FILE_SIZE`.
+        """
+        digest, size = await hash_upload(file)
+
+        file_path = await self._acquire(digest)
+        if file_path is not None:
+            return file_path
+
+        stored = await get_storage().save(file, f"/blobs/{digest[:2]}", digest)
+        statement = (
+            insert(StoredBlob)
+            .values(
+                sha256=digest,
+                file_path=stored.file_path,
+                size=size,
+                content_type=file.content_type,
+                ref_count=1,
+            )
+            .on_conflict_do_update(
+                index_elements=[StoredBlob.sha256],
+                set_={
+                    "ref_count": StoredBlob.ref_count + 1,
+                    "updated_at": datetime.now(timezone.utc),
+                },
+            )
+            .returning(StoredBlob.file_path)
+        )
+        file_path = (await self.session.execute(statement)).scalar_one()
+        await self.session.commit()
+
+        if file_path != stored.file_path:
+            # The same content was stored concurrently, keep a single copy
+            await get_storage().remove(stored.file_path)
+        return file_path
+
+    async def _acquire(self, digest: str) -> Optional[str]:
+        statement = (
+            update(StoredBlob)
+            .where(StoredBlob.sha256 == digest)
+            .values(
+                ref_count=StoredBlob.ref_count + 1,
+                updated_at=datetime.now(timezone.utc),
+            )
+            .returning(StoredBlob.file_path)
+        )
+        file_path = (await self.session.execute(statement)).scalar_one_or_none()
+        if file_path is not None:
+            await self.session.commit()
+        return file_path
+
+    async def release(self, file_path: Optional[str]) -> bool:
+        """
+        Drop one reference to a stored file and delete it with the last one.
+
+        Files stored before deduplication (or uploaded directly to the
+        storage) have no blob and are deleted right away.
+
+        Returns:
+            bool: True if the file was deleted.
+        """
+        if not file_path:
+            return False
+
+        statement = (
+            update(StoredBlob)
+            .where(StoredBlob.file_path == file_path)
+            .values(
+                ref_count=StoredBlob.ref_count - 1,
+                updated_at=datetime.now(timezone.utc),
+            )
+            .returning(StoredBlob.id, StoredBlob.ref_count)
+        )
+        row = (await self.session.execute(statement)).first()
+        if row is None:
+            await get_storage().remove(file_path)
+            return True
+
+        deleted = 0
+        if row.ref_count <= 0:
+            # Conditional: a concurrent store_upload of the same content keeps it
+            result = await self.session.execute(
+                delete(StoredBlob).where(
+                    StoredBlob.id == row.id, StoredBlob.ref_count <= 0
+                )
+            )
+            deleted = result.rowcount
+        await self.session.commit()
+
+        if deleted:
+            await get_storage().remove(file_path)
+        return bool(deleted)
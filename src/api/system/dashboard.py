@@ -1,9 +1,13 @@
+import logging
 from fastapi import APIRouter, Depends
 from sqlmodel import select, func, and_, or_
 from datetime import datetime, timedelta
 from typing import Dict, Any
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.database import get_session_async
+from src.helper.tracing import traced
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -49,6 +53,7 @@ async def get_basic_statistics():
     }
 
 @router.get("/comprehensive-stats")
+@traced("db.dashboard", "comprehensive_stats")
 async def get_comprehensive_statistics(
     db: AsyncSession = Depends(get_session_async)
 ):
@@ -377,10 +382,7 @@ async def get_comprehensive_statistics(
         }
         
     except Exception as e:
-        # Log l'erreur pour le debugging
-        print(f"Erreur dans get_comprehensive_statistics: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Erreur dans get_comprehensive_statistics: %s", e)
         
         # Retourner des données par défaut en cas d'erreur
         return {
@@ -444,6 +446,7 @@ async def get_comprehensive_statistics(
         }
 
 @router.get("/payment-stats")
+@traced("db.dashboard", "payment_stats")
 async def get_payment_statistics(
     db: AsyncSession = Depends(get_session_async)
 ):
@@ -632,10 +635,7 @@ async def get_payment_statistics(
         }
         
     except Exception as e:
-        # Log l'erreur pour le debugging
-        print(f"Erreur dans get_payment_statistics: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Erreur dans get_payment_statistics: %s", e)
         
         # Retourner des données par défaut en cas d'erreur
         return {
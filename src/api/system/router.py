@@ -4,6 +4,7 @@ from typing import Annotated
 from src.api.auth.utils import check_permissions, get_current_active_user
 from src.api.system.dependencies import get_organization_center
 from src.api.user.models import PermissionEnum, User
+from src.helper.cache import CacheTag, cache_response
 from src.helper.schemas import BaseOutFail, ErrorMessage
 from src.api.system.service import OrganizationCenterService
 from src.api.system.schemas import (
@@ -168,6 +169,7 @@ async def read_organization_centers_by_location(
     return {"data": organizations, "message": "Organization Centers fetched successfully"}
 
 @router.get("/organization-centers/{organization_id}/public", response_model=OrganizationCenterOutSuccess, tags=["Organization Centers"])
+@cache_response(CacheTag.ORGANIZATION_CENTERS)
 async def read_organization_center_public(
     organization_id: int,
     org_service: OrganizationCenterService = Depends()
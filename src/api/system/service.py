@@ -1,10 +1,11 @@
 from datetime import datetime, timezone
 from typing import List
 from fastapi import Depends
-from sqlalchemy import func
 from sqlalchemy.orm import selectinload
 from src.api.system.schemas import OrganizationCenterFilter
 from src.database import get_session_async
+from src.helper.cache import CacheTag, invalidate_cache_tags
+from src.helper.query import FilteredQuery
 from src.api.system.models import OrganizationCenter, OrganizationStatusEnum, OrganizationTypeEnum
 from sqlmodel import select, or_
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -16,16 +17,11 @@ class OrganizationCenterService:
     async def get(self, org_filter: OrganizationCenterFilter):
         """Get paginated list of organization centers with filtering"""
         
-        statement = (
+        query = FilteredQuery(
             select(OrganizationCenter)
             .where(OrganizationCenter.delete_at.is_(None))
         )
 
-        count_query = (
-            select(func.count(OrganizationCenter.id))
-            .where(OrganizationCenter.delete_at.is_(None))
-        )
-
         # Apply search filter
         if org_filter.search is not None:
             search_filter = or_(
@@ -37,56 +33,45 @@ class OrganizationCenterService:
                 OrganizationCenter.mobile_number.contains(org_filter.search),
                 OrganizationCenter.description.contains(org_filter.search),
             )
-            statement = statement.where(search_filter)
-            count_query = count_query.where(search_filter)
+            query.where(search_filter)
         
         # Apply status filter
         if org_filter.status is not None:
-            statement = statement.where(OrganizationCenter.status == org_filter.status)
-            count_query = count_query.where(OrganizationCenter.status == org_filter.status)
+            query.where(OrganizationCenter.status == org_filter.status)
         
         # Apply organization type filter
         if org_filter.organization_type is not None:
-            statement = statement.where(OrganizationCenter.organization_type == org_filter.organization_type)
-            count_query = count_query.where(OrganizationCenter.organization_type == org_filter.organization_type)
+            query.where(OrganizationCenter.organization_type == org_filter.organization_type)
         
         # Apply country code filter
         if org_filter.country_code is not None:
-            statement = statement.where(OrganizationCenter.country_code == org_filter.country_code)
-            count_query = count_query.where(OrganizationCenter.country_code == org_filter.country_code)
+            query.where(OrganizationCenter.country_code == org_filter.country_code)
 
         # Apply city filter
         if org_filter.city is not None:
-            statement = statement.where(OrganizationCenter.city == org_filter.city)
-            count_query = count_query.where(OrganizationCenter.city == org_filter.city)
+            query.where(OrganizationCenter.city == org_filter.city)
 
         # Apply ordering
         if org_filter.order_by == "created_at":
             if org_filter.asc == "asc":
-                statement = statement.order_by(OrganizationCenter.created_at)
+                query.order_by(OrganizationCenter.created_at)
             else:
-                statement = statement.order_by(OrganizationCenter.created_at.desc())
+                query.order_by(OrganizationCenter.created_at.desc())
         elif org_filter.order_by == "updated_at":
             if org_filter.asc == "asc":
-                statement = statement.order_by(OrganizationCenter.updated_at)
+                query.order_by(OrganizationCenter.updated_at)
             else:
-                statement = statement.order_by(OrganizationCenter.updated_at.desc())
+                query.order_by(OrganizationCenter.updated_at.desc())
         elif org_filter.order_by == "name":
             if org_filter.asc == "asc":
-                statement = statement.order_by(OrganizationCenter.name)
+                query.order_by(OrganizationCenter.name)
             else:
-                statement = statement.order_by(OrganizationCenter.name.desc())
+                query.order_by(OrganizationCenter.name.desc())
 
-        # Get total count
-        total_count = await self.session.execute(count_query)
-        total_count = total_count.scalar_one()
-
-        # Apply pagination
-        statement = statement.offset((org_filter.page - 1) * org_filter.page_size).limit(
-            org_filter.page_size
+        # Fetch the page and the total count in one statement
+        organizations, total_count = await query.paginate(
+            self.session, org_filter.page, org_filter.page_size
         )
-        result = await self.session.execute(statement)
-        organizations = result.scalars().all()
 
         return organizations, total_count
 
@@ -96,6 +81,7 @@ class OrganizationCenterService:
         self.session.add(organization)
         await self.session.commit()
         await self.session.refresh(organization)
+        await invalidate_cache_tags(CacheTag.ORGANIZATION_CENTERS)
         return organization
 
     async def get_by_id(self, org_id: int):
@@ -146,6 +132,7 @@ class OrganizationCenterService:
         self.session.add(organization)
         await self.session.commit()
         await self.session.refresh(organization)
+        await invalidate_cache_tags(CacheTag.ORGANIZATION_CENTERS)
         return organization
 
     async def update_status(self, org_id: int, status: OrganizationStatusEnum):
@@ -157,6 +144,7 @@ class OrganizationCenterService:
         self.session.add(organization)
         await self.session.commit()
         await self.session.refresh(organization)
+        await invalidate_cache_tags(CacheTag.ORGANIZATION_CENTERS)
         return organization
 
     async def delete(self, org_id: int):
@@ -169,6 +157,7 @@ class OrganizationCenterService:
         self.session.add(organization)
         await self.session.commit()
         await self.session.refresh(organization)
+        await invalidate_cache_tags(CacheTag.ORGANIZATION_CENTERS)
         return organization
 
     async def get_all_active(self):
@@ -5,7 +5,8 @@ from src.helper.model import CustomBaseUUIDModel, CustomBaseModel
 from typing import Dict, List, Optional
 from enum import Enum
 from datetime import datetime
-from sqlalchemy import TIMESTAMP, Column, JSON, Numeric
+from sqlalchemy import TIMESTAMP, Column, JSON, Numeric, Index, Text, text
+from src.api.storage.models import DOCUMENT_SEARCH_INDEX
 
 class TrainingTypeEnum(str, Enum):
     ON_SITE = "On-Site"
@@ -121,6 +122,9 @@ class StudentApplication(CustomBaseModel, table=True):
 
 class StudentAttachment(CustomBaseModel, table=True):
     __tablename__ = "student_attachments"
+    __table_args__ = (
+        Index("ix_student_attachments_text_search", text(DOCUMENT_SEARCH_INDEX), postgresql_using="gin"),
+    )
 
     application_id: int = Field(foreign_key="student_applications.id", nullable=False)
     attachment_type: str = Field(max_length=100)  # Colonne dans la DB
@@ -128,6 +132,11 @@ class StudentAttachment(CustomBaseModel, table=True):
     file_name: str = Field(max_length=255)  # Nom du fichier
     file_path: str = Field(max_length=255)
     upload_date: Optional[datetime] = Field(default=None)
+    # Renseignés par la tâche process_attachment_document
+    processing_status: Optional[str] = Field(default=None, max_length=20)
+    processing_error: Optional[str] = Field(default=None, max_length=255)
+    page_count: Optional[int] = Field(default=None)
+    text_content: Optional[str] = Field(default=None, sa_column=Column(Text, nullable=True))
 
 
 class TrainingFeeInstallmentPayment(CustomBaseModel, table=True):
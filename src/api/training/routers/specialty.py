@@ -2,6 +2,7 @@ from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from src.api.auth.utils import check_permissions
 from src.api.user.models import PermissionEnum, User
+from src.helper.cache import CacheTag, cache_response
 from src.helper.schemas import BaseOutFail
 from src.api.training.services import SpecialtyService
 from src.api.training.schemas import (
@@ -18,6 +19,7 @@ router = APIRouter()
 
 # Specialty CRUD Endpoints
 @router.get("/specialties", response_model=SpecialtiesPageOutSuccess, tags=["Specialty"])
+@cache_response(CacheTag.SPECIALTIES)
 async def list_specialties(
     filters: Annotated[SpecialtyFilter, Query(...)],
     specialty_service: SpecialtyService = Depends(),
@@ -101,6 +103,7 @@ async def delete_specialty_route(
 
 
 @router.get("/specialties/active/all", response_model=SpecialtyListOutSuccess, tags=["Specialty"])
+@cache_response(CacheTag.SPECIALTIES)
 async def get_active_specialties(
     specialty_service: SpecialtyService = Depends(),
 ):
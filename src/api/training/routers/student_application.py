@@ -1,15 +1,22 @@
+import logging
+import os
 from typing import Annotated
 from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, UploadFile, status
 from src.api.auth.utils import check_permissions, get_current_active_user
 from src.api.job_offers.models import ApplicationStatusEnum
 from src.api.payments.schemas import InitPaymentOutSuccess
 from src.api.user.models import PermissionEnum, User
-from src.helper.schemas import BaseOutFail, ErrorMessage
+from src.api.storage.dependencies import get_confirmed_upload
+from src.helper.download import zip_response
+from src.helper.export import export_response
+from src.helper.file_helper import FileHelper
+from src.helper.schemas import BaseOutFail, DirectUploadConfirmInput, DirectUploadInput, DirectUploadOutSuccess, ErrorMessage
 from src.api.training.services import StudentApplicationService
 
 from src.api.training.schemas import (
     ChangeStudentApplicationStatusInput,
     PayTrainingFeeInstallmentInput,
+    StudentApplicationExportFilter,
     StudentApplicationFilter,
     StudentApplicationsPageOutSuccess,
     StudentAttachmentInput,
@@ -21,6 +28,8 @@ from src.api.training.schemas import (
     PaymentInfo,
 )
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 @router.get("/student-applications", response_model=StudentApplicationsPageOutSuccess, tags=["Student Application"])
@@ -61,6 +70,17 @@ async def list_all_student_applications_admin(
     return {"data": applications, "page": input.page, "number": len(applications), "total_number": total}
 
 
+@router.get("/student-applications/export", tags=["Student Application"])
+async def export_student_applications(
+    input: Annotated[StudentApplicationExportFilter, Query(...)],
+    current_user: Annotated[User, Depends(check_permissions([PermissionEnum.CAN_VIEW_STUDENT_APPLICATION]))],
+    student_app_service: StudentApplicationService = Depends(),
+):
+    """Stream every student application matching the list filters as a CSV or XLSX file"""
+    statement = student_app_service.export_student_applications_statement(filters=input, user_id=None)
+    return export_response(statement, "student-applications", input.format)
+
+
 @router.get("/student-applications/{application_id}", response_model=StudentApplicationOutSuccess, tags=["Student Application"])
 async def get_student_application_admin(
     application_id: int,
@@ -137,6 +157,48 @@ async def list_student_attachments(
     attachments = await student_app_service.list_attachments_by_application(application_id, user_id=None)
     return {"message": "Attachments fetched successfully", "data": attachments}
 
+@router.get("/student-applications/{application_id}/attachments/zip", tags=["Student Application"])
+async def download_student_attachments(
+    application_id: int,
+    current_user: Annotated[User, Depends(check_permissions([PermissionEnum.CAN_VIEW_STUDENT_APPLICATION]))],
+    student_app_service: StudentApplicationService = Depends(),
+):
+    """Download every attachment of a student application as a ZIP archive"""
+    application = await student_app_service.get_student_application_by_id(application_id)
+    if application is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=BaseOutFail(
+                message=ErrorMessage.STUDENT_APPLICATION_NOT_FOUND.description,
+                error_code=ErrorMessage.STUDENT_APPLICATION_NOT_FOUND.value,
+            ).model_dump(),
+        )
+    
+    attachments = await student_app_service.list_attachments_by_application(application_id, user_id=None)
+    entries = [
+        (f"{attachment.document_type}{os.path.splitext(attachment.file_path)[1]}", attachment.file_path)
+        for attachment in attachments
+    ]
+    return zip_response(entries, f"student-application-{application.application_number or application.id}")
+
+@router.get("/training-sessions/{session_id}/attachments/zip", tags=["Student Application"])
+async def download_training_session_attachments(
+    session_id: str,
+    current_user: Annotated[User, Depends(check_permissions([PermissionEnum.CAN_VIEW_STUDENT_APPLICATION]))],
+    student_app_service: StudentApplicationService = Depends(),
+):
+    """Download the attachments of every application to a training session, one folder per application"""
+    rows = await student_app_service.list_attachments_by_session(session_id)
+    entries = [
+        (
+            f"{application.application_number or application.id}/"
+            f"{attachment.document_type}{os.path.splitext(attachment.file_path)[1]}",
+            attachment.file_path,
+        )
+        for application, attachment in rows
+    ]
+    return zip_response(entries, f"training-session-{session_id}")
+
 
 @router.delete("/student-applications/{application_id}", response_model=StudentApplicationOutSuccess, tags=["Student Application"])
 async def delete_student_application_admin(
@@ -254,8 +316,7 @@ async def create_student_application(
             metadata={"application_id": getattr(application, "id", None), "user_email": getattr(application, "email", None)}
         )
 
-        # debug lisible dans logs (JSON)
-        print("DEBUG payment_info:", payment_info.model_dump_json(indent=2))
+        logger.debug("Payment info: %s", payment_info.model_dump_json())
 
         # Si payment_info.success est True, on prépare le bloc à renvoyer
         if payment_info.success:
@@ -269,7 +330,7 @@ async def create_student_application(
 
         else:
             # paiement non réussi côté provider -> log et renvoyer erreur HTTP si tu veux
-            print("WARN: payment initiation failed:", payment_info.model_dump())
+            logger.warning("Payment initiation failed: %s (transaction %s)", payment_info.message, payment_info.transaction_id)
             # tu peux choisir de lever une exception à ce stade. Ici on continue et renvoie payment = None
 
     # 5️⃣ Construire la réponse finale avec la candidature complète + payment
@@ -435,6 +496,59 @@ async def create_student_attachment(
     )
     return {"message": "Attachment created successfully", "data": attachment}
 
+@router.post("/my-student-applications/{application_id}/attachments/presign", response_model=DirectUploadOutSuccess, tags=["My Student Application"])
+async def presign_student_attachment(
+    application_id: int,
+    input: DirectUploadInput,
+    student_app_service: StudentApplicationService = Depends(),
+):
+    """Prepare an upload sent straight to the storage, then call the confirm endpoint"""
+    application = await student_app_service.get_student_application_by_id(application_id)
+    if application is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=BaseOutFail(
+                message=ErrorMessage.STUDENT_APPLICATION_NOT_FOUND.description,
+                error_code=ErrorMessage.STUDENT_APPLICATION_NOT_FOUND.value,
+            ).model_dump(),
+        )
+    
+    upload = await FileHelper.create_direct_upload(
+        f"/student-applications/{application_id}",
+        input.file_name,
+        input.content_type,
+        input.size,
+        name=input.name,
+        context={"resource": "student_attachment", "id": application_id, "name": input.name},
+    )
+    return {"message": "Upload prepared successfully", "data": upload}
+
+@router.post("/my-student-applications/{application_id}/attachments/confirm", response_model=StudentAttachmentOutSuccess, tags=["My Student Application"])
+async def confirm_student_attachment(
+    application_id: int,
+    input: DirectUploadConfirmInput,
+    student_app_service: StudentApplicationService = Depends(),
+):
+    application = await student_app_service.get_student_application_by_id(application_id)
+    if application is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=BaseOutFail(
+                message=ErrorMessage.STUDENT_APPLICATION_NOT_FOUND.description,
+                error_code=ErrorMessage.STUDENT_APPLICATION_NOT_FOUND.value,
+            ).model_dump(),
+        )
+    
+    upload = await get_confirmed_upload(input.upload_token, "student_attachment", application_id)
+    attachment = await student_app_service.record_student_attachment(
+        user_id=application.user_id,
+        application_id=application_id,
+        document_type=upload["context"]["name"],
+        file_name=upload["file_name"],
+        file_path=upload["file_path"],
+    )
+    return {"message": "Attachment created successfully", "data": attachment}
+
 @router.delete("/my-student-attachments/{attachment_id}", response_model=StudentAttachmentOutSuccess, tags=["My Student Application"])
 async def delete_student_attachment(
     attachment_id: int,
@@ -22,6 +22,7 @@ from src.api.training.dependencies import (
     get_training_session,
 )
 from src.api.user.schemas import UserListOutSuccess
+from src.helper.cache import CacheTag, cache_response
 from src.helper.schemas import BaseOutFail, ErrorMessage
 
 router = APIRouter()
@@ -29,6 +30,7 @@ router = APIRouter()
 
 # Trainings
 @router.get("/trainings", response_model=TrainingsPageOutSuccess, tags=["Training"])
+@cache_response(CacheTag.TRAININGS)
 async def list_trainings(
     filters: Annotated[TrainingFilter, Query(...)],
     training_service: TrainingService = Depends(),
@@ -100,6 +102,7 @@ async def delete_training_route(
 
 # Training Sessions
 @router.get("/training-sessions", response_model=TrainingSessionsPageOutSuccess, tags=["Training Session"])
+@cache_response(CacheTag.TRAINING_SESSIONS)
 async def list_training_sessions(
     filters: Annotated[TrainingSessionFilter, Query(...)],
     training_service: TrainingService = Depends(),
@@ -109,6 +112,7 @@ async def list_training_sessions(
 
 
 @router.get("/trainings/{training_id}/sessions", response_model=TrainingSessionsPageOutSuccess, tags=["Training Session"])
+@cache_response(CacheTag.TRAININGS, CacheTag.TRAINING_SESSIONS)
 async def get_training_sessions_by_training_id(
     training_id: str,
     filters: Annotated[TrainingSessionFilter, Query(...)],
@@ -4,7 +4,7 @@ from fastapi import UploadFile
 from pydantic import BaseModel, EmailStr, Field
 from src.api.job_offers.models import ApplicationStatusEnum
 from src.api.training.models import DurationEnum, ReclamationPriorityEnum, ReclamationStatusEnum, TrainingSessionStatusEnum, TrainingStatusEnum, TrainingTypeEnum
-from src.helper.schemas import BaseOutPage, BaseOutSuccess
+from src.helper.schemas import BaseOutPage, BaseOutSuccess, ExportFormat
 
 class StrengthInput(BaseModel):
     image: str
@@ -196,9 +196,14 @@ class StudentApplicationFilter(BaseModel):
     is_paid: Optional[bool] = None
     status: Optional[str] = None
     payment_method: Optional[str] = None
+    attachment_text: Optional[str] = None  # Recherche dans le texte des pièces jointes PDF
     order_by: Literal["created_at"] = "created_at"
     asc: Literal["asc", "desc"] = "asc"
 
+
+class StudentApplicationExportFilter(StudentApplicationFilter):
+    format: ExportFormat = "csv"
+
 # Student Application and Attachments
 class StudentAttachmentInput(BaseModel):
     name: str
@@ -214,6 +219,8 @@ class StudentAttachmentOut(BaseModel):
     application_id: int
     document_type: str
     file_path: str
+    processing_status: Optional[str] = None
+    page_count: Optional[int] = None
     created_at: datetime
     updated_at: datetime
     
@@ -6,6 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select, or_
 
 from src.database import get_session_async
+from src.helper.query import FilteredQuery
 from src.api.training.models import (
     Reclamation,
     ReclamationType,
@@ -67,121 +68,69 @@ class ReclamationService:
 
     async def list_user_reclamations(self, user_id: str, filters: ReclamationFilter) -> Tuple[List[Reclamation], int]:
         """List reclamations for a specific user with pagination"""
-        statement = (
+        query = FilteredQuery(
             select(Reclamation)
             .join(StudentApplication, StudentApplication.application_number == Reclamation.application_number)
             .where(StudentApplication.user_id == user_id, Reclamation.delete_at.is_(None))
         )
-        
-        
-        count_query = (
-            select(func.count(Reclamation.id))
-            .join(StudentApplication, StudentApplication.application_number == Reclamation.application_number)
-            .where(StudentApplication.user_id == user_id, Reclamation.delete_at.is_(None))
-        )
 
-        # Apply search filter
-        if filters.search is not None:
-            search_filter = or_(
-                Reclamation.subject.contains(filters.search),
-                Reclamation.description.contains(filters.search),
-                Reclamation.reclamation_number.contains(filters.search),
-                Reclamation.application_number.contains(filters.search)
-            )
-            statement = statement.where(search_filter)
-            count_query = count_query.where(search_filter)
+        self._apply_filters(query, filters)
+        self._apply_ordering(query, filters)
 
-        # Apply status filter
-        if filters.status is not None:
-            statement = statement.where(Reclamation.status == filters.status)
-            count_query = count_query.where(Reclamation.status == filters.status)
+        return await query.paginate(self.session, filters.page, filters.page_size)
 
-        # Apply priority filter
-        if filters.priority is not None:
-            statement = statement.where(Reclamation.priority == filters.priority)
-            count_query = count_query.where(Reclamation.priority == filters.priority)
+    async def list_all_reclamations(self, filters: ReclamationFilter) -> Tuple[List[Reclamation], int]:
+        """List all reclamations for admin with pagination and filtering"""
+        query = FilteredQuery(select(Reclamation).where(Reclamation.delete_at.is_(None)))
 
-        # Apply ordering
-        if filters.order_by == "created_at":
-            statement = statement.order_by(
-                Reclamation.created_at if filters.asc == "asc" else Reclamation.created_at.desc()
-            )
-        elif filters.order_by == "subject":
-            statement = statement.order_by(
-                Reclamation.subject if filters.asc == "asc" else Reclamation.subject.desc()
-            )
-        elif filters.order_by == "priority":
-            statement = statement.order_by(
-                Reclamation.priority if filters.asc == "asc" else Reclamation.priority.desc()
-            )
+        self._apply_filters(query, filters)
 
-        # Get total count
-        total_count = (await self.session.execute(count_query)).scalar_one()
+        # Apply admin filters
+        if filters.reclamation_type is not None:
+            query.where(Reclamation.reclamation_type == filters.reclamation_type)
+            
+        if filters.admin_id is not None:
+            query.where(Reclamation.admin_id == filters.admin_id)
+            
+        if filters.application_number is not None:
+            query.where(Reclamation.application_number == filters.application_number)
 
-        # Apply pagination
-        statement = statement.offset((filters.page - 1) * filters.page_size).limit(filters.page_size)
-        result = await self.session.execute(statement)
-        return result.scalars().all(), total_count
+        self._apply_ordering(query, filters)
 
-    async def list_all_reclamations(self, filters: ReclamationFilter) -> Tuple[List[Reclamation], int]:
-        """List all reclamations for admin with pagination and filtering"""
-        statement = select(Reclamation).where(Reclamation.delete_at.is_(None))
-        count_query = select(func.count(Reclamation.id)).where(Reclamation.delete_at.is_(None))
+        return await query.paginate(self.session, filters.page, filters.page_size)
 
-        # Apply search filter
+    @staticmethod
+    def _apply_filters(query: FilteredQuery, filters: ReclamationFilter) -> None:
+        """Apply the search, status and priority filters shared by user and admin lists"""
         if filters.search is not None:
-            search_filter = or_(
+            query.where(or_(
                 Reclamation.subject.contains(filters.search),
                 Reclamation.description.contains(filters.search),
                 Reclamation.reclamation_number.contains(filters.search),
                 Reclamation.application_number.contains(filters.search)
-            )
-            statement = statement.where(search_filter)
-            count_query = count_query.where(search_filter)
+            ))
 
-        # Apply filters
         if filters.status is not None:
-            statement = statement.where(Reclamation.status == filters.status)
-            count_query = count_query.where(Reclamation.status == filters.status)
-            
+            query.where(Reclamation.status == filters.status)
+
         if filters.priority is not None:
-            statement = statement.where(Reclamation.priority == filters.priority)
-            count_query = count_query.where(Reclamation.priority == filters.priority)
-            
-        if filters.reclamation_type is not None:
-            statement = statement.where(Reclamation.reclamation_type == filters.reclamation_type)
-            count_query = count_query.where(Reclamation.reclamation_type == filters.reclamation_type)
-            
-        if filters.admin_id is not None:
-            statement = statement.where(Reclamation.admin_id == filters.admin_id)
-            count_query = count_query.where(Reclamation.admin_id == filters.admin_id)
-            
-        if filters.application_number is not None:
-            statement = statement.where(Reclamation.application_number == filters.application_number)
-            count_query = count_query.where(Reclamation.application_number == filters.application_number)
+            query.where(Reclamation.priority == filters.priority)
 
-        # Apply ordering
+    @staticmethod
+    def _apply_ordering(query: FilteredQuery, filters: ReclamationFilter) -> None:
         if filters.order_by == "created_at":
-            statement = statement.order_by(
+            query.order_by(
                 Reclamation.created_at if filters.asc == "asc" else Reclamation.created_at.desc()
             )
         elif filters.order_by == "subject":
-            statement = statement.order_by(
+            query.order_by(
                 Reclamation.subject if filters.asc == "asc" else Reclamation.subject.desc()
             )
         elif filters.order_by == "priority":
-            statement = statement.order_by(
+            query.order_by(
                 Reclamation.priority if filters.asc == "asc" else Reclamation.priority.desc()
             )
 
-        # Get total count
-        total_count = (await self.session.execute(count_query)).scalar_one()
-
-        # Apply pagination
-        statement = statement.offset((filters.page - 1) * filters.page_size).limit(filters.page_size)
-        result = await self.session.execute(statement)
-        return result.scalars().all(), total_count
-
     async def update_reclamation_status(self, reclamation: Reclamation, data: ReclamationAdminUpdateInput) -> Reclamation:
         """Update reclamation status and other admin fields"""
         for key, value in data.model_dump(exclude_none=True).items():
@@ -1,11 +1,12 @@
 from typing import List, Optional, Tuple
 from datetime import datetime, timezone
 from fastapi import Depends
-from sqlalchemy import func
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select, or_
 
 from src.database import get_session_async
+from src.helper.cache import CacheTag, invalidate_cache_tags
+from src.helper.query import FilteredQuery
 from src.api.training.models import Specialty
 from src.api.training.schemas import (
     SpecialtyCreateInput,
@@ -23,6 +24,7 @@ class SpecialtyService:
         self.session.add(specialty)
         await self.session.commit()
         await self.session.refresh(specialty)
+        await invalidate_cache_tags(CacheTag.SPECIALTIES)
         return specialty
 
     async def get_specialty_by_id(self, specialty_id: int) -> Optional[Specialty]:
@@ -45,35 +47,27 @@ class SpecialtyService:
 
     async def list_specialties(self, filters: SpecialtyFilter) -> Tuple[List[Specialty], int]:
         """List specialties with pagination and filtering"""
-        statement = select(Specialty).where(Specialty.delete_at.is_(None))
-        count_query = select(func.count(Specialty.id)).where(Specialty.delete_at.is_(None))
+        query = FilteredQuery(select(Specialty).where(Specialty.delete_at.is_(None)))
 
         # Apply search filter
         if filters.search is not None:
-            search_filter = or_(
+            query.where(or_(
                 Specialty.name.contains(filters.search),
                 Specialty.description.contains(filters.search)
-            )
-            statement = statement.where(search_filter)
-            count_query = count_query.where(search_filter)
+            ))
 
         # Apply ordering
         if filters.order_by == "created_at":
-            statement = statement.order_by(
+            query.order_by(
                 Specialty.created_at if filters.asc == "asc" else Specialty.created_at.desc()
             )
         elif filters.order_by == "name":
-            statement = statement.order_by(
+            query.order_by(
                 Specialty.name if filters.asc == "asc" else Specialty.name.desc()
             )
 
-        # Get total count
-        total_count = (await self.session.execute(count_query)).scalar_one()
-
-        # Apply pagination
-        statement = statement.offset((filters.page - 1) * filters.page_size).limit(filters.page_size)
-        result = await self.session.execute(statement)
-        return result.scalars().all(), total_count
+        # Fetch the page and the total count in one statement
+        return await query.paginate(self.session, filters.page, filters.page_size)
 
     async def update_specialty(self, specialty: Specialty, data: SpecialtyUpdateInput) -> Specialty:
         """Update specialty"""
@@ -82,6 +76,7 @@ class SpecialtyService:
         self.session.add(specialty)
         await self.session.commit()
         await self.session.refresh(specialty)
+        await invalidate_cache_tags(CacheTag.SPECIALTIES)
         return specialty
 
     async def delete_specialty(self, specialty: Specialty) -> Specialty:
@@ -89,6 +84,7 @@ class SpecialtyService:
         specialty.delete_at = datetime.now(timezone.utc)
         self.session.add(specialty)
         await self.session.commit()
+        await invalidate_cache_tags(CacheTag.SPECIALTIES)
         return specialty
 
     async def get_all_active_specialties(self) -> List[Specialty]:
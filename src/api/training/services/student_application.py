@@ -1,4 +1,4 @@
-import sys
+import logging
 from typing import List, Optional, Tuple
 from datetime import date, datetime, timezone
 from fastapi import Depends, HTTPException ,status
@@ -21,12 +21,16 @@ from src.api.training.schemas import (
 from src.api.user.service import UserService
 from src.api.user.models import User, UserTypeEnum
 from src.api.payments.schemas import PaymentInitInput
+from src.api.storage.models import DocumentStatusEnum, document_search_query, document_search_vector
+from src.api.storage.service import BlobStoreService
 # Importation différée pour éviter l'importation circulaire
 # from src.api.payments.service import PaymentService
 from src.config import settings
-from src.helper.file_helper import FileHelper
+from src.helper.cache import CacheTag, invalidate_cache_tags
+from src.helper.documents import process_attachment_document
 from src.helper.moodle import MoodleService
 from src.helper.notifications import SendPasswordNotification
+from src.helper.query import FilteredQuery
 from src.helper.schemas import BaseOutFail, ErrorMessage
 from src.helper.utils import clean_payment_description
 
@@ -44,6 +48,8 @@ except Exception:
 import secrets
 import string
 
+logger = logging.getLogger(__name__)
+
 def generate_password(length: int = 12) -> str:
     alphabet = string.ascii_letters + string.digits + string.punctuation
     password = ''.join(secrets.choice(alphabet) for _ in range(length))
@@ -256,7 +262,7 @@ class StudentApplicationService:
         try :
             payment = await payment_service.initiate_payment(payment_input)
         except Exception as e:
-            print(e.with_traceback(sys.exc_info()[2]))
+            logger.exception("Payment initiation error: %s", e)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=BaseOutFail(
@@ -324,7 +330,7 @@ class StudentApplicationService:
             payment = await payment_service.initiate_payment(payment_input)
             return payment
         except Exception as e:
-            print(e.with_traceback(sys.exc_info()[2]))
+            logger.exception("Payment initiation error: %s", e)
             return {"success": False, "message": str(e)}
 
     async def get_student_application_by_id(self, application_id: int,user_id : Optional[str]=None) -> Optional[StudentApplication]:
@@ -369,36 +375,23 @@ class StudentApplicationService:
         result = await self.session.execute(statement)
         return result.scalars().first()
     
-    async def get_student_application(self, filters: StudentApplicationFilter, user_id: Optional[str] = None) -> Tuple[List[StudentApplicationOut], int]:
-        """Get student applications with filtering"""
-        statement = (
-            select(StudentApplication)
+    @staticmethod
+    def _filter_student_applications(statement, filters: StudentApplicationFilter, user_id: Optional[str] = None) -> FilteredQuery:
+        """Join, filter and order `statement` the way the application lists do."""
+        query = FilteredQuery(
+            statement
             .join(User, User.id == StudentApplication.user_id)
             .join(Training, Training.id == StudentApplication.training_id)
             .join(TrainingSession, TrainingSession.id == StudentApplication.target_session_id)
             .where(StudentApplication.delete_at.is_(None))
-            .options(joinedload(StudentApplication.training))  # AJOUT : Eager loading pour éviter lazy load
-            .options(joinedload(StudentApplication.training_session))
-            .options(joinedload(StudentApplication.user))
-            .options(selectinload(StudentApplication.attachments))
-        )
-        
-        count_query = (
-            select(func.count(StudentApplication.id))
-            .join(User, User.id == StudentApplication.user_id)
-            .join(Training, Training.id == StudentApplication.training_id)         
-            .join(TrainingSession, TrainingSession.id == StudentApplication.target_session_id)
-            .where(StudentApplication.delete_at.is_(None))
         )
         
         if user_id is not None:
-            statement = statement.where(StudentApplication.user_id == user_id)
-            count_query = count_query.where(StudentApplication.user_id == user_id)
+            query.where(StudentApplication.user_id == user_id)
 
         # Apply payment_method filter if provided
         if filters.payment_method:
-            statement = statement.where(StudentApplication.payment_method == filters.payment_method)
-            count_query = count_query.where(StudentApplication.payment_method == filters.payment_method)
+            query.where(StudentApplication.payment_method == filters.payment_method)
 
         # Filtrage par paiement
         payment_filter = filters.is_paid if filters.is_paid is not None else None
@@ -418,8 +411,7 @@ class StudentApplicationService:
                     ),
                     StudentApplication.payment_method == "TRANSFER"
                 )
-                statement = statement.where(paid_condition)
-                count_query = count_query.where(paid_condition)
+                query.where(paid_condition)
             else:
                 # "Unpaid": ONLINE not yet APPROVED — excludes TRANSFER
                 unpaid_condition = and_(
@@ -429,8 +421,7 @@ class StudentApplicationService:
                         StudentApplication.payment_method.is_(None)
                     )
                 )
-                statement = statement.where(unpaid_condition)
-                count_query = count_query.where(unpaid_condition)
+                query.where(unpaid_condition)
 
         if filters.search is not None:
             like_clause = or_(
@@ -440,22 +431,28 @@ class StudentApplicationService:
                 Training.title.contains(filters.search),
                 Training.presentation.contains(filters.search),
             )
-            statement = statement.where(like_clause)
-            count_query = count_query.where(like_clause)
+            query.where(like_clause)
 
         if filters.status is not None:
-            statement = statement.where(StudentApplication.status == filters.status)
-            count_query = count_query.where(StudentApplication.status == filters.status)
+            query.where(StudentApplication.status == filters.status)
             
         if filters.training_id is not None:
-            statement = statement.where(StudentApplication.training_id == filters.training_id)
-            count_query = count_query.where(StudentApplication.training_id == filters.training_id)
+            query.where(StudentApplication.training_id == filters.training_id)
             
         if filters.training_session_id is not None:
-            statement = statement.where(StudentApplication.target_session_id == filters.training_session_id)
-            count_query = count_query.where(StudentApplication.target_session_id == filters.training_session_id)
-
-        total_count = (await self.session.execute(count_query)).scalar_one()
+            query.where(StudentApplication.target_session_id == filters.training_session_id)
+
+        # Full-text search in the text extracted from the attachments
+        if filters.attachment_text:
+            query.where(
+                select(StudentAttachment.id)
+                .where(
+                    StudentAttachment.application_id == StudentApplication.id,
+                    StudentAttachment.delete_at.is_(None),
+                    document_search_vector(StudentAttachment.text_content).op("@@")(document_search_query(filters.attachment_text)),
+                )
+                .exists()
+            )
 
         # Prioritize TRANSFER (payment_method == "TRANSFER" first)
         priority = case(
@@ -464,15 +461,49 @@ class StudentApplicationService:
         )
 
         if filters.order_by == "created_at":
-            statement = statement.order_by(priority, StudentApplication.created_at if filters.asc == "asc" else StudentApplication.created_at.desc())
+            query.order_by(priority, StudentApplication.created_at if filters.asc == "asc" else StudentApplication.created_at.desc())
         elif filters.order_by == "application_number":
-            statement = statement.order_by(priority, StudentApplication.application_number if filters.asc == "asc" else StudentApplication.application_number.desc())
+            query.order_by(priority, StudentApplication.application_number if filters.asc == "asc" else StudentApplication.application_number.desc())
         elif filters.order_by == "status":
-            statement = statement.order_by(priority, StudentApplication.status if filters.asc == "asc" else StudentApplication.status.desc())
+            query.order_by(priority, StudentApplication.status if filters.asc == "asc" else StudentApplication.status.desc())
+
+        return query
+
+    def export_student_applications_statement(self, filters: StudentApplicationFilter, user_id: Optional[str] = None):
+        """Select the exported columns of the applications matching the list filters."""
+        query = self._filter_student_applications(
+            select(
+                StudentApplication.application_number.label("application_number"),
+                StudentApplication.created_at.label("created_at"),
+                StudentApplication.status.label("status"),
+                StudentApplication.payment_method.label("payment_method"),
+                User.first_name.label("first_name"),
+                User.last_name.label("last_name"),
+                User.email.label("email"),
+                Training.title.label("training"),
+                TrainingSession.start_date.label("session_start_date"),
+                StudentApplication.registration_fee.label("registration_fee"),
+                StudentApplication.training_fee.label("training_fee"),
+                StudentApplication.currency.label("currency"),
+            ).select_from(StudentApplication),
+            filters,
+            user_id,
+        )
+        return query.order_by(StudentApplication.id).statement
 
-        statement = statement.offset((filters.page - 1) * filters.page_size).limit(filters.page_size)
-        result = await self.session.execute(statement)
-        applications = result.scalars().all()
+    async def get_student_application(self, filters: StudentApplicationFilter, user_id: Optional[str] = None) -> Tuple[List[StudentApplicationOut], int]:
+        """Get student applications with filtering"""
+        query = self._filter_student_applications(
+            select(StudentApplication)
+            .options(joinedload(StudentApplication.training))  # AJOUT : Eager loading pour éviter lazy load
+            .options(joinedload(StudentApplication.training_session))
+            .options(joinedload(StudentApplication.user))
+            .options(selectinload(StudentApplication.attachments)),
+            filters,
+            user_id,
+        )
+
+        applications, total_count = await query.paginate(self.session, filters.page, filters.page_size)
 
         # Convert to Pydantic models pour éviter les erreurs de validation
         from src.api.training.schemas import StudentAttachmentOut
@@ -549,6 +580,7 @@ class StudentApplicationService:
         
         await self.session.commit()
         await self.session.refresh(participant)
+        await invalidate_cache_tags(CacheTag.TRAINING_SESSIONS)
 
         # Enrol on Moodle (best-effort)
         
@@ -617,7 +649,15 @@ class StudentApplicationService:
         # Si payment_method est TRANSFER, le document_type sera le nom fourni (ex: BANK_TRANSFER_RECEIPT, CV, etc.)
         # Si payment_method est ONLINE, le document_type sera le nom fourni (ex: CV, DIPLOMA, etc.)
         document_type = input.name
+        url = await BlobStoreService(self.session).store_upload(input.file)
+        
+        # Extraire le nom du fichier
+        file_name = input.file.filename if hasattr(input.file, 'filename') else input.name
         
+        return await self.record_student_attachment(user_id, application_id, document_type, file_name, url)
+
+    async def record_student_attachment(self, user_id: str, application_id: int, document_type: str, file_name: str, file_path: str) -> StudentAttachment:
+        """Record an uploaded file as the attachment of its type, replacing the previous one"""
         # Replace existing attachment of same type
         existing_stmt = (
             select(StudentAttachment)
@@ -627,25 +667,22 @@ class StudentApplicationService:
         existing_res = await self.session.execute(existing_stmt)
         existing = existing_res.scalars().first()
         if existing is not None:
-            FileHelper.delete_file(existing.file_path)
+            await BlobStoreService(self.session).release(existing.file_path)
             await self.session.delete(existing)
             await self.session.commit()
 
-        url, _, _ = await FileHelper.upload_file(input.file, f"/student-applications/{application_id}", input.name)
-        
-        # Extraire le nom du fichier
-        file_name = input.file.filename if hasattr(input.file, 'filename') else input.name
-        
         attachment = StudentAttachment(
             application_id=application_id, 
-            file_path=url, 
+            file_path=file_path, 
             attachment_type=document_type,  # Remplir attachment_type
             document_type=document_type,  # Remplir document_type aussi
-            file_name=file_name
+            file_name=file_name,
+            processing_status=DocumentStatusEnum.PENDING,
         )
         self.session.add(attachment)
         await self.session.commit()
         await self.session.refresh(attachment)
+        process_attachment_document.delay("student", attachment.id)
         return attachment
 
     async def dissociate_student_attachment(self, application_id: int) -> None:
@@ -679,10 +716,25 @@ class StudentApplicationService:
         result = await self.session.execute(statement)
         return result.scalars().all()
 
+    async def list_attachments_by_session(self, session_id: str) -> List[Tuple[StudentApplication, StudentAttachment]]:
+        """List the attachments of every application to a training session"""
+        statement = (
+            select(StudentApplication, StudentAttachment)
+            .join(StudentAttachment, StudentAttachment.application_id == StudentApplication.id)
+            .where(
+                StudentApplication.target_session_id == session_id,
+                StudentApplication.delete_at.is_(None),
+                StudentAttachment.delete_at.is_(None),
+            )
+            .order_by(StudentApplication.id, StudentAttachment.created_at)
+        )
+        result = await self.session.execute(statement)
+        return result.all()
+
     async def delete_student_attachment(self, attachment: StudentAttachment) -> StudentAttachment:
         """Delete student attachment"""
-        FileHelper.delete_file(attachment.file_path)
-        self.session.delete(attachment)
+        await BlobStoreService(self.session).release(attachment.file_path)
+        await self.session.delete(attachment)
         await self.session.commit()
         return attachment
     
@@ -857,7 +909,7 @@ class StudentApplicationService:
             payment = await payment_service.initiate_payment(payment_input)
             
         except Exception as e:
-            print(e.with_traceback(sys.exc_info()[2]))
+            logger.exception("Payment initiation error: %s", e)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=BaseOutFail(
@@ -1,7 +1,6 @@
 from typing import List, Optional, Tuple
 from datetime import datetime, timezone
 from fastapi import Depends
-from sqlalchemy import func
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select, or_
 
@@ -20,7 +19,9 @@ from src.api.training.schemas import (
     TrainingSessionUpdateInput,
     TrainingSessionFilter,
 )
+from src.helper.cache import CacheTag, invalidate_cache_tags
 from src.helper.moodle import MoodleService
+from src.helper.query import FilteredQuery
 
 try:
     from src.helper.moodle import moodle_create_course_task
@@ -38,6 +39,7 @@ class TrainingService:
         self.session.add(training)
         await self.session.commit()
         await self.session.refresh(training)
+        await invalidate_cache_tags(CacheTag.TRAININGS)
         return training
 
     async def update_training(self, training: Training, data: TrainingUpdateInput) -> Training:
@@ -47,6 +49,7 @@ class TrainingService:
         self.session.add(training)
         await self.session.commit()
         await self.session.refresh(training)
+        await invalidate_cache_tags(CacheTag.TRAININGS)
         return training
 
     async def get_training_by_id(self, training_id: str) -> Optional[Training]:
@@ -57,46 +60,38 @@ class TrainingService:
 
     async def list_trainings(self, filters: TrainingFilter) -> Tuple[List[Training], int]:
         """List trainings with pagination and filtering"""
-        statement = select(Training).where(Training.delete_at.is_(None))
-        count_query = select(func.count(Training.id)).where(Training.delete_at.is_(None))
+        query = FilteredQuery(select(Training).where(Training.delete_at.is_(None)))
 
         # Apply search filter
         if filters.search is not None:
-            like_clause = or_(
+            query.where(or_(
                 Training.title.contains(filters.search),
                 Training.presentation.contains(filters.search),
                 Training.program.contains(filters.search),
                 Training.target_skills.contains(filters.search),
-            )
-            statement = statement.where(like_clause)
-            count_query = count_query.where(like_clause)
+            ))
 
         # Apply filters
         if filters.status is not None:
-            statement = statement.where(Training.status == filters.status)
-            count_query = count_query.where(Training.status == filters.status)
+            query.where(Training.status == filters.status)
 
         if filters.specialty_id is not None:
-            statement = statement.where(Training.specialty_id == filters.specialty_id)
-            count_query = count_query.where(Training.specialty_id == filters.specialty_id)
+            query.where(Training.specialty_id == filters.specialty_id)
 
         # Apply ordering
         if filters.order_by == "created_at":
-            statement = statement.order_by(Training.created_at if filters.asc == "asc" else Training.created_at.desc())
+            query.order_by(Training.created_at if filters.asc == "asc" else Training.created_at.desc())
         elif filters.order_by == "title":
-            statement = statement.order_by(Training.title if filters.asc == "asc" else Training.title.desc())
+            query.order_by(Training.title if filters.asc == "asc" else Training.title.desc())
 
-        total_count = (await self.session.execute(count_query)).scalar_one()
-
-        statement = statement.offset((filters.page - 1) * filters.page_size).limit(filters.page_size)
-        result = await self.session.execute(statement)
-        return result.scalars().all(), total_count
+        return await query.paginate(self.session, filters.page, filters.page_size)
 
     async def delete_training(self, training: Training) -> Training:
         """Soft delete training"""
         training.delete_at = datetime.now(timezone.utc)
         self.session.add(training)
         await self.session.commit()
+        await invalidate_cache_tags(CacheTag.TRAININGS)
         return training
 
     # Training Session CRUD Operations
@@ -133,6 +128,7 @@ class TrainingService:
         except Exception:
             pass
             
+        await invalidate_cache_tags(CacheTag.TRAINING_SESSIONS)
         return session
 
     async def update_training_session(self, training_session: TrainingSession, data: TrainingSessionUpdateInput) -> TrainingSession:
@@ -142,6 +138,7 @@ class TrainingService:
         self.session.add(training_session)
         await self.session.commit()
         await self.session.refresh(training_session)
+        await invalidate_cache_tags(CacheTag.TRAINING_SESSIONS)
         return training_session
 
     async def get_training_session_by_id(self, session_id: str) -> Optional[TrainingSession]:
@@ -152,41 +149,34 @@ class TrainingService:
 
     async def list_training_sessions(self, filters: TrainingSessionFilter) -> Tuple[List[TrainingSession], int]:
         """List training sessions with pagination and filtering"""
-        statement = select(TrainingSession).where(TrainingSession.delete_at.is_(None))
-        count_query = select(func.count(TrainingSession.id)).where(TrainingSession.delete_at.is_(None))
+        query = FilteredQuery(select(TrainingSession).where(TrainingSession.delete_at.is_(None)))
 
         # Apply filters
         if filters.training_id is not None:
-            statement = statement.where(TrainingSession.training_id == filters.training_id)
-            count_query = count_query.where(TrainingSession.training_id == filters.training_id)
+            query.where(TrainingSession.training_id == filters.training_id)
 
         if filters.center_id is not None:
-            statement = statement.where(TrainingSession.center_id == filters.center_id)
-            count_query = count_query.where(TrainingSession.center_id == filters.center_id)
+            query.where(TrainingSession.center_id == filters.center_id)
 
         if filters.status is not None:
-            statement = statement.where(TrainingSession.status == filters.status)
-            count_query = count_query.where(TrainingSession.status == filters.status)
+            query.where(TrainingSession.status == filters.status)
 
         # Apply ordering
         if filters.order_by == "created_at":
-            statement = statement.order_by(TrainingSession.created_at if filters.asc == "asc" else TrainingSession.created_at.desc())
+            query.order_by(TrainingSession.created_at if filters.asc == "asc" else TrainingSession.created_at.desc())
         elif filters.order_by == "registration_deadline":
-            statement = statement.order_by(TrainingSession.registration_deadline if filters.asc == "asc" else TrainingSession.registration_deadline.desc())
+            query.order_by(TrainingSession.registration_deadline if filters.asc == "asc" else TrainingSession.registration_deadline.desc())
         elif filters.order_by == "start_date":
-            statement = statement.order_by(TrainingSession.start_date if filters.asc == "asc" else TrainingSession.start_date.desc())
+            query.order_by(TrainingSession.start_date if filters.asc == "asc" else TrainingSession.start_date.desc())
 
-        total_count = (await self.session.execute(count_query)).scalar_one()
-
-        statement = statement.offset((filters.page - 1) * filters.page_size).limit(filters.page_size)
-        result = await self.session.execute(statement)
-        return result.scalars().all(), total_count
+        return await query.paginate(self.session, filters.page, filters.page_size)
 
     async def delete_training_session(self, training_session: TrainingSession) -> TrainingSession:
         """Soft delete training session"""
         training_session.delete_at = datetime.now(timezone.utc)
         self.session.add(training_session)
         await self.session.commit()
+        await invalidate_cache_tags(CacheTag.TRAINING_SESSIONS)
         return training_session
     
     
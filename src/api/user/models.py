@@ -3,7 +3,8 @@ from datetime import date, datetime, timezone
 from src.helper.model import CustomBaseUUIDModel, CustomBaseModel
 from typing import List, Optional, TYPE_CHECKING
 from enum import Enum
-from sqlalchemy import TIMESTAMP, event
+from sqlalchemy import TIMESTAMP, Column, event
+from sqlalchemy.dialects.postgresql import JSONB
 
 if TYPE_CHECKING:
     from src.api.cabinet.models import CabinetApplication
@@ -174,6 +175,7 @@ class User(CustomBaseUUIDModel, table=True):
     email: str | None = Field(nullable=True, index=True, unique=True)
     password: str = Field(nullable=False)
     picture: str | None = Field(nullable=True)
+    picture_variants: dict | None = Field(default=None, sa_column=Column(JSONB, nullable=True))
     status: str = Field(default=UserStatusEnum.ACTIVE)
     lang: str = Field(default="en")
     web_token: str | None = Field(nullable=True)
@@ -2,7 +2,7 @@ from pydantic import BaseModel, Field, AliasChoices
 from typing import List, Optional, Literal
 from datetime import date, datetime
 from src.api.user.models import CivilityEnum, UserStatusEnum, UserTypeEnum
-from src.helper.schemas import BaseOutPage, BaseOutSuccess
+from src.helper.schemas import BaseOutPage, BaseOutSuccess, ImageSources
 
 
 
@@ -62,6 +62,7 @@ class UserOut(BaseModel):
     email: Optional[str] = None
     address : Optional[str] = None
     picture :  Optional[str] = None 
+    picture_sources : ImageSources = Field(default=None, validation_alias=AliasChoices("picture_variants", "picture_sources"))
     status : str 
     lang : str 
     created_at : datetime
@@ -102,6 +103,7 @@ class UserSimpleOut(BaseModel):
     fix_number: str | None 
     email: str | None 
     picture : str | None 
+    picture_sources : ImageSources = Field(default=None, validation_alias=AliasChoices("picture_variants", "picture_sources"))
     status : str
     lang : str 
     web_token : str | None 
@@ -1,7 +1,6 @@
 from datetime import date, datetime, timezone
 from typing import List
 from fastapi import Depends
-from sqlalchemy import func
 from sqlalchemy.orm import selectinload , aliased, with_expression
 from src.api.user.schemas import UpdateUserInput, UserFilter
 from src.database import get_session_async
@@ -13,7 +12,9 @@ from passlib.context import CryptContext
 import re
 
 from src.helper.notifications import SendPasswordNotification
+from src.helper.images import delete_image_variants, process_image_variants
 from src.helper.moodle import MoodleService
+from src.helper.query import FilteredQuery
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -24,30 +25,15 @@ class UserService:
 
     async def get(self,user_filter : UserFilter):
         
-        statement = (
+        query = FilteredQuery(
             select(
                 User
             )
             .where(User.delete_at.is_(None))
         )
 
-        count_query = (
-            select(func.count(User.id))
-            .where(User.delete_at.is_(None))
-        )
-
         if user_filter.search is not None:
-            statement = statement.where(
-                or_(
-                    User.first_name.contains(user_filter.search),
-                    User.last_name.contains(user_filter.search),
-                    User.email.contains(user_filter.search),
-                    User.mobile_number.contains(user_filter.search),
-                    User.fix_number.contains(user_filter.search),
-                    User.country_code.contains(user_filter.search),
-                )
-            )
-            count_query = count_query.where(
+            query.where(
                 or_(
                     User.first_name.contains(user_filter.search),
                     User.last_name.contains(user_filter.search),
@@ -59,43 +45,34 @@ class UserService:
             )
         
         if  user_filter.user_type is not None:
-            statement = statement.where(User.user_type == user_filter.user_type)
-            count_query = count_query.where(User.user_type == user_filter.user_type)
+            query.where(User.user_type == user_filter.user_type)
         
         if user_filter.country_code is not None:
-            statement = statement.where(User.country_code == user_filter.country_code)
-            count_query = count_query.where(User.country_code == user_filter.country_code)
+            query.where(User.country_code == user_filter.country_code)
 
         if user_filter.order_by == "created_at":
             if user_filter.asc == "asc":
-                statement = statement.order_by(User.created_at)
+                query.order_by(User.created_at)
             else:
-                statement = statement.order_by(User.created_at.desc())
+                query.order_by(User.created_at.desc())
         elif user_filter.order_by == "last_login":
             if user_filter.asc == "asc":
-                statement = statement.order_by(User.last_login)
+                query.order_by(User.last_login)
             else:
-                statement = statement.order_by(User.last_login.desc())
+                query.order_by(User.last_login.desc())
         elif user_filter.order_by == "first_name":
             if user_filter.asc == "asc":
-                statement = statement.order_by(User.first_name)
+                query.order_by(User.first_name)
             else:
-                statement = statement.order_by(User.first_name.desc())
+                query.order_by(User.first_name.desc())
         elif user_filter.order_by == "last_name":
             if user_filter.asc == "asc":
-                statement = statement.order_by(User.last_name)
+                query.order_by(User.last_name)
             else:
-                statement = statement.order_by(User.last_name.desc())
+                query.order_by(User.last_name.desc())
 
-        total_count = await self.session.execute(count_query)
-        total_count = total_count.scalar_one()
-
-        if user_filter.page_size > 0:
-            statement = statement.offset((user_filter.page - 1) * user_filter.page_size).limit(
-                user_filter.page_size
-            )
-        result = await self.session.execute(statement)
-        users = result.scalars().all()
+        # A page_size of 0 returns every user
+        users, total_count = await query.paginate(self.session, user_filter.page, user_filter.page_size)
 
         return users, total_count
 
@@ -227,10 +204,14 @@ class UserService:
         statement = select(User).where(User.id == user_id)
         result = await self.session.execute(statement)
         user = result.scalars().one()
+        await delete_image_variants(user.picture_variants)
         user.picture = picture
+        user.picture_variants = None
         self.session.add(user)
         await self.session.commit()
         await self.session.refresh(user)
+        if picture:
+            process_image_variants.delay("user", user.id, picture)
         return user
 
 
@@ -1,9 +1,20 @@
 import functools
 import ssl
+from typing import Optional
 from celery import current_app as current_celery_app, shared_task
 from celery.result import AsyncResult
+from celery.signals import (
+    before_task_publish,
+    celeryd_init,
+    setup_logging,
+    task_postrun,
+    task_prerun,
+    worker_process_init,
+    worker_process_shutdown,
+)
 from celery.utils.time import get_exponential_backoff_interval
 from src.config import settings
+from src.helper.logs import TASK_CORRELATION_HEADER, configure_logging, correlation_id
 
 ssl_options = {
     "ssl_cert_reqs": ssl.CERT_REQUIRED,  # ⚠️ Insecure, use CERT_REQUIRED in production
@@ -23,19 +34,21 @@ def create_celery():
         task_acks_late=True,
         worker_prefetch_multiplier=1,
         task_reject_on_worker_lost=True,
+        result_expires=settings.CELERY_RESULT_EXPIRES,
         broker_transport_options={
                 "global_keyprefix": "lafaom:" 
             },
         result_backend_transport_options={
                 "global_keyprefix": "lafaom:" 
             },
-        task_default_queue="lafaom_default",
-        task_queues={
-            "lafaom_default": {
-                "exchange": "lafaom",
-                "routing_key": "lafaom.default",
-            },
-        }
+        # Task modules not imported by the API routers
+        imports=("src.helper.storage_gc", "src.helper.push", "src.api.notifications.utils"),
+        task_default_queue=settings.CELERY_TASK_DEFAULT_QUEUE,
+        task_default_exchange="lafaom",
+        task_default_routing_key="lafaom.default",
+        task_queues=settings.CELERY_TASK_QUEUES,
+        task_routes=settings.CELERY_TASK_ROUTES,
+        task_create_missing_queues=settings.CELERY_TASK_CREATE_MISSING_QUEUES,
         # Other configurations
     )
 
@@ -43,6 +56,138 @@ def create_celery():
     return celery_app
 
 
+def worker_pool_options(queues) -> dict:
+    """
+    Concurrency and prefetch of a worker consuming `queues`, from `CELERY_WORKER_POOLS`.
+    A worker consuming several queues gets the slots of all of them and the
+    smallest prefetch.
+    """
+    if isinstance(queues, str):
+        queues = queues.split(",")
+    pools = [settings.CELERY_WORKER_POOLS[queue] for queue in queues or () if queue in settings.CELERY_WORKER_POOLS]
+    if not pools:
+        return {}
+    return {
+        "concurrency": sum(pool["concurrency"] for pool in pools),
+        "prefetch_multiplier": min(pool["prefetch_multiplier"] for pool in pools),
+    }
+
+
+@celeryd_init.connect
+def configure_worker_pool(sender=None, conf=None, options=None, **kwargs):
+    """Size the pool of the starting worker after its queues, unless set on its command line"""
+    options = options or {}
+    pool = worker_pool_options(options.get("queues"))
+    if pool and options.get("concurrency") is None:
+        conf.worker_concurrency = pool["concurrency"]
+    if pool and options.get("prefetch_multiplier") is None:
+        conf.worker_prefetch_multiplier = pool["prefetch_multiplier"]
+
+
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+    """
+    Give each pool process its own database connections and clients. The
+    engines were created by the parent before the fork: their pooled
+    connections are dropped without being closed, since the parent owns them.
+    """
+    from src.database import dispose_engines
+    from src.helper.clients import reset_clients
+
+    dispose_engines(close=False)
+    reset_clients()
+
+
+@worker_process_shutdown.connect
+def shutdown_worker_process(**kwargs):
+    from src.database import dispose_engines
+    from src.helper.clients import close_clients
+
+    close_clients()
+    dispose_engines()
+
+
+@setup_logging.connect
+def configure_worker_logging(**kwargs):
+    """Workers log through the JSON pipeline of the API instead of the Celery handlers"""
+    configure_logging()
+
+
+@before_task_publish.connect
+def send_correlation_id(headers=None, **kwargs):
+    """Tasks sent while serving a request (or running a task) carry its correlation id"""
+    current = correlation_id.get()
+    if current is not None and headers is not None:
+        headers.setdefault(TASK_CORRELATION_HEADER, current)
+
+
+@task_prerun.connect
+def bind_correlation_id(task=None, **kwargs):
+    """Log the records of a task under the id of the request that sent it, else under the task id"""
+    request = task.request
+    if request.is_eager:
+        # Run in the caller, which keeps its own id
+        return
+    correlation_id.set(getattr(request, TASK_CORRELATION_HEADER, None) or request.id)
+
+
+@task_postrun.connect
+def unbind_correlation_id(task=None, **kwargs):
+    if not task.request.is_eager:
+        correlation_id.set(None)
+
+
+def get_queue_depths(app=None) -> dict:
+    """Number of messages waiting in each declared queue (not counting the ones reserved by workers)"""
+    app = app or current_celery_app
+    depths = {}
+    with app.connection_for_read() as connection:
+        channel = connection.default_channel
+        for queue in app.conf.task_queues:
+            try:
+                depths[queue.name] = channel.queue_declare(queue=queue.name, passive=True).message_count
+            except Exception:
+                # Not declared yet: nothing was ever sent to it
+                depths[queue.name] = 0
+    return depths
+
+
+def get_result_backend_usage(app=None, batch_size: int = 1000, scan_limit: Optional[int] = None) -> dict:
+    """
+    Number of results (task and group) kept in the Redis result backend and
+    the memory they use. At most `scan_limit` keys of the database
+    (`RESULT_BACKEND_SCAN_LIMIT`) are walked through per pattern; the counts
+    are then partial and `truncated` is set.
+    """
+    app = app or current_celery_app
+    scan_limit = scan_limit or settings.RESULT_BACKEND_SCAN_LIMIT
+    backend = app.backend
+    client = backend.client
+    keys, used, truncated = 0, 0, False
+    for pattern in (backend.get_key_for_task("*"), backend.get_key_for_group("*")):
+        cursor, scanned = 0, 0
+        while True:
+            cursor, batch = client.scan(cursor, match=pattern, count=batch_size)
+            scanned += batch_size
+            if batch:
+                used += _memory_usage(client, batch)
+                keys += len(batch)
+            if cursor == 0:
+                break
+            if scanned >= scan_limit:
+                truncated = True
+                break
+    return {"keys": keys, "bytes": used, "truncated": truncated}
+
+
+def _memory_usage(client, keys) -> int:
+    pipe = client.pipeline(transaction=False)
+    for key in keys:
+        pipe.memory_usage(key)
+    # None when the key expired since the scan
+    return sum(size or 0 for size in pipe.execute())
+
+
 def get_task_info(task_id):
     """
     return task info according to the task_id
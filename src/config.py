@@ -1,10 +1,11 @@
 import os
 from pydantic_settings import BaseSettings
 from pydantic import ConfigDict, model_validator,EmailStr, BeforeValidator,AnyUrl,computed_field,HttpUrl
-from typing import ClassVar, Literal,Annotated,Any
+from typing import ClassVar, Literal,Annotated,Any, Optional
 from typing_extensions import Self
 import secrets
-from kombu import Queue
+from fnmatch import fnmatchcase
+from kombu import Exchange, Queue
 
 # dmlnfn
 #
@@ -19,7 +20,10 @@ def route_task(name, args, kwargs, options, task=None, **kw):
     if ":" in name:
         queue, _ = name.split(":")
         return {"queue": queue}
-    return {"queue": "lafaom_default"}
+    for pattern, queue in settings.CELERY_TASK_QUEUE_ROUTES.items():
+        if fnmatchcase(name, pattern):
+            return {"queue": queue}
+    return {"queue": settings.CELERY_TASK_DEFAULT_QUEUE}
 
 class Settings(BaseSettings):
     
@@ -37,6 +41,45 @@ class Settings(BaseSettings):
     
     ## Sentry Debugging url 
     SENTRY_DSN: HttpUrl | None = None
+    # Share of the transactions traced, by default and for the first matching
+    # request path or Celery task name pattern (the others use the default)
+    SENTRY_TRACES_SAMPLE_RATE: float = 0.05
+    SENTRY_TRACES_SAMPLE_RATES: dict[str, float] = {
+        "/health/*": 0.0,
+        "/static/*": 0.0,
+        "/docs": 0.0,
+        "/openapi.json": 0.0,
+        "/metrics": 0.0,
+        "/api/v1/dashboard/health": 0.0,
+        # Status streams stay open for minutes
+        "/api/v1/payments/payments/*/events": 0.0,
+        "/api/v1/payments/*": 0.5,
+        "/api/v1/auth/*": 0.25,
+        "src.api.payments.*": 0.5,
+    }
+    # Share of the traced transactions profiled
+    SENTRY_PROFILES_SAMPLE_RATE: float = 0.0
+
+    ## Logging: level of the application loggers and of the modules set apart
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: dict[str, str] = {
+        "httpx": "WARNING",
+        "httpcore": "WARNING",
+        "sqlalchemy.engine": "WARNING",
+        "uvicorn.access": "WARNING",
+    }
+    # "json" lines for the log collectors, "text" for a terminal
+    LOG_FORMAT: Literal["json", "text"] = "json"
+    # Records waiting for the writer thread: beyond, new records are dropped instead of blocking
+    LOG_QUEUE_SIZE: int = 10000
+    # Mask email addresses and phone numbers in the log lines (secrets are always masked)
+    LOG_REDACT_PII: bool = True
+
+    ## Prometheus /metrics: ask the broker for the Celery queue depths at each scrape
+    METRICS_QUEUE_DEPTH: bool = True
+
+    ## Open the database connection pool (and the Firebase app) at startup instead of on first use
+    STARTUP_WARM_UP: bool = False
     
     ## Allow Cors origins
     BACKEND_CORS_ORIGINS: Annotated[
@@ -83,22 +126,77 @@ class Settings(BaseSettings):
     
     ## Credential to connect to Firebase Cloud Messaging for push notification
     FCM_SERVER_KEY:str = ""
+    FIREBASE_CREDENTIALS_FILE: str = "src/lafaom.json"
+    FCM_PROJECT_ID: str = "laakam-487e5"
+    # "stub" records the pushes instead of sending them (local development, tests)
+    FCM_BACKEND: Literal["firebase", "stub"] = "firebase"
+    # Multicast batches (up to 500 devices each) sent per worker, Celery rate limit format
+    FCM_BATCH_RATE_LIMIT: str = "10/s"
+
+    ## In-app notifications
+    # Users notified per INSERT ... SELECT of a fan-out
+    NOTIFICATION_FANOUT_BATCH_SIZE: int = 5000
+    # Newest notifications of each inbox kept in Redis, and how long (seconds)
+    NOTIFICATION_INBOX_CACHE_SIZE: int = 50
+    NOTIFICATION_CACHE_TTL: int = 3600
+
+    ## Shared HTTP client of each process (emails, payment providers)
+    HTTP_CLIENT_TIMEOUT: float = 30.0
+    HTTP_CLIENT_MAX_CONNECTIONS: int = 20
     
     
     
     #Prefer storage location
-    STORAGE_LOCATION: Literal["local","S3"] = "local"  #local,S3
+    STORAGE_LOCATION: Literal["local","S3","memory"] = "local"  #local,S3,memory (tests)
     
     
     #Max file upload size (20MB for PDF documents)
     MAX_FILE_SIZE: int = 20971520
     
+    #Uploads are copied to disk by chunks of this size (1MB)
+    UPLOAD_CHUNK_SIZE: int = 1048576
+    
+    #Validity in seconds of a direct (presigned) upload
+    DIRECT_UPLOAD_EXPIRE: int = 900
+    
+    #Downloads are streamed by chunks of this size (1MB)
+    DOWNLOAD_CHUNK_SIZE: int = 1048576
+    
+    #Bulk attachment ZIP: files read ahead in parallel, and chunks buffered per file
+    ZIP_FETCH_CONCURRENCY: int = 4
+    ZIP_PREFETCH_CHUNKS: int = 4
+    
+    #Validity in seconds of a signed /private-file link
+    PRIVATE_FILE_URL_EXPIRE: int = 3600
+    
+    #Resized variants (max width in px) generated for blog covers and profile pictures
+    IMAGE_VARIANT_WIDTHS: dict = {"thumb": 320, "card": 768, "full": 1600}
+    IMAGE_VARIANT_QUALITY: int = 80
+    
+    #Uploaded PDFs: documents above this page count are rejected, extracted text is cut at this length
+    DOCUMENT_MAX_PAGES: int = 300
+    DOCUMENT_TEXT_MAX_CHARS: int = 500000
+    
+    #Orphan file collector: folders scanned, keys checked per batch, pause between batches (s)
+    #and minimum age (h) of a file before it can be collected (direct uploads not confirmed yet)
+    STORAGE_GC_LOCATIONS: list = ["/blobs", "/student-applications", "/job-applications", "/cabinet-applications"]
+    STORAGE_GC_BATCH_SIZE: int = 1000
+    STORAGE_GC_BATCH_DELAY: int = 5
+    STORAGE_GC_MIN_AGE_HOURS: int = 24
+    
     
     ## Credential to connect to AWS S3 Bucket
     AWS_ACCESS_KEY_ID : str = ""
     AWS_SECRET_ACCESS_KEY : str = ""
     AWS_REGION : str = "us-east-1"
     AWS_BUCKET_NAME : str = "your-bucket-name"
+    AWS_ENDPOINT_URL : Optional[str] = None  # MinIO or any S3 compatible server
+    
+    ## S3 transfers: files above the threshold are sent as parallel multipart uploads
+    S3_MAX_POOL_CONNECTIONS : int = 20
+    S3_MULTIPART_THRESHOLD : int = 8388608
+    S3_MULTIPART_CHUNKSIZE : int = 8388608
+    S3_MAX_CONCURRENCY : int = 4
     
     MOODLE_API_URL : str = "https://moodle.example.com"
     MOODLE_API_TOKEN : str = ""
@@ -138,6 +236,11 @@ class Settings(BaseSettings):
     ELYONPAY_ERROR_URL: str = "https://lafaom-mao.org/payment/error"
 
     DEFAULT_PAYMENT_PROVIDER: str = "ELYONPAY"
+
+    ## Payment status stream (server-sent events)
+    # Seconds between keepalive comments, and longest a stream stays open (the browser reconnects)
+    PAYMENT_EVENTS_KEEPALIVE: int = 15
+    PAYMENT_EVENTS_TIMEOUT: int = 900
     
     CURRENCY_API_KEY : str | None = None
     CURRENCY_API_URL: str | None = None
@@ -149,6 +252,13 @@ class Settings(BaseSettings):
     ## The Redis Cache turn around time
     CACHE_TTL:int   = 3600
     
+    ## How long a pre-rendered blog post stays in Redis (rebuilt on every edit)
+    BLOG_RENDER_CACHE_TTL:int = 604800
+    
+    ## Rows fetched per round trip by the CSV/XLSX exports, and file chunk size
+    EXPORT_BATCH_SIZE:int = 1000
+    EXPORT_CHUNK_SIZE:int = 65536
+    
     ## Redis cache url
     REDIS_CACHE_URL:str = "redis://127.0.0.1:6379/0"
     
@@ -183,13 +293,50 @@ class Settings(BaseSettings):
     # Force all queues to be explicitly listed in `CELERY_TASK_QUEUES` to help prevent typos
     CELERY_TASK_CREATE_MISSING_QUEUES: bool = False
 
+    CELERY_HIGH_PRIORITY_QUEUE: str = "lafaom_high_priority"
+    CELERY_LOW_PRIORITY_QUEUE: str = "lafaom_low_priority"
+
     CELERY_TASK_QUEUES: list[Queue]  = [
-        Queue("lafaom_default"),
-        Queue("lafaom_high_priority"),
-        Queue("lafaom_low_priority"),
+        Queue("lafaom_default", Exchange("lafaom"), routing_key="lafaom.default"),
+        Queue("lafaom_high_priority", Exchange("lafaom"), routing_key="lafaom.high_priority"),
+        Queue("lafaom_low_priority", Exchange("lafaom"), routing_key="lafaom.low_priority"),
     ]
 
+    # Queue of each task, by task name pattern. Tasks sent for several purposes
+    # (the email tasks) pick their queue when they are sent instead
+    CELERY_TASK_QUEUE_ROUTES: dict[str, str] = {
+        "src.api.payments.utils.check_cash_in_status": "lafaom_high_priority",
+        "src.helper.images.*": "lafaom_low_priority",
+        "src.helper.documents.*": "lafaom_low_priority",
+        "src.helper.storage_gc.*": "lafaom_low_priority",
+    }
+
     CELERY_TASK_ROUTES: ClassVar[tuple] = (route_task,)
+
+    # Seconds a task result stays in the result backend. Fire and forget tasks
+    # (emails, push, image/document processing) do not store one at all
+    CELERY_RESULT_EXPIRES: int = 3600
+
+    # Most Redis keys /health/results walks through to measure the task results,
+    # and seconds its answer is reused
+    RESULT_BACKEND_SCAN_LIMIT: int = 100000
+    RESULT_BACKEND_USAGE_TTL: int = 60
+
+    # Defaults of the worker consuming each queue (`-Q`), unless given on its command line.
+    # Short tasks that must start fast get many slots and no prefetch, so a
+    # long task never holds back the messages reserved behind it
+    CELERY_WORKER_POOLS: dict[str, dict] = {
+        "lafaom_high_priority": {"concurrency": 8, "prefetch_multiplier": 1},
+        "lafaom_default": {"concurrency": 4, "prefetch_multiplier": 1},
+        "lafaom_low_priority": {"concurrency": 2, "prefetch_multiplier": 1},
+    }
+
+    # Pending messages above which a queue is reported as backed up by /health/queues
+    CELERY_QUEUE_DEPTH_ALERT: dict[str, int] = {
+        "lafaom_high_priority": 20,
+        "lafaom_default": 200,
+        "lafaom_low_priority": 1000,
+    }
     
 
 
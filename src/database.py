@@ -1,26 +1,77 @@
 from contextlib import contextmanager
 from sqlmodel import create_engine, Session
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import sessionmaker
 
 from typing import AsyncGenerator
 from src.config import settings
 
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
+DATABASE_URL = settings.DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://")
+
+# The engines are built on first use, so that importing the models (Alembic,
+# tests, Celery tasks that never touch one of them) does not load the drivers.
+# `engine`, `engine_async` and `async_session` stay importable from this module.
+_engines = {}
+
+
+def get_engine():
+    if "engine" not in _engines:
+        _engines["engine"] = create_engine(SQLALCHEMY_DATABASE_URL)
+    return _engines["engine"]
+
+
+def get_engine_async():
+    if "engine_async" not in _engines:
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        _engines["engine_async"] = create_async_engine(DATABASE_URL )#echo=True)
+    return _engines["engine_async"]
+
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+def get_async_session_maker():
+    if "async_session" not in _engines:
+        _engines["async_session"] = sessionmaker(get_engine_async(), class_=AsyncSession, expire_on_commit=False)
+    return _engines["async_session"]
 
 
+def __getattr__(name):
+    if name == "engine":
+        return get_engine()
+    if name == "engine_async":
+        return get_engine_async()
+    if name == "async_session":
+        return get_async_session_maker()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def dispose_engines(close: bool = True) -> None:
+    """
+    Drop the pooled connections of the engines built so far, from sync code.
+    `close=False` forgets them without closing them (a forked process sharing
+    its parent's sockets). The async engine connections can only be closed
+    from their event loop (see `close_engines`), so `close=True` leaves them.
+    """
+    if "engine" in _engines:
+        _engines["engine"].dispose(close=close)
+    if "engine_async" in _engines and not close:
+        _engines["engine_async"].sync_engine.dispose(close=False)
+
+
+async def close_engines() -> None:
+    """Close the connections of the engines built so far, on shutdown of the app"""
+    if "engine_async" in _engines:
+        await _engines["engine_async"].dispose()
+    if "engine" in _engines:
+        _engines["engine"].dispose()
+
 
 @contextmanager
 def get_session():
-    with Session(engine) as session:
+    with Session(get_engine()) as session:
         yield session
 
-DATABASE_URL = settings.DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://")
-engine_async = create_async_engine(DATABASE_URL )#echo=True)
-async_session = sessionmaker(engine_async, class_=AsyncSession, expire_on_commit=False)
 
 async def get_session_async() -> AsyncGenerator[AsyncSession, None]:
-    async with async_session() as session:
-        yield session
\ No newline at end of file
+    async with get_async_session_maker()() as session:
+        yield session
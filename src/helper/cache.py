@@ -0,0 +1,178 @@
+import functools
+import hashlib
+import inspect
+import json
+import logging
+from enum import Enum
+from typing import Optional
+from urllib.parse import urlencode
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.routing import serialize_response
+
+from src.config import settings
+from src.redis_client import delete_from_redis, get_from_redis, get_redis, set_to_redis
+
+logger = logging.getLogger(__name__)
+
+
+class CacheTag(str, Enum):
+    BLOG_POSTS = "blog_posts"
+    BLOG_CATEGORIES = "blog_categories"
+    BLOG_TAGS = "blog_tags"
+    TRAININGS = "trainings"
+    TRAINING_SESSIONS = "training_sessions"
+    SPECIALTIES = "specialties"
+    ORGANIZATION_CENTERS = "organization_centers"
+    JOB_OFFERS = "job_offers"
+
+
+def cache_key(request: Request) -> str:
+    """
+    Build the cache key of a request from its path and normalized query.
+
+    Query parameters are sorted so `?page=1&asc=asc` and `?asc=asc&page=1`
+    share the same entry.
+    """
+    query = urlencode(sorted(request.query_params.multi_items()))
+    digest = hashlib.sha1(f"{request.url.path}?{query}".encode()).hexdigest()
+    return f"cache:response:{digest}"
+
+
+def _tag_key(tag) -> str:
+    return f"cache:tag:{CacheTag(tag).value}"
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def compute_etag(body: str) -> str:
+    return f'"{hashlib.sha1(body.encode()).hexdigest()}"'
+
+
+def etag_response(request: Request, body: str, etag: Optional[str] = None) -> Response:
+    """
+    Return a JSON body with its ETag, or a bodiless 304 when the client
+    already holds that version (If-None-Match).
+    """
+    etag = etag or compute_etag(body)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+async def _serialize(request: Request, result) -> str:
+    route = request.scope.get("route")
+    response_field = getattr(route, "response_field", None)
+    if response_field is not None:
+        content = await serialize_response(
+            field=response_field, response_content=result
+        )
+    else:
+        content = jsonable_encoder(result)
+    return json.dumps(content, separators=(",", ":"), ensure_ascii=False)
+
+
+async def _store(key: str, body: str, tags, ttl: int) -> str:
+    etag = compute_etag(body)
+    try:
+        await set_to_redis(key, json.dumps({"etag": etag, "body": body}), ex=ttl)
+        redis_client = get_redis()
+        for tag in tags:
+            tag_key = f"{settings.REDIS_NAMESPACE}:{_tag_key(tag)}"
+            await redis_client.sadd(tag_key, key)
+            await redis_client.expire(tag_key, ttl)
+    except Exception as e:
+        logger.warning("Redis cache set error: %s", e)
+    return etag
+
+
+def cache_response(*tags: CacheTag, ttl: Optional[int] = None):
+    """
+    Cache the JSON response of a public GET route in Redis.
+
+    The response is serialized through the route's `response_model`, stored
+    under the request path and normalized query, and served with an ETag.
+    A matching `If-None-Match` header gets a 304 without a body. Entries are
+    dropped by `invalidate_cache_tags` with any of the given tags, or after
+    `ttl` seconds (defaults to `settings.CACHE_TTL`).
+
+    Redis errors are never fatal: the route then runs uncached.
+
+    Example:
+        @router.get("/blog/categories", response_model=PostCategoryListOutSuccess)
+        @cache_response(CacheTag.BLOG_CATEGORIES)
+        async def list_categories(...):
+    """
+
+    def decorator(func):
+        signature = inspect.signature(func)
+        request_param = next(
+            (
+                name
+                for name, param in signature.parameters.items()
+                if param.annotation is Request
+            ),
+            None,
+        )
+        inject_request = request_param is None
+        if inject_request:
+            request_param = "cache_request"
+            signature = signature.replace(
+                parameters=[
+                    *signature.parameters.values(),
+                    inspect.Parameter(
+                        request_param,
+                        inspect.Parameter.KEYWORD_ONLY,
+                        annotation=Request,
+                    ),
+                ]
+            )
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            request: Request = (
+                kwargs.pop(request_param) if inject_request else kwargs[request_param]
+            )
+            key = cache_key(request)
+
+            try:
+                cached = await get_from_redis(key)
+            except Exception as e:
+                logger.warning("Redis cache error: %s", e)
+                cached = None
+            if cached:
+                cached = json.loads(cached)
+                return etag_response(request, cached["body"], cached["etag"])
+
+            result = await func(*args, **kwargs)
+            if isinstance(result, Response):
+                return result
+
+            body = await _serialize(request, result)
+            etag = await _store(key, body, tags, ttl or settings.CACHE_TTL)
+            return etag_response(request, body, etag)
+
+        wrapper.__signature__ = signature
+        return wrapper
+
+    return decorator
+
+
+async def invalidate_cache_tags(*tags: CacheTag) -> None:
+    """Drop every cached response stored with any of the given tags."""
+    try:
+        redis_client = get_redis()
+        for tag in tags:
+            tag_key = _tag_key(tag)
+            keys = await redis_client.smembers(f"{settings.REDIS_NAMESPACE}:{tag_key}")
+            await delete_from_redis(*keys, tag_key)
+    except Exception as e:
+        logger.warning("Redis cache invalidation error: %s", e)
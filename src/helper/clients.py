@@ -0,0 +1,88 @@
+import threading
+from typing import Optional
+
+import httpx
+
+from src.config import settings
+from src.helper.metrics import AsyncProviderMetricsTransport, ProviderMetricsTransport
+
+# Built on first use in each process. A Celery worker forks its pool processes
+# after importing the app, so they are reset in every child (see celery_utils)
+_http_client: Optional[httpx.Client] = None
+_lock = threading.Lock()
+
+
+def get_http_client() -> httpx.Client:
+    """
+    HTTP client shared by the sync code of the process (Celery tasks). Its
+    connections are kept alive between tasks instead of opening a client,
+    a TCP connection and a TLS session per request.
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        with _lock:
+            if _http_client is None or _http_client.is_closed:
+                connections = settings.HTTP_CLIENT_MAX_CONNECTIONS
+                _http_client = httpx.Client(
+                    timeout=settings.HTTP_CLIENT_TIMEOUT,
+                    transport=ProviderMetricsTransport(
+                        httpx.HTTPTransport(
+                            limits=httpx.Limits(
+                                max_connections=connections,
+                                max_keepalive_connections=connections,
+                            ),
+                        )
+                    ),
+                )
+    return _http_client
+
+
+def async_http_client(**kwargs) -> httpx.AsyncClient:
+    """`httpx.AsyncClient` whose calls to the providers are recorded in the metrics"""
+    return httpx.AsyncClient(transport=AsyncProviderMetricsTransport(), **kwargs)
+
+
+def get_firebase_app():
+    """Default Firebase Admin app, initialized on first use"""
+    import firebase_admin
+    from firebase_admin import credentials
+
+    try:
+        return firebase_admin.get_app()
+    except ValueError:
+        with _lock:
+            try:
+                return firebase_admin.get_app()
+            except ValueError:
+                return firebase_admin.initialize_app(
+                    credential=credentials.Certificate(
+                        settings.FIREBASE_CREDENTIALS_FILE
+                    )
+                )
+
+
+def reset_clients() -> None:
+    """
+    Forget the clients inherited from the parent process, without closing
+    them: their sockets (and TLS sessions) are still used by the parent.
+    """
+    global _http_client, _lock
+    _http_client = None
+    _lock = threading.Lock()
+
+    import firebase_admin
+
+    firebase_admin._apps.clear()
+
+
+def close_clients() -> None:
+    """Close the clients of the process, on shutdown"""
+    global _http_client
+    if _http_client is not None:
+        _http_client.close()
+        _http_client = None
+
+    import firebase_admin
+
+    for app in list(firebase_admin._apps.values()):
+        firebase_admin.delete_app(app)
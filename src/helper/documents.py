@@ -0,0 +1,182 @@
+import asyncio
+import tempfile
+from contextlib import contextmanager
+from typing import IO, NamedTuple, Optional
+
+from celery import shared_task
+from PyPDF2 import PdfFileReader
+from sqlmodel import Session, select
+
+from src.api.storage.models import DocumentStatusEnum
+from src.config import settings
+from src.helper.storage import get_storage
+
+# The header may be preceded by junk, readers look for it in the first KB
+_PDF_HEADER = b"%PDF-"
+_HEADER_WINDOW = 1024
+
+
+class DocumentInspection(NamedTuple):
+    status: DocumentStatusEnum
+    page_count: Optional[int] = None
+    text: Optional[str] = None
+    error: Optional[str] = None
+
+
+def inspect_pdf(stream: IO[bytes], file_name: str = "") -> DocumentInspection:
+    """
+    Validate a PDF and extract its text, page by page.
+
+    PyPDF2 reads objects from `stream` on demand and the objects of a page are
+    dropped once its text is extracted, so the memory used does not grow with
+    the number of pages. Files that are not PDFs are skipped unless their
+    name says they should be one.
+    """
+    header = stream.read(_HEADER_WINDOW)
+    stream.seek(0)
+    if _PDF_HEADER not in header:
+        if file_name.lower().endswith(".pdf"):
+            return DocumentInspection(
+                DocumentStatusEnum.INVALID, error="Missing PDF header"
+            )
+        return DocumentInspection(DocumentStatusEnum.SKIPPED)
+
+    try:
+        reader = PdfFileReader(stream, strict=False)
+        if reader.isEncrypted:
+            # Owner password only: readable without a password, like in a viewer
+            try:
+                opened = reader.decrypt("")
+            except NotImplementedError:
+                opened = 0
+            if not opened:
+                return DocumentInspection(
+                    DocumentStatusEnum.ENCRYPTED, error="Password protected"
+                )
+
+        page_count = reader.getNumPages()
+        if page_count == 0:
+            return DocumentInspection(
+                DocumentStatusEnum.INVALID, page_count=0, error="No pages"
+            )
+        if page_count > settings.DOCUMENT_MAX_PAGES:
+            return DocumentInspection(
+                DocumentStatusEnum.TOO_MANY_PAGES, page_count=page_count
+            )
+
+        parts, length = [], 0
+        for number in range(page_count):
+            if length >= settings.DOCUMENT_TEXT_MAX_CHARS:
+                break
+            page_text = reader.getPage(number).extractText()
+            reader.resolvedObjects.clear()
+            parts.append(page_text)
+            length += len(page_text) + 1
+    except Exception as e:
+        # PdfReadError, but also the struct/zlib/value errors of damaged files
+        return DocumentInspection(
+            DocumentStatusEnum.INVALID, error=f"{type(e).__name__}: {e}"[:255]
+        )
+
+    # PostgreSQL text columns do not accept NUL characters
+    text = "\n".join(parts)[: settings.DOCUMENT_TEXT_MAX_CHARS].replace("\x00", "")
+    return DocumentInspection(
+        DocumentStatusEnum.VALID, page_count=page_count, text=text.strip() or None
+    )
+
+
+@contextmanager
+def open_stored_file(file_path: str):
+    """
+    Open a stored file for reading. Files that are not on disk (S3 objects)
+    are downloaded to a temporary file instead of memory.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+    """
+    storage = get_storage()
+    key = storage.key_of(file_path)
+    path = storage.local_path(key)
+    if path is not None:
+        with open(path, "rb") as f:
+            yield f
+        return
+
+    async def download(f):
+        async for chunk in storage.get_stream(key):
+            f.write(chunk)
+
+    with tempfile.TemporaryFile() as f:
+        asyncio.run(download(f))
+        f.seek(0)
+        yield f
+
+
+def _attachment_target(kind: str):
+    """Model and file name column of each kind of attachment"""
+    if kind == "student":
+        from src.api.training.models import StudentAttachment
+
+        return StudentAttachment, "file_name"
+    if kind == "job":
+        from src.api.job_offers.models import JobAttachment
+
+        return JobAttachment, "name"
+    raise ValueError(f"Unknown attachment kind: {kind}")
+
+
+@shared_task(ignore_result=True)
+def process_attachment_document(kind: str, attachment_id: int) -> Optional[str]:
+    """
+    Validate an uploaded attachment and store its page count and text.
+
+    Attachments sharing a deduplicated file reuse the result of the first one
+    processed. The result is discarded when the file was replaced meanwhile.
+    """
+    from src.database import engine
+
+    model, name_field = _attachment_target(kind)
+    with Session(engine) as session:
+        attachment = session.get(model, attachment_id)
+        if attachment is None:
+            return None
+        file_path, file_name = (
+            attachment.file_path,
+            getattr(attachment, name_field) or "",
+        )
+        processed = session.exec(
+            select(model).where(
+                model.file_path == file_path,
+                model.id != attachment_id,
+                model.processing_status.is_not(None),
+                model.processing_status != DocumentStatusEnum.PENDING.value,
+            )
+        ).first()
+        if processed is not None:
+            inspection = DocumentInspection(
+                DocumentStatusEnum(processed.processing_status),
+                processed.page_count,
+                processed.text_content,
+                processed.processing_error,
+            )
+
+    if processed is None:
+        try:
+            with open_stored_file(file_path) as f:
+                inspection = inspect_pdf(f, file_name or file_path)
+        except FileNotFoundError:
+            inspection = DocumentInspection(
+                DocumentStatusEnum.INVALID, error="File not found"
+            )
+
+    with Session(engine) as session:
+        attachment = session.get(model, attachment_id)
+        if attachment is None or attachment.file_path != file_path:
+            return None
+        attachment.processing_status = inspection.status.value
+        attachment.page_count = inspection.page_count
+        attachment.text_content = inspection.text
+        attachment.processing_error = inspection.error
+        session.add(attachment)
+        session.commit()
+    return inspection.status.value
@@ -0,0 +1,313 @@
+import asyncio
+import functools
+import os
+import zipfile
+from collections import deque
+from datetime import datetime
+from email.utils import formatdate
+from mimetypes import guess_type
+from typing import AsyncIterator, List, Optional, Tuple
+from urllib.parse import quote
+
+from fastapi import Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+
+from src.config import settings
+from src.helper.cache import etag_matches
+from src.helper.file_helper import FileHelper
+from src.helper.storage import get_storage
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Return the inclusive (start, end) of a single `Range: bytes=...` header,
+    or None to send the whole file (no header, unsupported unit, syntax
+    error or several ranges, which RFC 9110 allows a server to ignore).
+
+    Raises:
+        RangeNotSatisfiable: If the range lies outside of the file.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    start, _, end = header[len("bytes=") :].strip().partition("-")
+    try:
+        if start == "":
+            suffix = int(end)
+            if suffix == 0:
+                raise RangeNotSatisfiable(header)
+            return max(size - suffix, 0), size - 1
+        start = int(start)
+        end = int(end) if end else size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable(header)
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+
+def _content_disposition(filename: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+async def stream_stored_file(
+    file_path: str, chunk_size: Optional[int] = None
+) -> AsyncIterator[bytes]:
+    """
+    Yield a stored file (local path, S3 key or S3 public URL) by chunks.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+    """
+    storage = get_storage()
+    async for chunk in storage.get_stream(
+        storage.key_of(file_path), chunk_size or settings.DOWNLOAD_CHUNK_SIZE
+    ):
+        yield chunk
+
+
+def _stream(
+    request: Request,
+    size: int,
+    headers: dict,
+    media_type: str,
+    chunks,
+    full_response=None,
+) -> Response:
+    """
+    Answer a conditional and/or ranged GET once the file metadata is known.
+
+    `chunks(start, end)` returns the iterator of an inclusive byte range and
+    `full_response()` optionally builds a better response for the whole file.
+    """
+    if etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    if_range = request.headers.get("if-range")
+    try:
+        byte_range = (
+            parse_range(request.headers.get("range"), size)
+            if if_range in (None, headers["ETag"])
+            else None
+        )
+    except RangeNotSatisfiable:
+        return Response(
+            status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"}
+        )
+
+    if byte_range is None:
+        if full_response is not None:
+            return full_response()
+        return StreamingResponse(
+            chunks(0, size - 1),
+            media_type=media_type,
+            headers={**headers, "Content-Length": str(size)},
+        )
+
+    start, end = byte_range
+    return StreamingResponse(
+        chunks(start, end),
+        status_code=206,
+        media_type=media_type,
+        headers={
+            **headers,
+            "Content-Range": f"bytes {start}-{end}/{size}",
+            "Content-Length": str(end - start + 1),
+        },
+    )
+
+
+def _file_response(
+    path: str, media_type: str, headers: dict, chunk_size: int
+) -> FileResponse:
+    response = FileResponse(path, media_type=media_type, headers=headers)
+    response.chunk_size = chunk_size
+    return response
+
+
+async def file_response(
+    request: Request,
+    file_path: str,
+    filename: Optional[str] = None,
+    chunk_size: Optional[int] = None,
+) -> Optional[Response]:
+    """
+    Serve a stored file (a path returned by the `FileHelper` uploads) with
+    support for `Range`, `If-Range` and `If-None-Match`.
+
+    Files on disk are sent with `FileResponse` (zero-copy when the server
+    supports it), the others (S3 objects) are proxied from the storage backend
+    by chunks of `chunk_size` bytes (`DOWNLOAD_CHUNK_SIZE` by default) without
+    blocking the event loop.
+
+    Args:
+        file_path (str): The stored path, S3 key or S3 public URL of the file
+        filename (Optional[str]): Send the file as an attachment with this name.
+            Defaults to an inline response.
+
+    Returns:
+        The response, or None if the file does not exist.
+    """
+    chunk_size = chunk_size or settings.DOWNLOAD_CHUNK_SIZE
+    headers = {"Accept-Ranges": "bytes", "Cache-Control": "private"}
+    if filename:
+        headers["Content-Disposition"] = _content_disposition(filename)
+
+    storage = get_storage()
+    key = storage.key_of(file_path)
+    stored = await storage.stat(key)
+    if stored is None:
+        return None
+    size = stored.size
+    headers["ETag"] = stored.etag
+    if stored.last_modified:
+        headers["Last-Modified"] = formatdate(
+            stored.last_modified.timestamp(), usegmt=True
+        )
+    media_type = (
+        stored.content_type
+        or guess_type(filename or key)[0]
+        or "application/octet-stream"
+    )
+
+    full_response = None
+    path = storage.local_path(key)
+    if path is not None:
+        full_response = functools.partial(
+            _file_response, path, media_type, headers, chunk_size
+        )
+
+    def chunks(start: int, end: int):
+        whole = start == 0 and end == size - 1
+        return storage.get_stream(key, chunk_size, None if whole else (start, end))
+
+    return _stream(request, size, headers, media_type, chunks, full_response)
+
+
+class _ZipSink:
+    """Write-only, unseekable output: `zipfile` writes entries with data descriptors"""
+
+    def __init__(self):
+        self.parts: List[bytes] = []
+        self.offset = 0
+
+    def write(self, data: bytes) -> int:
+        self.parts.append(bytes(data))
+        self.offset += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.offset
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data, self.parts = b"".join(self.parts), []
+        return data
+
+
+async def _prefetch(file_path: str, queue: asyncio.Queue) -> None:
+    try:
+        async for chunk in stream_stored_file(file_path):
+            await queue.put(chunk)
+    except Exception as e:
+        await queue.put(e)
+        return
+    await queue.put(None)
+
+
+async def _zip_chunks(entries: List[Tuple[str, str]]) -> AsyncIterator[bytes]:
+    # At most ZIP_FETCH_CONCURRENCY files are read at once (the one being written
+    # and the next ones), each into a queue of ZIP_PREFETCH_CHUNKS chunks, so
+    # memory stays bounded whatever the archive size
+    window = deque()
+    pending = iter(entries)
+    sink = _ZipSink()
+    missing = []
+
+    def fill_window():
+        while len(window) < settings.ZIP_FETCH_CONCURRENCY:
+            entry = next(pending, None)
+            if entry is None:
+                return
+            queue = asyncio.Queue(maxsize=settings.ZIP_PREFETCH_CHUNKS)
+            window.append(
+                (entry, queue, asyncio.create_task(_prefetch(entry[1], queue)))
+            )
+
+    try:
+        with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as archive:
+            fill_window()
+            while window:
+                (name, file_path), queue, _ = window[0]
+
+                chunk = await queue.get()
+                if isinstance(chunk, Exception):
+                    missing.append(name)
+                    window.popleft()
+                    fill_window()
+                    continue
+                info = zipfile.ZipInfo(name, date_time=datetime.now().timetuple()[:6])
+                with archive.open(info, "w", force_zip64=True) as entry:
+                    while chunk is not None:
+                        if isinstance(chunk, Exception):
+                            # The entry is partly sent, the archive can't be valid
+                            raise chunk
+                        entry.write(chunk)
+                        if data := sink.drain():
+                            yield data
+                        chunk = await queue.get()
+                if data := sink.drain():
+                    yield data
+                window.popleft()
+                fill_window()
+
+            if missing:
+                archive.writestr("MISSING_FILES.txt", "\n".join(missing) + "\n")
+        yield sink.drain()
+    finally:
+        for _, _, task in window:
+            task.cancel()
+
+
+def zip_response(entries: List[Tuple[str, str]], filename: str) -> StreamingResponse:
+    """
+    Stream a ZIP archive of stored files without temporary files.
+
+    Files are stored uncompressed (attachments are PDFs and images), the ones
+    that can't be read are listed in `MISSING_FILES.txt`.
+
+    Args:
+        entries: The (name in the archive, stored file path) of each file
+        filename: The name of the archive, without extension
+    """
+    used = set()
+    unique_entries = []
+    for name, file_path in entries:
+        name = "/".join(
+            FileHelper.sanitize_filename(part)
+            for part in name.split("/")
+            if part.strip(".")
+        )
+        stem, extension = os.path.splitext(name)
+        candidate, index = name, 1
+        while candidate in used:
+            index += 1
+            candidate = f"{stem}_{index}{extension}"
+        used.add(candidate)
+        unique_entries.append((candidate, file_path))
+
+    return StreamingResponse(
+        _zip_chunks(unique_entries),
+        media_type="application/zip",
+        headers={"Content-Disposition": _content_disposition(f"{filename}.zip")},
+    )
@@ -0,0 +1,116 @@
+import csv
+import io
+import tempfile
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, AsyncIterator, List, Sequence
+
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from src.config import settings
+from src.database import get_async_session_maker
+from src.helper.schemas import ExportFormat
+
+_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+# Spreadsheets read text starting with these as a formula (CSV/formula injection)
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+async def stream_rows(
+    statement, batch_size: int | None = None
+) -> AsyncIterator[Sequence[Any]]:
+    """
+    Yield the rows of a select statement in batches from a server-side cursor.
+
+    The statement runs in its own session: a `StreamingResponse` body is
+    consumed after the request dependencies (and their session) are closed.
+    """
+    batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+    async with get_async_session_maker()() as session:
+        result = await session.stream(statement.execution_options(yield_per=batch_size))
+        async for partition in result.partitions():
+            yield partition
+
+
+def _cell(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (list, dict)):
+        value = str(value)
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        # Kept as text: names, titles and messages come from the users
+        return "'" + value
+    return value
+
+
+async def _csv_chunks(statement, headers: List[str]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # The BOM lets Excel detect UTF-8 (accents in names and titles)
+    buffer.write("\ufeff")
+    writer.writerow(headers)
+    async for rows in stream_rows(statement):
+        writer.writerows([_cell(value) for value in row] for row in rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+async def _xlsx_chunks(statement, headers: List[str]) -> AsyncIterator[bytes]:
+    from openpyxl import Workbook
+
+    # write_only keeps rows on disk, the zip container can only be sent once complete
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(headers)
+    async for rows in stream_rows(statement):
+        for row in rows:
+            sheet.append([_cell(value) for value in row])
+
+    with tempfile.TemporaryFile() as file:
+        await run_in_threadpool(workbook.save, file)
+        file.seek(0)
+        while chunk := await run_in_threadpool(file.read, settings.EXPORT_CHUNK_SIZE):
+            yield chunk
+
+
+def export_response(
+    statement, filename: str, export_format: ExportFormat = "csv"
+) -> StreamingResponse:
+    """
+    Stream the rows of a select statement as a CSV or XLSX download.
+
+    The column headers are the labels of the selected columns, so build the
+    statement with `select(Model.field.label("Header"), ...)`.
+
+    Example:
+        statement = select(Payment.transaction_id.label("transaction_id"), ...)
+        return export_response(statement, "payments", "csv")
+    """
+    headers = list(statement.selected_columns.keys())
+    chunks = (
+        _xlsx_chunks(statement, headers)
+        if export_format == "xlsx"
+        else _csv_chunks(statement, headers)
+    )
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    disposition = f'attachment; filename="{filename}-{stamp}.{export_format}"'
+    return StreamingResponse(
+        chunks,
+        media_type=_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": disposition},
+    )
@@ -1,158 +1,40 @@
+import logging
 import asyncio
+import aiofiles
+import base64
 import hashlib
 import hmac
-import shutil
-from typing import Optional
+import json
+import threading
+import time as time_module
+from typing import TYPE_CHECKING, AsyncIterator, Iterator, List, Optional, Tuple
 from urllib.parse import urlencode
-from fastapi import UploadFile
 import os
-from datetime import datetime, time
 from src.config import settings
-import boto3
-from fastapi import UploadFile
 import re
 from botocore.exceptions import BotoCoreError, ClientError, NoCredentialsError 
 
+logger = logging.getLogger(__name__)
 
-class FileHelper:
-    def __init__(self):
-        pass
-    
-    
-    ###########################################
-    ###########################################
-    ########    Main STORAGE   ################
-    ###########################################
-    ###########################################
-    
-    @staticmethod
-    async def upload_file(file: UploadFile, location: str = "", name: str = ""):
-        """
-        Upload a file to the specified location.
+if TYPE_CHECKING:
+    from boto3.s3.transfer import TransferConfig
 
-        If STORAGE_LOCATION is set to "local", this will save the file to the local
-        file system. Otherwise, it will upload the file to AWS S3.
 
-        Args:
-            file (UploadFile): The file to be uploaded
-            location (str): The directory path where the file should be
-                uploaded. Defaults to "".
-            name (str): The desired name of the uploaded file. Defaults to "".
+_s3_client = None
+_s3_client_lock = threading.Lock()
 
-        Returns:
-            A tuple containing the URL of the uploaded file, the sanitized
-            filename without extension, and the content type of the uploaded
-            file. If `public` is False, the URL is the S3 key of the uploaded
-            file instead of the public URL.
-        """
-        
-        if settings.STORAGE_LOCATION == "local":
-            return await FileHelper.upload_file_local(file, location, name)
-        else:
-            return await FileHelper.upload_file_to_s3(file, location, name, public=True)
+# Most keys accepted by one S3 DeleteObjects request
+S3_DELETE_BATCH_SIZE = 1000
 
-    @staticmethod
-    async def upload_private_file(file: UploadFile, location: str = "", name: str = "", extension: Optional[str] = None):
-        """
-        Upload a private file to the specified location.
-
-        If STORAGE_LOCATION is set to "local", this will save the file to the local
-        file system. Otherwise, it will upload the file to AWS S3 with private access.
 
-        Args:
-            file (UploadFile): The file to be uploaded.
-            location (str, optional): The directory path where the file should be
-                uploaded. Defaults to "".
-            name (str, optional): The desired name of the uploaded file. Defaults to "".
-            extension (Optional[str], optional): The file extension. Defaults to None.
+class FileTooLargeError(ValueError):
+    """Raised when an upload goes over `settings.MAX_FILE_SIZE`."""
 
-        Returns:
-            A tuple containing the path or URL of the uploaded file, the sanitized
-            filename without extension, and the content type of the uploaded file.
-        """
 
-        if settings.STORAGE_LOCATION == "local":
-            return await FileHelper.upload_private_file_local(file, location, name)
-        else:
-            return await FileHelper.upload_file_to_s3(file, location, name, False )
-    
-    @staticmethod
-    def delete_file(file_path: Optional[str] = None):
-        """
-        Delete a file from the specified storage location.
-
-        If STORAGE_LOCATION is set to "local", it deletes the file from the local
-        file system. Otherwise, it deletes the file from AWS S3.
-
-        Args:
-            file_path (Optional[str]): The path or key of the file to be deleted.
-                If None or an empty string, the function will not perform any action.
-        """
-
-        if file_path is None or file_path == "":
-            return
-        if settings.STORAGE_LOCATION == "local":
-            return FileHelper.delete_file_local(file_path)
-        else:
-            return FileHelper.delete_file_from_s3(file_path)
-    
-    
-    @staticmethod
-    def delete_folder(file_path: Optional[str] = None):
-        
-        """
-        Delete a folder from the specified storage location.
-
-        If STORAGE_LOCATION is set to "local", it deletes the folder from the local
-        file system. Otherwise, it deletes the folder from AWS S3.
-
-        Args:
-            file_path (Optional[str]): The path or key of the folder to be deleted.
-                If None or an empty string, the function will not perform any action.
-        """
-        
-        if file_path is None or file_path == "":
-            return
-        if "uploads" in file_path:
-            return FileHelper.delete_local_folder(file_path)
-        else:
-            return FileHelper.delete_s3_folder(file_path)
-    
-    @staticmethod
-    async def upload_private_byte(file: bytes, location: str = "", name: str = "", content_type: Optional[str] = None):
-        """
-        Upload a private byte stream to the specified location.
-
-        If STORAGE_LOCATION is set to "local", this will save the byte stream 
-        to the local file system. Otherwise, it will upload the byte stream 
-        to AWS S3 with private access.
-
-        Args:
-            file (bytes): The byte stream to be uploaded.
-            location (str, optional): The directory path where the byte stream 
-                should be uploaded. Defaults to "".
-            name (str, optional): The desired name of the uploaded file. Defaults to "".
-            content_type (Optional[str], optional): The MIME type of the byte stream. 
-                Defaults to None.
-
-        Returns:
-            A tuple containing the path or URL of the uploaded file, the sanitized
-            filename without extension, and the content type of the uploaded file.
-        """
-
-        if settings.STORAGE_LOCATION == "local":
-            return await FileHelper.upload_private_byte_local(file, location, name, content_type)
-        else:
-            return await FileHelper.upload_byte_to_s3(file, location, name, False , content_type=content_type)
-    
-    
-    @staticmethod
-    async def upload_public_byte(file: bytes, location: str = "", name: str = "", content_type: Optional[str] = None):
+class FileHelper:
+    def __init__(self):
+        pass
     
-        if settings.STORAGE_LOCATION == "local":
-            return await FileHelper.upload_public_byte_local(file, location, name, content_type)
-        else:
-            return await FileHelper.upload_byte_to_s3(file, location, name, True , content_type=content_type)
     
     ###########################################
     ###########################################
@@ -164,19 +46,49 @@ class FileHelper:
     def get_s3_client():
         
         """
-        Create and return an S3 client using the AWS credentials and region
-        specified in the settings.
+        Return the S3 client shared by the process, creating it on first use
+        with the AWS credentials, region and endpoint specified in the settings.
+
+        boto3 clients are thread-safe, so the same client (and its connection
+        pool) is reused by every worker thread the calls are offloaded to.
 
         Returns:
             boto3.S3.Client: The S3 client instance configured with the
             provided AWS access key, secret access key, and region.
         """
 
-        return boto3.client(
-            "s3",
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            region_name=settings.AWS_REGION,
+        global _s3_client
+        if _s3_client is None:
+            # boto3 takes a while to import: only processes using S3 load it
+            import boto3
+            from botocore.config import Config
+
+            with _s3_client_lock:
+                if _s3_client is None:
+                    _s3_client = boto3.session.Session().client(
+                        "s3",
+                        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+                        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+                        region_name=settings.AWS_REGION,
+                        endpoint_url=settings.AWS_ENDPOINT_URL,
+                        config=Config(max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS),
+                    )
+        return _s3_client
+
+    @staticmethod
+    def get_s3_transfer_config() -> "TransferConfig":
+        """
+        Return the transfer configuration of uploads: files bigger than
+        `S3_MULTIPART_THRESHOLD` are split in `S3_MULTIPART_CHUNKSIZE` parts
+        uploaded by `S3_MAX_CONCURRENCY` threads in parallel.
+        """
+        from boto3.s3.transfer import TransferConfig
+
+        return TransferConfig(
+            multipart_threshold=settings.S3_MULTIPART_THRESHOLD,
+            multipart_chunksize=settings.S3_MULTIPART_CHUNKSIZE,
+            max_concurrency=settings.S3_MAX_CONCURRENCY,
+            use_threads=True,
         )
 
     @staticmethod
@@ -199,135 +111,60 @@ class FileHelper:
 
 
     @staticmethod
-    async def upload_file_to_s3(file: UploadFile, location: str = "", name: str = "", public: bool = True):
+    def delete_s3_folder(prefix: str) -> int:
         """
-        Uploads a file to AWS S3.
+        Delete all objects in an S3 bucket that start with a given prefix.
 
-        Args:
-            file (UploadFile): The file to be uploaded.
-            location (str, optional): The directory path where the file should be
-                uploaded. Defaults to "".
-            name (str, optional): The desired name of the uploaded file. Defaults to "".
-            public (bool, optional): Whether the uploaded file should be publicly
-                accessible. Defaults to True.
+        Every page of the listing is deleted with one DeleteObjects request
+        (up to 1000 keys), so folders of any size are emptied.
 
-        Returns:
-            A tuple containing the URL of the uploaded file, the sanitized filename
-            without extension, and the content type of the uploaded file. If `public` is
-            False, the URL is the S3 key of the uploaded file instead of the public URL.
+        Parameters:
+        prefix (str): The prefix to match objects against.
 
-        Raises:
-            ValueError: If the file size exceeds the maximum allowed size.
-            RuntimeError: If AWS credentials are missing or invalid, or if the S3 upload
-                fails.
+        Returns:
+        int: The number of deleted objects.
         """
-        try:
-            if file.size > settings.MAX_FILE_SIZE:
-                raise ValueError(f"File size exceeds limit of {settings.MAX_FILE_SIZE} bytes")
-
-            path = location.strip("/")
-            date_time_now = datetime.now().strftime("%Y%m%d_%H%M%S")
-            name_split = os.path.splitext(file.filename)
+        deleted = 0
+        for objects in FileHelper.iter_s3_objects(prefix):
+            keys = [obj["Key"] for obj in objects]
+            failed = FileHelper.delete_s3_keys(keys)
+            deleted += len(keys) - len(failed)
+        logger.info("Deleted %s objects under %s", deleted, prefix)
+        return deleted
 
-            if not name or name == "":
-                back_name = FileHelper.sanitize_filename(name_split[0]) 
-                name = back_name + "_s3" + name_split[1]
-            else:
-                back_name = FileHelper.sanitize_filename(name)
-                name = f"{back_name}_s3{name_split[1]}"
-
-            full_path = f"{path}/{date_time_now}_{name}" if path else f"{date_time_now}_{name}"
-            
-            extra_args = { "ContentType": file.content_type }
-        
-            if public:
-                full_path = f"public/{full_path}"
-            else : 
-                full_path = f"private/{full_path}"
-                
-            file.file.seek(0)
-            s3 = FileHelper.get_s3_client()
-            
-            s3.upload_fileobj(file.file, settings.AWS_BUCKET_NAME, full_path, ExtraArgs=extra_args)
-
-            public_url = f"https://{settings.AWS_BUCKET_NAME}.s3.{settings.AWS_REGION}.amazonaws.com/{full_path}"
-
-            return (public_url if public else full_path), back_name, file.content_type
-
-        except NoCredentialsError:
-            raise RuntimeError("AWS credentials are missing or invalid")
-        except ClientError as e:
-            error_code = e.response["Error"]["Code"]
-            if error_code == "NoSuchBucket":
-                raise RuntimeError(f"Bucket {settings.AWS_BUCKET_NAME} does not exist")
-            raise RuntimeError(f"S3 upload failed: {str(e)}")
-        except BotoCoreError as e:
-            raise RuntimeError(f"S3 error: {str(e)}")
-    
-    
-    
     @staticmethod
-    async def upload_byte_to_s3(file: bytes, location: str = "", name: str = "", public: bool = True,content_type : Optional[str]=None):
-        
-        try:
-            if len(file) > settings.MAX_FILE_SIZE:
-                raise ValueError(f"File size exceeds limit of {settings.MAX_FILE_SIZE} bytes")
-
-            path = location.strip("/")
-            
-            name_split = os.path.splitext(name)
-
-            name = f"{name_split[0]}_s3{name_split[1]}"
-
-
-            full_path = f"{path}/{name}" if path else f"{name}"
-        
-            if public:
-                full_path = f"public/{full_path}"
-            else : 
-                full_path = f"private/{full_path}"
-                
-
-            s3 = FileHelper.get_s3_client()
-            s3.put_object(Bucket=settings.AWS_BUCKET_NAME, Key=full_path, Body=file, ContentType=content_type)
-        
-            public_url = FileHelper.get_s3_public_url(full_path)
-
-            return (public_url if public else full_path), name, content_type
+    def iter_s3_objects(prefix: str, start_after: Optional[str] = None, page_size: int = 1000) -> Iterator[List[dict]]:
+        """
+        Yield the objects under `prefix` page by page (lists of at most
+        `page_size` dicts with Key, Size, LastModified, ETag), in key order
+        and starting after the key `start_after` when given.
+        """
+        paginator = FileHelper.get_s3_client().get_paginator("list_objects_v2")
+        params = {"Bucket": settings.AWS_BUCKET_NAME, "Prefix": prefix, "PaginationConfig": {"PageSize": page_size}}
+        if start_after:
+            params["StartAfter"] = start_after
+        for page in paginator.paginate(**params):
+            if page.get("Contents"):
+                yield page["Contents"]
 
-        except NoCredentialsError:
-            raise RuntimeError("AWS credentials are missing or invalid")
-        except ClientError as e:
-            error_code = e.response["Error"]["Code"]
-            if error_code == "NoSuchBucket":
-                raise RuntimeError(f"Bucket {settings.AWS_BUCKET_NAME} does not exist")
-            raise RuntimeError(f"S3 upload failed: {str(e)}")
-        except BotoCoreError as e:
-            raise RuntimeError(f"S3 error: {str(e)}")
-    
-    
-    
-    
     @staticmethod
-    def delete_s3_folder(prefix: str):
+    def delete_s3_keys(keys: List[str]) -> List[str]:
         """
-        Delete all objects in an S3 bucket that start with a given prefix.
-
-        Given a prefix string, this function lists all objects in the
-        S3 bucket that start with that prefix, and then deletes them.
-
-        Parameters:
-        prefix (str): The prefix to match objects against.
+        Delete S3 objects with DeleteObjects requests of `S3_DELETE_BATCH_SIZE` keys.
 
         Returns:
-        None
+            The keys that could not be deleted. Missing keys count as deleted.
         """
         s3 = FileHelper.get_s3_client()
-        response = s3.list_objects_v2(Bucket=settings.AWS_BUCKET_NAME, Prefix=prefix)
-        if "Contents" in response:
-            for obj in response["Contents"]:
-                s3.delete_object(Bucket=settings.AWS_BUCKET_NAME, Key=obj["Key"])
-                print(f"🗑 Deleted {obj['Key']}")
+        failed = []
+        for start in range(0, len(keys), S3_DELETE_BATCH_SIZE):
+            batch = keys[start:start + S3_DELETE_BATCH_SIZE]
+            response = s3.delete_objects(
+                Bucket=settings.AWS_BUCKET_NAME,
+                Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
+            )
+            failed.extend(error["Key"] for error in response.get("Errors", []))
+        return failed
 
     @staticmethod
     def delete_file_from_s3(key: str) -> bool:
@@ -368,8 +205,35 @@ class FileHelper:
         Returns:
         str: The public URL for the given file.
         """
+        if settings.AWS_ENDPOINT_URL:
+            return f"{settings.AWS_ENDPOINT_URL.rstrip('/')}/{settings.AWS_BUCKET_NAME}/{key}"
         return f"https://{settings.AWS_BUCKET_NAME}.s3.{settings.AWS_REGION}.amazonaws.com/{key}"
 
+    @staticmethod
+    def get_s3_key(file_path: str) -> str:
+        """
+        Return the S3 key of a stored file path, which is either a key
+        (private files) or the public URL returned by `StorageBackend.save`.
+        """
+        public_prefix = FileHelper.get_s3_public_url("")
+        if file_path.startswith(public_prefix):
+            return file_path[len(public_prefix):]
+        return file_path.strip("/")
+
+    @staticmethod
+    async def s3_head(key: str) -> Optional[dict]:
+        """
+        Return the metadata of an S3 object (ContentLength, ContentType,
+        ETag, LastModified), or None if it does not exist.
+        """
+        s3 = FileHelper.get_s3_client()
+        try:
+            return await asyncio.to_thread(s3.head_object, Bucket=settings.AWS_BUCKET_NAME, Key=key)
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise RuntimeError(f"S3 error: {str(e)}")
+
     @staticmethod
     def generate_s3_presigned_url(key: str, expires_in: int = 3600):
         """
@@ -406,68 +270,255 @@ class FileHelper:
         
         
     @staticmethod
-    async def s3_stream(key: str, chunk_size: int = 4 * 1024 * 1024):
+    async def s3_stream(key: str, chunk_size: Optional[int] = None, byte_range: Optional[Tuple[int, int]] = None):
+        """
+        Yield the content of an S3 object by chunks of `chunk_size` bytes
+        (`DOWNLOAD_CHUNK_SIZE` by default), or only the inclusive
+        `byte_range` (start, end) of it.
+        """
+        chunk_size = chunk_size or settings.DOWNLOAD_CHUNK_SIZE
         s3 = FileHelper.get_s3_client()
         loop = asyncio.get_running_loop()
-        s3_object = await loop.run_in_executor(None, lambda: s3.get_object(Bucket=settings.AWS_BUCKET_NAME, Key=key))
+        params = {"Bucket": settings.AWS_BUCKET_NAME, "Key": key}
+        if byte_range is not None:
+            params["Range"] = f"bytes={byte_range[0]}-{byte_range[1]}"
+        s3_object = await loop.run_in_executor(None, lambda: s3.get_object(**params))
         body = s3_object["Body"]
 
-        for chunk in body.iter_chunks(chunk_size):
-            yield chunk
+        try:
+            # Each read blocks on the socket, keep it off the event loop
+            while chunk := await loop.run_in_executor(None, body.read, chunk_size):
+                yield chunk
+        finally:
+            body.close()
         
+    ###########################################
+    ###########################################
+    ########   DIRECT UPLOAD   ################
+    ###########################################
+    ###########################################
+    
     @staticmethod
-    def get_aws_object(key: str):
-        
+    def sign_token(payload: dict, expire: int) -> str:
         """
-        Get a file object from AWS S3.
+        Sign a payload into an url-safe token valid for `expire` seconds.
 
-        Given a key string, this function attempts to retrieve the
-        corresponding file object from the S3 bucket specified in the
-        settings. The file object is returned if successful; otherwise,
-        `None` is returned if the file does not exist.
+        The token is `<base64 json>.<hmac sha256>` keyed with `SECRET_KEY`,
+        the same secret as `generate_local_signed_url`.
+        """
+        data = {**payload, "exp": int(time_module.time()) + expire}
+        body = base64.urlsafe_b64encode(json.dumps(data, separators=(",", ":")).encode()).decode().rstrip("=")
+        signature = hmac.new(settings.SECRET_KEY.encode(), body.encode(), hashlib.sha256).hexdigest()
+        return f"{body}.{signature}"
 
-        Args:
-            key (str): The S3 key (path) of the file to retrieve (e.g., 'folder/20250710_183045_example.txt').
+    @staticmethod
+    def read_token(token: str) -> dict:
+        """
+        Return the payload of a token made by `sign_token`.
+
+        Raises:
+            ValueError: If the token is malformed, tampered with or expired.
+        """
+        body, _, signature = token.rpartition(".")
+        expected = hmac.new(settings.SECRET_KEY.encode(), body.encode(), hashlib.sha256).hexdigest()
+        if not body or not hmac.compare_digest(signature, expected):
+            raise ValueError("Invalid token signature")
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(body + "=" * (-len(body) % 4)))
+        except (ValueError, TypeError) as e:
+            raise ValueError("Invalid token payload") from e
+        if payload.get("exp", 0) < time_module.time():
+            raise ValueError("Token expired")
+        return payload
+
+    @staticmethod
+    async def claim_upload_token(upload_token: str, payload: dict, step: str) -> str:
+        """
+        Mark a direct upload token as used for `step` ("receipt" or "confirm").
+
+        Tokens are single use: a second PUT would replace a file already
+        checked, a second confirm would attach the same file to several rows.
+        The claim lives in Redis until the token expires.
 
         Returns:
-            dict: The file object if successful; otherwise, None if the file does not exist.
+            The key of the claim, to release it if the step fails.
 
         Raises:
-            RuntimeError: If an error occurs during file retrieval, such as missing AWS credentials or a client error.
+            ValueError: If the token was already used for this step.
         """
-        try:
-            s3 = FileHelper.get_s3_client()
-            return  s3.get_object(Bucket=settings.AWS_BUCKET_NAME, Key=key)
-            
-        except ClientError as e:
-            print(e)
-            if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
-                
-                return None 
-            raise RuntimeError(f"Could not get the object : {str(e)}")
-        except Exception as e:
-            print(e)
-            raise RuntimeError(f"Could not get the object: {str(e)}")
+        from src.redis_client import set_to_redis
+
+        digest = hashlib.sha256(upload_token.encode()).hexdigest()
+        claim = f"upload_token:{step}:{digest}"
+        ttl = max(int(payload["exp"] - time_module.time()), 1)
+        if not await set_to_redis(claim, 1, ex=ttl, nx=True):
+            raise ValueError("Upload token already used")
+        return claim
+
+    @staticmethod
+    def build_upload_key(location: str, file_name: str, name: str = "") -> Tuple[str, str]:
+        """
+        Build the storage key of a public upload the way `StorageBackend.save` names files.
+
+        Returns:
+            A tuple containing the key (S3 key, or path relative to `src/` for
+            the local storage) and the sanitized name without extension.
+        """
+        from src.helper.storage import get_storage
+
+        return get_storage().make_key(location, file_name, name)
+
+    @staticmethod
+    async def create_direct_upload(
+        location: str,
+        file_name: str,
+        content_type: str,
+        size: int,
+        name: str = "",
+        context: Optional[dict] = None,
+    ) -> dict:
+        """
+        Prepare an upload that goes straight to the storage instead of
+        through the API.
+
+        On S3 this is a presigned POST whose policy pins the key, the
+        content type and a content length up to `size`. On the local
+        storage it is a PUT to `/local-upload` authorised by a signed token.
+        Either way the client then calls the confirm endpoint of the
+        resource with `upload_token`, which `confirm_direct_upload` checks.
+
+        Args:
+            location (str): The directory path of the file (e.g. "/job-applications")
+            file_name (str): The original file name, for the extension
+            content_type (str): The MIME type the client will send
+            size (int): The size in bytes the client will send
+            name (str): The desired name of the file. Defaults to the file name.
+            context (Optional[dict]): Extra values carried to the confirm step
+                (the resource the file belongs to).
+
+        Returns:
+            A dict with the `method`, `url`, form `fields`, request `headers`,
+            `upload_token` and `expires_in`.
+
+        Raises:
+            FileTooLargeError: If `size` exceeds `MAX_FILE_SIZE`.
+        """
+        if size > settings.MAX_FILE_SIZE:
+            raise FileTooLargeError(f"File size exceeds limit of {settings.MAX_FILE_SIZE} bytes")
+
+        expire = settings.DIRECT_UPLOAD_EXPIRE
+        key, back_name = FileHelper.build_upload_key(location, file_name, name)
+        upload_token = FileHelper.sign_token(
+            {
+                "key": key,
+                "name": back_name,
+                "file_name": file_name,
+                "content_type": content_type,
+                "max_size": size,
+                "storage": settings.STORAGE_LOCATION,
+                "context": context or {},
+            },
+            expire,
+        )
+
+        if settings.STORAGE_LOCATION == "local":
+            return {
+                "method": "PUT",
+                "url": f"{settings.API_BASE_URL}/api/v1/local-upload?{urlencode({'token': upload_token})}",
+                "fields": {},
+                "headers": {"Content-Type": content_type},
+                "upload_token": upload_token,
+                "expires_in": expire,
+            }
+
+        s3 = FileHelper.get_s3_client()
+        presigned = await asyncio.to_thread(
+            s3.generate_presigned_post,
+            settings.AWS_BUCKET_NAME,
+            key,
+            Fields={"Content-Type": content_type},
+            Conditions=[{"Content-Type": content_type}, ["content-length-range", 1, size]],
+            ExpiresIn=expire,
+        )
+        return {
+            "method": "POST",
+            "url": presigned["url"],
+            "fields": presigned["fields"],
+            "headers": {},
+            "upload_token": upload_token,
+            "expires_in": expire,
+        }
 
     @staticmethod
-    def get_aws_list_objects_v2(prefix: str):
+    async def confirm_direct_upload(upload_token: str) -> dict:
+        """
+        Check that the file announced by `create_direct_upload` was uploaded.
+
+        The object is looked up (HEAD on S3, stat on the local storage) and
+        its size checked against the announced one. A token is confirmed once.
+
+        Returns:
+            The token payload plus `file_path` (the value to store on the
+            row, as `StorageBackend.save` would return it) and the stored `size`.
+
+        Raises:
+            ValueError: If the token is invalid, expired or already
+                confirmed, the file is missing or does not match what was
+                announced.
+        """
+        from src.helper.storage import get_storage
+        from src.redis_client import delete_from_redis
 
+        payload = FileHelper.read_token(upload_token)
+        claim = await FileHelper.claim_upload_token(upload_token, payload, "confirm")
+        storage = get_storage()
         try:
-            s3 = FileHelper.get_s3_client()
-            return  s3.list_objects_v2(Bucket=settings.AWS_BUCKET_NAME, Prefix=prefix)
-        
-        except ClientError as e:
-            print(e)
-            if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
-                
-                return None 
-            raise RuntimeError(f"Could not get the object : {str(e)}")
-        except Exception as e:
-            print(e)
-            raise RuntimeError(f"Could not get the object: {str(e)}")
-        
+            stored = await storage.stat(payload["key"])
+            if stored is None:
+                raise ValueError("Uploaded file not found")
+            # The local storage keeps no content type, it was checked on reception
+            if payload["storage"] != "local" and stored.content_type != payload["content_type"]:
+                raise ValueError("Uploaded file content type does not match")
+            if stored.size == 0 or stored.size > payload["max_size"]:
+                raise ValueError("Uploaded file size does not match")
+        except ValueError:
+            # Not uploaded yet or refused: the client may confirm again
+            await delete_from_redis(claim)
+            raise
+
+        return {**payload, "file_path": storage.file_path(payload["key"]), "size": stored.size}
 
+    @staticmethod
+    async def receive_local_upload(upload_token: str, content_type: Optional[str], chunks: AsyncIterator[bytes]) -> dict:
+        """
+        Store the body of a local direct upload (the local counterpart of the
+        presigned POST) at the key pinned by the token. A token is received
+        once, so the file cannot be replaced after it was confirmed.
 
+        Raises:
+            ValueError: If the token is invalid, expired, already used, not
+                for the local storage or the content type differs from the
+                announced one.
+            FileTooLargeError: If the body is bigger than the announced size.
+        """
+        from src.redis_client import delete_from_redis
+
+        payload = FileHelper.read_token(upload_token)
+        if payload["storage"] != "local":
+            raise ValueError("Token is not for the local storage")
+        if content_type != payload["content_type"]:
+            raise ValueError("Content type does not match")
+
+        claim = await FileHelper.claim_upload_token(upload_token, payload, "receipt")
+        path_save = os.path.join("src", payload["key"])
+        os.makedirs(os.path.dirname(path_save), exist_ok=True)
+        try:
+            size, _ = await FileHelper.save_stream(chunks, path_save, payload["max_size"])
+        except Exception:
+            # Nothing was stored: the client may send the file again
+            await delete_from_redis(claim)
+            raise
+        return {**payload, "size": size}
 
     ###########################################
     ###########################################
@@ -495,13 +546,8 @@ class FileHelper:
             RuntimeError: If an error occurs during URL generation, such as a client error.
         """
         
-        expire = int(time.time()) + expire
-        data = f"{file_path}:{expire}"
-        signature = hmac.new(
-            settings.SECRET_KEY.encode(),
-            data.encode(),
-            hashlib.sha256
-        ).hexdigest()
+        expire = int(time_module.time()) + expire
+        signature = FileHelper._local_file_signature(file_path, expire)
 
         query = urlencode({
             "file": file_path,
@@ -509,218 +555,60 @@ class FileHelper:
             "signature": signature
         })
 
-        return f"/private-file?{query}"
+        return f"{settings.API_BASE_URL}/api/v1/private-file?{query}"
 
-    
     @staticmethod
-    async def upload_file_local(file: UploadFile, location: str = "", name: str = ""):
-        """
-        This function is used to upload a file to the server. The file is saved
-        in the src/static directory. If a location is provided, the file is saved
-        in that location. If a name is provided, the file is saved with that name.
-        Otherwise, the file is saved with the same name as the original file.
-
-        Args:
-            file (UploadFile): The file to be uploaded
-            location (str): The location where the file should be saved
-            name (str): The name with which the file should be saved
-
-        Returns:
-            A tuple containing the path of the saved file, the name of the saved
-            file, and the content type of the file
-        """
-        try:
-            path_save = "src/static/uploads"
-            path_save = path_save + location
-
-            if not os.path.exists(path_save):
-                os.makedirs(path_save)
-
-            path = "static/uploads" + location
-
-            date_time_now = datetime.now().strftime("%H%M%S%f")
-            name_split = os.path.splitext(file.filename)
-            if name == "":
-                name = file.filename
-                back_name = name_split[0]
-            else:
-                back_name = name
-                name = f"{name}{name_split[1]}"
-
-            path = f"{path}/{date_time_now}_{name}"
-            path_save = f"{path_save}/{date_time_now}_{name}"
-            contents = await file.read()
-            with open(path_save, "wb") as f:
-                f.write(contents)
-
-            return path, back_name, file.content_type
-
-        except Exception as e:
-            print(e)
-            return None, None, None
+    def _local_file_signature(file_path: str, expire: int) -> str:
+        data = f"{file_path}:{expire}"
+        return hmac.new(
+            settings.SECRET_KEY.encode(),
+            data.encode(),
+            hashlib.sha256
+        ).hexdigest()
 
     @staticmethod
-    async def upload_private_file_local(file: UploadFile, location: str = "", name: str = ""):
+    def verify_local_signed_url(file_path: str, expire: int, signature: str) -> bool:
         """
-        This function is used to upload a file to the server. The file is saved
-        in the src/static directory. If a location is provided, the file is saved
-        in that location. If a name is provided, the file is saved with that name.
-        Otherwise, the file is saved with the same name as the original file.
-
-        Args:
-            file (UploadFile): The file to be uploaded
-            location (str): The location where the file should be saved
-            name (str): The name with which the file should be saved
+        Check the query of a link made by `generate_local_signed_url`.
 
         Returns:
-            A tuple containing the path of the saved file, the name of the saved
-            file, and the content type of the file
+            bool: True if the signature matches and the link has not expired.
         """
-        try:
-            path_save = "src/uploads"
-            path_save = path_save + location
-
-            if not os.path.exists(path_save):
-                os.makedirs(path_save)
-
-            path = "uploads" + location
-
-            date_time_now = datetime.now().strftime("%H%M%S%f")
-            name_split = os.path.splitext(file.filename)
-            if name == "":
-                name = file.filename
-                back_name = name_split[0]
-            else:
-                back_name = name
-                name = f"{name}{name_split[1]}"
-
-            path = f"{path}/{date_time_now}_{name}"
-            path_save = f"{path_save}/{date_time_now}_{name}"
-            with open(path_save, "wb") as f:
-                f.write(file.file.read())
+        if expire < time_module.time():
+            return False
+        return hmac.compare_digest(signature, FileHelper._local_file_signature(file_path, expire))
 
-            extension = file.content_type
-            return path, back_name, extension
-
-        except Exception as e:
-            print(e)
-            return None, None, None
     
     @staticmethod
-    async def upload_private_byte_local(file: bytes, location: str = "", name: str = "",extension: Optional[str] = None):
-        
+    async def save_stream(chunks: AsyncIterator[bytes], destination: str, max_size: Optional[int] = None) -> Tuple[int, str]:
         """
-        This function is used to upload a byte file to the server. The file is saved
-        in the src/static directory. If a location is provided, the file is saved
-        in that location. If a name is provided, the file is saved with that name.
-        Otherwise, the file is saved with the same name as the original file.
+        Write a stream of chunks (a request body) to `destination`.
 
-        Args:
-            file (bytes): The file to be uploaded
-            location (str): The location where the file should be saved
-            name (str): The name with which the file should be saved
-            extension (Optional[str]): The content type of the file
+        Only one chunk is held in memory at a time. The size limit is checked
+        as the chunks arrive, the SHA-256 is computed on the fly and no
+        partial file is left behind on failure.
 
         Returns:
-            A tuple containing the path of the saved file, the name of the saved
-            file, and the content type of the file
-        """
-        try:
-            path_save = "src/uploads"
-            path_save = path_save + location
-
-            if not os.path.exists(path_save):
-                try :
-                    os.makedirs(path_save)
-                except :
-                    pass
-
-            path = "uploads" + location
+            A tuple containing the size in bytes and the SHA-256 hex digest
+            of the content.
 
-            path = f"{path}/{name}"
-            path_save = f"{path_save}/{name}"
-            with open(path_save, "wb") as f:
-                f.write(file)
-            
-            return path, name, extension
-
-        except Exception as e:
-            print(e)
-            return None, None, None
-    
-    @staticmethod
-    async def upload_public_byte_local(file: bytes, location: str = "", name: str = "",extension: Optional[str] = None):
-        
-        try:
-            path_save = "src/static/uploads"
-            path_save = path_save + location
-
-            if not os.path.exists(path_save):
-                try :
-                    os.makedirs(path_save)
-                except :
-                    pass
-
-            path = "uploads" + location
-
-            path = f"{path}/{name}"
-            path_save = f"{path_save}/{name}"
-            with open(path_save, "wb") as f:
-                f.write(file)
-            print(path_save)
-            return path, name, extension
-
-        except Exception as e:
-            print(e)
-            return None, None, None
-    
-    
-    @staticmethod
-    def delete_file_local(file_path: str):
-        
-        """
-        This function is used to delete a file from the local server. The path to
-        the file should be provided. The function returns a dictionary with the
-        message and the success status.
-
-        Args:
-            file_path (str): The path to the file to be deleted
-
-        Returns:
-            A dictionary containing the message and the success status
+        Raises:
+            FileTooLargeError: If the stream goes over the size limit.
         """
+        max_size = settings.MAX_FILE_SIZE if max_size is None else max_size
+        digest = hashlib.sha256()
+        size = 0
         try:
-            # Construct the full path to the image
-            full_path = os.path.join("src", file_path)
-
-            # Check if the file exists
-            if os.path.exists(full_path):
-                os.remove(full_path)
-                return {"message": "File deleted successfully", "success": True}
-            else:
-                return {"message": "File not found", "success": False}
-
-        except Exception as e:
-            print(e)
-            return {"message": "Exception has occur", "success": False}
-
-    @staticmethod
-    def delete_local_folder(folder_path: str):
-        """
-        Deletes a folder from the local server.
-
-        This function takes the relative path to a folder, constructs its absolute path,
-        and deletes it if it exists. If the folder does not exist, a message indicating
-        that the folder was not found is printed.
-
-        Args:
-            folder_path (str): The relative path to the folder to be deleted.
-        """
-
-        absolute_path = os.path.abspath("src/"+folder_path)
-    
-        if os.path.isdir(absolute_path):
-            shutil.rmtree(absolute_path)
-            print(f"🗑 Deleted local folder: {absolute_path}")
-        else:
-            print(f"⚠ Folder not found: {absolute_path}")
\ No newline at end of file
+            async with aiofiles.open(destination, "wb") as output:
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if size > max_size:
+                        raise FileTooLargeError(f"File size exceeds limit of {max_size} bytes")
+                    digest.update(chunk)
+                    await output.write(chunk)
+        except BaseException:
+            if os.path.exists(destination):
+                os.remove(destination)
+            raise
+
+        return size, digest.hexdigest()
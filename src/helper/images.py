@@ -0,0 +1,164 @@
+import asyncio
+import io
+import os
+from typing import Dict, List, Optional, Tuple
+
+from celery import shared_task
+from PIL import Image, ImageOps, features
+from sqlmodel import Session
+
+from src.config import settings
+from src.helper.storage import get_storage
+
+# (extension, Pillow format, content type) of the files generated for each variant
+_FORMATS = (("webp", "WEBP", "image/webp"), ("jpeg", "JPEG", "image/jpeg"))
+
+
+def _output_formats():
+    # Pillow can be built without libwebp, JPEG is always available
+    return [
+        output for output in _FORMATS if output[1] != "WEBP" or features.check("webp")
+    ]
+
+
+def render_variants(data: bytes) -> List[Tuple[str, str, int, int, bytes]]:
+    """
+    Resize an image to each of `IMAGE_VARIANT_WIDTHS` (never upscaled) in
+    WebP (when Pillow supports it) and JPEG.
+
+    The EXIF orientation is applied to the pixels and the metadata (EXIF,
+    GPS, camera) is not copied to the variants, only the colour profile.
+
+    Returns:
+        A list of (variant, extension, width, height, content).
+    """
+    with Image.open(io.BytesIO(data)) as source:
+        icc_profile = source.info.get("icc_profile")
+        image = ImageOps.exif_transpose(source)
+        has_alpha = image.mode in ("RGBA", "LA") or (
+            image.mode == "P" and "transparency" in image.info
+        )
+        image = image.convert("RGBA" if has_alpha else "RGB")
+
+    if has_alpha:
+        # JPEG has no transparency, flatten on white
+        opaque = Image.new("RGB", image.size, (255, 255, 255))
+        opaque.paste(image, mask=image.getchannel("A"))
+    else:
+        opaque = image
+
+    rendered = []
+    quality = settings.IMAGE_VARIANT_QUALITY
+    for variant, width in settings.IMAGE_VARIANT_WIDTHS.items():
+        for extension, image_format, _ in _output_formats():
+            resized = (image if extension == "webp" else opaque).copy()
+            resized.thumbnail((width, width * 10), Image.LANCZOS)
+            buffer = io.BytesIO()
+            options = {"quality": quality}
+            if icc_profile:
+                options["icc_profile"] = icc_profile
+            if image_format == "JPEG":
+                options.update(optimize=True, progressive=True)
+            resized.save(buffer, image_format, **options)
+            rendered.append(
+                (variant, extension, resized.width, resized.height, buffer.getvalue())
+            )
+    return rendered
+
+
+async def generate_image_variants(file_path: str, location: str) -> Dict[str, dict]:
+    """
+    Build and store the variants of a stored image next to it.
+
+    Returns:
+        The value of the `*_variants` column: {variant: {width, height, webp, jpeg}}
+    """
+    storage = get_storage()
+    data = await storage.read(file_path)
+    rendered = await asyncio.to_thread(render_variants, data)
+
+    stem = os.path.splitext(os.path.basename(storage.key_of(file_path)))[0]
+    content_types = {extension: content_type for extension, _, content_type in _FORMATS}
+    variants: Dict[str, dict] = {}
+    for variant, extension, width, height, content in rendered:
+        stored = await storage.save_bytes(
+            content, location, f"{stem}_{variant}.{extension}", content_types[extension]
+        )
+        variants.setdefault(variant, {"width": width, "height": height})[
+            extension
+        ] = stored.file_path
+    return variants
+
+
+async def delete_image_variants(variants: Optional[Dict[str, dict]]) -> None:
+    for variant in (variants or {}).values():
+        for extension, _, _ in _FORMATS:
+            if variant.get(extension):
+                await get_storage().remove(variant[extension])
+
+
+def _image_target(kind: str):
+    """Model, image column, variants column and upload location of each kind of image"""
+    if kind == "post":
+        from src.api.blog.models import Post
+
+        return Post, "cover_image", "cover_image_variants", "/posts"
+    if kind == "post_section":
+        from src.api.blog.models import PostSection
+
+        return PostSection, "cover_image", "cover_image_variants", "/posts/sections"
+    if kind == "user":
+        from src.api.user.models import User
+
+        return User, "picture", "picture_variants", "/profile"
+    raise ValueError(f"Unknown image kind: {kind}")
+
+
+async def _drop_blog_caches(slug: str) -> None:
+    from src.api.blog.service import BlogService
+    from src.helper.cache import CacheTag, invalidate_cache_tags
+    from src.redis_client import close_redis
+
+    try:
+        await BlogService(session=None).drop_post_render_cache(slug)
+        await invalidate_cache_tags(CacheTag.BLOG_POSTS)
+    finally:
+        await close_redis()
+
+
+@shared_task(ignore_result=True)
+def process_image_variants(
+    kind: str, row_id, file_path: str
+) -> Optional[Dict[str, dict]]:
+    """
+    Generate the variants of an uploaded image and store their URLs on the row.
+
+    Variants are discarded when the image was replaced or removed while the
+    task was waiting.
+    """
+    from src.database import engine
+
+    model, image_field, variants_field, location = _image_target(kind)
+    variants = asyncio.run(generate_image_variants(file_path, location))
+
+    slug = None
+    with Session(engine) as session:
+        row = session.get(model, row_id)
+        if row is None or getattr(row, image_field) != file_path:
+            asyncio.run(delete_image_variants(variants))
+            return None
+        setattr(row, variants_field, variants)
+        session.add(row)
+        session.commit()
+
+        if kind == "post":
+            slug = row.slug
+        elif kind == "post_section":
+            from src.api.blog.models import Post
+
+            post = session.get(Post, row.post_id)
+            slug = post.slug if post else None
+
+    if slug:
+        asyncio.run(_drop_blog_caches(slug))
+    return variants
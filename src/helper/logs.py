@@ -0,0 +1,296 @@
+"""
+Structured logging of the API and of the Celery workers.
+
+The application logs through `logging.getLogger(__name__)`. Records are
+rendered in the calling thread and put on a bounded queue; a single writer
+thread masks the secrets and personal data, formats them (JSON lines by
+default) and writes them to stdout. A full queue drops records instead of
+blocking a request.
+
+Each record carries the correlation id of the request (the `X-Request-ID`
+header, or a new one) or of the Celery task it runs in: the id is passed
+along with the tasks the request enqueues.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import re
+import sys
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from src.config import settings
+
+# Correlation id of the request or task being run
+correlation_id: ContextVar[Optional[str]] = ContextVar("correlation_id", default=None)
+
+REQUEST_ID_HEADER = b"x-request-id"
+# Ids accepted from the clients, others are replaced (they end up in the log lines)
+_VALID_REQUEST_ID = re.compile(r"[\w.:-]{1,64}")
+# Header of the Celery messages with the correlation id of the sending request
+TASK_CORRELATION_HEADER = "lafaom_correlation_id"
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s [%(correlation_id)s] %(message)s"
+
+REDACTED = "[REDACTED]"
+# Names of the settings, parameters and log fields holding credentials
+SENSITIVE_NAME = re.compile(
+    r"pass(word|wd)?|secret|token|api_?key|authorization|signature|private_key", re.I
+)
+_KEY_VALUE = re.compile(
+    r"""(?P<key>["']?[\w-]*"""
+    r"""(?:pass(?:word|wd)?|secret|token|api[_-]?key|"""
+    r"""authorization|signature|private_key)"""
+    r"""[\w-]*["']?\s*[:=]\s*)"""
+    r"""(?P<value>"[^"]*"|'[^']*'|[^\s,;&})]+)""",
+    re.I,
+)
+_BEARER = re.compile(r"\b(Bearer|Basic)\s+[\w.~+/=-]+", re.I)
+_JWT = re.compile(r"\beyJ[\w-]+\.[\w-]+\.[\w-]*")
+_EMAIL = re.compile(r"(?<![\w.+-])([\w.+-])[\w.+-]*@([\w-]+(?:\.[\w-]+)+)")
+# 8 to 15 digits, maybe after a "+" and split by spaces (dates and ids are left alone)
+_PHONE = re.compile(r"(?<![\w.+-])\+?\d(?:[ ]?\d){7,14}(?![\w.-])")
+
+# Attributes of every LogRecord: the others were passed in `extra`
+_RECORD_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {
+    "message",
+    "asctime",
+    "correlation_id",
+    "taskName",
+}
+
+
+def new_correlation_id() -> str:
+    return uuid.uuid4().hex
+
+
+def _secret_values() -> list:
+    """Values of the credentials in the settings, longest first"""
+    values = {
+        value
+        for name, value in settings.model_dump().items()
+        if SENSITIVE_NAME.search(name) and isinstance(value, str) and len(value) >= 6
+    }
+    return sorted(values, key=len, reverse=True)
+
+
+def _mask_phone(match: re.Match) -> str:
+    digits = re.sub(r"\D", "", match.group(0))
+    return "*" * (len(digits) - 2) + digits[-2:]
+
+
+class Redactor:
+    """Masks credentials and, with `LOG_REDACT_PII`, emails and phone numbers"""
+
+    def __init__(self, secrets: Optional[list] = None, pii: Optional[bool] = None):
+        self.secrets = _secret_values() if secrets is None else secrets
+        self.pii = settings.LOG_REDACT_PII if pii is None else pii
+
+    def __call__(self, text: str) -> str:
+        for secret in self.secrets:
+            if secret in text:
+                text = text.replace(secret, REDACTED)
+        text = _KEY_VALUE.sub(lambda m: m.group("key") + REDACTED, text)
+        text = _BEARER.sub(lambda m: f"{m.group(1)} {REDACTED}", text)
+        text = _JWT.sub(REDACTED, text)
+        if self.pii:
+            text = _EMAIL.sub(r"\1***@\2", text)
+            text = _PHONE.sub(_mask_phone, text)
+        return text
+
+
+class RedactingFilter(logging.Filter):
+    """Masks the message, traceback and extra fields of the records before writing"""
+
+    def __init__(self, redactor: Optional[Redactor] = None):
+        super().__init__()
+        self.redact = redactor or Redactor()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.msg = self.redact(str(record.msg))
+        if record.exc_text:
+            record.exc_text = self.redact(record.exc_text)
+        for key, value in list(vars(record).items()):
+            if key in _RECORD_ATTRS:
+                continue
+            if SENSITIVE_NAME.search(key):
+                setattr(record, key, REDACTED)
+            elif isinstance(value, str):
+                setattr(record, key, self.redact(value))
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per record: time, level, logger, message, correlation id,
+    extra fields and traceback.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "correlation_id", None):
+            entry["correlation_id"] = record.correlation_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Puts the records on a bounded queue for the writer thread. The message and
+    traceback are rendered here, while the arguments are those of the call;
+    when the queue is full the record is dropped and counted.
+    """
+
+    _traceback_formatter = logging.Formatter()
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self._traceback_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        current = correlation_id.get()
+        if current is not None:
+            record.correlation_id = current
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_queue_handler: Optional[NonBlockingQueueHandler] = None
+_listener: Optional[QueueListener] = None
+
+
+def build_handler(stream=None) -> logging.Handler:
+    """Handler of the writer thread: redaction, then JSON or text lines on `stream`"""
+    handler = logging.StreamHandler(stream or sys.stdout)
+    if settings.LOG_FORMAT == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(
+            logging.Formatter(TEXT_FORMAT, defaults={"correlation_id": "-"})
+        )
+    handler.addFilter(RedactingFilter())
+    return handler
+
+
+def configure_logging(stream=None) -> NonBlockingQueueHandler:
+    """
+    Route every logger of the process (application, uvicorn, Celery) to the
+    queue and start the writer thread, once. Levels come from `LOG_LEVEL` and,
+    per logger, from `LOG_LEVELS`.
+    """
+    global _queue_handler, _listener
+    if _queue_handler is not None:
+        return _queue_handler
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    _queue_handler = NonBlockingQueueHandler(queue.Queue(settings.LOG_QUEUE_SIZE))
+    root.addHandler(_queue_handler)
+    root.setLevel(settings.LOG_LEVEL)
+    for name, level in settings.LOG_LEVELS.items():
+        logging.getLogger(name).setLevel(level)
+    # uvicorn sets up its own stream handlers before importing the app
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        logger = logging.getLogger(name)
+        logger.handlers = []
+        logger.propagate = True
+
+    _listener = QueueListener(_queue_handler.queue, build_handler(stream))
+    _listener.start()
+    atexit.register(stop_logging)
+    return _queue_handler
+
+
+def stop_logging() -> None:
+    """Write the records still queued and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _restart_after_fork() -> None:
+    """
+    The writer thread is not copied into forked processes (Celery pool,
+    gunicorn): start theirs.
+    """
+    global _listener
+    if _listener is None:
+        return
+    _queue_handler.queue = queue.Queue(settings.LOG_QUEUE_SIZE)
+    _listener = QueueListener(_queue_handler.queue, *_listener.handlers)
+    _listener.start()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+class CorrelationIdMiddleware:
+    """
+    ASGI middleware giving each request a correlation id: the `X-Request-ID`
+    header sent by the client or the proxy, else a new one. The id is sent back
+    in the response headers.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            return await self.app(scope, receive, send)
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == REQUEST_ID_HEADER:
+                request_id = value.decode("latin-1")
+                break
+        if request_id is None or not _VALID_REQUEST_ID.fullmatch(request_id):
+            request_id = new_correlation_id()
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (REQUEST_ID_HEADER, request_id.encode("latin-1")),
+                ]
+            await send(message)
+
+        token = correlation_id.set(request_id)
+        await self.app(scope, receive, send_with_id)
+        # Kept on errors: the unhandled exceptions handler runs outside this middleware
+        correlation_id.reset(token)
@@ -0,0 +1,237 @@
+import logging
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram
+from prometheus_client.core import GaugeMetricFamily
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets (seconds) of the API routes and of the provider calls
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+REDIS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time to serve a request, by route template",
+    ["method", "route", "status"],
+    buckets=REQUEST_BUCKETS,
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "Requests being served", ["method"]
+)
+REDIS_COMMAND_DURATION = Histogram(
+    "redis_command_duration_seconds",
+    "Latency of the Redis cache commands",
+    ["command"],
+    buckets=REDIS_BUCKETS,
+)
+PROVIDER_REQUEST_DURATION = Histogram(
+    "provider_request_duration_seconds",
+    "Latency of the calls to the external providers",
+    ["provider"],
+    buckets=REQUEST_BUCKETS,
+)
+PROVIDER_REQUEST_ERRORS = Counter(
+    "provider_request_errors_total",
+    "Calls to the external providers that failed or got an error status",
+    ["provider", "reason"],
+)
+
+
+def route_label(scope: dict) -> str:
+    """
+    Route template of a served request ("/api/v1/payments/{payment_id}"), so
+    that the series do not grow with the ids in the paths.
+    """
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    # Mounted apps (static files) only leave the path they are mounted on
+    return scope.get("root_path") or "unmatched"
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request, labelled by route and status"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_progress.dec()
+            HTTP_REQUEST_DURATION.labels(
+                method, route_label(scope), str(status)
+            ).observe(time.perf_counter() - started)
+
+
+def provider_hosts() -> Dict[str, str]:
+    hosts = {
+        "api-checkout.cinetpay.com": "cinetpay",
+        urlsplit(settings.ELYONPAY_API_URL).hostname: "elyonpay",
+        urlsplit(settings.MOODLE_API_URL).hostname: "moodle",
+        settings.MAILGUN_ENDPOINT: "mailgun",
+        "api.brevo.com": "brevo",
+    }
+    if settings.CURRENCY_API_URL:
+        hosts[urlsplit(settings.CURRENCY_API_URL).hostname] = "currency_api"
+    return hosts
+
+
+def provider_of(request: httpx.Request) -> str:
+    return provider_hosts().get(request.url.host, "other")
+
+
+def _observe_response(provider: str, response: httpx.Response, started: float) -> None:
+    PROVIDER_REQUEST_DURATION.labels(provider).observe(time.perf_counter() - started)
+    if response.status_code >= 400:
+        PROVIDER_REQUEST_ERRORS.labels(provider, str(response.status_code)).inc()
+
+
+def _observe_error(provider: str, error: Exception, started: float) -> None:
+    PROVIDER_REQUEST_DURATION.labels(provider).observe(time.perf_counter() - started)
+    PROVIDER_REQUEST_ERRORS.labels(provider, type(error).__name__).inc()
+
+
+class ProviderMetricsTransport(httpx.BaseTransport):
+    """httpx transport recording the latency and errors of each call, by provider"""
+
+    def __init__(self, transport: Optional[httpx.BaseTransport] = None):
+        self.transport = transport or httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        provider = provider_of(request)
+        started = time.perf_counter()
+        try:
+            response = self.transport.handle_request(request)
+        except Exception as e:
+            _observe_error(provider, e, started)
+            raise
+        _observe_response(provider, response, started)
+        return response
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class AsyncProviderMetricsTransport(httpx.AsyncBaseTransport):
+    """`ProviderMetricsTransport` of the async clients"""
+
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        provider = provider_of(request)
+        started = time.perf_counter()
+        try:
+            response = await self.transport.handle_async_request(request)
+        except Exception as e:
+            _observe_error(provider, e, started)
+            raise
+        _observe_response(provider, response, started)
+        return response
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+class PoolCollector:
+    """Connections of the SQLAlchemy pools built by the process, read at scrape time"""
+
+    @staticmethod
+    def families():
+        return (
+            GaugeMetricFamily(
+                "db_pool_connections",
+                "Connections of the database pools",
+                labels=["engine", "state"],
+            ),
+            GaugeMetricFamily(
+                "db_pool_size",
+                "Configured size of the database pools",
+                labels=["engine"],
+            ),
+        )
+
+    def describe(self):
+        return self.families()
+
+    def collect(self):
+        from src.database import _engines
+
+        connections, size = self.families()
+        for name in ("engine", "engine_async"):
+            engine = _engines.get(name)
+            if engine is None:
+                continue
+            pool = getattr(engine, "sync_engine", engine).pool
+            if not hasattr(pool, "checkedout"):
+                continue
+            connections.add_metric([name, "checked_out"], pool.checkedout())
+            connections.add_metric([name, "checked_in"], pool.checkedin())
+            connections.add_metric([name, "overflow"], max(pool.overflow(), 0))
+            size.add_metric([name], pool.size())
+        yield connections
+        yield size
+
+
+class QueueDepthCollector:
+    """Messages waiting in each Celery queue, asked to the broker at scrape time"""
+
+    @staticmethod
+    def family():
+        return GaugeMetricFamily(
+            "celery_queue_depth",
+            "Messages waiting in the Celery queues",
+            labels=["queue"],
+        )
+
+    def describe(self):
+        return [self.family()]
+
+    def collect(self):
+        from src.celery_utils import get_queue_depths
+
+        depth = self.family()
+        try:
+            depths = get_queue_depths()
+        except Exception as e:
+            logger.warning("Celery queue depth error: %s", e)
+            depths = {}
+        for queue, count in depths.items():
+            depth.add_metric([queue], count)
+        yield depth
+
+
+_collectors_registered = False
+
+
+def register_collectors(registry=REGISTRY) -> None:
+    """Add the scrape-time collectors (database pools, Celery queues), once"""
+    global _collectors_registered
+    if not _collectors_registered:
+        registry.register(PoolCollector())
+        if settings.METRICS_QUEUE_DEPTH:
+            registry.register(QueueDepthCollector())
+        _collectors_registered = True
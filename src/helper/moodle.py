@@ -1,6 +1,9 @@
-import httpx
+import logging
 from typing import Any, Dict, List, Optional
 from src.config import settings
+from src.helper.clients import async_http_client
+
+logger = logging.getLogger(__name__)
 
 
 class MoodleAPIError(Exception):
@@ -20,8 +23,7 @@ class MoodleService:
     def __init__(self, base_url: Optional[str] = None, token: Optional[str] = None) -> None:
         self.base_url = (base_url or getattr(settings, "MOODLE_API_URL", "")).rstrip("/")
         self.token = token or getattr(settings, "MOODLE_API_TOKEN", None)
-        
-        print(self.base_url, self.token)
+
         if not self.base_url or not self.token:
             raise ValueError("MoodleService requires MOODLE_BASE_URL and MOODLE_TOKEN in settings")
 
@@ -32,12 +34,11 @@ class MoodleService:
             "wsfunction": wsfunction,
             "moodlewsrestformat": "json",
         }
-        async with httpx.AsyncClient(timeout=30) as client:
+        async with async_http_client(timeout=30) as client:
             resp = await client.post(url, params=query, data=params)
             resp.raise_for_status()
             data = resp.json()
-            
-            print(data)
+            logger.debug("Moodle %s response: %s", wsfunction, data)
             # Moodle errors often come as {exception, errorcode, message}
             if isinstance(data, dict) and data.get("exception"):
                 raise MoodleAPIError(f"{data.get('errorcode')}: {data.get('message')}")
@@ -1,4 +1,6 @@
 
+from typing import ClassVar, Optional
+
 from pydantic import BaseModel
 from src.config import settings
 
@@ -11,6 +13,8 @@ class NotificationBase(BaseModel):
     email : str
     email_template : str = "email_base"
     lang : str = "en"
+    # Queue of the email task, the task route (default queue) when None
+    celery_queue : ClassVar[Optional[str]] = None
     
     def email_data(self):
         return {}
@@ -20,11 +24,11 @@ class NotificationBase(BaseModel):
     def send_notification(self) :
         data = self.email_data()
         if settings.EMAIL_CHANNEL == EMAIL_CHANNEL.SMTP :
-            NotificationHelper.send_smtp_email.delay( data)
+            NotificationHelper.send_smtp_email.apply_async(args=(data,), queue=self.celery_queue)
         elif settings.EMAIL_CHANNEL == EMAIL_CHANNEL.MAILGUN : 
-            NotificationHelper.send_mailgun_email.delay( data)
+            NotificationHelper.send_mailgun_email.apply_async(args=(data,), queue=self.celery_queue)
         elif settings.EMAIL_CHANNEL == EMAIL_CHANNEL.BREVO :
-            NotificationHelper.send_brevo_email.delay( data)
+            NotificationHelper.send_brevo_email.apply_async(args=(data,), queue=self.celery_queue)
         return True
             
 
@@ -53,6 +57,7 @@ class LoginAlertNotification(NotificationBase) :
 class AccountVerifyNotification(NotificationBase) :
 
     subject : str = "Email Validation"
+    celery_queue : ClassVar[Optional[str]] = settings.CELERY_HIGH_PRIORITY_QUEUE
     email_template : str = "verify_email.html"
     code : str = ""  
     time : int = 30
@@ -74,6 +79,7 @@ class AccountVerifyNotification(NotificationBase) :
 class ForgottenPasswordNotification(NotificationBase) :
 
     subject : str = "Forgotten Password"
+    celery_queue : ClassVar[Optional[str]] = settings.CELERY_HIGH_PRIORITY_QUEUE
     email_template : str = "forgotten_password.html"
     code : str = ""  
     time : int = 30 
@@ -96,6 +102,7 @@ class ForgottenPasswordNotification(NotificationBase) :
 class ChangeAccountNotification(NotificationBase) :
 
     subject : str = "Change Email"
+    celery_queue : ClassVar[Optional[str]] = settings.CELERY_HIGH_PRIORITY_QUEUE
     email_template : str = "change_email.html" 
     code : str = ""  
     time : int = 30  
@@ -118,6 +125,7 @@ class ChangeAccountNotification(NotificationBase) :
 class TwoFactorAuthNotification(NotificationBase) :
 
     subject : str = "Two Factor Authentication"
+    celery_queue : ClassVar[Optional[str]] = settings.CELERY_HIGH_PRIORITY_QUEUE
     email_template : str = "2fa_auth_email.html"  
     code : str = ""  
     time : int = 30  
@@ -198,6 +206,7 @@ class JobApplicationConfirmationNotification(NotificationBase) :
 class JobApplicationOTPNotification(NotificationBase) :
 
     subject : str = "Job Application Update Code"
+    celery_queue : ClassVar[Optional[str]] = settings.CELERY_HIGH_PRIORITY_QUEUE
     email_template : str = "job_application_otp.html"
     code : str = ""
     time : int = 30
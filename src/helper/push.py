@@ -0,0 +1,224 @@
+import json
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from celery import shared_task
+
+from src.config import settings
+from src.helper.in_app_notif import NotificationType
+
+# Most tokens one FCM multicast call accepts
+FCM_MULTICAST_LIMIT = 500
+
+
+class PushMessage(NamedTuple):
+    title: str
+    body: str
+    image: Optional[str] = None
+    data: Optional[Dict[str, str]] = None
+
+
+class PushResult(NamedTuple):
+    sent: int
+    failed: int
+    # Tokens FCM reports as unregistered or belonging to another project
+    invalid_tokens: List[str]
+    # Tokens refused because the FCM quota was exceeded, to send again later
+    quota_exceeded_tokens: List[str] = []
+
+
+class FirebasePushClient:
+    """Multicast through the Firebase Admin app of the process"""
+
+    def send_multicast(self, tokens: List[str], message: PushMessage) -> PushResult:
+        from firebase_admin import messaging
+
+        from src.helper.clients import get_firebase_app
+
+        response = messaging.send_each_for_multicast(
+            messaging.MulticastMessage(
+                tokens=tokens,
+                notification=messaging.Notification(
+                    title=message.title, body=message.body, image=message.image
+                ),
+                data=message.data,
+            ),
+            app=get_firebase_app(),
+        )
+        invalid, quota_exceeded = [], []
+        for token, result in zip(tokens, response.responses):
+            if isinstance(result.exception, messaging.QuotaExceededError):
+                quota_exceeded.append(token)
+            elif isinstance(
+                result.exception,
+                (messaging.UnregisteredError, messaging.SenderIdMismatchError),
+            ):
+                invalid.append(token)
+        return PushResult(
+            response.success_count, response.failure_count, invalid, quota_exceeded
+        )
+
+
+class StubPushClient:
+    """
+    Local stand-in for FCM (FCM_BACKEND="stub"): records the messages instead
+    of sending them. Tokens starting with "invalid" are reported unregistered.
+    """
+
+    def __init__(self):
+        self.sent: List[Tuple[List[str], PushMessage]] = []
+
+    def send_multicast(self, tokens: List[str], message: PushMessage) -> PushResult:
+        self.sent.append((list(tokens), message))
+        invalid = [token for token in tokens if token.startswith("invalid")]
+        return PushResult(len(tokens) - len(invalid), len(invalid), invalid)
+
+
+_clients = {}
+
+
+def get_push_client():
+    """Push client of `settings.FCM_BACKEND`"""
+    if settings.FCM_BACKEND not in _clients:
+        _clients[settings.FCM_BACKEND] = (
+            StubPushClient() if settings.FCM_BACKEND == "stub" else FirebasePushClient()
+        )
+    return _clients[settings.FCM_BACKEND]
+
+
+def push_data(data: Optional[dict]) -> Optional[Dict[str, str]]:
+    """FCM data payloads only hold strings"""
+    if not data:
+        return None
+    return {
+        key: value if isinstance(value, str) else json.dumps(value)
+        for key, value in data.items()
+    }
+
+
+def build_push_message(
+    notification_type: NotificationType, lang: str, data: dict
+) -> PushMessage:
+    lang = lang if lang in notification_type.title else "en"
+    return PushMessage(
+        title=notification_type.title[lang],
+        body=notification_type.template[lang].format(**data),
+        data=push_data(
+            {
+                "type": notification_type.value,
+                "action": notification_type.action(lang, data),
+            }
+        ),
+    )
+
+
+def plan_push_batches(
+    recipients: Iterable[Tuple[str, str]], size: int = FCM_MULTICAST_LIMIT
+) -> Iterator[Tuple[str, List[str]]]:
+    """
+    Group the (token, lang) of the recipients into batches of at most `size`
+    tokens sharing a language. Duplicate tokens are sent once.
+    """
+    batches: Dict[str, List[str]] = {}
+    seen = set()
+    for token, lang in recipients:
+        if not token or token in seen:
+            continue
+        seen.add(token)
+        batch = batches.setdefault(lang or "en", [])
+        batch.append(token)
+        if len(batch) == size:
+            yield lang or "en", batch
+            batches[lang or "en"] = []
+    for lang, batch in batches.items():
+        if batch:
+            yield lang, batch
+
+
+def prune_device_tokens(tokens: List[str]) -> int:
+    """Forget the device tokens FCM no longer accepts"""
+    from sqlalchemy import update
+
+    from src.api.user.models import User
+    from src.database import engine
+    from sqlmodel import Session
+
+    with Session(engine) as session:
+        result = session.execute(
+            update(User).where(User.web_token.in_(tokens)).values(web_token=None)
+        )
+        session.commit()
+    return result.rowcount
+
+
+def deliver_push_batch(tokens: List[str], message: PushMessage) -> PushResult:
+    result = get_push_client().send_multicast(tokens, message)
+    if result.invalid_tokens:
+        prune_device_tokens(result.invalid_tokens)
+    return result
+
+
+def iter_push_recipients(
+    user_ids: Optional[List[str]] = None,
+) -> Iterator[Tuple[str, str]]:
+    """(token, lang) of the users with a device token, FCM_MULTICAST_LIMIT at a time"""
+    from sqlmodel import Session, select
+
+    from src.api.user.models import User
+    from src.database import engine
+
+    last_id = None
+    with Session(engine) as session:
+        while True:
+            statement = (
+                select(User.id, User.web_token, User.lang)
+                .where(User.web_token.is_not(None))
+                .order_by(User.id)
+            )
+            if user_ids is not None:
+                statement = statement.where(User.id.in_(user_ids))
+            if last_id is not None:
+                statement = statement.where(User.id > last_id)
+            rows = session.exec(statement.limit(FCM_MULTICAST_LIMIT)).all()
+            for _, token, lang in rows:
+                yield token, lang
+            if len(rows) < FCM_MULTICAST_LIMIT:
+                return
+            last_id = rows[-1][0]
+
+
+@shared_task(
+    bind=True,
+    ignore_result=True,
+    rate_limit=settings.FCM_BATCH_RATE_LIMIT,
+    max_retries=5,
+)
+def send_push_batch(self, tokens: List[str], message: dict) -> None:
+    """
+    Send one multicast batch. The tokens refused because the FCM quota was
+    exceeded are sent again later, the devices already notified are not.
+    """
+    result = deliver_push_batch(tokens, PushMessage(**message))
+    if result.quota_exceeded_tokens:
+        raise self.retry(
+            args=(result.quota_exceeded_tokens, message),
+            countdown=60 * (self.request.retries + 1),
+        )
+
+
+@shared_task(ignore_result=True)
+def fan_out_push(
+    notification_type: str, data: dict, user_ids: Optional[List[str]] = None
+) -> None:
+    """
+    Send a `NotificationType` push to `user_ids` (every user with a device when
+    None), in the language of each user. One `send_push_batch` is queued per
+    FCM_MULTICAST_LIMIT tokens.
+    """
+    kind = NotificationType.from_value(notification_type)
+    if kind is None:
+        raise ValueError(f"Unknown notification type: {notification_type}")
+    messages = {}
+    for lang, tokens in plan_push_batches(iter_push_recipients(user_ids)):
+        if lang not in messages:
+            messages[lang] = build_push_message(kind, lang, data)._asdict()
+        send_push_batch.delay(tokens, messages[lang])
@@ -0,0 +1,176 @@
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class FilteredQuery:
+    """
+    Filter, order and paginate a select statement in a single round trip.
+
+    Filters are applied once with `where`, then `paginate` fetches the
+    requested page together with `count(*) OVER()` so the total number of
+    matching records comes back with the rows instead of from a second
+    count query. `paginate_cursor` does the same for keyset (cursor)
+    pagination.
+
+    Example:
+        query = FilteredQuery(select(Payment).where(Payment.delete_at.is_(None)))
+        if filters.status is not None:
+            query.where(Payment.status == filters.status)
+        query.order_by(Payment.created_at.desc())
+        payments, total = await query.paginate(session, filters.page, filters.page_size)
+    """
+
+    def __init__(self, statement) -> None:
+        self.statement = statement
+
+    def where(self, *clauses) -> "FilteredQuery":
+        self.statement = self.statement.where(*clauses)
+        return self
+
+    def order_by(self, *clauses) -> "FilteredQuery":
+        self.statement = self.statement.order_by(*clauses)
+        return self
+
+    def count_statement(self):
+        """Return a standalone count of the filtered statement."""
+        return select(func.count()).select_from(
+            self.statement.order_by(None).subquery()
+        )
+
+    async def paginate(
+        self, session: AsyncSession, page: int, page_size: int
+    ) -> Tuple[List[Any], int]:
+        """
+        Fetch one page and the total number of matching records.
+
+        A `page_size` of 0 or less returns every matching record.
+
+        Returns:
+            A tuple of the records of the page and the total count.
+        """
+        statement = self.statement.add_columns(func.count().over().label("total_count"))
+        if page_size > 0:
+            statement = statement.offset((page - 1) * page_size).limit(page_size)
+
+        rows = (await session.execute(statement)).all()
+        if rows:
+            return [row[0] for row in rows], rows[0][-1]
+
+        # A page past the end has no row to carry the window total
+        if page > 1:
+            total_count = (await session.execute(self.count_statement())).scalar_one()
+            return [], total_count
+        return [], 0
+
+    async def paginate_cursor(
+        self,
+        session: AsyncSession,
+        cursor: Optional[str],
+        page_size: int,
+        key_column,
+        id_column,
+        descending: bool = False,
+    ) -> Tuple[List[Any], int, Optional[str]]:
+        """
+        Fetch one page using keyset pagination on `(key_column, id_column)`.
+
+        Any ordering set on the query is replaced by the keyset ordering.
+        The count returned is `count(*) OVER()` evaluated after the cursor
+        predicate, i.e. the number of records from the cursor onwards.
+
+        Returns:
+            A tuple of the records of the page, the remaining count and the
+            cursor of the next page (None on the last page).
+
+        Raises:
+            ValueError: If the cursor cannot be decoded or does not match
+                the types of the columns.
+        """
+        statement = self.statement.order_by(None)
+        if cursor:
+            key_value, id_value = decode_cursor(cursor, key_column, id_column)
+            row_key = tuple_(key_column, id_column)
+            if descending:
+                statement = statement.where(row_key < tuple_(key_value, id_value))
+            else:
+                statement = statement.where(row_key > tuple_(key_value, id_value))
+
+        if descending:
+            statement = statement.order_by(key_column.desc(), id_column.desc())
+        else:
+            statement = statement.order_by(key_column, id_column)
+
+        statement = statement.add_columns(
+            func.count().over().label("total_count")
+        ).limit(page_size + 1)
+        rows = (await session.execute(statement)).all()
+
+        remaining = rows[0][-1] if rows else 0
+        items = [row[0] for row in rows[:page_size]]
+        next_cursor = None
+        if len(rows) > page_size:
+            last = items[-1]
+            next_cursor = encode_cursor(
+                getattr(last, key_column.key), getattr(last, id_column.key)
+            )
+        return items, remaining, next_cursor
+
+
+def encode_cursor(key_value: Any, id_value: Any) -> str:
+    """Encode a keyset position as an opaque url-safe string."""
+    if isinstance(key_value, (datetime, date)):
+        key_value = key_value.isoformat()
+    payload = json.dumps([key_value, id_value], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _cursor_value(value: Any, column) -> Any:
+    """Check (and convert) a decoded cursor value against the type of its column."""
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if value is None:
+        return value
+    if python_type in (datetime, date):
+        if not isinstance(value, str):
+            raise ValueError(f"Invalid cursor value for {column.key}: {value!r}")
+        return python_type.fromisoformat(value)
+    if (
+        python_type in (float, Decimal)
+        and isinstance(value, (int, float))
+        and not isinstance(value, bool)
+    ):
+        return python_type(value)
+    if not isinstance(value, python_type) or (
+        isinstance(value, bool) and python_type is not bool
+    ):
+        raise ValueError(f"Invalid cursor value for {column.key}: {value!r}")
+    return value
+
+
+def decode_cursor(cursor: str, key_column, id_column=None) -> Tuple[Any, Any]:
+    """
+    Decode a cursor produced by `encode_cursor` for the given key (and id)
+    column.
+
+    Raises:
+        ValueError: If the cursor is malformed or its values do not match the
+            types of the columns.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key_value, id_value = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+    key_value = _cursor_value(key_value, key_column)
+    if id_column is not None:
+        id_value = _cursor_value(id_value, id_column)
+    return key_value, id_value
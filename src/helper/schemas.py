@@ -1,9 +1,12 @@
-from typing import Any
-from pydantic import BaseModel
+from typing import Annotated, Any, Dict, Literal, Optional
+from pydantic import BaseModel, BeforeValidator, Field
 
 from enum import Enum
 
 
+ExportFormat = Literal["csv", "xlsx"]
+
+
 class BaseOutPage(BaseModel):
     
     """
@@ -13,6 +16,8 @@ class BaseOutPage(BaseModel):
     -    number :int (the number of record in the data)
     -    total_number : int (the total number of record found for the query)  
     -    number_page : int (the total number of page for the query)
+    -    next_cursor : str (the cursor of the next page, only in cursor mode.
+         total_number then counts the records from the cursor onwards)
         
     """
     
@@ -20,6 +25,7 @@ class BaseOutPage(BaseModel):
     page : int
     number :int
     total_number : int   
+    next_cursor : Optional[str] = None
     
     
 class BaseOut(BaseModel):
@@ -59,6 +65,72 @@ class BaseOutFail(BaseOut):
     message : str  
     error_code : str          
 
+
+class DirectUploadInput(BaseModel):
+    
+    """
+    Announce a file uploaded straight to the storage
+    -    name : str (document type / name of the file)
+    -    file_name : str (original file name)
+    -    content_type : str (MIME type sent with the file)
+    -    size : int (size in bytes, the upload may not be bigger)
+    """
+    
+    name : str
+    file_name : str
+    content_type : str
+    size : int = Field(gt=0)
+
+
+class DirectUploadOut(BaseModel):
+    method : str
+    url : str
+    fields : dict = {}
+    headers : dict = {}
+    upload_token : str
+    expires_in : int
+
+
+class DirectUploadOutSuccess(BaseOutSuccess):
+    data : DirectUploadOut
+
+
+class DirectUploadConfirmInput(BaseModel):
+    upload_token : str
+
+
+class ImageVariantOut(BaseModel):
+    width : int
+    height : int
+    webp : Optional[str] = None
+    jpeg : str
+
+
+class ImageSourcesOut(BaseModel):
+    """
+    Resized variants of an image, ready for
+    `<picture><source type="image/webp" srcset="{webp_srcset}"><img srcset="{jpeg_srcset}"></picture>`
+    """
+    variants : Dict[str, ImageVariantOut]
+    webp_srcset : Optional[str] = None
+    jpeg_srcset : str
+
+    @classmethod
+    def from_variants(cls, variants: Any) -> Any:
+        """Build the sources from the `*_variants` column ({name: {width, height, webp, jpeg}})"""
+        if not variants or not isinstance(variants, dict) or "variants" in variants:
+            return variants or None
+        ordered = sorted(variants.values(), key=lambda variant: variant["width"])
+        has_webp = all(variant.get("webp") for variant in ordered)
+        return {
+            "variants": variants,
+            "webp_srcset": ", ".join(f"{variant['webp']} {variant['width']}w" for variant in ordered) if has_webp else None,
+            "jpeg_srcset": ", ".join(f"{variant['jpeg']} {variant['width']}w" for variant in ordered),
+        }
+
+
+ImageSources = Annotated[Optional[ImageSourcesOut], BeforeValidator(ImageSourcesOut.from_variants)]
+
 class WhatsappParameter(BaseModel):
     type : str = "text" 
     value : str = ""         
@@ -204,5 +276,13 @@ class ErrorMessage(Enum):
     NO_ROLE_FOUND = ('no_role_found',"No role found")
     
     ROLE_NOT_FOUND = ('role_not_found',"Role not found")
+    
+    INVALID_CURSOR = ('invalid_cursor',"Invalid pagination cursor")
+    FILE_TOO_LARGE = ('file_too_large',"File size exceeds the maximum allowed size")
+    INVALID_UPLOAD_TOKEN = ('invalid_upload_token',"Invalid or expired upload token")
+    UPLOADED_FILE_NOT_VALID = ('uploaded_file_not_valid',"The uploaded file is missing or does not match the announced file")
+    INVALID_FILE_SIGNATURE = ('invalid_file_signature',"Invalid or expired file link")
+    FILE_NOT_FOUND = ('file_not_found',"File not found")
+    NOTIFICATION_NOT_FOUND = ('notification_not_found',"Notification not found")
     def __str__(self):
         return self.value
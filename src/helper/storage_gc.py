@@ -0,0 +1,183 @@
+import asyncio
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set
+
+from celery import shared_task
+from sqlmodel import Session, select
+
+from src.config import settings
+from src.helper.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+# Redis keys (in REDIS_NAMESPACE) of the collector progress and of its last report
+GC_STATE_KEY = "storage_gc:state"
+GC_REPORT_KEY = "storage_gc:report"
+GC_REPORT_EXPIRE = 7 * 24 * 3600
+
+# Orphan keys listed in the report, the counters cover all of them
+GC_REPORT_SAMPLE = 200
+
+
+def storage_prefix(location: str) -> str:
+    """Key prefix of the public files uploaded to `location` (see `make_key`)"""
+    return f"{get_storage().root(public=True)}/{location.strip('/')}/"
+
+
+def referenced_keys(keys: List[str]) -> Set[str]:
+    """Keys among `keys` that a row still points at (attachments, documents, blobs)"""
+    from src.api.cabinet.models import CabinetApplication
+    from src.api.job_offers.models import JobAttachment
+    from src.api.storage.models import StoredBlob
+    from src.api.training.models import StudentAttachment
+    from src.database import engine
+
+    # Public files are stored as their URL on S3, as their key otherwise
+    storage = get_storage()
+    values = {key: key for key in keys}
+    values.update({storage.file_path(key): key for key in keys})
+
+    found = set()
+    columns = (
+        StudentAttachment.file_path,
+        JobAttachment.file_path,
+        CabinetApplication.proposal_document_path,
+        StoredBlob.file_path,
+    )
+    with Session(engine) as session:
+        for column in columns:
+            found.update(
+                session.exec(select(column).where(column.in_(list(values)))).all()
+            )
+    return {values[value] for value in found}
+
+
+def new_gc_state(dry_run: bool) -> Dict:
+    return {
+        "dry_run": dry_run,
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "location": 0,
+        "start_after": None,
+        "scanned": 0,
+        "orphans": 0,
+        "orphan_bytes": 0,
+        "deleted": 0,
+        "failed": 0,
+        "sample": [],
+        "finished_at": None,
+    }
+
+
+async def collect_orphan_batch(state: Dict) -> Dict:
+    """
+    Check the next `STORAGE_GC_BATCH_SIZE` stored files against the database
+    and delete the orphans (unless `dry_run`). Returns the updated state, whose
+    `finished_at` is set once every location has been scanned.
+    """
+    locations = settings.STORAGE_GC_LOCATIONS
+    if state["location"] >= len(locations):
+        state["finished_at"] = datetime.now(timezone.utc).isoformat()
+        return state
+
+    storage = get_storage()
+    objects = await storage.list(
+        storage_prefix(locations[state["location"]]),
+        state["start_after"],
+        settings.STORAGE_GC_BATCH_SIZE,
+    )
+    if not objects:
+        state["location"] += 1
+        state["start_after"] = None
+        return state
+
+    state["start_after"] = objects[-1].key
+    state["scanned"] += len(objects)
+    # Recent files may belong to an upload that is not confirmed or recorded yet
+    cutoff = datetime.now(timezone.utc) - timedelta(
+        hours=settings.STORAGE_GC_MIN_AGE_HOURS
+    )
+    candidates = [obj for obj in objects if obj.last_modified <= cutoff]
+    referenced = (
+        referenced_keys([obj.key for obj in candidates]) if candidates else set()
+    )
+    orphans = [obj for obj in candidates if obj.key not in referenced]
+
+    state["orphans"] += len(orphans)
+    state["orphan_bytes"] += sum(obj.size for obj in orphans)
+    room = GC_REPORT_SAMPLE - len(state["sample"])
+    state["sample"].extend(obj.key for obj in orphans[: max(room, 0)])
+
+    if orphans and not state["dry_run"]:
+        keys = [obj.key for obj in orphans]
+        failed = await storage.delete_many(keys)
+        state["deleted"] += len(keys) - len(failed)
+        state["failed"] += len(failed)
+    return state
+
+
+def _save_to_redis(
+    key: str, value: Optional[Dict], ex: Optional[int] = None
+) -> Optional[Dict]:
+    """Store (or delete, when `value` is None) a JSON value, return the previous one"""
+    from src.redis_client import (
+        close_redis,
+        delete_from_redis,
+        get_from_redis,
+        set_to_redis,
+    )
+
+    async def save():
+        try:
+            previous = await get_from_redis(key)
+            if value is None:
+                await delete_from_redis(key)
+            else:
+                await set_to_redis(key, json.dumps(value), ex=ex)
+            return json.loads(previous) if previous else None
+        finally:
+            await close_redis()
+
+    return asyncio.run(save())
+
+
+@shared_task(ignore_result=True)
+def collect_orphan_files(
+    dry_run: bool = True, state: Optional[Dict] = None, resume: bool = False
+) -> Optional[Dict]:
+    """
+    Find (and delete, when `dry_run` is False) the stored files of
+    `STORAGE_GC_LOCATIONS` that no attachment, cabinet document or blob refers to.
+
+    Each run checks one batch then queues the next one `STORAGE_GC_BATCH_DELAY`
+    seconds later, carrying the progress. The progress is also kept in Redis:
+    `collect_orphan_files.delay(resume=True)` continues an interrupted
+    collection. The final report is kept in Redis under `storage_gc:report`.
+    """
+    if state is None:
+        previous = _save_to_redis(GC_STATE_KEY, None) if resume else None
+        state = previous or new_gc_state(dry_run)
+
+    state = asyncio.run(collect_orphan_batch(state))
+    if state["finished_at"]:
+        _save_to_redis(GC_STATE_KEY, None)
+        _save_to_redis(GC_REPORT_KEY, state, ex=GC_REPORT_EXPIRE)
+        logger.info(
+            "Storage GC %sfinished: %s files scanned, %s orphans (%s bytes), "
+            "%s deleted, %s failed",
+            "(dry run) " if state["dry_run"] else "",
+            state["scanned"],
+            state["orphans"],
+            state["orphan_bytes"],
+            state["deleted"],
+            state["failed"],
+        )
+        return state
+
+    _save_to_redis(GC_STATE_KEY, state)
+    collect_orphan_files.apply_async(
+        kwargs={"dry_run": state["dry_run"], "state": state},
+        countdown=settings.STORAGE_GC_BATCH_DELAY,
+    )
+    return None
@@ -0,0 +1,81 @@
+import functools
+import inspect
+from contextlib import nullcontext
+from fnmatch import fnmatchcase
+from typing import Optional
+
+from src.config import settings
+
+# sentry_sdk once started by `src.resources.init_sentry`: until then (development,
+# tests, no DSN) spans are not created at all and sentry_sdk is not imported
+_sentry_sdk = None
+
+
+def enable_tracing(sentry_sdk) -> None:
+    global _sentry_sdk
+    _sentry_sdk = sentry_sdk
+
+
+def span(op: str, name: Optional[str] = None):
+    """
+    Context manager timing a block as a child span of the current transaction.
+    Nothing is created when the transaction is not sampled, which keeps the
+    cost of an untraced request to a lookup (about a microsecond per span).
+    """
+    if _sentry_sdk is None:
+        return nullcontext()
+    parent = _sentry_sdk.get_current_span()
+    if parent is None or not parent.sampled:
+        return nullcontext()
+    return _sentry_sdk.start_span(op=op, name=name)
+
+
+def traced(op: str, name: Optional[str] = None):
+    """Time each call of the decorated function (sync or async) in a span"""
+
+    def decorator(func):
+        description = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(op, description):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(op, description):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def sample_rate(target: str) -> float:
+    """Sample rate of the first `SENTRY_TRACES_SAMPLE_RATES` pattern matching `name`"""
+    for pattern, rate in settings.SENTRY_TRACES_SAMPLE_RATES.items():
+        if fnmatchcase(target, pattern):
+            return rate
+    return settings.SENTRY_TRACES_SAMPLE_RATE
+
+
+def traces_sampler(sampling_context: dict) -> float:
+    """
+    Sentry `traces_sampler`: a trace continued from an upstream service keeps its
+    decision, requests are sampled after their path and Celery tasks after their name.
+    """
+    parent_sampled = sampling_context.get("parent_sampled")
+    if parent_sampled is not None:
+        return float(parent_sampled)
+
+    scope = sampling_context.get("asgi_scope")
+    if scope is not None:
+        return sample_rate(scope.get("path", ""))
+    job = sampling_context.get("celery_job")
+    if job is not None:
+        return sample_rate(job.get("task", ""))
+    return settings.SENTRY_TRACES_SAMPLE_RATE
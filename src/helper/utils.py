@@ -1,3 +1,4 @@
+import logging
 from typing import Optional
 import os
 import smtplib
@@ -6,22 +7,16 @@ from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from datetime import datetime
 from jinja2 import Environment, FileSystemLoader
-from pyfcm import FCMNotification
 from src.config import settings
+from src.helper.clients import get_http_client
 import httpx
 from celery import shared_task
 
 
-
-
-push_service = FCMNotification(
-        service_account_file="src/lafaom.json",
-        credentials=None,
-        project_id="laakam-487e5"
-    )
-
 env = Environment(loader=FileSystemLoader('src/templates'))
 
+logger = logging.getLogger(__name__)
+
 
 def clean_cinetpay_string(value: str, max_length: int = 150, allow_dashes: bool = True) -> str:
     """
@@ -100,7 +95,7 @@ def clean_payment_description(description: str, max_length: int = 150) -> str:
 
 class NotificationHelper :
     @staticmethod
-    @shared_task  
+    @shared_task(ignore_result=True)
     def send_in_app_notification(notify_data : dict):
         """
         Send an in app notification to a user, given the notification data.
@@ -112,11 +107,11 @@ class NotificationHelper :
         None
         """
         
-        NotificationHelper.send_push_notification(data=notify_data)
+        NotificationHelper.send_push_notification(notify_data)
 
 
     @staticmethod
-    @shared_task  
+    @shared_task(ignore_result=True)
     def send_push_notification(notify_data : dict):
         """
             Send an in app notification to a user, given the notification data.
@@ -138,18 +133,21 @@ class NotificationHelper :
         
         #NotificationHelper.send_ws_message(data=data)
         
-        print(notify_data)
-        response = push_service.notify( 
-                fcm_token=notify_data["device_id"],
-                notification_title=notify_data["title"],
-                notification_body=notify_data["message"],
-                notification_image=notify_data["image"],
-                data_payload=notify_data["action"]
-            )
+        from src.helper.push import PushMessage, deliver_push_batch, push_data
+
+        deliver_push_batch(
+            [notify_data["device_id"]],
+            PushMessage(
+                title=notify_data["title"],
+                body=notify_data["message"],
+                image=notify_data.get("image"),
+                data=push_data(notify_data.get("action")),
+            ),
+        )
         
 
     @staticmethod  
-    @shared_task      
+    @shared_task(ignore_result=True)
     def send_smtp_email(data : dict):
     
         """
@@ -205,27 +203,27 @@ class NotificationHelper :
                     server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
                     server.send_message(message)
                     
-                    print('email send ' + data["to_email"] )
+                    logger.info("Email sent to %s", data["to_email"])
             else:
                 with smtplib.SMTP_SSL(settings.SMTP_HOST, settings.SMTP_PORT) as server:
                     
                     server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
                     server.send_message(message)
                     
-                    print('email send ' + data["to_email"] )
+                    logger.info("Email sent to %s", data["to_email"])
                 
     
                 
         except smtplib.SMTPAuthenticationError as e:
-            print(f"Authentication error with {settings.SMTP_HOST}:{settings.SMTP_PORT} ({settings.SMTP_ENCRYPTION}): {e}")
+            logger.error("Authentication error with %s:%s (%s): %s", settings.SMTP_HOST, settings.SMTP_PORT, settings.SMTP_ENCRYPTION, e)
             if "5.7.9" in str(e):
-                print("HINT: This error (5.7.9) usually means an App Password is required, or Gmail is blocking the connection. Visit https://accounts.google.com/DisplayUnlockCaptcha while logged in as " + settings.SMTP_USER)
+                logger.error("HINT: This error (5.7.9) usually means an App Password is required, or Gmail is blocking the connection. Visit https://accounts.google.com/DisplayUnlockCaptcha while logged in as %s", settings.SMTP_USER)
         except Exception as e:
-            print(f"An error occurred while sending email via {settings.SMTP_HOST}:{settings.SMTP_PORT}: {e}")    
+            logger.error("An error occurred while sending email via %s:%s: %s", settings.SMTP_HOST, settings.SMTP_PORT, e)
 
 
     @staticmethod  
-    @shared_task
+    @shared_task(ignore_result=True)
     def send_mailgun_email(data: dict):
         """
         Send an email using Mailgun API.
@@ -272,22 +270,21 @@ class NotificationHelper :
     
         
         try:
-            with httpx.Client() as client:
-                response =   client.post(url, data=payload,auth=("api", settings.MAILGUN_SECRET))
-            
-                if response.status_code == 200:
-                    
-                    print(f"Email sent successfully to {data['to_email']} with Mailgun API")
-                else:
-                    print(f"Failed to send email: {response.status_code} - {response.text} with Mailgun API")
+            response = get_http_client().post(url, data=payload, auth=("api", settings.MAILGUN_SECRET))
+
+            if response.status_code == 200:
+
+                logger.info("Email sent successfully to %s with Mailgun API", data['to_email'])
+            else:
+                logger.error("Failed to send email: %s - %s with Mailgun API", response.status_code, response.text)
 
 
         except httpx.HTTPError as e:
-            print(f"An error occurred while sending the email: {e}")
+            logger.error("An error occurred while sending the email: %s", e)
 
 
     @staticmethod  
-    @shared_task
+    @shared_task(ignore_result=True)
     def send_brevo_email(data: dict):
         """
         Send an email using Brevo API.
@@ -334,13 +331,12 @@ class NotificationHelper :
         }
         
         try:
-            with httpx.Client() as client:
-                response = client.post(url, json=payload, headers=headers)
-            
-                if response.status_code in [200, 201]:
-                    print(f"Email sent successfully to {data['to_email']} with Brevo API")
-                else:
-                    print(f"Failed to send email: {response.status_code} - {response.text} with Brevo API")
+            response = get_http_client().post(url, json=payload, headers=headers)
+
+            if response.status_code in [200, 201]:
+                logger.info("Email sent successfully to %s with Brevo API", data['to_email'])
+            else:
+                logger.error("Failed to send email: %s - %s with Brevo API", response.status_code, response.text)
 
         except httpx.HTTPError as e:
-            print(f"An error occurred while sending the email with Brevo: {e}")
+            logger.error("An error occurred while sending the email with Brevo: %s", e)
@@ -1,6 +1,11 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.exceptions import RequestValidationError, HTTPException, ResponseValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from src.api.auth.utils import rotate_key
 from src.config import settings
 from src.api.user.router import router as user_router
@@ -12,38 +17,37 @@ from src.api.training.routers import router as training_router
 from src.api.system.router import router as system_router
 from src.api.system.dashboard import router as dashboard_router
 from src.api.cabinet.router import router as cabinet_router
+from src.api.storage.router import router as storage_router
+from src.api.notifications.router import router as notifications_router
 
-import firebase_admin
-from firebase_admin import credentials
 from fastapi.staticfiles import StaticFiles
 from starlette.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
-import sentry_sdk
-from src.celery_utils import create_celery
+from src.celery_utils import create_celery, get_queue_depths, get_result_backend_usage
+from src.helper.file_helper import FileTooLargeError
+from src.helper.logs import CorrelationIdMiddleware, configure_logging
+from src.helper.metrics import MetricsMiddleware, register_collectors
 from src.helper.schemas import BaseOutFail, ErrorMessage
+from src.resources import close_resources, init_sentry, open_resources
+
+# JSON lines written by a background thread, before uvicorn logs the first request
+configure_logging()
 
-# Initialize Firebase Admin SDK
-if firebase_admin._apps:
-    firebase_admin.delete_app(firebase_admin.get_app())
-cred = credentials.Certificate("src/lafaom.json")
-firebase_admin.initialize_app(credential=cred)
+# Firebase, the database engines and the HTTP clients are built on first use
+init_sentry()
 
-if settings.SENTRY_DSN and settings.ENV != "development":
-    sentry_sdk.init(
-        dsn= settings.SENTRY_DSN,
-        # Set traces_sample_rate to 1.0 to capture 100%
-        # of transactions for tracing.
-        traces_sample_rate=1.0,
-        _experiments={
-            # Set continuous_profiling_auto_start to True
-            # to automatically start the profiler on when
-            # possible.
-            "continuous_profiling_auto_start": True,
-        },)
+logger = logging.getLogger(__name__)
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    #await rotate_key()
+    await open_resources()
+    yield
+    await close_resources()
 
-app = FastAPI(title=settings.PROJECT_NAME)
+
+app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
 celery = create_celery()
 app.celery_app = celery
 
@@ -101,6 +105,7 @@ app.add_middleware(
         "Origin",
         "Access-Control-Request-Method",
         "Access-Control-Request-Headers",
+        "If-None-Match",
     ],
     expose_headers=[
         "Content-Type",
@@ -109,10 +114,17 @@ app.add_middleware(
         "X-Page-Count",
         "X-Current-Page",
         "X-Per-Page",
-        "X-Total-Pages"
+        "X-Total-Pages",
+        "ETag",
+        "Content-Disposition"
     ],
 )
 
+app.add_middleware(CorrelationIdMiddleware)
+# Outermost: the latency covers the other middlewares and the error handlers
+app.add_middleware(MetricsMiddleware)
+register_collectors()
+
 app.mount("/static", StaticFiles(directory="src/static"), name="static")
 
 app.include_router(auth_router, prefix=base_url + "/auth", tags=["Auth"])
@@ -124,6 +136,8 @@ app.include_router(payments_router, prefix=base_url + "/payments", tags=["Paymen
 app.include_router(system_router, prefix=base_url + "/system", tags=["System"])
 app.include_router(dashboard_router, prefix=base_url + "/dashboard", tags=["Dashboard"])
 app.include_router(cabinet_router, prefix=base_url + "/cabinet-application")
+app.include_router(storage_router, prefix=base_url)
+app.include_router(notifications_router, prefix=base_url)
 
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
@@ -175,12 +189,7 @@ async def http_exception_handler(request: Request, exc: HTTPException):
 @app.exception_handler(ResponseValidationError)
 async def response_validation_exception_handler(request: Request, exc: ResponseValidationError):
     """Handle response validation errors"""
-    import traceback
-    error_traceback = traceback.format_exc()
-    
-    # Log the error for debugging
-    print(f"Response validation error: {exc}")
-    print(f"Traceback: {error_traceback}")
+    logger.error("Response validation error: %s", exc, exc_info=exc)
     
     return JSONResponse(
         status_code=500,
@@ -192,15 +201,20 @@ async def response_validation_exception_handler(request: Request, exc: ResponseV
         }
     )
 
+@app.exception_handler(FileTooLargeError)
+async def file_too_large_exception_handler(request: Request, exc: FileTooLargeError):
+    return JSONResponse(
+        status_code=413,
+        content=BaseOutFail(
+            message=ErrorMessage.FILE_TOO_LARGE.description,
+            error_code=ErrorMessage.FILE_TOO_LARGE.value,
+        ).model_dump(),
+    )
+
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
     """Handle all unhandled exceptions"""
-    import traceback
-    error_traceback = traceback.format_exc()
-    
-    # Log the error for debugging
-    print(f"Unhandled exception: {exc}")
-    print(f"Traceback: {error_traceback}")
+    logger.error("Unhandled exception: %s", exc, exc_info=exc)
     
     return JSONResponse(
         status_code=500,
@@ -262,7 +276,64 @@ async def database_health() -> dict:
             "error": str(e)
         }  
 
-@app.on_event("startup")
-async def startup_event():
-    #wait rotate_key()
-    pass
\ No newline at end of file
+@app.get("/health/queues", tags=["Health"])
+async def queues_health() -> dict:
+    """Check the Celery queues are not backed up"""
+    from starlette.concurrency import run_in_threadpool
+
+    try:
+        depths = await run_in_threadpool(get_queue_depths, celery)
+    except Exception as e:
+        return {
+            "status": "unhealthy",
+            "error": str(e)
+        }
+    backed_up = [
+        queue for queue, depth in depths.items()
+        if depth > settings.CELERY_QUEUE_DEPTH_ALERT.get(queue, float("inf"))
+    ]
+    return {
+        "status": "degraded" if backed_up else "healthy",
+        "queues": depths,
+        "backed_up": backed_up
+    }
+
+# Last /health/results measure: (time.monotonic() it expires at, usage)
+_results_usage = (0.0, None)
+_results_usage_lock = asyncio.Lock()
+
+
+@app.get("/health/results", tags=["Health"])
+async def results_health() -> dict:
+    """
+    Memory used by the task results kept in the Redis result backend. The
+    scan is bounded and its result reused for `RESULT_BACKEND_USAGE_TTL`
+    seconds: the route is public.
+    """
+    global _results_usage
+    from starlette.concurrency import run_in_threadpool
+
+    try:
+        async with _results_usage_lock:
+            expires_at, usage = _results_usage
+            if usage is None or expires_at <= time.monotonic():
+                usage = await run_in_threadpool(get_result_backend_usage, celery)
+                _results_usage = (time.monotonic() + settings.RESULT_BACKEND_USAGE_TTL, usage)
+    except Exception as e:
+        return {
+            "status": "unhealthy",
+            "error": str(e)
+        }
+    return {
+        "status": "healthy",
+        "results": usage
+    }
+
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+async def metrics() -> Response:
+    """Prometheus metrics of the process (requests, pools, Redis, Celery queues, providers)"""
+    from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+    from starlette.concurrency import run_in_threadpool
+
+    # The Celery queue depths are asked to the broker
+    return Response(await run_in_threadpool(generate_latest), media_type=CONTENT_TYPE_LATEST)
@@ -1,5 +1,6 @@
 import redis.asyncio as redis
 from src.config import settings
+from src.helper.metrics import REDIS_COMMAND_DURATION
 
 
 _redis = None
@@ -15,13 +16,39 @@ def get_redis():
     return _redis
 
 
-async def set_to_redis(key, value, ex: int | None = None):
+async def set_to_redis(key, value, ex: int | None = None, nx: bool = False):
     redis_client = get_redis()
-    return await redis_client.set(
-        f"{settings.REDIS_NAMESPACE}:{key}", value, ex=ex
-    )
+    with REDIS_COMMAND_DURATION.labels("set").time():
+        return await redis_client.set(
+            f"{settings.REDIS_NAMESPACE}:{key}", value, ex=ex, nx=nx
+        )
 
 
 async def get_from_redis(key):
     redis_client = get_redis()
-    return await redis_client.get(f"{settings.REDIS_NAMESPACE}:{key}")
+    with REDIS_COMMAND_DURATION.labels("get").time():
+        return await redis_client.get(f"{settings.REDIS_NAMESPACE}:{key}")
+
+
+async def delete_from_redis(*keys):
+    if not keys:
+        return 0
+    redis_client = get_redis()
+    with REDIS_COMMAND_DURATION.labels("delete").time():
+        return await redis_client.delete(
+            *[f"{settings.REDIS_NAMESPACE}:{key}" for key in keys]
+        )
+
+
+async def publish_to_redis(channel, message):
+    redis_client = get_redis()
+    with REDIS_COMMAND_DURATION.labels("publish").time():
+        return await redis_client.publish(f"{settings.REDIS_NAMESPACE}:{channel}", message)
+
+
+async def close_redis():
+    """Close the client, needed before its event loop ends (e.g. `asyncio.run` in a Celery task)"""
+    global _redis
+    if _redis is not None:
+        client, _redis = _redis, None
+        await client.aclose()
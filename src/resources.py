@@ -0,0 +1,64 @@
+"""
+Process-wide resources of the API (Sentry, database engines, Redis, HTTP and
+Firebase clients).
+
+Nothing is set up at import: the clients are built on first use, and the app
+lifespan warms them up (`STARTUP_WARM_UP`) and closes them on shutdown.
+Importing `src.main` (tests, Alembic, Celery workers) stays fast and does not
+need credentials.
+"""
+
+from src.config import settings
+
+
+def init_sentry() -> bool:
+    """
+    Start Sentry when a DSN is configured outside development. Called before
+    the app is built: the Starlette integration patches the routes and
+    middlewares as they are created.
+    """
+    if not settings.SENTRY_DSN or settings.ENV == "development":
+        return False
+
+    import sentry_sdk
+
+    from src.helper.tracing import enable_tracing, traces_sampler
+
+    sentry_sdk.init(
+        dsn=settings.SENTRY_DSN,
+        # Payment and auth routes are traced more often, health checks and
+        # static files never (see SENTRY_TRACES_SAMPLE_RATES)
+        traces_sampler=traces_sampler,
+        # Only a share of the traced transactions is profiled, no continuous profiling
+        profiles_sample_rate=settings.SENTRY_PROFILES_SAMPLE_RATE,
+    )
+    enable_tracing(sentry_sdk)
+    return True
+
+
+async def open_resources() -> None:
+    """Build the engines and open a first connection at startup, not on a request"""
+    if not settings.STARTUP_WARM_UP:
+        return
+
+    from sqlalchemy import text
+
+    from src.database import get_engine_async
+
+    async with get_engine_async().connect() as connection:
+        await connection.execute(text("SELECT 1"))
+    if settings.FCM_BACKEND == "firebase":
+        from src.helper.clients import get_firebase_app
+
+        get_firebase_app()
+
+
+async def close_resources() -> None:
+    """Close the connections and clients opened by the process"""
+    from src.database import close_engines
+    from src.helper.clients import close_clients
+    from src.redis_client import close_redis
+
+    await close_redis()
+    await close_engines()
+    close_clients()
@@ -1,14 +1,29 @@
+import asyncio
+import io
 from collections.abc import Generator
+from fnmatch import fnmatchcase
 
 import pytest
 from fastapi.testclient import TestClient
 from sqlmodel import Session, SQLModel, create_engine
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.pool import StaticPool
+from starlette.datastructures import Headers, UploadFile
 
 # from src.api.auth.schemas import RegisterInput  # Commenté si non disponible
+import src.api.cabinet.models  # noqa: F401 (mapped by the User relationships)
 from src.api.user.service import UserService
 from src.database import get_session
 from src.main import app
+import src.redis_client as redis_client
+
+
+@compiles(JSONB, "sqlite")
+def compile_jsonb_sqlite(type_, compiler, **kw):
+    """JSONB columns (posts.tags, users.picture_variants) are plain JSON on SQLite"""
+    return "JSON"
+
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"  # Use in-memory DB for isolation
 
@@ -18,6 +33,12 @@ engine = create_engine(
     poolclass=StaticPool,
 )
 
+# GIN indexes (text search, tags) only exist on PostgreSQL
+for table in SQLModel.metadata.tables.values():
+    for index in table.indexes:
+        if index.dialect_options["postgresql"].get("using") == "gin":
+            index.ddl_if(dialect="postgresql")
+
 # Ensure the database is created before tests run
 SQLModel.metadata.create_all(engine)
 
@@ -46,3 +67,139 @@ def client() -> Generator[TestClient, None, None]:
     """Provides a FastAPI test client."""
     with TestClient(app) as c:
         yield c
+
+
+class FakePubSub:
+    """Pattern subscription of FakeRedis: published messages are queued for `listen`"""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.patterns = []
+        self.messages = asyncio.Queue()
+
+    async def psubscribe(self, pattern):
+        self.patterns.append(pattern)
+        self.redis.subscriptions += 1
+
+    async def listen(self):
+        while True:
+            message = await self.messages.get()
+            if isinstance(message, Exception):
+                raise message
+            yield message
+
+    async def aclose(self):
+        self.redis.pubsubs.remove(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def memory_usage(self, key):
+        self.commands.append(key)
+
+    def execute(self):
+        values = self.redis.values
+        return [
+            len(values[key]) + 50 if key in values else None for key in self.commands
+        ]
+
+
+class FakeRedis:
+    """
+    In-memory stand-in for the redis commands used by the app: strings, sets
+    and pub/sub of the asyncio client, and the key scan of the Celery result
+    backend (synchronous client, memory usage of a value = its length + 50).
+    """
+
+    def __init__(self):
+        self.values = {}
+        self.sets = {}
+        self.pubsubs = []
+        self.subscriptions = 0
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    async def delete(self, *keys):
+        deleted = 0
+        for key in keys:
+            value = self.values.pop(key, None)
+            members = self.sets.pop(key, None)
+            deleted += int(value is not None or members is not None)
+        return deleted
+
+    async def incr(self, key):
+        self.values[key] = int(self.values.get(key, 0)) + 1
+        return self.values[key]
+
+    async def sadd(self, key, *members):
+        self.sets.setdefault(key, set()).update(members)
+
+    async def smembers(self, key):
+        return set(self.sets.get(key, set()))
+
+    async def expire(self, key, seconds):
+        return True
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        pubsub = FakePubSub(self)
+        self.pubsubs.append(pubsub)
+        return pubsub
+
+    async def publish(self, channel, message):
+        receivers = 0
+        for pubsub in self.pubsubs:
+            for pattern in pubsub.patterns:
+                if fnmatchcase(channel, pattern):
+                    pubsub.messages.put_nowait(
+                        {
+                            "type": "pmessage",
+                            "pattern": pattern,
+                            "channel": channel,
+                            "data": message,
+                        }
+                    )
+                    receivers += 1
+        return receivers
+
+    def scan(self, cursor=0, match=None, count=10):
+        """Walks `count` keys per call, in insertion order, and returns those matching"""
+        keys = list(self.values)[cursor:cursor + count]
+        cursor = cursor + count if cursor + count < len(self.values) else 0
+        pattern = match.decode()
+        return cursor, [key for key in keys if fnmatchcase(key.decode(), pattern)]
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+@pytest.fixture
+def fake_redis(monkeypatch) -> FakeRedis:
+    """Replaces the redis client of the app for the test"""
+    fake = FakeRedis()
+    monkeypatch.setattr(redis_client, "_redis", fake)
+    return fake
+
+
+@pytest.fixture
+def make_upload():
+    """Builds an in-memory UploadFile, as FastAPI passes them to the routes"""
+
+    def make(content: bytes, filename: str = "cv.pdf", size=None) -> UploadFile:
+        return UploadFile(
+            file=io.BytesIO(content),
+            size=size,
+            filename=filename,
+            headers=Headers({"content-type": "application/pdf"}),
+        )
+
+    return make
@@ -0,0 +1,137 @@
+"""
+Tests pour le stockage dédupliqué des pièces jointes
+"""
+
+import asyncio
+import hashlib
+
+from src.api.storage.service import BlobStoreService
+from src.config import settings
+from src.helper import storage
+from src.helper.storage import MemoryStorage, get_storage
+
+
+class FakeResult:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar_one_or_none(self):
+        return self.value
+
+    def scalar_one(self):
+        return self.value
+
+    def first(self):
+        return self.value
+
+
+class FakeSession:
+    """Answers every UPDATE ... RETURNING with no row (content not stored yet)"""
+
+    def __init__(self):
+        self.commits = 0
+
+    async def execute(self, statement):
+        return FakeResult(None)
+
+    async def commit(self):
+        self.commits += 1
+
+
+def test_release_deletes_files_stored_before_deduplication(monkeypatch):
+    monkeypatch.setattr(settings, "STORAGE_LOCATION", "memory")
+    monkeypatch.setitem(storage._backends, "memory", MemoryStorage())
+    get_storage().objects["public/job-applications/old.pdf"] = (
+        b"%PDF",
+        "application/pdf",
+        None,
+    )
+    service = BlobStoreService(session=FakeSession())
+
+    assert asyncio.run(service.release("public/job-applications/old.pdf")) is True
+    assert asyncio.run(service.release(None)) is False
+    assert get_storage().objects == {}
+
+
+def test_new_content_is_stored_once(monkeypatch, make_upload):
+    monkeypatch.setattr(settings, "STORAGE_LOCATION", "memory")
+    monkeypatch.setitem(storage._backends, "memory", MemoryStorage())
+
+    class InsertingSession(FakeSession):
+        """No blob yet: the UPDATE finds no row, the INSERT returns the new path"""
+
+        async def execute(self, statement):
+            statements.append(statement.compile().params)
+            return FakeResult(statements[-1].get("file_path"))
+
+    statements = []
+    service = BlobStoreService(session=InsertingSession())
+    content = b"%PDF" + b"x" * 100
+    digest = hashlib.sha256(content).hexdigest()
+
+    file_path = asyncio.run(service.store_upload(make_upload(content)))
+
+    assert file_path.startswith(f"public/blobs/{digest[:2]}/")
+    assert asyncio.run(get_storage().read(file_path)) == content
+    assert statements[0]["sha256_1"] == digest
+    assert statements[1]["sha256"] == digest
+    assert statements[1]["size"] == len(content)
+
+
+def test_known_content_is_not_uploaded_again(monkeypatch, make_upload):
+    monkeypatch.setattr(settings, "STORAGE_LOCATION", "memory")
+    monkeypatch.setitem(storage._backends, "memory", MemoryStorage())
+    get_storage().objects["public/blobs/stored.pdf"] = (
+        b"%PDF",
+        "application/pdf",
+        None,
+    )
+    writes = []
+
+    async def put(key, data, content_type=None):
+        writes.append(key)
+
+    monkeypatch.setattr(get_storage(), "put", put)
+
+    class ExistingSession(FakeSession):
+        """The blob exists: the UPDATE increments it and returns its path"""
+
+        async def execute(self, statement):
+            return FakeResult("public/blobs/stored.pdf")
+
+    session = ExistingSession()
+    service = BlobStoreService(session=session)
+
+    file_path = asyncio.run(service.store_upload(make_upload(b"%PDF")))
+
+    assert file_path == "public/blobs/stored.pdf"
+    assert writes == []
+    assert session.commits == 1
+    assert list(get_storage().objects) == ["public/blobs/stored.pdf"]
+
+
+def test_concurrent_upload_of_the_same_content_keeps_one_copy(monkeypatch, make_upload):
+    monkeypatch.setattr(settings, "STORAGE_LOCATION", "memory")
+    monkeypatch.setitem(storage._backends, "memory", MemoryStorage())
+    get_storage().objects["public/blobs/stored.pdf"] = (
+        b"%PDF",
+        "application/pdf",
+        None,
+    )
+
+    class RacingSession(FakeSession):
+        """Stored by another request between the UPDATE and the INSERT"""
+
+        def __init__(self):
+            super().__init__()
+            self.results = iter([None, "public/blobs/stored.pdf"])
+
+        async def execute(self, statement):
+            return FakeResult(next(self.results))
+
+    service = BlobStoreService(session=RacingSession())
+
+    file_path = asyncio.run(service.store_upload(make_upload(b"%PDF")))
+
+    assert file_path == "public/blobs/stored.pdf"
+    assert list(get_storage().objects) == ["public/blobs/stored.pdf"]
@@ -0,0 +1,111 @@
+"""
+Tests pour le cache de rendu des articles du blog
+"""
+
+import asyncio
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api.blog.models import Post, PostSection
+from src.api.blog.router import router as blog_router
+from src.api.blog.service import BlogService
+
+
+def make_post():
+    post = Post(
+        id=1,
+        user_id="user",
+        author_name="Author",
+        title="Hello",
+        slug="hello",
+        cover_image="cover.png",
+        summary="summary",
+        tags=["news"],
+        category_id=1,
+    )
+    post.sections = [
+        PostSection(id=2, title="Second", content="b", position=2, post_id=1),
+        PostSection(id=1, title="First", content="a", position=1, post_id=1),
+    ]
+    return post
+
+
+@pytest.fixture
+def service(monkeypatch):
+    state = {"loads": 0}
+    service = BlogService(session=None)
+
+    async def get_full_post_by_slug(slug):
+        state["loads"] += 1
+        return make_post() if slug == "hello" else None
+
+    monkeypatch.setattr(service, "get_full_post_by_slug", get_full_post_by_slug)
+    service.state = state
+    return service
+
+
+def test_post_is_built_once_then_served_from_redis(fake_redis, service):
+    first = asyncio.run(service.get_rendered_post("hello"))
+    second = asyncio.run(service.get_rendered_post("hello"))
+
+    assert service.state["loads"] == 1
+    assert first == second
+    data = json.loads(first["body"])["data"]
+    assert [section["title"] for section in data["sections"]] == ["First", "Second"]
+
+
+def test_sections_share_the_stored_render(fake_redis, service):
+    asyncio.run(service.get_rendered_post("hello"))
+    sections = asyncio.run(service.get_rendered_sections("hello"))
+
+    assert service.state["loads"] == 1
+    assert [section["id"] for section in json.loads(sections["body"])["data"]] == [1, 2]
+
+
+def test_unknown_post_returns_none(fake_redis, service):
+    assert asyncio.run(service.get_rendered_post("missing")) is None
+
+
+def test_hit_rate_is_reported(fake_redis, service):
+    for _ in range(4):
+        asyncio.run(service.get_rendered_post("hello"))
+
+    stats = asyncio.run(service.get_render_cache_stats())
+
+    assert stats == {"hits": 3, "misses": 1, "hit_rate": 0.75}
+
+
+@pytest.fixture
+def client(service, monkeypatch):
+    async def get_full_post_by_id(post_id):
+        return make_post() if post_id == 1 else None
+
+    monkeypatch.setattr(service, "get_full_post_by_id", get_full_post_by_id)
+    app = FastAPI()
+    app.include_router(blog_router)
+    app.dependency_overrides[BlogService] = lambda: service
+    return TestClient(app)
+
+
+def test_post_by_id_route(fake_redis, client):
+    response = client.get("/blog/posts/1")
+    assert response.status_code == 200
+    assert response.json()["data"]["slug"] == "hello"
+
+    assert client.get("/blog/posts/2").status_code == 400
+
+
+def test_post_by_slug_route_serves_the_render_with_its_etag(fake_redis, client):
+    response = client.get("/blog/posts-by-slug/hello")
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert [section["title"] for section in data["sections"]] == ["First", "Second"]
+    etag = response.headers["etag"]
+
+    response = client.get("/blog/posts-by-slug/hello", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert client.get("/blog/posts-by-slug/missing").status_code == 400
@@ -0,0 +1,133 @@
+"""
+Tests pour les tags des articles du blog (filtre @> sur JSONB, facettes par tag)
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+import src.api.blog.service as blog_service
+from src.api.blog.models import Post
+from src.api.blog.schemas import PostCreateInput, PostFilter, PostUpdateInput
+from src.api.blog.service import BlogService
+
+
+class Result:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def all(self):
+        return self.rows
+
+
+class RecordingSession:
+    """Keeps the statements and the added rows instead of talking to PostgreSQL"""
+
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.statements = []
+        self.added = []
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return Result(self.rows)
+
+    def add(self, row):
+        self.added.append(row)
+
+    async def commit(self):
+        pass
+
+    async def refresh(self, row):
+        row.id = row.id or 1
+
+
+def compile_sql(statement):
+    compiled = statement.compile(dialect=postgresql.dialect())
+    return " ".join(str(compiled).split()), compiled.params
+
+
+def list_posts_sql(**filters):
+    session = RecordingSession()
+    asyncio.run(BlogService(session=session).list_posts(PostFilter(**filters)))
+    return compile_sql(session.statements[0])
+
+
+@pytest.fixture
+def service(fake_redis, monkeypatch):
+    async def save(upload, location, name=None):
+        return SimpleNamespace(file_path=f"{location}/{name}.png")
+
+    async def refresh_post_render_cache(post_id):
+        pass
+
+    monkeypatch.setattr(blog_service, "get_storage", lambda: SimpleNamespace(save=save))
+    monkeypatch.setattr(
+        blog_service.process_image_variants, "delay", lambda *args: None
+    )
+    service = BlogService(session=RecordingSession())
+    monkeypatch.setattr(service, "refresh_post_render_cache", refresh_post_render_cache)
+    return service
+
+
+def test_one_tag_is_a_containment_filter():
+    sql, params = list_posts_sql(tag="santé")
+
+    assert "posts.tags @> %(tags_1)s" in sql
+    assert params["tags_1"] == ["santé"]
+
+
+def test_tags_match_all_and_any():
+    sql, params = list_posts_sql(tags=["santé", "emploi"])
+    assert sql.count("posts.tags @>") == 1
+    assert params["tags_1"] == ["santé", "emploi"]
+
+    sql, params = list_posts_sql(tags=["santé", "emploi"], tags_match="any")
+    assert "(posts.tags @> %(tags_1)s) OR (posts.tags @> %(tags_2)s)" in sql
+    assert (params["tags_1"], params["tags_2"]) == (["santé"], ["emploi"])
+
+
+def test_tag_facets_skip_posts_without_an_array():
+    session = RecordingSession(rows=[("santé", 3), ("emploi", 1)])
+
+    counts = asyncio.run(BlogService(session=session).list_tag_counts())
+
+    assert counts == [{"tag": "santé", "count": 3}, {"tag": "emploi", "count": 1}]
+    sql, params = compile_sql(session.statements[0])
+    assert "jsonb_array_elements_text(posts.tags)" in sql
+    assert "jsonb_typeof(posts.tags) = %(jsonb_typeof_1)s" in sql
+    assert params["jsonb_typeof_1"] == "array"
+
+
+def test_post_created_without_tags_stores_an_empty_list(service, make_upload):
+    cover = make_upload(b"png", "cover.png")
+    data = PostCreateInput(
+        author_name="Author", title="Sans tags", cover_image=cover, category_id=1
+    )
+
+    post = asyncio.run(service.create_post(data, user_id="user"))
+
+    assert post.tags == []
+    assert service.session.added == [post]
+
+
+def test_update_keeps_tags_a_list(service):
+    post = Post(
+        id=4,
+        user_id="user",
+        author_name="Author",
+        title="Ancien",
+        slug="ancien",
+        cover_image="/posts/ancien.png",
+        cover_image_variants={},
+        tags=None,
+        category_id=1,
+    )
+
+    asyncio.run(service.update_post(post, PostUpdateInput(title="Nouveau")))
+    assert post.tags == []
+
+    asyncio.run(service.update_post(post, PostUpdateInput(tags=["santé"])))
+    assert post.tags == ["santé"]
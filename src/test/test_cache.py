@@ -0,0 +1,101 @@
+"""
+Tests pour le cache de réponses des routes publiques
+"""
+
+import asyncio
+from typing import List
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from src.helper.cache import CacheTag, cache_response, invalidate_cache_tags
+
+
+class ItemOut(BaseModel):
+    name: str
+
+
+class ItemListOut(BaseModel):
+    message: str
+    data: List[ItemOut]
+
+
+class ItemRecord:
+    """Plays the role of an ORM row: more attributes than the response model"""
+
+    def __init__(self, name):
+        self.name = name
+        self.secret = "hidden"
+
+
+@pytest.fixture
+def app_state():
+    state = {"calls": 0, "items": ["first"]}
+    app = FastAPI()
+
+    @app.get("/items", response_model=ItemListOut)
+    @cache_response(CacheTag.BLOG_POSTS)
+    async def list_items(page: int = 1):
+        state["calls"] += 1
+        return {"message": "ok", "data": [ItemRecord(name) for name in state["items"]]}
+
+    state["client"] = TestClient(app)
+    return state
+
+
+def test_response_is_served_from_cache(fake_redis, app_state):
+    client = app_state["client"]
+
+    first = client.get("/items?page=1")
+    second = client.get("/items?page=1")
+
+    assert first.status_code == second.status_code == 200
+    assert first.json() == {"message": "ok", "data": [{"name": "first"}]}
+    assert second.json() == first.json()
+    assert app_state["calls"] == 1
+
+
+def test_query_order_does_not_change_the_key(fake_redis, app_state):
+    client = app_state["client"]
+
+    client.get("/items?page=1&extra=a")
+    client.get("/items?extra=a&page=1")
+
+    assert app_state["calls"] == 1
+
+
+def test_matching_etag_returns_not_modified(fake_redis, app_state):
+    client = app_state["client"]
+
+    etag = client.get("/items").headers["etag"]
+    response = client.get("/items", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+def test_invalidation_by_tag_refreshes_the_response(fake_redis, app_state):
+    client = app_state["client"]
+
+    client.get("/items")
+    app_state["items"] = ["second"]
+    asyncio.run(invalidate_cache_tags(CacheTag.BLOG_POSTS))
+    response = client.get("/items")
+
+    assert response.json()["data"] == [{"name": "second"}]
+    assert app_state["calls"] == 2
+
+
+def test_route_still_works_when_redis_is_down(fake_redis, monkeypatch, app_state):
+    async def redis_down(*args, **kwargs):
+        raise ConnectionError("redis is down")
+
+    monkeypatch.setattr(fake_redis, "get", redis_down)
+    monkeypatch.setattr(fake_redis, "set", redis_down)
+
+    response = app_state["client"].get("/items")
+
+    assert response.status_code == 200
+    assert response.json()["data"] == [{"name": "first"}]
@@ -0,0 +1,102 @@
+"""
+Tests pour le routage des tâches Celery vers les files de priorité et le
+dimensionnement des workers
+"""
+
+from types import SimpleNamespace
+
+from celery import Celery
+
+from src.celery_utils import (
+    configure_worker_pool,
+    get_queue_depths,
+    worker_pool_options,
+)
+from src.config import route_task, settings
+from src.helper.notifications import LoginAlertNotification, TwoFactorAuthNotification
+from src.helper.schemas import EMAIL_CHANNEL
+from src.helper.utils import NotificationHelper
+
+
+def queue_of(task_name: str) -> str:
+    return route_task(task_name, (), {}, {})["queue"]
+
+
+def test_tasks_are_routed_by_name():
+    assert (
+        queue_of("src.api.payments.utils.check_cash_in_status")
+        == "lafaom_high_priority"
+    )
+    assert queue_of("src.helper.images.process_image_variants") == "lafaom_low_priority"
+    assert (
+        queue_of("src.helper.documents.process_attachment_document")
+        == "lafaom_low_priority"
+    )
+    assert (
+        queue_of("src.helper.storage_gc.collect_orphan_files") == "lafaom_low_priority"
+    )
+    assert queue_of("src.helper.moodle.moodle_create_course_task") == "lafaom_default"
+    assert queue_of("lafaom_high_priority:anything") == "lafaom_high_priority"
+
+
+def test_otp_emails_are_sent_to_the_high_priority_queue(monkeypatch):
+    sent = []
+    monkeypatch.setattr(settings, "EMAIL_CHANNEL", EMAIL_CHANNEL.SMTP)
+    monkeypatch.setattr(
+        NotificationHelper.send_smtp_email,
+        "apply_async",
+        lambda args, queue: sent.append(queue),
+    )
+
+    TwoFactorAuthNotification(email="a@b.c", code="123456").send_notification()
+    LoginAlertNotification(email="a@b.c").send_notification()
+
+    assert sent == ["lafaom_high_priority", None]
+
+
+def test_worker_pool_follows_its_queues(monkeypatch):
+    monkeypatch.setattr(
+        settings,
+        "CELERY_WORKER_POOLS",
+        {
+            "lafaom_high_priority": {"concurrency": 8, "prefetch_multiplier": 1},
+            "lafaom_low_priority": {"concurrency": 2, "prefetch_multiplier": 4},
+        },
+    )
+
+    assert worker_pool_options(["lafaom_low_priority"]) == {
+        "concurrency": 2,
+        "prefetch_multiplier": 4,
+    }
+    assert worker_pool_options("lafaom_high_priority,lafaom_low_priority") == {
+        "concurrency": 10,
+        "prefetch_multiplier": 1,
+    }
+    assert worker_pool_options(None) == {}
+
+    conf = SimpleNamespace(worker_concurrency=None, worker_prefetch_multiplier=1)
+    configure_worker_pool(
+        conf=conf,
+        options={
+            "queues": ["lafaom_low_priority"],
+            "concurrency": 3,
+            "prefetch_multiplier": None,
+        },
+    )
+    # The command line wins
+    assert (conf.worker_concurrency, conf.worker_prefetch_multiplier) == (None, 4)
+
+
+def test_queue_depths():
+    app = Celery("test", broker="memory://")
+    app.conf.task_queues = settings.CELERY_TASK_QUEUES
+    app.conf.task_routes = (route_task,)
+    for _ in range(3):
+        app.send_task("src.helper.images.process_image_variants")
+    app.send_task("src.api.payments.utils.check_cash_in_status")
+
+    assert get_queue_depths(app) == {
+        "lafaom_default": 0,
+        "lafaom_high_priority": 1,
+        "lafaom_low_priority": 3,
+    }
@@ -0,0 +1,114 @@
+"""
+Tests pour l'upload direct vers le stockage (jeton signé, réception locale,
+confirmation)
+"""
+
+import asyncio
+import os
+
+import pytest
+
+from src.config import settings
+from src.helper.file_helper import FileHelper, FileTooLargeError
+
+
+@pytest.fixture
+def local_storage(tmp_path, monkeypatch, fake_redis):
+    monkeypatch.setattr(settings, "STORAGE_LOCATION", "local")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+async def body(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+def prepare(size=10, content_type="application/pdf"):
+    return asyncio.run(
+        FileHelper.create_direct_upload(
+            "/student-applications/3",
+            "diploma.pdf",
+            content_type,
+            size,
+            name="diploma",
+            context={"resource": "student_attachment", "id": 3},
+        )
+    )
+
+
+def test_local_round_trip(local_storage):
+    upload = prepare()
+    assert upload["method"] == "PUT"
+    assert "/api/v1/local-upload?token=" in upload["url"]
+
+    asyncio.run(
+        FileHelper.receive_local_upload(
+            upload["upload_token"], "application/pdf", body(b"12345", b"67890")
+        )
+    )
+    confirmed = asyncio.run(FileHelper.confirm_direct_upload(upload["upload_token"]))
+
+    assert confirmed["size"] == 10
+    assert confirmed["context"] == {"resource": "student_attachment", "id": 3}
+    assert confirmed["file_path"].startswith("static/uploads/student-applications/3/")
+    assert os.path.getsize(os.path.join("src", confirmed["file_path"])) == 10
+
+
+def test_body_larger_than_announced_is_refused(local_storage):
+    upload = prepare(size=4)
+
+    with pytest.raises(FileTooLargeError):
+        asyncio.run(
+            FileHelper.receive_local_upload(
+                upload["upload_token"], "application/pdf", body(b"12345")
+            )
+        )
+
+
+def test_confirm_without_upload_fails(local_storage):
+    upload = prepare()
+
+    with pytest.raises(ValueError):
+        asyncio.run(FileHelper.confirm_direct_upload(upload["upload_token"]))
+
+
+def test_tokens_are_single_use(local_storage):
+    token = prepare()["upload_token"]
+
+    # A refused body or a confirm before the upload do not use the token
+    with pytest.raises(FileTooLargeError):
+        asyncio.run(
+            FileHelper.receive_local_upload(token, "application/pdf", body(b"x" * 11))
+        )
+    with pytest.raises(ValueError):
+        asyncio.run(FileHelper.confirm_direct_upload(token))
+
+    asyncio.run(
+        FileHelper.receive_local_upload(token, "application/pdf", body(b"%PDF-1.4"))
+    )
+    confirmed = asyncio.run(FileHelper.confirm_direct_upload(token))
+
+    with pytest.raises(ValueError, match="already used"):
+        asyncio.run(FileHelper.confirm_direct_upload(token))
+    with pytest.raises(ValueError, match="already used"):
+        asyncio.run(
+            FileHelper.receive_local_upload(token, "application/pdf", body(b"other"))
+        )
+    with open(os.path.join("src", confirmed["file_path"]), "rb") as f:
+        assert f.read() == b"%PDF-1.4"
+
+
+def test_tampered_or_expired_token_is_rejected(local_storage):
+    token = prepare()["upload_token"]
+    with pytest.raises(ValueError):
+        FileHelper.read_token(token[:-1] + ("0" if token[-1] != "0" else "1"))
+
+    expired = FileHelper.sign_token({"key": "static/uploads/x.pdf"}, -1)
+    with pytest.raises(ValueError):
+        FileHelper.read_token(expired)
+
+
+def test_oversized_announcement_is_refused(local_storage):
+    with pytest.raises(FileTooLargeError):
+        prepare(size=settings.MAX_FILE_SIZE + 1)
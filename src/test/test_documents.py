@@ -0,0 +1,121 @@
+"""
+Tests pour la validation des PDF et l'extraction de texte des pièces jointes
+"""
+
+import io
+
+from PyPDF2 import PdfFileReader, PdfFileWriter
+
+from src.api.storage.models import DocumentStatusEnum
+from src.config import settings
+from src.helper.documents import inspect_pdf
+
+
+def make_pdf(pages) -> bytes:
+    """Minimal PDF with one line of text on each page"""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for text in pages:
+        content = b"BT /F1 12 Tf 72 720 Td (" + text.encode() + b") Tj ET"
+        objects.append(
+            b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content)
+        )
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>"
+            % (len(objects))
+        )
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(kids),
+        len(kids),
+    )
+
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref,
+    )
+    return bytes(pdf)
+
+
+def encrypt(data: bytes, user_password: str) -> bytes:
+    writer = PdfFileWriter()
+    writer.appendPagesFromReader(PdfFileReader(io.BytesIO(data)))
+    writer.encrypt(user_password, "owner")
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+def test_text_and_page_count_are_extracted():
+    inspection = inspect_pdf(
+        io.BytesIO(make_pdf(["Curriculum vitae", "Diplome de master"])), "cv.pdf"
+    )
+
+    assert inspection.status == DocumentStatusEnum.VALID
+    assert inspection.page_count == 2
+    assert "Curriculum vitae" in inspection.text
+    assert "Diplome de master" in inspection.text
+
+
+def test_text_is_capped(monkeypatch):
+    monkeypatch.setattr(settings, "DOCUMENT_TEXT_MAX_CHARS", 30)
+
+    inspection = inspect_pdf(
+        io.BytesIO(make_pdf([f"Page number {i} of the report" for i in range(20)]))
+    )
+
+    assert inspection.page_count == 20
+    assert len(inspection.text) <= 30
+
+
+def test_too_many_pages(monkeypatch):
+    monkeypatch.setattr(settings, "DOCUMENT_MAX_PAGES", 2)
+
+    inspection = inspect_pdf(io.BytesIO(make_pdf(["a", "b", "c"])))
+
+    assert (inspection.status, inspection.page_count, inspection.text) == (
+        DocumentStatusEnum.TOO_MANY_PAGES,
+        3,
+        None,
+    )
+
+
+def test_encrypted_documents():
+    data = make_pdf(["Confidentiel"])
+
+    assert (
+        inspect_pdf(io.BytesIO(encrypt(data, "secret"))).status
+        == DocumentStatusEnum.ENCRYPTED
+    )
+    # Owner password only: opens without a password
+    assert inspect_pdf(io.BytesIO(encrypt(data, ""))).status == DocumentStatusEnum.VALID
+
+
+def test_corrupted_and_other_files():
+    truncated = make_pdf(["Curriculum vitae"])[:120]
+
+    assert (
+        inspect_pdf(io.BytesIO(truncated), "cv.pdf").status
+        == DocumentStatusEnum.INVALID
+    )
+    assert (
+        inspect_pdf(io.BytesIO(b"\x89PNG\r\n"), "fake.pdf").status
+        == DocumentStatusEnum.INVALID
+    )
+    assert (
+        inspect_pdf(io.BytesIO(b"\x89PNG\r\n"), "photo.png").status
+        == DocumentStatusEnum.SKIPPED
+    )
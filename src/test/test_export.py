@@ -0,0 +1,102 @@
+"""
+Tests pour l'export CSV et XLSX en streaming
+"""
+
+import asyncio
+import csv
+import io
+from datetime import datetime, timezone
+from enum import Enum
+
+import pytest
+from sqlmodel import Field, SQLModel, select
+
+import src.helper.export as export
+
+
+class ExportStatus(str, Enum):
+    PAID = "PAID"
+
+
+class ExportItem(SQLModel, table=True):
+    __tablename__ = "test_export_items"
+
+    id: int = Field(default=None, primary_key=True)
+    label: str
+    created_at: datetime
+
+
+def test_csv_export_streams_one_chunk_per_batch(monkeypatch):
+    batches = [
+        [("é-1", datetime(2025, 1, 1, tzinfo=timezone.utc), ExportStatus.PAID)],
+        [("item-2", None, ExportStatus.PAID)],
+    ]
+
+    async def fake_stream_rows(statement, batch_size=None):
+        for batch in batches:
+            yield batch
+
+    monkeypatch.setattr(export, "stream_rows", fake_stream_rows)
+    statement = select(
+        ExportItem.label.label("label"),
+        ExportItem.created_at.label("created_at"),
+        ExportItem.id.label("status"),
+    )
+
+    response = export.export_response(statement, "items", "csv")
+    chunks = asyncio.run(_collect_chunks(response))
+
+    assert len(chunks) == 2
+    assert response.headers["content-disposition"].startswith(
+        'attachment; filename="items-'
+    )
+    rows = list(csv.reader(io.StringIO(b"".join(chunks).decode("utf-8-sig"))))
+    assert rows == [
+        ["label", "created_at", "status"],
+        ["é-1", "2025-01-01T00:00:00+00:00", "PAID"],
+        ["item-2", "", "PAID"],
+    ]
+
+
+FORMULAS = ['=HYPERLINK("http://x")', "+1+1", "-2+3", "@SUM(A1)", "\tcmd", "\rcmd"]
+
+
+@pytest.fixture
+def formula_rows(monkeypatch):
+    async def fake_stream_rows(statement, batch_size=None):
+        yield [(value, None, -5) for value in FORMULAS]
+
+    monkeypatch.setattr(export, "stream_rows", fake_stream_rows)
+    return select(
+        ExportItem.label.label("label"),
+        ExportItem.created_at.label("created_at"),
+        ExportItem.id.label("id"),
+    )
+
+
+def test_csv_cells_are_not_formulas(formula_rows):
+    response = export.export_response(formula_rows, "items", "csv")
+    chunks = asyncio.run(_collect_chunks(response))
+
+    rows = list(csv.reader(io.StringIO(b"".join(chunks).decode("utf-8-sig"))))
+    assert [row[0] for row in rows[1:]] == ["'" + value for value in FORMULAS]
+    assert {row[2] for row in rows[1:]} == {"-5"}
+
+
+def test_xlsx_cells_are_not_formulas(formula_rows):
+    openpyxl = pytest.importorskip("openpyxl")
+
+    response = export.export_response(formula_rows, "items", "xlsx")
+    content = b"".join(asyncio.run(_collect_chunks(response)))
+
+    sheet = openpyxl.load_workbook(io.BytesIO(content)).active
+    rows = list(sheet.iter_rows(min_row=2, values_only=True))
+    # XML reads the "\r" of the last value back as "\n"
+    assert [row[0] for row in rows[:-1]] == ["'" + value for value in FORMULAS[:-1]]
+    assert rows[-1][0] == "'\ncmd"
+    assert all(cell.data_type == "s" for cell in sheet["A"][1:])
+    assert {row[2] for row in rows} == {-5}
+
+
+async def _collect_chunks(response):
+    return [chunk async for chunk in response.body_iterator]
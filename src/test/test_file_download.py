@@ -0,0 +1,117 @@
+"""
+Tests pour le téléchargement des fichiers (lien signé, Range, ETag)
+"""
+
+import os
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import src.helper.file_helper as file_helper
+from src.api.storage.router import router as storage_router
+from src.config import settings
+from src.helper.download import RangeNotSatisfiable, parse_range
+from src.helper.file_helper import FileHelper
+
+
+CONTENT = bytes(range(256)) * 40
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "STORAGE_LOCATION", "local")
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("src/uploads/keys")
+    with open("src/uploads/keys/report.pdf", "wb") as f:
+        f.write(CONTENT)
+    app = FastAPI()
+    app.include_router(storage_router, prefix="/api/v1")
+    return TestClient(app)
+
+
+def private_url(file_path="uploads/keys/report.pdf", expire=60):
+    return FileHelper.generate_local_signed_url(file_path, expire).removeprefix(
+        settings.API_BASE_URL
+    )
+
+
+def test_parse_range():
+    assert parse_range(None, 100) is None
+    assert parse_range("bytes=0-9", 100) == (0, 9)
+    assert parse_range("bytes=90-", 100) == (90, 99)
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    assert parse_range("bytes=50-500", 100) == (50, 99)
+    assert parse_range("bytes=0-1,5-6", 100) is None
+    assert parse_range("items=0-1", 100) is None
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range("bytes=100-", 100)
+
+
+def test_signed_link_serves_the_whole_file(client):
+    response = client.get(private_url())
+
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers["accept-ranges"] == "bytes"
+
+
+def test_tampered_expired_or_escaping_links_are_refused(client):
+    assert (
+        client.get(private_url().replace("signature=", "signature=0")).status_code
+        == 403
+    )
+    assert client.get(private_url(expire=-1)).status_code == 403
+    assert client.get(private_url("uploads/../config.py")).status_code == 404
+
+
+def test_range_and_etag(client):
+    url = private_url()
+    etag = client.get(url).headers["etag"]
+
+    partial = client.get(url, headers={"Range": "bytes=10-19"})
+    assert partial.status_code == 206
+    assert partial.content == CONTENT[10:20]
+    assert partial.headers["content-range"] == f"bytes 10-19/{len(CONTENT)}"
+
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+    assert (
+        client.get(url, headers={"Range": f"bytes={len(CONTENT)}-"}).status_code == 416
+    )
+    # A stale If-Range sends the whole (changed) file
+    assert (
+        client.get(url, headers={"Range": "bytes=0-1", "If-Range": '"old"'}).status_code
+        == 200
+    )
+
+
+def test_s3_object_is_proxied_by_range(client, monkeypatch):
+    pytest.importorskip("moto")
+    try:
+        from moto import mock_aws
+    except ImportError:  # moto < 5
+        from moto import mock_s3 as mock_aws
+
+    monkeypatch.setattr(settings, "STORAGE_LOCATION", "S3")
+    monkeypatch.setattr(settings, "AWS_BUCKET_NAME", "lafaom-test")
+    monkeypatch.setattr(settings, "AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setattr(settings, "AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setattr(file_helper, "_s3_client", None)
+    with mock_aws():
+        s3 = FileHelper.get_s3_client()
+        s3.create_bucket(Bucket="lafaom-test")
+        s3.put_object(
+            Bucket="lafaom-test",
+            Key="private/keys/report.pdf",
+            Body=CONTENT,
+            ContentType="application/pdf",
+        )
+        url = private_url("private/keys/report.pdf")
+
+        whole = client.get(url)
+        partial = client.get(url, headers={"Range": "bytes=-16"})
+
+    assert whole.content == CONTENT
+    assert whole.headers["content-type"] == "application/pdf"
+    assert partial.status_code == 206
+    assert partial.content == CONTENT[-16:]
@@ -0,0 +1,108 @@
+"""
+Tests pour le stockage S3 de FileHelper (serveur S3 simulé par moto)
+"""
+
+import asyncio
+
+import pytest
+
+moto = pytest.importorskip("moto")
+
+import src.helper.file_helper as file_helper
+from src.config import settings
+from src.helper.file_helper import FileHelper
+from src.helper.storage import get_storage
+
+try:
+    from moto import mock_aws
+except ImportError:  # moto < 5
+    from moto import mock_s3 as mock_aws
+
+
+BUCKET = "lafaom-test"
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    monkeypatch.setattr(settings, "STORAGE_LOCATION", "S3")
+    monkeypatch.setattr(settings, "AWS_BUCKET_NAME", BUCKET)
+    monkeypatch.setattr(settings, "AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setattr(settings, "AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setattr(settings, "S3_MULTIPART_THRESHOLD", 5 * MB)
+    monkeypatch.setattr(settings, "S3_MULTIPART_CHUNKSIZE", 5 * MB)
+    monkeypatch.setattr(file_helper, "_s3_client", None)
+    with mock_aws():
+        client = FileHelper.get_s3_client()
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+def test_client_is_created_once(s3):
+    assert FileHelper.get_s3_client() is s3
+
+
+def test_large_upload_is_multipart_and_keeps_the_loop_free(s3, make_upload):
+    content = bytes(range(256)) * (12 * MB // 256)
+    upload = make_upload(content, "report.pdf", size=len(content))
+    ticks = 0
+
+    async def ticker(done: asyncio.Event):
+        nonlocal ticks
+        while not done.is_set():
+            ticks += 1
+            await asyncio.sleep(0)
+
+    async def run():
+        done = asyncio.Event()
+        task = asyncio.create_task(ticker(done))
+        result = await get_storage().save(
+            upload, "/student-applications/1", "diploma", public=False
+        )
+        done.set()
+        await task
+        return result
+
+    result = asyncio.run(run())
+    key = result.key
+
+    assert key.startswith("private/student-applications/1/") and key.endswith(
+        "diploma_s3.pdf"
+    )
+    assert result.file_path == key
+    assert (result.name, result.content_type) == ("diploma", "application/pdf")
+    stored = s3.get_object(Bucket=BUCKET, Key=key)
+    assert stored["ContentLength"] == 12 * MB
+    # A multipart object has an ETag suffixed by its number of parts
+    assert stored["ETag"].strip('"').endswith("-3")
+    assert ticks > 1
+
+
+def test_remove_deletes_the_object(s3):
+    stored = asyncio.run(
+        get_storage().save_bytes(
+            b"{}", "/keys", "key.json", "application/json", public=False
+        )
+    )
+
+    asyncio.run(get_storage().remove(stored.file_path))
+
+    assert (
+        s3.list_objects_v2(Bucket=BUCKET, Prefix="private/keys/").get("KeyCount") == 0
+    )
+
+
+def test_s3_stream_yields_the_whole_object(s3):
+    s3.put_object(Bucket=BUCKET, Key="public/file.bin", Body=b"x" * (3 * MB + 5))
+
+    async def read():
+        return b"".join(
+            [
+                chunk
+                async for chunk in FileHelper.s3_stream(
+                    "public/file.bin", chunk_size=MB
+                )
+            ]
+        )
+
+    assert len(asyncio.run(read())) == 3 * MB + 5
@@ -0,0 +1,101 @@
+"""
+Tests pour l'upload local en streaming (mémoire, limite de taille, hash)
+"""
+
+import asyncio
+import hashlib
+import os
+import tracemalloc
+
+import pytest
+from starlette.datastructures import Headers, UploadFile
+
+from src.config import settings
+from src.helper.file_helper import FileTooLargeError
+from src.helper.storage import LocalStorage
+
+
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Run from a temporary directory so uploads land under tmp_path/src"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def write_source(path, size: int) -> str:
+    block = os.urandom(MB)
+    with open(path, "wb") as f:
+        for _ in range(size // MB):
+            f.write(block)
+    return str(path)
+
+
+def open_upload(path: str, filename: str = "document.pdf") -> UploadFile:
+    return UploadFile(
+        file=open(path, "rb"),
+        size=None,  # unknown size, as with a chunked request body
+        filename=filename,
+        headers=Headers({"content-type": "application/pdf"}),
+    )
+
+
+def test_content_hash_is_computed_while_copying(workdir):
+    source = write_source(workdir / "source.pdf", 3 * MB)
+    upload = open_upload(source)
+
+    stored = asyncio.run(
+        LocalStorage().save(upload, "/job-applications/7", "copy", public=False)
+    )
+
+    with open(source, "rb") as f:
+        assert stored.sha256 == hashlib.sha256(f.read()).hexdigest()
+    assert stored.size == 3 * MB
+    assert os.path.getsize(os.path.join("src", stored.key)) == 3 * MB
+
+
+def test_oversized_upload_aborts_and_leaves_no_file(workdir, monkeypatch):
+    monkeypatch.setattr(settings, "MAX_FILE_SIZE", 2 * MB)
+    upload = open_upload(write_source(workdir / "big.pdf", 8 * MB))
+
+    with pytest.raises(FileTooLargeError):
+        asyncio.run(
+            LocalStorage().save(upload, "/student-applications/1", "cv", public=False)
+        )
+
+    # Refused from the spooled size, before reading or writing anything
+    assert upload.file.tell() == 0
+    assert not os.path.exists(workdir / "src/uploads/student-applications/1")
+
+
+def test_concurrent_20mb_uploads_keep_memory_flat(workdir):
+    uploads_count = 8
+    sources = [
+        write_source(workdir / f"source-{i}.pdf", 20 * MB) for i in range(uploads_count)
+    ]
+
+    async def upload_all():
+        uploads = [open_upload(source) for source in sources]
+        storage = LocalStorage()
+        return await asyncio.gather(
+            *[
+                storage.save(upload, "/job-applications/7", f"file-{i}", public=False)
+                for i, upload in enumerate(uploads)
+            ]
+        )
+
+    tracemalloc.start()
+    try:
+        results = asyncio.run(upload_all())
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert len({stored.key for stored in results}) == uploads_count
+    for stored in results:
+        assert stored.file_path.startswith("uploads/job-applications/7/")
+        assert os.path.getsize(os.path.join("src", stored.file_path)) == 20 * MB
+    # Buffering whole files would need 160MB, streaming holds about one chunk per upload
+    assert peak < uploads_count * 2 * settings.UPLOAD_CHUNK_SIZE + 4 * MB
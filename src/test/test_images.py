@@ -0,0 +1,166 @@
+"""
+Tests pour la génération des variantes d'images (redimensionnement, EXIF, srcset)
+"""
+
+import asyncio
+import io
+import os
+from types import SimpleNamespace
+
+import pytest
+from PIL import Image, features
+
+import src.api.blog.service as blog_service
+from src.api.blog.models import Post
+from src.api.blog.schemas import PostSectionOut, PostUpdateInput
+from src.api.blog.service import BlogService
+from src.config import settings
+from src.helper.images import generate_image_variants, render_variants
+from src.helper.schemas import ImageSourcesOut
+
+ORIENTATION = 0x0112
+EXTENSIONS = ("webp", "jpeg") if features.check("webp") else ("jpeg",)
+
+
+def make_photo(width=2000, height=1000, orientation=None, mode="RGB") -> bytes:
+    image = Image.new(
+        mode, (width, height), (200, 30, 30, 255) if mode == "RGBA" else (200, 30, 30)
+    )
+    exif = Image.Exif()
+    exif[0x010F] = "Camera maker"
+    if orientation:
+        exif[ORIENTATION] = orientation
+    buffer = io.BytesIO()
+    if mode == "RGBA":
+        image.save(buffer, "PNG")
+    else:
+        image.save(buffer, "JPEG", exif=exif.tobytes())
+    return buffer.getvalue()
+
+
+def test_variants_are_resized_without_exif():
+    rendered = render_variants(make_photo())
+
+    assert {(variant, extension) for variant, extension, *_ in rendered} == {
+        (variant, extension)
+        for variant in settings.IMAGE_VARIANT_WIDTHS
+        for extension in EXTENSIONS
+    }
+    for variant, extension, width, height, content in rendered:
+        assert width == min(settings.IMAGE_VARIANT_WIDTHS[variant], 2000)
+        assert height == width // 2
+        with Image.open(io.BytesIO(content)) as image:
+            assert image.format == extension.upper()
+            assert "exif" not in image.info
+
+
+def test_orientation_is_applied_and_small_images_are_not_upscaled():
+    # Orientation 6: stored landscape, displayed portrait
+    rendered = render_variants(make_photo(600, 300, orientation=6))
+
+    # Rotated to 300x600, narrower than every variant so kept as is
+    assert {(width, height) for _, _, width, height, _ in rendered} == {(300, 600)}
+
+
+@pytest.mark.skipif(not features.check("webp"), reason="Pillow built without WebP")
+def test_transparent_images_keep_alpha_in_webp():
+    rendered = render_variants(make_photo(400, 400, mode="RGBA"))
+
+    modes = {}
+    for variant, extension, _, _, content in rendered:
+        with Image.open(io.BytesIO(content)) as image:
+            modes[extension] = image.mode
+    assert modes == {"webp": "RGBA", "jpeg": "RGB"}
+
+
+def test_variants_are_stored_next_to_the_original(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "STORAGE_LOCATION", "local")
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("src/static/uploads/posts")
+    with open("src/static/uploads/posts/101010_news.jpg", "wb") as f:
+        f.write(make_photo())
+
+    variants = asyncio.run(
+        generate_image_variants("static/uploads/posts/101010_news.jpg", "/posts")
+    )
+
+    assert variants["thumb"]["jpeg"] == "static/uploads/posts/101010_news_thumb.jpeg"
+    for variant in variants.values():
+        for extension in EXTENSIONS:
+            assert os.path.isfile(os.path.join("src", variant[extension]))
+
+
+def test_srcset_is_built_from_the_stored_variants():
+    variants = {
+        "card": {"width": 768, "height": 384, "webp": "c.webp", "jpeg": "c.jpeg"},
+        "thumb": {"width": 320, "height": 160, "webp": "t.webp", "jpeg": "t.jpeg"},
+    }
+
+    sources = ImageSourcesOut.from_variants(variants)
+    section = PostSectionOut.model_validate(
+        {
+            "id": 1,
+            "title": "t",
+            "cover_image": "c.jpg",
+            "cover_image_variants": variants,
+            "content": "",
+            "position": 1,
+            "post_id": 1,
+            "created_at": "2025-01-01T00:00:00Z",
+            "updated_at": "2025-01-01T00:00:00Z",
+        }
+    )
+
+    assert sources["webp_srcset"] == "t.webp 320w, c.webp 768w"
+    assert section.cover_image_sources.jpeg_srcset == "t.jpeg 320w, c.jpeg 768w"
+    assert ImageSourcesOut.from_variants(None) is None
+
+
+def test_variants_are_queued_only_for_a_new_cover(fake_redis, monkeypatch, make_upload):
+    queued = []
+
+    class Session:
+        def add(self, row):
+            pass
+
+        async def commit(self):
+            pass
+
+        async def refresh(self, row):
+            pass
+
+    async def save(upload, location, name=None):
+        return SimpleNamespace(file_path=f"static/uploads{location}/{name}.jpg")
+
+    async def remove(file_path):
+        return True
+
+    async def refresh_post_render_cache(post_id):
+        pass
+
+    storage = SimpleNamespace(save=save, remove=remove)
+    monkeypatch.setattr(blog_service, "get_storage", lambda: storage)
+    monkeypatch.setattr(
+        blog_service.process_image_variants, "delay", lambda *args: queued.append(args)
+    )
+    service = BlogService(session=Session())
+    monkeypatch.setattr(service, "refresh_post_render_cache", refresh_post_render_cache)
+    post = Post(
+        id=5,
+        user_id="user",
+        author_name="Author",
+        title="News",
+        slug="news",
+        cover_image="static/uploads/posts/news.jpg",
+        tags=[],
+        category_id=1,
+    )
+
+    # Variants still pending: editing the text does not queue them again
+    asyncio.run(service.update_post(post, PostUpdateInput(summary="Résumé")))
+    assert queued == []
+
+    cover = make_upload(make_photo(), "cover.jpg")
+    data = PostUpdateInput(title="Other", cover_image=cover)
+    asyncio.run(service.update_post(post, data))
+    assert queued == [("post", 5, "static/uploads/posts/other.jpg")]
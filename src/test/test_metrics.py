@@ -0,0 +1,214 @@
+"""
+Tests pour les métriques Prometheus (latence par route, pools, Redis, files
+Celery, fournisseurs)
+"""
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY, CollectorRegistry, generate_latest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+
+import src.celery_utils as celery_utils
+import src.database as database
+import src.redis_client as redis_client
+from src.config import settings
+from src.helper.metrics import (
+    AsyncProviderMetricsTransport,
+    MetricsMiddleware,
+    PoolCollector,
+    ProviderMetricsTransport,
+    QueueDepthCollector,
+)
+
+
+@pytest.fixture(autouse=True)
+def no_broker(monkeypatch):
+    """Reading REGISTRY collects the Celery queue depths once src.main added them"""
+    monkeypatch.setattr(celery_utils, "get_queue_depths", lambda app=None: {})
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_request_latency_by_route_template():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        return {"id": item_id}
+
+    before = sample(
+        "http_request_duration_seconds_count",
+        method="GET",
+        route="/items/{item_id}",
+        status="200",
+    )
+    client = TestClient(app)
+    for item_id in range(3):
+        assert client.get(f"/items/{item_id}").status_code == 200
+    assert client.get("/items/abc").status_code == 422
+    assert client.get("/missing").status_code == 404
+
+    assert (
+        sample(
+            "http_request_duration_seconds_count",
+            method="GET",
+            route="/items/{item_id}",
+            status="200",
+        )
+        == before + 3
+    )
+    assert (
+        sample(
+            "http_request_duration_seconds_count",
+            method="GET",
+            route="/items/{item_id}",
+            status="422",
+        )
+        >= 1
+    )
+    assert (
+        sample(
+            "http_request_duration_seconds_count",
+            method="GET",
+            route="unmatched",
+            status="404",
+        )
+        >= 1
+    )
+    assert sample("http_requests_in_progress", method="GET") == 0
+
+
+def test_provider_calls(monkeypatch):
+    def handler(request):
+        if request.url.path == "/down":
+            raise httpx.ConnectError("connection refused", request=request)
+        return httpx.Response(500 if request.url.path == "/error" else 200, json={})
+
+    before = {
+        "calls": sample("provider_request_duration_seconds_count", provider="cinetpay"),
+        "status": sample(
+            "provider_request_errors_total", provider="cinetpay", reason="500"
+        ),
+        "connect": sample(
+            "provider_request_errors_total", provider="brevo", reason="ConnectError"
+        ),
+        "other": sample("provider_request_duration_seconds_count", provider="other"),
+    }
+    with httpx.Client(
+        transport=ProviderMetricsTransport(httpx.MockTransport(handler))
+    ) as client:
+        client.post("https://api-checkout.cinetpay.com/v2/payment/check")
+        client.post("https://api-checkout.cinetpay.com/error")
+        with pytest.raises(httpx.ConnectError):
+            client.post("https://api.brevo.com/down")
+        client.get("https://example.com/")
+
+    async def call_async():
+        async with httpx.AsyncClient(
+            transport=AsyncProviderMetricsTransport(httpx.MockTransport(handler))
+        ) as client:
+            await client.post("https://api-checkout.cinetpay.com/v2/payment/check")
+
+    asyncio.run(call_async())
+
+    assert (
+        sample("provider_request_duration_seconds_count", provider="cinetpay")
+        == before["calls"] + 3
+    )
+    assert (
+        sample("provider_request_errors_total", provider="cinetpay", reason="500")
+        == before["status"] + 1
+    )
+    assert (
+        sample("provider_request_errors_total", provider="brevo", reason="ConnectError")
+        == before["connect"] + 1
+    )
+    assert (
+        sample("provider_request_duration_seconds_count", provider="other")
+        == before["other"] + 1
+    )
+
+
+def test_pool_gauges(tmp_path, monkeypatch):
+    engine = create_engine(
+        f"sqlite:///{tmp_path}/db.sqlite", poolclass=QueuePool, pool_size=3
+    )
+    monkeypatch.setattr(database, "_engines", {"engine": engine})
+    registry = CollectorRegistry()
+    registry.register(PoolCollector())
+
+    with engine.connect():
+        assert (
+            registry.get_sample_value(
+                "db_pool_connections", {"engine": "engine", "state": "checked_out"}
+            )
+            == 1
+        )
+    assert (
+        registry.get_sample_value(
+            "db_pool_connections", {"engine": "engine", "state": "checked_out"}
+        )
+        == 0
+    )
+    assert (
+        registry.get_sample_value(
+            "db_pool_connections", {"engine": "engine", "state": "checked_in"}
+        )
+        == 1
+    )
+    assert registry.get_sample_value("db_pool_size", {"engine": "engine"}) == 3
+    engine.dispose()
+
+
+def test_queue_depth_gauges(monkeypatch):
+    registry = CollectorRegistry()
+    registry.register(QueueDepthCollector())
+
+    monkeypatch.setattr(
+        celery_utils,
+        "get_queue_depths",
+        lambda app=None: {"lafaom_default": 4, "lafaom_high_priority": 0},
+    )
+    assert (
+        registry.get_sample_value("celery_queue_depth", {"queue": "lafaom_default"})
+        == 4
+    )
+
+    def broker_down(app=None):
+        raise ConnectionError("broker down")
+
+    monkeypatch.setattr(celery_utils, "get_queue_depths", broker_down)
+    assert b"celery_queue_depth" in generate_latest(registry)
+
+
+def test_redis_command_latency(fake_redis):
+    fake_redis.values[f"{settings.REDIS_NAMESPACE}:key"] = "1"
+    before = sample("redis_command_duration_seconds_count", command="get")
+    assert asyncio.run(redis_client.get_from_redis("key")) == "1"
+    assert sample("redis_command_duration_seconds_count", command="get") == before + 1
+
+
+def test_metrics_endpoint(monkeypatch):
+    from src.main import app
+
+    monkeypatch.setattr(
+        celery_utils, "get_queue_depths", lambda app=None: {"lafaom_default": 2}
+    )
+    client = TestClient(app)
+    client.get("/")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert (
+        'http_request_duration_seconds_count{method="GET",route="/",status="200"}'
+        in response.text
+    )
+    assert 'celery_queue_depth{queue="lafaom_default"} 2.0' in response.text
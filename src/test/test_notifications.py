@@ -0,0 +1,172 @@
+"""
+Tests pour la boîte de notifications in-app (fan-out en base, compteurs non lus
+et première page en cache)
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.dialects import postgresql
+
+import src.api.notifications.utils as notification_utils
+from src.api.notifications.models import Notification
+from src.api.notifications.schemas import NotificationFilter
+from src.api.notifications.service import NotificationService, invalidate_inboxes
+from src.config import settings
+from src.helper.in_app_notif import NotificationType
+from src.helper.query import decode_cursor
+
+
+class ScalarResult:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar_one(self):
+        return self.value
+
+
+class CountingSession:
+    def __init__(self, unread):
+        self.unread = unread
+        self.counts = 0
+
+    async def execute(self, statement):
+        self.counts += 1
+        return ScalarResult(self.unread)
+
+
+def make_notifications(count):
+    now = datetime(2025, 11, 24, 10, tzinfo=timezone.utc)
+    return [
+        Notification(
+            id=count - i,
+            user_id="user-1",
+            notification_type="new_ebook",
+            title=f"t{i}",
+            message=f"m{i}",
+            action=[],
+            created_at=now - timedelta(minutes=i),
+            updated_at=now,
+        )
+        for i in range(count)
+    ]
+
+
+def test_fan_out_is_one_insert_select_per_batch():
+    statement = notification_utils.fan_out_statement(
+        NotificationType.NEW_EBOOK, {"ebook_title": "Santé"}, None, "id-100", "id-200"
+    )
+    compiled = statement.compile(dialect=postgresql.dialect())
+    sql = " ".join(str(compiled).split())
+
+    assert sql.startswith(
+        "INSERT INTO notifications (user_id, notification_type, title, message, "
+        "action, created_at, updated_at) SELECT users.id"
+    )
+    assert "CASE users.lang WHEN %(param_" in sql
+    assert "users.id > %(id_1)s AND users.id <= %(id_2)s" in sql
+    assert sql.endswith("RETURNING notifications.user_id")
+    assert "Un nouvel ebook intitulé 'Santé' a été ajouté." in compiled.params.values()
+    assert [{"name": "Lire maintenant", "url": "/ebooks"}] in compiled.params.values()
+
+
+class FakeResult:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar(self):
+        return self.value
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.value
+
+
+def test_fan_out_walks_the_users_by_batches(monkeypatch):
+    ids = [f"user-{i:03d}" for i in range(7)]
+    # (last id of the batch, users notified): the last batch is not full
+    batches = iter([("user-002", ids[0:3]), ("user-005", ids[3:6]), (None, ids[6:])])
+    invalidated, pushed, current = [], [], {}
+
+    class FakeSession:
+        def __init__(self, engine):
+            pass
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            return False
+
+        def execute(self, statement):
+            if statement.is_insert:
+                return FakeResult(current["batch"])
+            current["until"], current["batch"] = next(batches)
+            return FakeResult(current["until"])
+
+        def commit(self):
+            pass
+
+    import src.helper.push as push
+
+    monkeypatch.setattr(notification_utils, "Session", FakeSession)
+    monkeypatch.setattr(notification_utils, "_invalidate", invalidated.append)
+    monkeypatch.setattr(settings, "NOTIFICATION_FANOUT_BATCH_SIZE", 3)
+    monkeypatch.setattr(push.fan_out_push, "delay", lambda *args: pushed.append(args))
+
+    notified = notification_utils.fan_out_notification.run(
+        "new_ebook", {"ebook_title": "x"}, push=True
+    )
+
+    assert notified == 7
+    assert invalidated == [ids[0:3], ids[3:6], ids[6:]]
+    assert pushed == [("new_ebook", {"ebook_title": "x"}, None)]
+
+
+def test_first_pages_are_served_from_the_cached_inbox(fake_redis, monkeypatch):
+    service = NotificationService(session=CountingSession(unread=4))
+    pages = []
+
+    async def page(user_id, cursor, page_size, unread=False):
+        pages.append((cursor, page_size, unread))
+        return make_notifications(3), None
+
+    monkeypatch.setattr(service, "_page", page)
+
+    async def scenario():
+        first, first_cursor = await service.list_notifications(
+            "user-1", NotificationFilter(page_size=2)
+        )
+        again, _ = await service.list_notifications(
+            "user-1", NotificationFilter(page_size=3)
+        )
+        await service.list_notifications(
+            "user-1", NotificationFilter(cursor=first_cursor)
+        )
+        await service.list_notifications("user-1", NotificationFilter(unread=True))
+        counts = [
+            await service.unread_count("user-1"),
+            await service.unread_count("user-1"),
+        ]
+        await invalidate_inboxes(["user-1"])
+        await service.list_notifications("user-1", NotificationFilter())
+        return first, first_cursor, again, counts
+
+    first, first_cursor, again, counts = asyncio.run(scenario())
+
+    assert [n["title"] for n in first] == ["t0", "t1"] and len(again) == 3
+    assert decode_cursor(first_cursor, Notification.created_at) == (
+        datetime(2025, 11, 24, 9, 59, tzinfo=timezone.utc),
+        2,
+    )
+    # Built once, the cursor and unread pages go to the database, rebuilt after
+    # the invalidation
+    assert pages == [
+        (None, settings.NOTIFICATION_INBOX_CACHE_SIZE, False),
+        (first_cursor, 20, False),
+        (None, 20, True),
+        (None, settings.NOTIFICATION_INBOX_CACHE_SIZE, False),
+    ]
+    assert counts == [4, 4] and service.session.counts == 1
@@ -0,0 +1,236 @@
+"""
+Tests pour le flux SSE du statut des paiements (pub/sub Redis partagé par les écouteurs)
+"""
+
+import asyncio
+import json
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import src.api.payments.events as payment_events
+import src.api.payments.utils as payment_utils
+from src.api.payments.events import (
+    PaymentEventBroker,
+    payment_event,
+    publish_payment_status,
+    stream_payment_status,
+)
+from src.api.payments.models import Payment, PaymentStatusEnum
+from src.api.payments.router import router as payments_router
+from src.api.payments.service import PaymentService
+
+
+def make_payment(transaction_id, status=PaymentStatusEnum.PENDING.value):
+    return Payment(
+        transaction_id=transaction_id,
+        status=status,
+        payment_type="CinetPayPayment",
+        amount=1000,
+        currency="XAF",
+    )
+
+
+async def collect(stream):
+    return [chunk async for chunk in stream]
+
+
+def status_events(chunks):
+    return [
+        json.loads(chunk.split("data: ", 1)[1])
+        for chunk in chunks
+        if chunk.startswith("event: status")
+    ]
+
+
+def test_stream_sends_current_status_then_changes_until_final(fake_redis):
+    async def run():
+        broker = PaymentEventBroker()
+        queue = await broker.subscribe("tx-1")
+        stream = asyncio.create_task(
+            collect(
+                stream_payment_status(
+                    payment_event(make_payment("tx-1")), queue, broker
+                )
+            )
+        )
+        await asyncio.sleep(0)
+        await publish_payment_status(
+            make_payment("tx-2", PaymentStatusEnum.ACCEPTED.value)
+        )
+        await publish_payment_status(make_payment("tx-1", PaymentStatusEnum.ERROR))
+        await publish_payment_status(
+            make_payment("tx-1", PaymentStatusEnum.ACCEPTED.value)
+        )
+        chunks = await asyncio.wait_for(stream, 1)
+        return chunks, broker
+
+    chunks, broker = asyncio.run(run())
+    assert status_events(chunks) == [
+        {"transaction_id": "tx-1", "status": "pending"},
+        {"transaction_id": "tx-1", "status": "error"},
+        {"transaction_id": "tx-1", "status": "accepted"},
+    ]
+    assert broker.listeners == {}
+
+
+def test_stream_of_final_payment_ends_at_once(fake_redis):
+    async def run():
+        broker = PaymentEventBroker()
+        queue = await broker.subscribe("tx-1")
+        return (
+            await collect(
+                stream_payment_status(
+                    payment_event(make_payment("tx-1", "refused")), queue, broker
+                )
+            ),
+            broker,
+        )
+
+    chunks, broker = asyncio.run(run())
+    assert status_events(chunks) == [{"transaction_id": "tx-1", "status": "refused"}]
+    assert broker.listeners == {}
+
+
+def test_stream_keepalive_and_timeout(fake_redis):
+    async def run():
+        broker = PaymentEventBroker()
+        queue = await broker.subscribe("tx-1")
+        stream = stream_payment_status(
+            payment_event(make_payment("tx-1")),
+            queue,
+            broker,
+            keepalive=0.01,
+            timeout=0.035,
+        )
+        return await asyncio.wait_for(collect(stream), 1)
+
+    chunks = asyncio.run(run())
+    assert len(status_events(chunks)) == 1
+    assert chunks.count(": keepalive\n\n") >= 2
+
+
+def test_lost_subscription_ends_streams(fake_redis):
+    async def run():
+        broker = PaymentEventBroker()
+        queue = await broker.subscribe("tx-1")
+        stream = asyncio.create_task(
+            collect(
+                stream_payment_status(
+                    payment_event(make_payment("tx-1")), queue, broker
+                )
+            )
+        )
+        await asyncio.sleep(0)
+        fake_redis.pubsubs[0].messages.put_nowait(ConnectionError("connection reset"))
+        return await asyncio.wait_for(stream, 1)
+
+    chunks = asyncio.run(run())
+    assert len(status_events(chunks)) == 1
+    assert fake_redis.pubsubs == []
+
+
+def test_events_route(fake_redis, monkeypatch):
+    payments = {"tx-1": make_payment("tx-1", PaymentStatusEnum.ACCEPTED.value)}
+
+    class Service:
+        async def get_payment_by_transaction_id(self, transaction_id):
+            return payments.get(transaction_id)
+
+    monkeypatch.setattr(payment_events, "_broker", None)
+    app = FastAPI()
+    app.include_router(payments_router, prefix="/api/v1/payments")
+    app.dependency_overrides[PaymentService] = Service
+    client = TestClient(app)
+
+    response = client.get("/api/v1/payments/payments/tx-1/events")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert status_events([response.text]) == [
+        {"transaction_id": "tx-1", "status": "accepted"}
+    ]
+
+    response = client.get("/api/v1/payments/payments/tx-2/events")
+    assert response.status_code == 400
+    assert response.json()["detail"]["error_code"] == "payment_not_found"
+    assert payment_events.get_payment_event_broker().listeners == {}
+
+
+def test_cash_in_check_publishes_status_changes(monkeypatch):
+    published = []
+    payment = make_payment("tx-1")
+
+    class Session:
+        def scalars(self, statement):
+            return SimpleNamespace(first=lambda: payment)
+
+    @contextmanager
+    def get_session():
+        yield Session()
+
+    def check(session, payment):
+        payment.status = PaymentStatusEnum.ACCEPTED.value
+        return payment
+
+    monkeypatch.setattr(payment_utils, "get_session", get_session)
+    monkeypatch.setattr(
+        payment_utils.PaymentService, "check_payment_status_sync", staticmethod(check)
+    )
+    monkeypatch.setattr(payment_utils, "publish_payment_status_sync", published.append)
+
+    result = payment_utils.check_cash_in_status("tx-1")
+    assert result["data"] == {"transaction_id": "tx-1", "status": "accepted"}
+    assert published == [payment]
+
+    published.clear()
+    monkeypatch.setattr(
+        payment_utils.PaymentService,
+        "check_payment_status_sync",
+        staticmethod(lambda session, payment: payment),
+    )
+    payment.status = PaymentStatusEnum.PENDING.value
+    payment_utils.check_cash_in_status("tx-1")
+    assert published == []
+
+
+def test_thousands_of_listeners_share_one_subscription(fake_redis):
+    listeners, payments = 5000, 100
+
+    async def run():
+        broker = PaymentEventBroker()
+        queues = await asyncio.gather(
+            *(broker.subscribe(f"tx-{i % payments}") for i in range(listeners))
+        )
+        streams = [
+            asyncio.create_task(
+                collect(
+                    stream_payment_status(
+                        payment_event(make_payment(f"tx-{i % payments}")), queue, broker
+                    )
+                )
+            )
+            for i, queue in enumerate(queues)
+        ]
+        await asyncio.sleep(0)
+        started = time.perf_counter()
+        for i in range(payments):
+            await publish_payment_status(
+                make_payment(f"tx-{i}", PaymentStatusEnum.ACCEPTED.value)
+            )
+        results = await asyncio.wait_for(asyncio.gather(*streams), 30)
+        return results, time.perf_counter() - started, broker
+
+    results, elapsed, broker = asyncio.run(run())
+    print(
+        f"{listeners} listeners on {payments} payments notified "
+        f"in {elapsed * 1000:.0f} ms"
+    )
+    assert fake_redis.subscriptions == 1
+    assert all(
+        [event["status"] for event in status_events(chunks)] == ["pending", "accepted"]
+        for chunks in results
+    )
+    assert broker.listeners == {}
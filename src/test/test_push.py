@@ -0,0 +1,143 @@
+"""
+Tests pour l'envoi groupé des notifications push (lots multicast, langues,
+jetons invalides)
+"""
+
+import pytest
+
+import src.helper.push as push
+from src.config import settings
+from src.helper.in_app_notif import NotificationType
+from src.helper.push import (
+    FCM_MULTICAST_LIMIT,
+    PushMessage,
+    StubPushClient,
+    plan_push_batches,
+)
+from src.helper.utils import NotificationHelper
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    monkeypatch.setattr(settings, "FCM_BACKEND", "stub")
+    monkeypatch.setitem(push._clients, "stub", StubPushClient())
+    pruned = []
+    monkeypatch.setattr(
+        push,
+        "prune_device_tokens",
+        lambda tokens: pruned.append(list(tokens)) or len(tokens),
+    )
+    return push._clients["stub"], pruned
+
+
+def test_batches_hold_at_most_500_tokens_of_one_language():
+    recipients = [(f"token-{i}", "fr" if i % 3 == 0 else "en") for i in range(1200)]
+    recipients += [("token-1", "en"), (None, "en")]
+
+    batches = list(plan_push_batches(recipients))
+
+    assert all(len(tokens) <= FCM_MULTICAST_LIMIT for _, tokens in batches)
+    assert sorted(len(tokens) for _, tokens in batches) == [300, 400, 500]
+    assert {lang for lang, _ in batches} == {"en", "fr"}
+    assert sum(len(tokens) for _, tokens in batches) == 1200
+
+
+def test_fan_out_queues_one_batch_per_500_devices(stub, monkeypatch):
+    client, pruned = stub
+    recipients = [(f"token-{i}", "en") for i in range(1000)] + [
+        ("invalid-1", "fr"),
+        ("token-fr", "fr"),
+    ]
+    monkeypatch.setattr(
+        push, "iter_push_recipients", lambda user_ids=None: iter(recipients)
+    )
+    monkeypatch.setattr(
+        push.send_push_batch,
+        "delay",
+        lambda tokens, message: push.send_push_batch.run(tokens, message),
+    )
+
+    push.fan_out_push("new_ebook", {"ebook_title": "Santé publique"})
+
+    assert [len(tokens) for tokens, _ in client.sent] == [500, 500, 2]
+    message = client.sent[-1][1]
+    assert message.title == NotificationType.NEW_EBOOK.title["fr"]
+    assert message.body == "Un nouvel ebook intitulé 'Santé publique' a été ajouté."
+    assert all(isinstance(value, str) for value in message.data.values())
+    assert pruned == [["invalid-1"]]
+
+
+def test_unknown_notification_type_is_refused(stub):
+    with pytest.raises(ValueError):
+        push.fan_out_push("no_such_type", {})
+
+
+def test_single_push_goes_through_the_same_client(stub):
+    client, pruned = stub
+
+    NotificationHelper.send_in_app_notification(
+        {
+            "device_id": "invalid-device",
+            "title": "Rappel",
+            "message": "Demain 9h",
+            "image": None,
+            "action": {"url": "/streaming"},
+        }
+    )
+
+    assert client.sent == [
+        (
+            ["invalid-device"],
+            PushMessage("Rappel", "Demain 9h", None, {"url": "/streaming"}),
+        )
+    ]
+    assert pruned == [["invalid-device"]]
+
+
+def test_firebase_responses_mark_unregistered_tokens(monkeypatch):
+    from firebase_admin import exceptions, messaging
+
+    import src.helper.clients as clients
+
+    def send_each_for_multicast(message, app=None):
+        assert len(message.tokens) == 4 and message.data == {"type": "reminder"}
+        return messaging.BatchResponse(
+            [
+                messaging.SendResponse({"name": "projects/p/messages/1"}, None),
+                messaging.SendResponse(None, messaging.UnregisteredError("gone")),
+                messaging.SendResponse(
+                    None, exceptions.UnavailableError("retry later")
+                ),
+                messaging.SendResponse(None, messaging.QuotaExceededError("slow down")),
+            ]
+        )
+
+    monkeypatch.setattr(messaging, "send_each_for_multicast", send_each_for_multicast)
+    monkeypatch.setattr(clients, "get_firebase_app", lambda: None)
+
+    message = PushMessage("t", "b", data={"type": "reminder"})
+    result = push.FirebasePushClient().send_multicast(["a", "b", "c", "d"], message)
+
+    assert result == (1, 3, ["b"], ["d"])
+
+
+def test_quota_retry_resends_only_the_refused_tokens(stub, monkeypatch):
+    _, pruned = stub
+    retries = []
+
+    def send_multicast(tokens, message):
+        return push.PushResult(1, 2, ["invalid-1"], ["token-3"])
+
+    def retry(args, countdown):
+        retries.append((args, countdown))
+        return RuntimeError("retry")
+
+    monkeypatch.setattr(push._clients["stub"], "send_multicast", send_multicast)
+    monkeypatch.setattr(push.send_push_batch, "retry", retry)
+    message = PushMessage("t", "b")._asdict()
+
+    with pytest.raises(RuntimeError):
+        push.send_push_batch.run(["token-1", "invalid-1", "token-3"], message)
+
+    assert pruned == [["invalid-1"]]
+    assert retries == [((["token-3"], message), 60)]
@@ -0,0 +1,153 @@
+"""
+Tests pour FilteredQuery (pagination en une seule requête)
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+import pytest
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Field, Session, SQLModel, create_engine, select
+
+from src.helper.query import FilteredQuery, decode_cursor, encode_cursor
+
+
+class QueryItem(SQLModel, table=True):
+    __tablename__ = "test_query_items"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    label: str
+    amount: float
+    created_at: datetime
+
+
+class SyncSessionAdapter:
+    """Expose a sync session through the async `execute` used by the services"""
+
+    def __init__(self, session: Session):
+        self.session = session
+        self.executed = 0
+
+    async def execute(self, statement):
+        self.executed += 1
+        return self.session.execute(statement)
+
+
+@pytest.fixture
+def session():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    QueryItem.__table__.create(engine)
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    with Session(engine) as db:
+        for i in range(25):
+            db.add(
+                QueryItem(
+                    label=f"item-{i}",
+                    amount=i * 10,
+                    created_at=start + timedelta(hours=i),
+                )
+            )
+        db.commit()
+        yield SyncSessionAdapter(db)
+
+
+def test_paginate_returns_rows_and_total_in_one_statement(session):
+    query = (
+        FilteredQuery(select(QueryItem))
+        .where(QueryItem.amount >= 50)
+        .order_by(QueryItem.id)
+    )
+
+    items, total = asyncio.run(query.paginate(session, page=2, page_size=5))
+
+    assert total == 20
+    assert [item.label for item in items] == [f"item-{i}" for i in range(10, 15)]
+    assert session.executed == 1
+
+
+def test_paginate_past_last_page_still_returns_total(session):
+    query = FilteredQuery(select(QueryItem)).where(QueryItem.amount < 30)
+
+    items, total = asyncio.run(query.paginate(session, page=5, page_size=10))
+
+    assert items == []
+    assert total == 3
+
+
+def test_paginate_without_page_size_returns_everything(session):
+    items, total = asyncio.run(
+        FilteredQuery(select(QueryItem)).paginate(session, page=1, page_size=0)
+    )
+
+    assert len(items) == 25
+    assert total == 25
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_paginate_cursor_walks_every_row_once(session, descending):
+    seen = []
+    cursor = None
+    while True:
+        query = FilteredQuery(select(QueryItem))
+        items, remaining, cursor = asyncio.run(
+            query.paginate_cursor(
+                session,
+                cursor,
+                10,
+                key_column=QueryItem.created_at,
+                id_column=QueryItem.id,
+                descending=descending,
+            )
+        )
+        assert remaining == 25 - len(seen)
+        seen.extend(item.id for item in items)
+        if cursor is None:
+            break
+
+    expected = list(range(1, 26))
+    assert seen == (expected[::-1] if descending else expected)
+
+
+def test_cursor_round_trip_restores_datetime():
+    created_at = datetime(2025, 3, 4, 5, 6, 7, tzinfo=timezone.utc)
+
+    assert decode_cursor(encode_cursor(created_at, 42), QueryItem.created_at) == (
+        created_at,
+        42,
+    )
+
+
+def test_invalid_cursor_raises_value_error():
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor", QueryItem.created_at)
+
+
+@pytest.mark.parametrize(
+    "key_value, id_value",
+    [
+        ({"$gt": 1}, 42),
+        (1700000000, 42),
+        ("yesterday", 42),
+        ("2025-03-04T05:06:07+00:00", "42"),
+        ("2025-03-04T05:06:07+00:00", True),
+    ],
+)
+def test_cursor_of_the_wrong_type_raises_value_error(key_value, id_value):
+    cursor = encode_cursor(key_value, id_value)
+
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, QueryItem.created_at, QueryItem.id)
+
+
+def test_numeric_cursor_keys_are_converted():
+    assert decode_cursor(encode_cursor(3, 7), QueryItem.amount, QueryItem.id) == (
+        3.0,
+        7,
+    )
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor("3", 7), QueryItem.amount, QueryItem.id)
@@ -0,0 +1,101 @@
+"""
+Tests pour les backends de stockage (local, S3 simulé par moto, mémoire)
+"""
+
+import asyncio
+import hashlib
+
+import pytest
+
+import src.helper.file_helper as file_helper
+from src.config import settings
+from src.helper.file_helper import FileTooLargeError
+from src.helper.storage import LocalStorage, MemoryStorage, S3Storage
+
+BUCKET = "lafaom-test"
+
+
+@pytest.fixture(params=["local", "memory", "s3"])
+def backend(request, tmp_path, monkeypatch):
+    if request.param == "local":
+        monkeypatch.chdir(tmp_path)
+        yield LocalStorage()
+    elif request.param == "memory":
+        yield MemoryStorage()
+    else:
+        moto = pytest.importorskip("moto")
+        mock_aws = getattr(moto, "mock_aws", None) or moto.mock_s3
+        monkeypatch.setattr(settings, "AWS_BUCKET_NAME", BUCKET)
+        monkeypatch.setattr(settings, "AWS_ACCESS_KEY_ID", "testing")
+        monkeypatch.setattr(settings, "AWS_SECRET_ACCESS_KEY", "testing")
+        monkeypatch.setattr(file_helper, "_s3_client", None)
+        with mock_aws():
+            file_helper.FileHelper.get_s3_client().create_bucket(Bucket=BUCKET)
+            yield S3Storage()
+
+
+async def read(backend, key, byte_range=None):
+    return b"".join([chunk async for chunk in backend.get_stream(key, 4, byte_range)])
+
+
+def test_save_then_read_back(backend, make_upload):
+    upload = make_upload(b"%PDF-1.4 content", "Mon CV.pdf")
+    stored = asyncio.run(backend.save(upload, "/job-applications", public=False))
+
+    assert stored.key.startswith(f"{backend.root(False)}/job-applications/")
+    assert stored.key.endswith(".pdf") and stored.name == "Mon_CV"
+    assert stored.size == 16
+    assert stored.sha256 == hashlib.sha256(b"%PDF-1.4 content").hexdigest()
+    assert backend.key_of(stored.file_path) == stored.key
+    assert asyncio.run(read(backend, stored.key)) == b"%PDF-1.4 content"
+    assert asyncio.run(read(backend, stored.key, (5, 7))) == b"1.4"
+    assert asyncio.run(backend.stat(stored.key)).size == 16
+    assert asyncio.run(backend.presign(stored.key))
+
+
+def test_oversized_upload_is_refused(backend, monkeypatch, make_upload):
+    monkeypatch.setattr(settings, "MAX_FILE_SIZE", 10)
+
+    with pytest.raises(FileTooLargeError):
+        asyncio.run(backend.save(make_upload(b"x" * 11), "/job-applications"))
+    assert asyncio.run(backend.list(backend.root(True) + "/")) == []
+
+
+def test_missing_files(backend):
+    key = f"{backend.root(True)}/posts/missing.jpg"
+
+    assert asyncio.run(backend.stat(key)) is None
+    with pytest.raises(FileNotFoundError):
+        asyncio.run(read(backend, key))
+
+
+def test_list_delete_and_remove_folder(backend):
+    async def scenario():
+        for name in ("a.txt", "b.txt", "c.txt"):
+            await backend.save_bytes(name.encode(), "/exports", name, "text/plain")
+        await backend.save_bytes(b"other", "/posts", "d.txt", "text/plain")
+        prefix = f"{backend.root(True)}/exports/"
+
+        first = await backend.list(prefix, limit=2)
+        rest = await backend.list(prefix, start_after=first[-1].key)
+        failed = await backend.delete_many([first[0].key])
+        remaining = [obj.key for obj in await backend.list(prefix)]
+        removed = await backend.remove_folder(prefix)
+        return (
+            first,
+            rest,
+            failed,
+            remaining,
+            removed,
+            await backend.list(backend.root(True) + "/"),
+        )
+
+    first, rest, failed, remaining, removed, left = asyncio.run(scenario())
+
+    suffix = backend.name_suffix
+    assert [obj.key.rsplit("/", 1)[1] for obj in first + rest] == [
+        f"{name}{suffix}.txt" for name in "abc"
+    ]
+    assert failed == []
+    assert len(remaining) == 2 and removed == 2
+    assert [obj.key.rsplit("/", 1)[1] for obj in left] == [f"d{suffix}.txt"]
@@ -0,0 +1,136 @@
+"""
+Tests pour la suppression par lots sur S3 et le ramasse-miettes des fichiers orphelins
+"""
+
+import asyncio
+import os
+import time
+
+import pytest
+
+import src.helper.file_helper as file_helper
+import src.helper.storage_gc as storage_gc
+from src.config import settings
+from src.helper import storage
+from src.helper.file_helper import FileHelper
+from src.helper.storage import MemoryStorage, get_storage
+from src.helper.storage_gc import collect_orphan_batch, new_gc_state
+
+BUCKET = "lafaom-test"
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    moto = pytest.importorskip("moto")
+    mock_aws = getattr(moto, "mock_aws", None) or moto.mock_s3
+    monkeypatch.setattr(settings, "STORAGE_LOCATION", "S3")
+    monkeypatch.setattr(settings, "AWS_BUCKET_NAME", BUCKET)
+    monkeypatch.setattr(settings, "AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setattr(settings, "AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setattr(file_helper, "_s3_client", None)
+    with mock_aws():
+        client = FileHelper.get_s3_client()
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+def run_gc(state):
+    while not state["finished_at"]:
+        state = asyncio.run(collect_orphan_batch(state))
+    return state
+
+
+def test_delete_s3_folder_goes_past_the_first_page(s3):
+    requests = []
+    s3.meta.events.register(
+        "before-call.s3.DeleteObjects", lambda **kwargs: requests.append(kwargs)
+    )
+    for i in range(1100):
+        s3.put_object(Bucket=BUCKET, Key=f"private/rsa/{i:04d}.json", Body=b"{}")
+    s3.put_object(Bucket=BUCKET, Key="private/other.json", Body=b"{}")
+
+    assert FileHelper.delete_s3_folder("private/rsa/") == 1100
+    assert [
+        obj["Key"] for page in FileHelper.iter_s3_objects("private/") for obj in page
+    ] == ["private/other.json"]
+    assert len(requests) == 2
+
+
+def test_orphans_are_reported_then_deleted_on_s3(s3, monkeypatch):
+    monkeypatch.setattr(settings, "STORAGE_GC_BATCH_SIZE", 2)
+    monkeypatch.setattr(settings, "STORAGE_GC_MIN_AGE_HOURS", 0)
+    for key in (
+        "public/blobs/ab/1.pdf",
+        "public/blobs/cd/2.pdf",
+        "public/job-applications/3.pdf",
+        "public/posts/cover.jpg",
+    ):
+        s3.put_object(Bucket=BUCKET, Key=key, Body=b"%PDF")
+    kept = {"public/blobs/ab/1.pdf"}
+    checked = []
+
+    def referenced_keys(keys):
+        checked.extend(keys)
+        return kept & set(keys)
+
+    monkeypatch.setattr(storage_gc, "referenced_keys", referenced_keys)
+
+    report = run_gc(new_gc_state(dry_run=True))
+    assert (
+        report["scanned"],
+        report["orphans"],
+        report["orphan_bytes"],
+        report["deleted"],
+    ) == (3, 2, 8, 0)
+    assert report["sample"] == [
+        "public/blobs/cd/2.pdf",
+        "public/job-applications/3.pdf",
+    ]
+    assert "public/posts/cover.jpg" not in checked
+
+    report = run_gc(new_gc_state(dry_run=False))
+    remaining = sorted(
+        obj["Key"] for page in FileHelper.iter_s3_objects("public/") for obj in page
+    )
+    assert report["deleted"] == 2
+    assert remaining == ["public/blobs/ab/1.pdf", "public/posts/cover.jpg"]
+
+
+def test_recent_local_files_are_kept(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "STORAGE_LOCATION", "local")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(storage_gc, "referenced_keys", lambda keys: set())
+    os.makedirs("src/static/uploads/student-applications/7")
+    for name, age in (("old.pdf", 2 * 24 * 3600), ("new.pdf", 60)):
+        path = f"src/static/uploads/student-applications/7/{name}"
+        with open(path, "wb") as f:
+            f.write(b"%PDF")
+        os.utime(path, (time.time() - age, time.time() - age))
+
+    state = new_gc_state(dry_run=False)
+    state["location"] = 1  # Resumed from a saved state, on /student-applications
+    report = run_gc(state)
+
+    assert report["deleted"] == 1
+    assert os.listdir("src/static/uploads/student-applications/7") == ["new.pdf"]
+
+
+def test_memory_storage_collects_in_batches(monkeypatch):
+    monkeypatch.setattr(settings, "STORAGE_LOCATION", "memory")
+    monkeypatch.setattr(settings, "STORAGE_GC_BATCH_SIZE", 100)
+    monkeypatch.setattr(settings, "STORAGE_GC_MIN_AGE_HOURS", 0)
+    monkeypatch.setitem(storage._backends, "memory", MemoryStorage())
+    monkeypatch.setattr(
+        storage_gc,
+        "referenced_keys",
+        lambda keys: {key for key in keys if key.endswith("0.pdf")},
+    )
+    for i in range(250):
+        asyncio.run(
+            get_storage().save_bytes(b"%PDF", "/job-applications", f"{i:03d}.pdf")
+        )
+
+    report = run_gc(new_gc_state(dry_run=False))
+
+    assert (report["scanned"], report["deleted"]) == (250, 225)
+    assert len(get_storage().objects) == 25
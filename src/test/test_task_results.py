@@ -0,0 +1,70 @@
+"""
+Tests pour le stockage des résultats des tâches Celery (ignore_result,
+expiration, mémoire utilisée)
+"""
+
+import asyncio
+
+from celery import Celery
+
+import src.main as main
+from src.api.payments.utils import check_cash_in_status, handle_payment_effects
+from src.celery_utils import get_result_backend_usage
+from src.helper.documents import process_attachment_document
+from src.helper.images import process_image_variants
+from src.helper.storage_gc import collect_orphan_files
+from src.helper.utils import NotificationHelper
+
+
+def test_fire_and_forget_tasks_store_no_result():
+    notifications = (
+        NotificationHelper.send_smtp_email,
+        NotificationHelper.send_mailgun_email,
+        NotificationHelper.send_brevo_email,
+        NotificationHelper.send_push_notification,
+        NotificationHelper.send_in_app_notification,
+    )
+    for task in notifications + (
+        handle_payment_effects,
+        process_image_variants,
+        process_attachment_document,
+        collect_orphan_files,
+    ):
+        assert task.ignore_result, task.name
+    assert not check_cash_in_status.ignore_result
+
+
+def test_result_memory_is_measured_by_batches(fake_redis):
+    app = Celery("test", broker="memory://", backend="redis://localhost:6379/0")
+    app.conf.result_backend_transport_options = {"global_keyprefix": "lafaom:"}
+    store = fake_redis.values
+    store.update(
+        {app.backend.get_key_for_task(f"task-{i}"): b"x" * 100 for i in range(5)}
+    )
+    store[app.backend.get_key_for_group("group-1")] = b"y" * 10
+    store[b"lafaom:cache:catalog"] = b"z" * 1000
+    app.backend.client = fake_redis
+
+    usage = get_result_backend_usage(app, batch_size=2)
+    assert usage == {"keys": 6, "bytes": 5 * 150 + 60, "truncated": False}
+
+    # The scan stops after scan_limit keys of the database
+    usage = get_result_backend_usage(app, batch_size=2, scan_limit=4)
+    assert usage == {"keys": 4, "bytes": 4 * 150, "truncated": True}
+
+
+def test_results_health_reuses_its_measure(monkeypatch):
+    scans = []
+
+    def usage(app):
+        scans.append(app)
+        return {"keys": len(scans)}
+
+    monkeypatch.setattr(main, "get_result_backend_usage", usage)
+    monkeypatch.setattr(main, "_results_usage", (0.0, None))
+
+    first = asyncio.run(main.results_health())
+    second = asyncio.run(main.results_health())
+
+    assert first == second == {"status": "healthy", "results": {"keys": 1}}
+    assert len(scans) == 1
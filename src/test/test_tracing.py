@@ -0,0 +1,130 @@
+"""
+Tests pour l'échantillonnage des traces Sentry et les spans des chemins critiques
+"""
+
+import asyncio
+import inspect
+import time
+
+import pytest
+import sentry_sdk
+from sentry_sdk.transport import Transport
+
+import src.helper.tracing as tracing
+from src.helper.tracing import span, traced, traces_sampler
+
+
+class CapturingTransport(Transport):
+    envelopes = []
+
+    def capture_envelope(self, envelope):
+        self.envelopes.append(envelope)
+
+
+@pytest.fixture
+def sentry(monkeypatch):
+    CapturingTransport.envelopes = []
+    sentry_sdk.init(
+        dsn="https://key@sentry.example.com/1",
+        transport=CapturingTransport,
+        traces_sample_rate=1.0,
+        default_integrations=False,
+    )
+    monkeypatch.setattr(tracing, "_sentry_sdk", sentry_sdk)
+    yield CapturingTransport.envelopes
+    sentry_sdk.get_global_scope().set_client(None)
+
+
+def sent_spans(envelopes):
+    sentry_sdk.flush()
+    return [
+        (s["op"], s["description"])
+        for envelope in envelopes
+        for item in envelope.items
+        if item.type == "transaction"
+        for s in item.payload.json["spans"]
+    ]
+
+
+def request(path):
+    return {"asgi_scope": {"type": "http", "path": path}, "parent_sampled": None}
+
+
+def test_traces_sampler():
+    assert traces_sampler(request("/health/queues")) == 0.0
+    assert traces_sampler(request("/static/logo.png")) == 0.0
+    assert traces_sampler(request("/api/v1/payments/payments/tx-1/events")) == 0.0
+    assert traces_sampler(request("/api/v1/payments/check-status/tx-1")) == 0.5
+    assert traces_sampler(request("/api/v1/auth/token")) == 0.25
+    assert traces_sampler(request("/api/v1/blogs")) == 0.05
+    assert (
+        traces_sampler(
+            {"celery_job": {"task": "src.api.payments.utils.check_cash_in_status"}}
+        )
+        == 0.5
+    )
+    assert (
+        traces_sampler({"celery_job": {"task": "src.helper.push.send_push_batch"}})
+        == 0.05
+    )
+    # A trace started upstream keeps its decision
+    assert traces_sampler({**request("/health/queues"), "parent_sampled": True}) == 1.0
+
+
+def test_traced_keeps_the_signature():
+    @traced("payment")
+    async def check(transaction_id: str, retries: int = 0):
+        return transaction_id
+
+    assert inspect.iscoroutinefunction(check)
+    assert list(inspect.signature(check).parameters) == ["transaction_id", "retries"]
+    assert asyncio.run(check("tx-1")) == "tx-1"
+
+
+def test_spans_of_sampled_transactions(sentry):
+    @traced("provider", "cinetpay.check_status")
+    def check_status():
+        with span("db", "update"):
+            return "accepted"
+
+    with sentry_sdk.start_transaction(name="sampled", sampled=True):
+        assert check_status() == "accepted"
+    with sentry_sdk.start_transaction(name="unsampled", sampled=False):
+        assert check_status() == "accepted"
+
+    assert sent_spans(sentry) == [
+        ("provider", "cinetpay.check_status"),
+        ("db", "update"),
+    ]
+
+
+def test_span_overhead(sentry):
+    """Cost per call of a traced function: tracing off, not sampled, sampled"""
+    calls = 20000
+
+    def plain():
+        return None
+
+    decorated = traced("payment")(plain)
+
+    def per_call(func):
+        started = time.perf_counter()
+        for _ in range(calls):
+            func()
+        return (time.perf_counter() - started) / calls * 1e6
+
+    baseline = per_call(plain)
+    with sentry_sdk.start_transaction(name="unsampled", sampled=False):
+        unsampled = per_call(decorated) - baseline
+    with sentry_sdk.start_transaction(name="sampled", sampled=True):
+        sampled = per_call(decorated) - baseline
+    tracing._sentry_sdk = None
+    off = per_call(decorated) - baseline
+
+    print(
+        f"span overhead: {off:.2f} us off, {unsampled:.2f} us not sampled, "
+        f"{sampled:.2f} us sampled"
+    )
+    assert off < 5
+    assert unsampled < 10
+    assert sampled < 200
@@ -0,0 +1,124 @@
+"""
+Tests pour les ressources partagées par les processus des workers Celery
+(client HTTP, moteurs, benchmark)
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+from celery import Celery
+
+import src.database as database
+import src.helper.clients as clients
+from src.celery_utils import init_worker_process, shutdown_worker_process
+
+TASKS = 50
+
+
+class OkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body in one write, a second small write waits for the delayed ACK
+    wbufsize = -1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+        self.wfile.flush()
+
+    def log_message(self, *args):
+        pass
+
+
+class CountingServer(ThreadingHTTPServer):
+    daemon_threads = True
+    connections = 0
+
+    def process_request(self, request, client_address):
+        self.connections += 1
+        super().process_request(request, client_address)
+
+
+@pytest.fixture
+def server():
+    server = CountingServer(("127.0.0.1", 0), OkHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def fresh_clients():
+    clients.reset_clients()
+    yield
+    clients.close_clients()
+
+
+def test_http_client_is_shared_until_the_process_is_forked():
+    client = clients.get_http_client()
+
+    assert clients.get_http_client() is client
+    init_worker_process()
+    assert clients.get_http_client() is not client
+    # The parent's client is left open for the parent
+    assert not client.is_closed
+    client.close()
+
+
+def test_worker_process_hooks_reset_the_engine_pools(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        database.engine, "dispose", lambda close=True: calls.append(("sync", close))
+    )
+    monkeypatch.setattr(
+        database.engine_async.sync_engine,
+        "dispose",
+        lambda close=True: calls.append(("async", close)),
+    )
+
+    init_worker_process()
+    client = clients.get_http_client()
+    shutdown_worker_process()
+
+    assert calls == [("sync", False), ("async", False), ("sync", True)]
+    assert client.is_closed
+
+
+def test_task_throughput(server):
+    """
+    Eager tasks posting to a local server, with a client per task (before) and
+    the process client (after)
+    """
+    app = Celery("benchmark", broker="memory://")
+    app.conf.task_always_eager = True
+    url = f"http://127.0.0.1:{server.server_address[1]}/send"
+
+    @app.task
+    def send_with_new_client(data):
+        with httpx.Client() as client:
+            return client.post(url, json=data).status_code
+
+    @app.task
+    def send_with_shared_client(data):
+        return clients.get_http_client().post(url, json=data).status_code
+
+    results = {}
+    for task in (send_with_new_client, send_with_shared_client):
+        opened = server.connections
+        started = time.perf_counter()
+        statuses = {task.delay({"to_email": "a@b.c"}).get() for _ in range(TASKS)}
+        elapsed = time.perf_counter() - started
+        results[task.__name__] = (server.connections - opened, TASKS / elapsed)
+        assert statuses == {200}
+
+    for name, (connections, throughput) in results.items():
+        print(f"{name}: {connections} connections, {throughput:.0f} tasks/s")
+    assert results["send_with_new_client"][0] == TASKS
+    assert results["send_with_shared_client"][0] == 1
@@ -0,0 +1,115 @@
+"""
+Tests pour l'archive ZIP des pièces jointes (streaming, fichiers manquants,
+mémoire bornée)
+"""
+
+import asyncio
+import io
+import os
+import tracemalloc
+import zipfile
+
+import pytest
+
+import src.helper.download as download
+from src.config import settings
+from src.helper.download import zip_response
+
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def uploads(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "STORAGE_LOCATION", "local")
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("src/static/uploads/blobs")
+    return tmp_path
+
+
+def store(name: str, content: bytes) -> str:
+    with open(f"src/static/uploads/blobs/{name}", "wb") as f:
+        f.write(content)
+    return f"static/uploads/blobs/{name}"
+
+
+async def collect(response):
+    return [chunk async for chunk in response.body_iterator]
+
+
+def test_archive_contains_every_entry(uploads):
+    cv = store("cv.pdf", b"%PDF cv")
+    diploma = store("diploma.pdf", b"%PDF diploma" * 1000)
+    entries = [
+        ("APP-1/CV.pdf", cv),
+        ("APP-1/DIPLOMA.pdf", diploma),
+        ("APP-2/CV.pdf", cv),
+        ("APP-2/CV.pdf", cv),
+    ]
+
+    response = zip_response(entries, "job-offer-REF")
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(asyncio.run(collect(response)))))
+
+    assert (
+        response.headers["content-disposition"]
+        == 'attachment; filename="job-offer-REF.zip"'
+    )
+    assert archive.namelist() == [
+        "APP-1/CV.pdf",
+        "APP-1/DIPLOMA.pdf",
+        "APP-2/CV.pdf",
+        "APP-2/CV_2.pdf",
+    ]
+    assert archive.read("APP-1/DIPLOMA.pdf") == b"%PDF diploma" * 1000
+    assert archive.testzip() is None
+
+
+def test_missing_files_are_listed_and_names_are_sanitized(uploads):
+    cv = store("cv.pdf", b"%PDF cv")
+
+    response = zip_response(
+        [("../../etc/CV.pdf", cv), ("ID card.pdf", "static/uploads/blobs/gone.pdf")],
+        "app",
+    )
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(asyncio.run(collect(response)))))
+
+    assert archive.namelist() == ["etc/CV.pdf", "MISSING_FILES.txt"]
+    assert archive.read("MISSING_FILES.txt") == b"ID_card.pdf\n"
+
+
+def test_reads_ahead_are_bounded(uploads, monkeypatch):
+    monkeypatch.setattr(settings, "ZIP_FETCH_CONCURRENCY", 2)
+    monkeypatch.setattr(settings, "DOWNLOAD_CHUNK_SIZE", MB)
+    block = os.urandom(MB)
+    entries = [(f"file-{i}.bin", store(f"file-{i}.bin", block * 6)) for i in range(8)]
+    running, peak_running = 0, 0
+    stream_stored_file = download.stream_stored_file
+
+    async def counting_stream(file_path, chunk_size=None):
+        nonlocal running, peak_running
+        running += 1
+        peak_running = max(peak_running, running)
+        try:
+            async for chunk in stream_stored_file(file_path, chunk_size):
+                yield chunk
+        finally:
+            running -= 1
+
+    monkeypatch.setattr(download, "stream_stored_file", counting_stream)
+
+    async def consume():
+        size = 0
+        async for chunk in zip_response(entries, "session").body_iterator:
+            size += len(chunk)
+        return size
+
+    tracemalloc.start()
+    try:
+        size = asyncio.run(consume())
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert size > 8 * 6 * MB
+    assert peak_running <= 2
+    # 2 files in flight with at most ZIP_PREFETCH_CHUNKS + 1 chunks each, not 48MB
+    assert peak < 2 * (settings.ZIP_PREFETCH_CHUNKS + 2) * MB + 4 * MB